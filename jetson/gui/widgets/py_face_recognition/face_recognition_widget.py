@@ -11,7 +11,8 @@ from PySide6.QtCore import Qt, QTimer, Signal, QPropertyAnimation, QEasingCurve,
 from PySide6.QtGui import QImage, QPixmap, QColor, QPainter, QPen, QFont
 
 # Import các module cần thiết từ ứng dụng gốc
-from src.core.zensys_factory import get_default_instance
+from src.core.zensys_factory import get_default_instance, start_default_instance_async, is_default_instance_ready
+from src.core.capture import PreviewRenderer
 # Import custom notification popup
 from gui.widgets.py_notification_popup.notification_popup import NotificationPopup
 
@@ -66,20 +67,12 @@ class FaceRecognitionWidget(QWidget):
         self.session_id = generate_random_id(length=10)
         self.pending_notification = None
         
-        # Initialize ZenSys face system
-        self.face_system = get_default_instance()
-        
-        # Ensure system properties exist
-        if not hasattr(self.face_system, '_last_frame'):
-            self.face_system._last_frame = None
-        
-        # Start camera if not already started
-        if hasattr(self.face_system, 'camera') and self.face_system.camera is None:
-            print("Starting camera in ZenSys...")
-            self.face_system.start_camera()
-            
-        # Register callback for system events
-        self.face_system.set_ui_callback(self.on_system_callback)
+        # ZenSys được khởi động trong luồng nền; gắn vào widget khi sẵn sàng
+        self.face_system = None
+        # Ảnh preview được thu nhỏ và vẽ bbox trong luồng nền
+        self.preview = None
+        self._shown_preview_seq = 0
+        self.startup = start_default_instance_async()
         
         # Connect verification signal to slot - nhận kết quả xác thực
         self.verification_signal.connect(self.show_verification_popup)
@@ -101,6 +94,41 @@ class FaceRecognitionWidget(QWidget):
         self.notification_timer.setSingleShot(True)
         self.notification_timer.timeout.connect(self.handle_pending_notification)
     
+    def attach_face_system(self):
+        """
+        Attach the ZenSys instance once startup finished (called in UI thread)
+        
+        Returns:
+            bool: True nếu face system đã sẵn sàng
+        """
+        if self.face_system is not None:
+            return True
+        
+        if not is_default_instance_ready():
+            # Hiển thị tiến trình khởi động thay cho camera view
+            self.face_label.setText(self.startup.describe())
+            return False
+        
+        self.face_system = get_default_instance()
+        
+        # Ensure system properties exist
+        if not hasattr(self.face_system, '_last_frame'):
+            self.face_system._last_frame = None
+        
+        # Start camera if not already started
+        if hasattr(self.face_system, 'camera') and self.face_system.camera is None:
+            print("Starting camera in ZenSys...")
+            self.face_system.start_camera()
+            
+        # Register callback for system events
+        self.face_system.set_ui_callback(self.on_system_callback)
+        self.face_label.setText("")
+        
+        self.preview = PreviewRenderer(self.face_system)
+        self.preview.set_target_size(self.face_label.width(), self.face_label.height())
+        self.preview.start()
+        return True
+    
     def setup_ui(self):
         """Initialize UI components"""
         # Main layout
@@ -135,64 +163,34 @@ class FaceRecognitionWidget(QWidget):
         # Skip if notification is active
         if self.active_notification:
             return
-            
-        # Get the latest processed frame
-        result = self.face_system.get_latest_processed_frame()
         
-        # If no frame is available, try to get one directly
-        if self.face_system._last_frame is None:
-            if hasattr(self.face_system, 'camera') and self.face_system.camera:
-                try:
-                    ret, frame = self.face_system.camera.read()
-                    if ret:
-                        self.face_system._last_frame = frame
-                except Exception as e:
-                    print(f"Error capturing frame: {e}")
-                    return
-            else:
-                return
-        
-        # Update UI if frame exists
-        if self.face_system._last_frame is not None:
-            self.update_ui_with_result(result)
-    
-    def update_ui_with_result(self, result):
-        """Update UI with the latest frame and detection results"""
-        # Ensure frame exists
-        if not hasattr(self.face_system, '_last_frame') or self.face_system._last_frame is None:
+        # Wait until ZenSys finished loading models
+        if not self.attach_face_system():
             return
-            
-        # Create a copy to avoid modifying the original
-        display_frame = self.face_system._last_frame.copy()
-        
-        # Get face detection results
-        faces = self.face_system.face_analyzer.get(display_frame)
-        
-        # Draw bounding box if faces detected
-        if faces:
-            face = faces[0]
-            bbox = face.bbox
-            x1, y1, x2, y2 = [int(b) for b in bbox]
-            cv2.rectangle(display_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        
-        # Convert to RGB for Qt
-        rgb_frame = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_frame.shape
         
-        # Create QImage and pixmap
-        q_img = QImage(rgb_frame.data, w, h, ch * w, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(q_img)
+        # Kích thước mới áp dụng cho lần render kế tiếp của luồng preview
+        self.preview.set_target_size(self.face_label.width(), self.face_label.height())
         
-        # Scale with aspect ratio
-        scaled_pixmap = pixmap.scaled(
-            self.face_label.width(), 
-            self.face_label.height(),
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
-        
-        # Set pixmap to label
-        self.face_label.setPixmap(scaled_pixmap)
+        # Bỏ qua khi chưa có ảnh mới (frame, bbox và kích thước không đổi)
+        seq, preview = self.preview.latest_frame()
+        if preview is None:
+            return
+        try:
+            if seq == self._shown_preview_seq:
+                return
+            with self.face_system.metrics.stage("ui_frame"):
+                self.update_ui_with_result(preview.array)
+            self._shown_preview_seq = seq
+        finally:
+            # QPixmap đã giữ bản sao riêng, buffer quay về pool của PreviewRenderer
+            preview.release()
+    
+    def update_ui_with_result(self, image):
+        """Show a preview already resized and annotated by PreviewRenderer"""
+        # Ảnh BGR đã đúng kích thước hiển thị: không đổi màu, không scale trên UI thread
+        h, w = image.shape[:2]
+        q_img = QImage(image.data, w, h, image.strides[0], QImage.Format_BGR888)
+        self.face_label.setPixmap(QPixmap.fromImage(q_img))
     
     @Slot(object)
     def show_verification_popup(self, verification_result):
@@ -485,6 +483,8 @@ class FaceRecognitionWidget(QWidget):
         self.frame_timer.stop()
         self.reset_timer.stop()
         self.notification_timer.stop()
+        if self.preview is not None:
+            self.preview.stop()
         
         # Stop RFID listening
         if hasattr(self.face_system, "stop_rfid_listening"):
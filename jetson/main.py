@@ -9,7 +9,8 @@ from gui.widgets import *
 from gui.uis.windows.main_window.functions_main_window import *
 
 # IMPORT ZENSYS FACTORY
-from src.core.zensys_factory import get_default_instance
+from src.core.zensys_factory import get_default_instance, start_default_instance_async, get_stream_instances, get_startup_orchestrator, reload_config
+from utils.config_utils import config
 
 os.environ["QT_FONT_DPI"] = "96"
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
@@ -77,14 +78,14 @@ class MainWindow(QMainWindow):
             # Chỉ thực hiện nếu đang ở trang Face Recognition
             if hasattr(self.ui.load_pages, 'face_recognition_page') and \
                hasattr(self.ui.load_pages.face_recognition_page, 'face_widget'):
-                
-                # Dừng RFID listener
-                self.ui.load_pages.face_recognition_page.face_widget.face_system.stop_rfid_listening()
-                
-                # Giải phóng camera
-                if hasattr(self.ui.load_pages.face_recognition_page.face_widget, 'cap') and \
-                   self.ui.load_pages.face_recognition_page.face_widget.cap is not None:
-                    self.ui.load_pages.face_recognition_page.face_widget.cap.release()
+                face_system = self.ui.load_pages.face_recognition_page.face_widget.face_system
+                if face_system is not None:
+                    # Dừng RFID listener
+                    face_system.stop_rfid_listening()
+                    
+                    # Dừng luồng đọc camera và giải phóng nguồn frame (mọi luồng camera)
+                    for instance in get_stream_instances() or [face_system]:
+                        instance.stop_camera()
         except Exception as e:
             print(f"Error closing resources: {e}")
             
@@ -117,5 +118,11 @@ class MainWindow(QMainWindow):
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setWindowIcon(QIcon("icon.ico"))
+    # Tải model trong luồng nền, cửa sổ hiển thị trạng thái khởi động trong lúc chờ
+    start_default_instance_async()
+    # API điều khiển dùng chung với chế độ headless (service.py) cho công cụ giám sát
+    if config.service.gui_api:
+        from src.core.service import ControlServer
+        ControlServer(get_stream_instances, startup=get_startup_orchestrator(), reload_fn=reload_config).start()
     window = MainWindow()
     sys.exit(app.exec())
\ No newline at end of file
@@ -35,6 +35,8 @@ class AdaFace:
         input_name = input_cfg.name
         self.input_size = tuple(input_shape[2:4][::-1])
         self.input_shape = input_shape
+        # get_feat nhận được nhiều crop trong một lần gọi session
+        self.dynamic_batch = not isinstance(input_shape[0], int)
         outputs = self.session.get_outputs()
         output_names = []
         for out in outputs:
@@ -76,7 +78,9 @@ class AdaFace:
         return sim
 
     def get_feat(self, imgs):
-        if not isinstance(imgs, list):
+        if isinstance(imgs, np.ndarray) and imgs.ndim == 4:
+            imgs = list(imgs)  # Stack (N, H, W, 3) từ face_align.norm_crop_many
+        elif not isinstance(imgs, list):
             imgs = [imgs]
         input_size = self.input_size
 
@@ -1,7 +1,6 @@
 import cv2
 import numpy as np
 from utils.config_utils import config
-from types import SimpleNamespace
 
 class FaceAntiSpoofing:
     def __init__(self, var_thresh=None, grad_thresh=None, normalize_method=None, 
@@ -43,8 +42,25 @@ class FaceAntiSpoofing:
         self.global_min_depth = None
         self.global_max_depth = None
         
+        # Buffer cho compute_depth_stats, giữ lại giữa các frame
+        self._buffers = {}
+        
         print(f"Anti-spoofing feature is {'enabled' if self.enable else 'disabled'}")
     
+    def apply_config(self):
+        """
+        Cập nhật ngưỡng từ config.anti_spoofing (sau config.reload())
+        """
+        settings = config.anti_spoofing
+        self.enable = settings.enable
+        self.var_thresh = settings.var_thresh
+        self.grad_thresh = settings.grad_thresh
+        self.normalize_method = settings.normalize_method
+        self.depth_range_thresh = settings.depth_range_thresh
+        self.min_depth_thresh = settings.min_depth_thresh
+        self.max_depth_thresh = settings.max_depth_thresh
+        print(f"Anti-spoofing config applied: {'enabled' if self.enable else 'disabled'}")
+    
     def normalize_depth_map(self, depth_map, min_depth=None, max_depth=None):
         """
         Chuẩn hóa depth map sử dụng các phương pháp khác nhau.
@@ -144,15 +160,20 @@ class FaceAntiSpoofing:
         new_y1 = max(0, center_y - half_side)
         new_x2 = min(depth_map.shape[1], center_x + half_side)
         new_y2 = min(depth_map.shape[0], center_y + half_side)
+        if new_x2 <= new_x1 or new_y2 <= new_y1:
+            return None
         
-        # Crop depth map
-        depth_crop = depth_map[new_y1:new_y2, new_x1:new_x2].copy()
-        
-        # Process for visualization
-        depth_vis = self.enhance_depth_visualization(depth_crop)
+        # Crop depth map (depth map mới mỗi lần predict nên không cần copy)
+        depth_crop = depth_map[new_y1:new_y2, new_x1:new_x2]
         
-        # Process for anti-spoofing
-        result, depth_stats = self.detect_spoofing(depth_crop)
+        # Thống kê và ảnh hiển thị dùng chung một lần blur
+        depth_stats, depth_smooth = self.compute_depth_stats(depth_crop)
+        result, criteria_status = self.evaluate_depth_stats(depth_stats)
+        if depth_crop.ndim == 2:
+            depth_vis = self.enhance_depth_visualization(depth_crop, depth_smooth, depth_stats["mean_depth"])
+        else:
+            # Ảnh hiển thị của crop màu giữ cách chuyển xám RGB2GRAY cũ
+            depth_vis = self.enhance_depth_visualization(depth_crop)
         
         # Thêm thông tin vào kết quả trả về
         result_dict = {
@@ -160,83 +181,83 @@ class FaceAntiSpoofing:
             "depth_visualization": depth_vis,
             "is_real": result == "live",
             "detection_result": result,
-            **depth_stats  # Mở rộng dictionary với các thông số stats
+            **depth_stats,  # Mở rộng dictionary với các thông số stats
+            "criteria_status": criteria_status
         }
         
         return result_dict
     
-    def enhance_depth_visualization(self, depth_crop):
+    def _buffer(self, name, shape, dtype=np.float32):
+        """Buffer dùng lại giữa các lần gọi khi kích thước crop không đổi"""
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buffer
+        return buffer
+    
+    def compute_depth_stats(self, depth_crop):
         """
-        Enhance depth map visualization by removing background
+        Tính mọi thống kê depth của crop trong một lượt: chuẩn hóa về uint8, blur một
+        lần, variance, Sobel và độ lớn gradient, ghi vào các buffer dùng lại.
+        Giá trị giống hệt cách tính cũ (uint8 0-255) nên các ngưỡng đã hiệu chỉnh giữ nguyên.
+        
+        Returns:
+            - dict: depth_variance, mean_gradient, min_depth, max_depth, depth_range, mean_depth
+            - depth_smooth: depth map uint8 đã chuẩn hóa và blur, là buffer sẽ bị
+              ghi đè ở lần gọi sau
         """
         # Convert to grayscale if it's in RGB format
         if len(depth_crop.shape) == 3:
-            depth_gray = cv2.cvtColor(depth_crop, cv2.COLOR_RGB2GRAY)
+            depth_gray = cv2.cvtColor(depth_crop, cv2.COLOR_BGR2GRAY)
         else:
-            depth_gray = depth_crop.copy()
-            
-        # Apply Gaussian blur to smooth
-        depth_smooth = cv2.GaussianBlur(depth_gray, (5, 5), 0)
+            depth_gray = depth_crop
+        shape = depth_gray.shape
         
-        # Calculate min, max, and average depth
-        min_depth = np.min(depth_smooth)
-        max_depth = np.max(depth_smooth)
-        avg_depth = np.mean(depth_smooth)
+        # Lấy giá trị min/max thực tế của depth map
+        raw_min_depth, raw_max_depth, _, _ = cv2.minMaxLoc(depth_gray)
         
-        # Set all points below average to black (0)
-        mask = depth_smooth < avg_depth
-        depth_enhanced = depth_smooth.copy()
-        depth_enhanced[mask] = 0
+        # Chuẩn hóa về dải 0-255 (float32, cùng thứ tự phép tính với normalize_depth_map)
+        depth_norm = self._buffer("norm", shape)
+        if self.normalize_method == "min_max":
+            if raw_max_depth == raw_min_depth:
+                depth_norm.fill(0)
+            else:
+                np.copyto(depth_norm, depth_gray)
+                depth_norm -= np.float32(raw_min_depth)
+                depth_norm /= np.float32(raw_max_depth - raw_min_depth)
+                depth_norm *= np.float32(255)
+        else:
+            np.multiply(self.normalize_depth_map(depth_gray), np.float32(255), out=depth_norm)
         
-        # Chuẩn hóa cho việc hiển thị tốt hơn
-        norm_depth = self.normalize_depth_map(depth_enhanced)
-        depth_vis_uint8 = (norm_depth * 255).astype(np.uint8)
-            
-        # Convert back to color for visualization
-        depth_vis = cv2.applyColorMap(depth_vis_uint8, cv2.COLORMAP_JET)
+        # Cắt về uint8 như astype(np.uint8), rồi blur, variance và gradient trên ảnh uint8
+        depth_uint8 = self._buffer("norm_uint8", shape, np.uint8)
+        np.copyto(depth_uint8, depth_norm, casting='unsafe')
+        depth_smooth = cv2.GaussianBlur(depth_uint8, (5, 5), 0, dst=self._buffer("smooth", shape, np.uint8))
+        mean, std = cv2.meanStdDev(depth_smooth)
+        grad_x = cv2.Sobel(depth_smooth, cv2.CV_32F, 1, 0, dst=self._buffer("grad_x", shape), ksize=3)
+        grad_y = cv2.Sobel(depth_smooth, cv2.CV_32F, 0, 1, dst=self._buffer("grad_y", shape), ksize=3)
+        grad_mag = cv2.magnitude(grad_x, grad_y, magnitude=self._buffer("grad_mag", shape))
         
-        return depth_vis
+        stats = {
+            "depth_variance": float(std[0, 0]) ** 2,
+            "mean_gradient": float(cv2.mean(grad_mag)[0]),
+            "min_depth": float(raw_min_depth),
+            "max_depth": float(raw_max_depth),
+            "depth_range": float(raw_max_depth - raw_min_depth),
+            "mean_depth": float(mean[0, 0])
+        }
+        return stats, depth_smooth
     
-    def detect_spoofing(self, depth_crop):
+    def evaluate_depth_stats(self, stats):
         """
-        Detect if a face is real or spoofed based on depth map analysis
+        So thống kê depth (của một frame hoặc đã gộp qua nhiều frame) với các ngưỡng
         
         Returns:
             - result: "spoof" hoặc "live"
-            - dict: từ điển chứa các giá trị thống kê
+            - dict: trạng thái từng tiêu chí (True = pass)
         """
-        # Nếu tính năng anti-spoofing bị tắt, luôn trả về "live"
+        # Nếu tính năng anti-spoofing bị tắt, mọi tiêu chí đều pass
         if not self.enable:
-            # Vẫn tính toán các giá trị thống kê để hiển thị, nhưng không dùng để phát hiện spoofing
-            if len(depth_crop.shape) == 3:
-                depth_gray = cv2.cvtColor(depth_crop, cv2.COLOR_BGR2GRAY)
-            else:
-                depth_gray = depth_crop.copy()
-            
-            # Lấy giá trị min/max thực tế của depth map
-            raw_min_depth = float(np.min(depth_gray))
-            raw_max_depth = float(np.max(depth_gray))
-            raw_depth_range = raw_max_depth - raw_min_depth
-                
-            # Chuẩn hóa depth map sử dụng phương pháp đã chọn
-            depth_norm = self.normalize_depth_map(depth_gray)
-            
-            # Chuyển về uint8 cho các bước xử lý tiếp theo
-            depth_norm_uint8 = (depth_norm * 255).astype(np.uint8)
-                
-            # Apply Gaussian blur to smooth
-            depth_smooth = cv2.GaussianBlur(depth_norm_uint8, (5, 5), 0)
-            
-            # Calculate depth variance
-            depth_variance = float(np.var(depth_smooth))
-            
-            # Calculate gradient magnitude using Sobel filters
-            grad_x = cv2.Sobel(depth_smooth, cv2.CV_64F, 1, 0, ksize=3)
-            grad_y = cv2.Sobel(depth_smooth, cv2.CV_64F, 0, 1, ksize=3)
-            grad_mag = np.sqrt(grad_x**2 + grad_y**2)
-            mean_grad = float(np.mean(grad_mag))
-            
-            # Tất cả các tiêu chí đều pass vì anti-spoofing đã bị tắt
             criteria_status = {
                 "variance_pass": True,
                 "gradient_pass": True,
@@ -244,70 +265,62 @@ class FaceAntiSpoofing:
                 "min_depth_pass": True,
                 "max_depth_pass": True
             }
-            
-            # Tạo từ điển với các giá trị thống kê (vẫn giữ để hiển thị)
-            stats = {
-                "depth_variance": depth_variance,
-                "mean_gradient": mean_grad,
-                "min_depth": raw_min_depth,
-                "max_depth": raw_max_depth,
-                "depth_range": raw_depth_range,
-                "criteria_status": criteria_status
-            }
-            
-            return "live", stats
-            
-        # Convert to grayscale if it's in RGB format
-        if len(depth_crop.shape) == 3:
-            depth_gray = cv2.cvtColor(depth_crop, cv2.COLOR_BGR2GRAY)
-        else:
-            depth_gray = depth_crop.copy()
-        
-        # Lấy giá trị min/max thực tế của depth map
-        raw_min_depth = float(np.min(depth_gray))
-        raw_max_depth = float(np.max(depth_gray))
-        raw_depth_range = raw_max_depth - raw_min_depth
-            
-        # Chuẩn hóa depth map sử dụng phương pháp đã chọn
-        depth_norm = self.normalize_depth_map(depth_gray)
-        
-        # Chuyển về uint8 cho các bước xử lý tiếp theo
-        depth_norm_uint8 = (depth_norm * 255).astype(np.uint8)
-            
-        # Apply Gaussian blur to smooth
-        depth_smooth = cv2.GaussianBlur(depth_norm_uint8, (5, 5), 0)
-        
-        # Calculate depth variance
-        depth_variance = float(np.var(depth_smooth))
-        
-        # Calculate gradient magnitude using Sobel filters
-        grad_x = cv2.Sobel(depth_smooth, cv2.CV_64F, 1, 0, ksize=3)
-        grad_y = cv2.Sobel(depth_smooth, cv2.CV_64F, 0, 1, ksize=3)
-        grad_mag = np.sqrt(grad_x**2 + grad_y**2)
-        mean_grad = float(np.mean(grad_mag))
+            return "live", criteria_status
         
         # Trạng thái phát hiện cho từng tiêu chí (True = pass, False = spoof)
         criteria_status = {
-            "variance_pass": depth_variance >= self.var_thresh,
-            "gradient_pass": mean_grad >= self.grad_thresh,
-            "depth_range_pass": raw_depth_range >= self.depth_range_thresh,
-            "min_depth_pass": raw_min_depth >= self.min_depth_thresh,
-            "max_depth_pass": raw_max_depth <= self.max_depth_thresh
+            "variance_pass": stats["depth_variance"] >= self.var_thresh,
+            "gradient_pass": stats["mean_gradient"] >= self.grad_thresh,
+            "depth_range_pass": stats["depth_range"] >= self.depth_range_thresh,
+            "min_depth_pass": stats["min_depth"] >= self.min_depth_thresh,
+            "max_depth_pass": stats["max_depth"] <= self.max_depth_thresh
         }
         
         # Nếu bất kỳ tiêu chí nào không đạt, phát hiện spoof
-        is_live = all(criteria_status.values())
+        result = "live" if all(criteria_status.values()) else "spoof"
+        return result, criteria_status
+    
+    def enhance_depth_visualization(self, depth_crop, depth_smooth=None, mean_depth=None):
+        """
+        Enhance depth map visualization by removing background
         
-        result = "live" if is_live else "spoof"
+        Args:
+            depth_crop: Depth crop
+            depth_smooth, mean_depth: Kết quả compute_depth_stats() của cùng crop (để không blur lại),
+                chỉ dùng với crop một kênh
+        """
+        if depth_smooth is None:
+            # Convert to grayscale if it's in RGB format
+            if len(depth_crop.shape) == 3:
+                depth_gray = cv2.cvtColor(depth_crop, cv2.COLOR_RGB2GRAY)
+            else:
+                depth_gray = depth_crop
+            depth_smooth = cv2.GaussianBlur(depth_gray, (5, 5), 0)
+            mean_depth = float(np.mean(depth_smooth))
         
-        # Tạo từ điển với các giá trị thống kê
-        stats = {
-            "depth_variance": depth_variance,
-            "mean_gradient": mean_grad,
-            "min_depth": raw_min_depth,
-            "max_depth": raw_max_depth,
-            "depth_range": raw_depth_range,
-            "criteria_status": criteria_status
-        }
+        # Set all points below average to black (0)
+        depth_enhanced = self._buffer("enhanced", depth_smooth.shape)
+        np.copyto(depth_enhanced, depth_smooth)
+        depth_enhanced[depth_smooth < mean_depth] = 0
+        
+        # Kéo giãn về 0-255 cho việc hiển thị tốt hơn
+        max_depth = float(depth_enhanced.max())
+        depth_vis_uint8 = cv2.convertScaleAbs(depth_enhanced, alpha=255.0 / max_depth if max_depth > 0 else 0.0)
+            
+        # Convert back to color for visualization
+        depth_vis = cv2.applyColorMap(depth_vis_uint8, cv2.COLORMAP_JET)
+        
+        return depth_vis
+    
+    def detect_spoofing(self, depth_crop):
+        """
+        Detect if a face is real or spoofed based on depth map analysis
         
-        return result, stats
\ No newline at end of file
+        Returns:
+            - result: "spoof" hoặc "live"
+            - dict: từ điển chứa các giá trị thống kê
+        """
+        stats, _ = self.compute_depth_stats(depth_crop)
+        result, criteria_status = self.evaluate_depth_stats(stats)
+        stats["criteria_status"] = criteria_status
+        return result, stats
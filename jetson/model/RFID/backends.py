@@ -0,0 +1,429 @@
+import os
+import time
+import select
+import struct
+import threading
+from dataclasses import dataclass
+
+try:
+    import fcntl
+except ImportError:  # Windows: chỉ dùng được keyboard/serial/replay
+    fcntl = None
+
+try:
+    import serial  # pyserial, chỉ cần cho đầu đọc serial
+except ImportError:
+    serial = None
+
+@dataclass
+class RFIDEvent:
+    """Một lần quẹt thẻ hoàn chỉnh"""
+    card_id: str
+    timestamp: float  # time.time() lúc nhận đủ mã
+    monotonic: float  # time.perf_counter() cùng thời điểm, để đo độ trễ
+    source: str  # Tên backend
+
+# Linux input key code (linux/input-event-codes.h) -> ký tự, dùng cho evdev
+EVDEV_KEYS = {2: "1", 3: "2", 4: "3", 5: "4", 6: "5", 7: "6", 8: "7", 9: "8", 10: "9", 11: "0", 12: "-",
+              71: "7", 72: "8", 73: "9", 75: "4", 76: "5", 77: "6", 79: "1", 80: "2", 81: "3", 82: "0"}
+EVDEV_KEYS.update(zip(range(16, 26), "qwertyuiop"))
+EVDEV_KEYS.update(zip(range(30, 39), "asdfghjkl"))
+EVDEV_KEYS.update(zip(range(44, 51), "zxcvbnm"))
+EVDEV_ENTER = (28, 96)  # KEY_ENTER, KEY_KPENTER
+EV_KEY = 1
+EVIOCGRAB = 0x40044590
+INPUT_EVENT = struct.Struct("llHHi")  # struct input_event: timeval, type, code, value
+
+# HID usage ID (bàn phím, boot protocol) -> ký tự, dùng cho hidraw
+HID_KEYS = {0x2D: "-", 0x27: "0", 0x62: "0"}
+HID_KEYS.update(zip(range(0x04, 0x1E), "abcdefghijklmnopqrstuvwxyz"))
+HID_KEYS.update(zip(range(0x1E, 0x27), "123456789"))
+HID_KEYS.update(zip(range(0x59, 0x62), "123456789"))
+HID_ENTER = (0x28, 0x58)
+
+class CodeAssembler:
+    """
+    Ghép ký tự thành mã thẻ. Mã kết thúc khi gặp Enter, hoặc khi không có ký tự
+    mới trong char_timeout giây (đầu đọc không gửi Enter). Đầu đọc gõ mỗi ký tự
+    cách nhau vài ms nên char_timeout chỉ cần lớn hơn khoảng đó một chút.
+    """
+
+    def __init__(self, on_code, char_timeout=0.1):
+        self.on_code = on_code
+        self.char_timeout = char_timeout
+        self.show_keys = False
+        self._chars = []
+        self._last_char = 0.0
+        self._lock = threading.Lock()
+
+    def feed(self, char):
+        if self.show_keys:
+            print(f"RFID key: {char}")
+        with self._lock:
+            self._chars.append(char)
+            self._last_char = time.perf_counter()
+
+    def reset(self):
+        with self._lock:
+            self._chars = []
+
+    def flush(self):
+        """Kết thúc mã đang ghép (Enter)"""
+        with self._lock:
+            code, self._chars = "".join(self._chars), []
+        if code:
+            self.on_code(code)
+
+    def remaining(self):
+        """Số giây tới khi mã đang ghép hết hạn, None nếu không có mã nào đang ghép"""
+        with self._lock:
+            if not self._chars:
+                return None
+            return max(0.0, self._last_char + self.char_timeout - time.perf_counter())
+
+    def expire(self):
+        """Kết thúc mã nếu đã quá char_timeout kể từ ký tự cuối"""
+        if self.remaining() == 0.0:
+            self.flush()
+
+class RFIDBackend:
+    """
+    Nguồn mã thẻ RFID chạy trong luồng riêng, gửi RFIDEvent cho callback mỗi khi
+    đọc đủ một mã. Lớp con cài đặt _run() và (nếu giữ tài nguyên) _close().
+    """
+
+    name = "base"
+
+    def __init__(self, char_timeout=0.1):
+        self.assembler = CodeAssembler(self._emit, char_timeout)
+        self.on_event = None
+        self._running = False
+        self._thread = None
+        self._wake = threading.Event()
+
+    def describe(self):
+        return self.name
+
+    def start(self, on_event):
+        """
+        Args:
+            on_event: Hàm on_event(RFIDEvent), gọi trong luồng của backend
+        """
+        if self._running:
+            return
+        self.on_event = on_event
+        self._running = True
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._guarded_run, name=f"RFID-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        self._close()
+
+    def is_running(self):
+        return self._running
+
+    def _guarded_run(self):
+        try:
+            self._run()
+        except Exception as e:
+            print(f"Error in RFID {self.describe()} reader: {e}")
+        finally:
+            self._running = False
+
+    def _run(self):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def _emit(self, card_id):
+        event = RFIDEvent(card_id=card_id, timestamp=time.time(), monotonic=time.perf_counter(),
+                          source=self.name)
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                print(f"Error in RFID event callback: {e}")
+
+class _DeviceBackend(RFIDBackend):
+    """Backend đọc từ một file thiết bị, chờ bằng select() để Enter/timeout xử lý ngay"""
+
+    def __init__(self, device, char_timeout=0.1):
+        super().__init__(char_timeout)
+        self.device = device
+        self._fd = None
+        self._wake_r, self._wake_w = None, None
+
+    def describe(self):
+        return f"{self.name} ({self.device})"
+
+    def start(self, on_event):
+        self._fd = os.open(self.device, os.O_RDONLY | os.O_NONBLOCK)
+        self._wake_r, self._wake_w = os.pipe()
+        self._prepare()
+        super().start(on_event)
+
+    def stop(self):
+        if self._wake_w is not None:
+            os.write(self._wake_w, b"x")  # Đánh thức select()
+        super().stop()
+
+    def _prepare(self):
+        pass
+
+    def _close(self):
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            if fd is not None:
+                os.close(fd)
+        self._fd = self._wake_r = self._wake_w = None
+
+    def _run(self):
+        while self._running:
+            readable, _, _ = select.select([self._fd, self._wake_r], [], [], self.assembler.remaining())
+            if self._wake_r in readable:
+                break
+            if self._fd in readable:
+                try:
+                    data = os.read(self._fd, 4096)
+                except BlockingIOError:
+                    continue
+                if data:
+                    self._handle(data)
+                else:
+                    # FIFO/thiết bị bị đóng phía ghi: chờ thêm dữ liệu mà không quay vòng
+                    time.sleep(0.05)
+            self.assembler.expire()
+
+    def _handle(self, data):
+        raise NotImplementedError
+
+class EvdevBackend(_DeviceBackend):
+    """
+    Đầu đọc USB dạng bàn phím qua /dev/input/eventX. Chỉ cần quyền đọc file
+    thiết bị (nhóm input hoặc udev rule), không cần root như hook bàn phím toàn
+    cục; grab=True giữ thiết bị riêng để mã thẻ không gõ vào ứng dụng khác.
+    """
+
+    name = "evdev"
+
+    def __init__(self, device, char_timeout=0.1, grab=True):
+        super().__init__(device, char_timeout)
+        self.grab = grab
+        self._pending = b""
+
+    def _prepare(self):
+        if self.grab and fcntl is not None:
+            try:
+                fcntl.ioctl(self._fd, EVIOCGRAB, 1)
+            except OSError as e:
+                print(f"Cannot grab RFID device {self.device}: {e}")
+
+    def _handle(self, data):
+        data = self._pending + data
+        usable = len(data) - len(data) % INPUT_EVENT.size
+        self._pending = data[usable:]
+        for _, _, ev_type, code, value in INPUT_EVENT.iter_unpack(data[:usable]):
+            if ev_type != EV_KEY or value != 1:  # Chỉ lấy lúc nhấn phím
+                continue
+            if code in EVDEV_ENTER:
+                self.assembler.flush()
+            elif code in EVDEV_KEYS:
+                self.assembler.feed(EVDEV_KEYS[code])
+
+class HidRawBackend(_DeviceBackend):
+    """
+    Đầu đọc USB dạng bàn phím qua /dev/hidrawN, đọc report boot-keyboard 8 byte
+    (modifier, reserved, 6 keycode); report có report ID đứng đầu thì 9 byte.
+    """
+
+    name = "hidraw"
+
+    def __init__(self, device, char_timeout=0.1, report_size=8):
+        super().__init__(device, char_timeout)
+        self.report_size = report_size
+        self._pending = b""
+        self._pressed = set()
+
+    def _handle(self, data):
+        data = self._pending + data
+        usable = len(data) - len(data) % self.report_size
+        self._pending = data[usable:]
+        for offset in range(0, usable, self.report_size):
+            report = data[offset:offset + self.report_size]
+            keys = [k for k in report[-6:] if k]
+            # Phím mới xuất hiện so với report trước = một lần nhấn
+            for key in keys:
+                if key in self._pressed:
+                    continue
+                if key in HID_ENTER:
+                    self.assembler.flush()
+                elif key in HID_KEYS:
+                    self.assembler.feed(HID_KEYS[key])
+            self._pressed = set(keys)
+
+class SerialBackend(RFIDBackend):
+    """
+    Đầu đọc qua cổng serial (USB-UART). Khung STX ... ETX hoặc kết thúc bằng
+    CR/LF đều được; ký tự không phải chữ/số bị bỏ qua.
+    """
+
+    name = "serial"
+
+    def __init__(self, device, baudrate=9600, char_timeout=0.1):
+        super().__init__(char_timeout)
+        if serial is None:
+            raise ImportError("Serial RFID reader needs pyserial: pip install pyserial")
+        self.device = device
+        self.baudrate = baudrate
+        self._port = None
+
+    def describe(self):
+        return f"{self.name} ({self.device} @ {self.baudrate})"
+
+    def start(self, on_event):
+        self._port = serial.Serial(self.device, self.baudrate, timeout=0.5)
+        super().start(on_event)
+
+    def _close(self):
+        if self._port is not None:
+            self._port.close()
+            self._port = None
+
+    def _run(self):
+        while self._running:
+            remaining = self.assembler.remaining()
+            self._port.timeout = 0.5 if remaining is None else max(remaining, 0.001)
+            data = self._port.read(self._port.in_waiting or 1)
+            for byte in data:
+                if byte == 0x02:  # STX: bắt đầu mã mới
+                    self.assembler.reset()
+                elif byte in (0x03, 0x0A, 0x0D):  # ETX, LF, CR
+                    self.assembler.flush()
+                elif chr(byte).isalnum() or chr(byte) in "-_":
+                    self.assembler.feed(chr(byte))
+            self.assembler.expire()
+
+class KeyboardBackend(RFIDBackend):
+    """
+    Hook bàn phím toàn cục (thư viện keyboard, cần root trên Linux). Giữ lại để
+    tương thích; nên dùng evdev/hidraw khi biết thiết bị của đầu đọc.
+    """
+
+    name = "keyboard"
+
+    def __init__(self, char_timeout=0.1):
+        super().__init__(char_timeout)
+        self._hook = None
+
+    def _on_key(self, event):
+        # Xử lý riêng cho Enter/Return (nhiều RFID reader gửi kèm newline)
+        if event.name in ("enter", "\n", "\r") or event.scan_code == 28:
+            self.assembler.flush()
+        elif event.name.isdigit() or event.name.isalpha() or event.name in ('-', '_'):
+            self.assembler.feed(event.name)
+        self._wake.set()
+
+    def _run(self):
+        try:
+            import keyboard
+        except ImportError:
+            print("Vui lòng cài đặt thư viện 'keyboard': pip install keyboard")
+            return
+        self._hook = keyboard.on_press(self._on_key)
+        try:
+            # Ngủ tới khi có phím mới hoặc mã đang ghép hết hạn, không quay vòng định kỳ
+            while self._running:
+                self._wake.wait(self.assembler.remaining())
+                self._wake.clear()
+                self.assembler.expire()
+        finally:
+            keyboard.unhook(self._hook)
+
+class ReplayBackend(RFIDBackend):
+    """
+    Phát lại kịch bản quẹt thẻ để thử nghiệm không cần phần cứng.
+
+    Kịch bản là list (delay, card_id) hoặc file văn bản, mỗi dòng "<giây> <mã thẻ>"
+    với giây là khoảng chờ kể từ lần quẹt trước; dòng bắt đầu bằng # bị bỏ qua.
+    """
+
+    name = "replay"
+
+    def __init__(self, script, speed=1.0, loop=False):
+        super().__init__()
+        self.source = script if isinstance(script, str) else None
+        self.script = self.load_script(script) if isinstance(script, str) else list(script)
+        # Lặp kịch bản rỗng (hoặc toàn delay 0) sẽ quay vòng không nghỉ
+        if loop and sum(delay for delay, _ in self.script) <= 0:
+            raise ValueError("loop=True needs a replay script with a positive total delay")
+        self.speed = speed
+        self.loop = loop
+        self.scheduled = []  # perf_counter() dự kiến của từng lần quẹt đã phát
+        self.done = threading.Event()
+
+    @staticmethod
+    def load_script(path):
+        script = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                delay, card_id = line.split(None, 1)
+                script.append((float(delay), card_id.strip()))
+        return script
+
+    def describe(self):
+        return f"{self.name} ({self.source or f'{len(self.script)} scans'})"
+
+    def _run(self):
+        try:
+            due = time.perf_counter()
+            while self._running:
+                for delay, card_id in self.script:
+                    due += delay / self.speed
+                    if self._wake.wait(max(0.0, due - time.perf_counter())):
+                        return
+                    self.scheduled.append(due)
+                    self._emit(card_id)
+                if not self.loop:
+                    return
+        finally:
+            self.done.set()
+
+    def wait(self, timeout=None):
+        """Chờ phát hết kịch bản"""
+        return self.done.wait(timeout)
+
+def create_rfid_backend(kind, device=None, settings=None):
+    """
+    Tạo backend đầu đọc RFID
+
+    Args:
+        kind: "keyboard" | "evdev" | "hidraw" | "serial" | "replay"
+        device: File thiết bị (evdev/hidraw/serial) hoặc file kịch bản (replay)
+        settings: Namespace như config.rfid (char_timeout, baudrate, grab)
+
+    Returns:
+        RFIDBackend
+    """
+    char_timeout = getattr(settings, 'char_timeout', 0.1)
+    if kind == "keyboard":
+        return KeyboardBackend(char_timeout)
+    if kind in ("evdev", "hidraw", "serial", "replay") and not device:
+        raise ValueError(f"RFID backend '{kind}' needs a device")
+    if kind == "evdev":
+        return EvdevBackend(device, char_timeout, grab=getattr(settings, 'grab', True))
+    if kind == "hidraw":
+        return HidRawBackend(device, char_timeout)
+    if kind == "serial":
+        return SerialBackend(device, getattr(settings, 'baudrate', 9600), char_timeout)
+    if kind == "replay":
+        return ReplayBackend(device)
+    raise ValueError(f"Unknown RFID backend: {kind}")
@@ -0,0 +1,200 @@
+import os
+import json
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    card_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS cards_user_id ON cards (user_id);
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    display_name TEXT,
+    role TEXT,
+    gallery_identity TEXT,
+    active INTEGER NOT NULL DEFAULT 1,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS users_gallery_identity ON users (gallery_identity);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+class IdentityStore:
+    """
+    Danh tính tại thiết bị: mã thẻ -> userId -> tên thư mục gallery của người đó.
+
+    Dữ liệu nằm trong SQLite (ghi từng dòng, không ghi lại cả file như rfid.json)
+    và được giữ thêm trong dict để tra cứu lúc xác thực là O(1), không đụng disk.
+    Người dùng chưa có dòng trong bảng users được coi là có gallery_identity = userId
+    (thư mục gallery đặt theo userId như hiện tại).
+    """
+
+    def __init__(self, path=":memory:"):
+        """
+        Args:
+            path: File SQLite (":memory:" cho test)
+        """
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._cards = {}  # card_id -> user_id
+        self._users = {}  # user_id -> {"display_name", "role", "gallery_identity", "active"}
+        self._by_gallery = {}  # gallery_identity (lower) -> user_id
+        self._load()
+
+    def _load(self):
+        with self._lock:
+            self._cards = dict(self._conn.execute("SELECT card_id, user_id FROM cards"))
+            self._users = {}
+            for user_id, display_name, role, gallery_identity, active in self._conn.execute(
+                    "SELECT user_id, display_name, role, gallery_identity, active FROM users"):
+                self._users[user_id] = {"display_name": display_name, "role": role,
+                                        "gallery_identity": gallery_identity or user_id, "active": bool(active)}
+            self._by_gallery = {user["gallery_identity"].lower(): user_id for user_id, user in self._users.items()}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        return len(self._cards)
+
+    def _active_user(self, user_id):
+        user = self._users.get(user_id)
+        return user is None or user["active"]
+
+    def user_id_for_card(self, card_id):
+        """userId của thẻ, None nếu thẻ không có hoặc người dùng đã bị khóa"""
+        user_id = self._cards.get(card_id)
+        return user_id if user_id is not None and self._active_user(user_id) else None
+
+    def user_id_for_gallery(self, identity):
+        """userId của một tên thư mục gallery (kết quả nhận diện khuôn mặt), None nếu là Unknown"""
+        if not identity or identity == "Unknown":
+            return None
+        user_id = self._by_gallery.get(identity.lower())
+        if user_id is None:
+            user_id = identity  # Gallery đặt theo userId, hoặc index dựng từ vector trên server (face_sync)
+        return user_id if user_id is not None and self._active_user(user_id) else None
+
+    def lookup(self, card_id):
+        """
+        Returns:
+            dict: card_id, user_id, display_name, role, gallery_identity; None nếu không có
+        """
+        user_id = self.user_id_for_card(card_id)
+        if user_id is None:
+            return None
+        user = self._users.get(user_id) or {}
+        return {
+            "card_id": card_id,
+            "user_id": user_id,
+            "display_name": user.get("display_name") or user_id,
+            "role": user.get("role"),
+            "gallery_identity": user.get("gallery_identity") or user_id
+        }
+
+    def apply(self, cards=(), users=(), removed_cards=(), cursors=None):
+        """
+        Ghi một lô thay đổi trong một transaction (kèm cursor đồng bộ, để mất điện giữa
+        chừng không làm cursor chạy trước dữ liệu)
+
+        Args:
+            cards: Iterable dict card_id, user_id, updated_at
+            users: Iterable dict user_id, display_name, role, gallery_identity, active, updated_at
+            removed_cards: Mã thẻ cần xóa
+            cursors: dict tên -> giá trị cursor
+        """
+        cards, users, removed_cards = list(cards), list(users), list(removed_cards)
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cards (card_id, user_id, updated_at) VALUES (?, ?, ?)",
+                    [(c["card_id"], c["user_id"], c.get("updated_at")) for c in cards])
+                # Server không gửi gallery_identity: giữ ánh xạ thư mục gallery đã có ở thiết bị.
+                # UPDATE + INSERT OR IGNORE thay cho UPSERT (SQLite < 3.24 trên JetPack 4)
+                self._conn.executemany(
+                    "UPDATE users SET display_name = ?, role = ?, gallery_identity = COALESCE(?, gallery_identity), "
+                    "active = ?, updated_at = ? WHERE user_id = ?",
+                    [(u.get("display_name"), u.get("role"), u.get("gallery_identity"), int(u.get("active", True)),
+                      u.get("updated_at"), u["user_id"]) for u in users])
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO users (user_id, display_name, role, gallery_identity, active, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(u["user_id"], u.get("display_name"), u.get("role"), u.get("gallery_identity"),
+                      int(u.get("active", True)), u.get("updated_at")) for u in users])
+                self._conn.executemany("DELETE FROM cards WHERE card_id = ?", [(c,) for c in removed_cards])
+                self._conn.executemany("INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)",
+                                       list((cursors or {}).items()))
+            for card in cards:
+                self._cards[card["card_id"]] = card["user_id"]
+            for card_id in removed_cards:
+                self._cards.pop(card_id, None)
+            for user in users:
+                old = self._users.get(user["user_id"])
+                if old is not None:
+                    self._by_gallery.pop(old["gallery_identity"].lower(), None)
+                gallery_identity = user.get("gallery_identity") or (old or {}).get("gallery_identity") \
+                    or user["user_id"]
+                self._users[user["user_id"]] = {"display_name": user.get("display_name"), "role": user.get("role"),
+                                                "gallery_identity": gallery_identity,
+                                                "active": bool(user.get("active", True))}
+                self._by_gallery[gallery_identity.lower()] = user["user_id"]
+
+    def add_card(self, card_id, user_id):
+        """Thêm/đổi một thẻ (một dòng, không ghi lại toàn bộ dữ liệu)"""
+        self.apply(cards=[{"card_id": card_id, "user_id": user_id}])
+
+    def card_ids(self):
+        with self._lock:
+            return list(self._cards)
+
+    def get_cursor(self, name):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def import_mapping(self, mapping):
+        """Nhập dict {mã thẻ: userId} (định dạng rfid.json cũ)"""
+        self.apply(cards=[{"card_id": str(card_id), "user_id": str(user_id)} for card_id, user_id in mapping.items()])
+
+    def import_json(self, path):
+        """
+        Nhập rfid.json cũ nếu store còn trống (lần đầu chạy sau khi chuyển sang SQLite)
+
+        Returns:
+            int: Số thẻ đã nhập
+        """
+        if self._cards or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                mapping = json.load(f) or {}
+        except (OSError, ValueError) as e:
+            print(f"Error importing RFID database {path}: {e}")
+            return 0
+        self.import_mapping(mapping)
+        print(f"Imported {len(mapping)} RFID cards from {path}")
+        return len(mapping)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_identity_store():
+    """IdentityStore dùng chung cho cả tiến trình (file theo config.identity.database)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            from utils.config_utils import config
+            _store = IdentityStore(config.identity.database)
+            _store.import_json(config.data.rfid_file)
+        return _store
@@ -1,7 +1,4 @@
 import time
-import threading
-import json
-import os
 import sys
 from pathlib import Path
 
@@ -11,9 +8,15 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from utils.config_utils import config
+from model.RFID.backends import create_rfid_backend
+from model.RFID.identity_store import get_identity_store
 
 class RFID:
-    def __init__(self):
+    def __init__(self, identities=None):
+        """
+        Args:
+            identities: IdentityStore (mặc định: store dùng chung theo config.identity)
+        """
         # Thông tin RFID hiện tại
         self.current_id = None
         self.id_callback = None
@@ -21,128 +24,55 @@ class RFID:
         self.last_scan_id = None
         self.min_scan_interval = 2.0  # Khoảng thời gian tối thiểu giữa các lần quét cùng thẻ (giây)
         
-        # Đọc database từ file JSON
-        self.rfid_database = self._load_rfid_database()
+        # Mã thẻ -> userId -> thư mục gallery (SQLite, nhập rfid.json cũ ở lần chạy đầu)
+        self.identities = identities if identities is not None else get_identity_store()
         
-        # Cấu hình listener
-        self.listening = True
-        self.input_buffer = ""
-        self.last_key_time = 0
-        self.listener_thread = None
-        self.timeout = 0.8  # Tăng timeout để đảm bảo phần đọc đủ và không bị cắt
+        # Cấu hình listener (đầu đọc cụ thể nằm trong backend, xem backends.py)
+        self.listening = False
+        self.backend = None
+        self.last_event = None  # RFIDEvent của lần quẹt gần nhất
         self.debug_mode = False  # Chế độ debug để xem từng key được nhận
         self.show_keys = False   # Không hiển thị từng phím nữa
     
-    def _load_rfid_database(self):
-        """Đọc database RFID từ file JSON"""
-        try:
-            rfid_file = config.data.rfid_file
-            if os.path.exists(rfid_file):
-                with open(rfid_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            else:
-                print(f"Warning: RFID database file not found at {rfid_file}")
-                return {}
-        except Exception as e:
-            print(f"Error loading RFID database: {e}")
-    
-    def _save_rfid_database(self):
-        """Lưu database RFID vào file JSON"""
-        try:
-            rfid_file = config.data.rfid_file
-            os.makedirs(os.path.dirname(rfid_file), exist_ok=True)
-            
-            with open(rfid_file, 'w', encoding='utf-8') as f:
-                json.dump(self.rfid_database, f, indent=4, ensure_ascii=False)
-            
-            return True
-        except Exception as e:
-            print(f"Error saving RFID database: {e}")
-            return False
-    
-    def start_listening(self):
-        """Bắt đầu lắng nghe input RFID từ keyboard"""
+    def start_listening(self, backend=None):
+        """
+        Bắt đầu lắng nghe đầu đọc RFID
+        
+        Args:
+            backend: RFIDBackend (mặc định: theo config.rfid)
+        """
+        if backend is None:
+            settings = config.rfid
+            backend = create_rfid_backend(settings.backend, settings.device, settings)
+        self.backend = backend
+        self.backend.assembler.show_keys = self.debug_mode and self.show_keys
         self.listening = True
-        self.listener_thread = threading.Thread(target=self._keyboard_listener)
-        self.listener_thread.daemon = True
-        self.listener_thread.start()
-        print("RFID listener started in keyboard emulation mode")
+        self.backend.start(self._on_event)
+        print(f"RFID listener started: {self.backend.describe()}")
     
     def stop_listening(self):
         """Dừng lắng nghe RFID input"""
         self.listening = False
-        if self.listener_thread:
-            self.listener_thread.join(timeout=1.0)
+        if self.backend:
+            self.backend.stop()
     
     def set_callback(self, callback):
         """Set callback function khi RFID được quét"""
         self.id_callback = callback
     
-    def _keyboard_listener(self):
-        """Lắng nghe input từ bàn phím mô phỏng máy quét RFID"""
-        try:
-            import keyboard
-            
-            def on_key(event):
-                # Xử lý riêng cho Enter/Return (nhiều RFID reader gửi kèm newline)
-                if event.name == "enter" or event.name == "\n" or event.name == "\r" or event.scan_code == 28:
-                    # Kiểm tra nếu buffer có dữ liệu thì xử lý như một mã RFID hoàn chỉnh
-                    if self.input_buffer:
-                        if self.debug_mode:
-                            print(f"Enter/Newline detected, processing RFID code: {self.input_buffer}")
-                        self._process_rfid_code()
-                    return
-                
-                # Xử lý các phím khác
-                current_time = time.time()
-                # Nếu quá timeout, xóa buffer
-                if current_time - self.last_key_time > self.timeout and self.input_buffer:
-                    if self.debug_mode:
-                        print(f"Timeout reset, discarding buffer: {self.input_buffer}")
-                    self.input_buffer = ""
-                
-                self.last_key_time = current_time
-                
-                # Debug mode to see each key (chỉ hiển thị nếu show_keys=True)
-                if self.debug_mode and self.show_keys:
-                    key_char = event.name
-                    ascii_val = ord(key_char) if len(key_char) == 1 else f"scan_code={event.scan_code}"
-                    print(f"Key detected: {key_char}, ASCII/Code: {ascii_val}")
-                
-                # Chỉ xử lý các ký tự hợp lệ cho mã RFID
-                if event.name.isdigit() or event.name.isalpha() or event.name in ['-', '_']:
-                    self.input_buffer += event.name
-                    if self.debug_mode and self.show_keys:
-                        print(f"Current buffer: {self.input_buffer}")
-            
-            # Đăng ký hook bàn phím  
-            keyboard.on_press(on_key)
-            
-            # Giữ thread alive và xử lý timeout
-            while self.listening:
-                time.sleep(0.1)
-                
-                # Kiểm tra buffer timeout cho trường hợp không phát hiện được Enter/newline
-                current_time = time.time()
-                if self.input_buffer and (current_time - self.last_key_time > self.timeout):
-                    if self.debug_mode:
-                        print(f"Processing buffer by timeout (no newline detected): {self.input_buffer}")
-                    self._process_rfid_code()
-                
-        except ImportError:
-            print("Vui lòng cài đặt thư viện 'keyboard': pip install keyboard")
-            print("Chạy lệnh: pip install keyboard")
-        except Exception as e:
-            print(f"Error in RFID keyboard listener: {e}")
+    def _on_event(self, event):
+        """Nhận RFIDEvent từ backend (luồng của backend)"""
+        if self.debug_mode:
+            print(f"RFID code from {event.source}: {event.card_id}")
+        self.last_event = event
+        self._process_rfid_code(event.card_id)
     
-    def _process_rfid_code(self):
+    def _process_rfid_code(self, rfid_code):
         """Xử lý mã RFID sau khi nhận đủ"""
-        if not self.input_buffer:
-            return
-            
         # Loại bỏ ký tự không mong muốn
-        rfid_code = self.input_buffer.strip()
-        self.input_buffer = ""
+        rfid_code = (rfid_code or "").strip()
+        if not rfid_code:
+            return
         
         # Kiểm tra độ dài hợp lý của mã RFID (thường từ 5-20 ký tự)
         if len(rfid_code) < 3 or len(rfid_code) > 30:
@@ -173,31 +103,34 @@ class RFID:
                 print(f"Error in RFID callback: {e}")
     
     def get_name_from_id(self, rfid_id):
-        """Lấy tên người từ ID RFID"""
-        name = self.rfid_database.get(rfid_id, "Unknown")
-        print(f"Looking up RFID {rfid_id} → Found name: {name}")
+        """Lấy userId của thẻ RFID ("Unknown" nếu thẻ chưa đăng ký hoặc đã bị khóa)"""
+        name = self.identities.user_id_for_card(rfid_id) or "Unknown"
+        print(f"Looking up RFID {rfid_id} → Found user: {name}")
         return name
     
     def verify_identity(self, rfid_id, face_name):
-        """Xác thực ID RFID và kết quả nhận diện khuôn mặt"""
-        rfid_name = self.get_name_from_id(rfid_id)
-        
-        # Tính độ tương đồng dựa trên tên
-        match = rfid_name.lower() == face_name.lower()  # Case insensitive
+        """
+        Xác thực ID RFID và kết quả nhận diện khuôn mặt theo userId: thẻ và thư mục
+        gallery của khuôn mặt được quy về userId rồi mới so sánh
+        """
+        rfid_user = self.identities.user_id_for_card(rfid_id)
+        face_user = self.identities.user_id_for_gallery(face_name)
+        match = rfid_user is not None and rfid_user == face_user
         
         result = {
             "match": match,
-            "rfid_name": rfid_name,
-            "face_name": face_name
+            "rfid_name": rfid_user or "Unknown",
+            "face_name": face_name,
+            "user_id": rfid_user,
+            "face_user_id": face_user
         }
         
-        print(f"Verification result: RFID={rfid_name}, Face={face_name}, Match={match}")
+        print(f"Verification result: RFID user={rfid_user}, Face={face_name} (user={face_user}), Match={match}")
         return result
         
     def add_rfid_user(self, rfid_id, name):
-        """Thêm người dùng mới vào database RFID"""
-        self.rfid_database[rfid_id] = name
-        self._save_rfid_database()  # Lưu lại vào file
+        """Thêm thẻ RFID cho người dùng (name là userId)"""
+        self.identities.add_card(rfid_id, name)
         print(f"Đã thêm người dùng: {name} với ID RFID: {rfid_id}")
         return True
         
@@ -211,4 +144,6 @@ class RFID:
         """
         self.debug_mode = enable
         self.show_keys = show_keys
+        if self.backend:
+            self.backend.assembler.show_keys = enable and show_keys
         print(f"RFID debug mode: {'ON' if enable else 'OFF'}, Show keys: {'ON' if show_keys else 'OFF'}")
\ No newline at end of file
@@ -65,6 +65,10 @@ class RetinaFace:
             output_names.append(o.name)
         self.input_name = input_name
         self.output_names = output_names
+        # Output dạng (N, K*A, C) khi model được export với chiều batch
+        self.batched = len(outputs[0].shape) == 3
+        # Chạy được nhiều ảnh trong một lần gọi session (detect_batch)
+        self.dynamic_batch = self.batched and not isinstance(input_shape[0], int)
         self.input_mean = 127.5
         self.input_std = 128.0
         self.use_kps = False
@@ -106,35 +110,31 @@ class RetinaFace:
                 self.input_size = input_size
 
     def forward(self, img, threshold):
-        scores_list = []
-        bboxes_list = []
-        kpss_list = []
         input_size = tuple(img.shape[0:2][::-1])
         blob = cv2.dnn.blobFromImage(img, 1.0/self.input_std, input_size, (self.input_mean, self.input_mean, self.input_mean), swapRB=True)
         net_outs = self.session.run(self.output_names, {self.input_name : blob})
+        return self._decode(net_outs, blob.shape[2], blob.shape[3], threshold, 0 if self.batched else None)
 
-        input_height = blob.shape[2]
-        input_width = blob.shape[3]
+    def _decode(self, net_outs, input_height, input_width, threshold, index=None):
+        """Giải mã output của một ảnh; index là vị trí ảnh trong batch (None nếu output không có chiều batch)"""
+        scores_list = []
+        bboxes_list = []
+        kpss_list = []
         fmc = self.fmc
         for idx, stride in enumerate(self._feat_stride_fpn):
-            scores = net_outs[idx]
-            bbox_preds = net_outs[idx+fmc]
+            if index is None:
+                scores = net_outs[idx]
+                bbox_preds = net_outs[idx+fmc]
+            else:
+                scores = net_outs[idx][index]
+                bbox_preds = net_outs[idx+fmc][index]
             bbox_preds = bbox_preds * stride
             if self.use_kps:
-                kps_preds = net_outs[idx+fmc*2] * stride
+                kps_preds = (net_outs[idx+fmc*2] if index is None else net_outs[idx+fmc*2][index]) * stride
             height = input_height // stride
             width = input_width // stride
             K = height * width
-            key = (height, width, stride)
-            if key in self.center_cache:
-                anchor_centers = self.center_cache[key]
-            else:
-                anchor_centers = np.stack(np.mgrid[:height, :width][::-1], axis=-1).astype(np.float32)
-                anchor_centers = (anchor_centers * stride).reshape( (-1, 2) )
-                if self._num_anchors>1:
-                    anchor_centers = np.stack([anchor_centers]*self._num_anchors, axis=1).reshape( (-1,2) )
-                if len(self.center_cache)<100:
-                    self.center_cache[key] = anchor_centers
+            anchor_centers = self._anchor_centers(height, width, stride)
 
             pos_inds = np.where(scores>=threshold)[0]
             bboxes = distance2bbox(anchor_centers, bbox_preds)
@@ -149,10 +149,25 @@ class RetinaFace:
                 kpss_list.append(pos_kpss)
         return scores_list, bboxes_list, kpss_list
 
-    def detect(self, img, input_size = None, max_num=0, metric='default'):
-        assert input_size is not None or self.input_size is not None
-        input_size = self.input_size if input_size is None else input_size
-            
+    def _anchor_centers(self, height, width, stride):
+        key = (height, width, stride)
+        if key in self.center_cache:
+            return self.center_cache[key]
+        anchor_centers = np.stack(np.mgrid[:height, :width][::-1], axis=-1).astype(np.float32)
+        anchor_centers = (anchor_centers * stride).reshape( (-1, 2) )
+        if self._num_anchors>1:
+            anchor_centers = np.stack([anchor_centers]*self._num_anchors, axis=1).reshape( (-1,2) )
+        if len(self.center_cache)<100:
+            self.center_cache[key] = anchor_centers
+        return anchor_centers
+
+    def prime_center_cache(self, input_size):
+        """Precompute anchor centers of every stride for an input size (w, h)"""
+        for stride in self._feat_stride_fpn:
+            self._anchor_centers(input_size[1] // stride, input_size[0] // stride, stride)
+
+    def _letterbox(self, img, input_size):
+        """Resize giữ tỉ lệ vào khung input_size (w, h), phần thừa để đen"""
         im_ratio = float(img.shape[0]) / img.shape[1]
         model_ratio = float(input_size[1]) / input_size[0]
         if im_ratio>model_ratio:
@@ -165,9 +180,40 @@ class RetinaFace:
         resized_img = cv2.resize(img, (new_width, new_height))
         det_img = np.zeros( (input_size[1], input_size[0], 3), dtype=np.uint8 )
         det_img[:new_height, :new_width, :] = resized_img
+        return det_img, det_scale
+
+    def detect(self, img, input_size = None, max_num=0, metric='default'):
+        assert input_size is not None or self.input_size is not None
+        input_size = self.input_size if input_size is None else input_size
 
+        det_img, det_scale = self._letterbox(img, input_size)
         scores_list, bboxes_list, kpss_list = self.forward(det_img, self.det_thresh)
+        return self._postprocess(img, scores_list, bboxes_list, kpss_list, det_scale, max_num, metric)
+
+    def detect_batch(self, imgs, input_size=None, max_num=0, metric='default'):
+        """
+        Detect trên nhiều ảnh (vd: frame của nhiều camera) trong một lần gọi session.
+        Model có batch cố định thì chạy lần lượt từng ảnh.
+
+        Returns:
+            List (det, kpss) theo thứ tự của imgs
+        """
+        if not self.dynamic_batch or len(imgs) < 2:
+            return [self.detect(img, input_size=input_size, max_num=max_num, metric=metric) for img in imgs]
+        assert input_size is not None or self.input_size is not None
+        input_size = self.input_size if input_size is None else input_size
+
+        letterboxed = [self._letterbox(img, input_size) for img in imgs]
+        blob = cv2.dnn.blobFromImages([det_img for det_img, _ in letterboxed], 1.0/self.input_std, tuple(input_size),
+                                      (self.input_mean, self.input_mean, self.input_mean), swapRB=True)
+        net_outs = self.session.run(self.output_names, {self.input_name : blob})
+        results = []
+        for index, (img, (_, det_scale)) in enumerate(zip(imgs, letterboxed)):
+            decoded = self._decode(net_outs, blob.shape[2], blob.shape[3], self.det_thresh, index)
+            results.append(self._postprocess(img, *decoded, det_scale, max_num, metric))
+        return results
 
+    def _postprocess(self, img, scores_list, bboxes_list, kpss_list, det_scale, max_num, metric):
         scores = np.vstack(scores_list)
         scores_ravel = scores.ravel()
         order = scores_ravel.argsort()[::-1]
@@ -1,3 +1,3 @@
-from .model_zoo import ModelZoo, model_zoo
+from .model_zoo import ModelZoo, model_zoo, get_session_profile, build_session_options
 
-__all__ = ['ModelZoo', 'model_zoo'] 
\ No newline at end of file
+__all__ = ['ModelZoo', 'model_zoo', 'get_session_profile', 'build_session_options'] 
\ No newline at end of file
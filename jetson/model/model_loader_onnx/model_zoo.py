@@ -1,10 +1,37 @@
 import os
 import os.path as osp
 import glob
+import hashlib
 import onnxruntime
 
 from model.AdaFace.adaface_onnx import AdaFace
 from model.RetinaFace.retinaface import RetinaFace
+from utils.config_utils import config
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    'disable': onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    'basic': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    'extended': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    'all': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+EXECUTION_MODES = {
+    'sequential': onnxruntime.ExecutionMode.ORT_SEQUENTIAL,
+    'parallel': onnxruntime.ExecutionMode.ORT_PARALLEL,
+}
+
+# Các biến thể model: <tên>.onnx (fp32) và <tên>.<precision>.onnx
+MODEL_PRECISIONS = ('fp32', 'fp16', 'int8_dynamic', 'int8_static')
+
+# Giá trị mặc định khi config.yaml không khai báo profile
+DEFAULT_SESSION_PROFILE = {
+    'graph_optimization_level': 'all',
+    'intra_op_num_threads': 0,
+    'inter_op_num_threads': 1,
+    'execution_mode': 'sequential',
+    'enable_cpu_mem_arena': True,
+    'enable_mem_pattern': True,
+}
 
 class PickableInferenceSession(onnxruntime.InferenceSession): 
     """
@@ -21,24 +48,129 @@ class PickableInferenceSession(onnxruntime.InferenceSession):
         model_path = values['model_path']
         self.__init__(model_path)
 
+def get_session_profile(name=None):
+    """
+    Get a named session profile from config.onnx_runtime.profiles.
+    
+    Args:
+        name: Profile name (default: config.onnx_runtime.profile)
+        
+    Returns:
+        dict: Profile settings merged over DEFAULT_SESSION_PROFILE
+        
+    Raises:
+        ValueError: If the profile is not defined in config
+    """
+    settings = config.onnx_runtime
+    name = name or settings.profile
+    if name not in settings.profiles and name != 'default':
+        raise ValueError(f"Unknown ONNX Runtime profile: {name}")
+    profile = dict(DEFAULT_SESSION_PROFILE)
+    profile.update(settings.profiles.get(name) or {})
+    return profile
+
+def build_session_options(profile):
+    """
+    Build onnxruntime.SessionOptions from a profile dict.
+    
+    Args:
+        profile: dict with graph_optimization_level, intra_op_num_threads,
+            inter_op_num_threads, execution_mode, enable_cpu_mem_arena, enable_mem_pattern
+            
+    Returns:
+        onnxruntime.SessionOptions
+    """
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[str(profile['graph_optimization_level']).lower()]
+    options.intra_op_num_threads = int(profile['intra_op_num_threads'])
+    options.inter_op_num_threads = int(profile['inter_op_num_threads'])
+    options.execution_mode = EXECUTION_MODES[str(profile['execution_mode']).lower()]
+    options.enable_cpu_mem_arena = bool(profile['enable_cpu_mem_arena'])
+    options.enable_mem_pattern = bool(profile['enable_mem_pattern'])
+    return options
+
+def get_optimized_model_path(onnx_file, profile_name, profile, providers, cache_dir=None):
+    """
+    Path of the cached optimized graph for (model, profile, providers).
+    The key includes the source file size/mtime and the onnxruntime version, so a
+    new model file or runtime upgrade produces a new cache entry.
+    
+    Returns:
+        str: Path under cache_dir (default: config.onnx_runtime.cache_dir)
+    """
+    cache_dir = cache_dir or config.onnx_runtime.cache_dir
+    stat = os.stat(onnx_file)
+    key = "|".join([
+        osp.abspath(onnx_file), str(stat.st_size), str(int(stat.st_mtime)),
+        onnxruntime.__version__, ",".join(providers or []),
+        str(profile['graph_optimization_level'])
+    ])
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+    stem = osp.splitext(osp.basename(onnx_file))[0]
+    return osp.join(cache_dir, f"{stem}.{profile_name}.{digest}.onnx")
+
+def _remove_stale_optimized(optimized_path):
+    """Remove older cache entries of the same model/profile"""
+    stem = osp.basename(optimized_path).rsplit('.', 2)[0]
+    for path in glob.glob(osp.join(osp.dirname(optimized_path), f"{glob.escape(stem)}.*.onnx")):
+        if path != optimized_path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def get_variant_path(onnx_file, precision):
+    """
+    Path of a precision variant next to the FP32 file (retinaface.onnx -> retinaface.int8_static.onnx)
+    """
+    if precision in (None, '', 'fp32'):
+        return onnx_file
+    if precision not in MODEL_PRECISIONS:
+        raise ValueError(f"Unknown model precision: {precision} (expected one of {MODEL_PRECISIONS})")
+    stem, ext = osp.splitext(onnx_file)
+    return f"{stem}.{precision}{ext}"
+
+def resolve_model_variant(onnx_file, precision=None):
+    """
+    Resolve the file to load for the requested precision, falling back to FP32
+    when the variant has not been generated.
+    
+    Returns:
+        str: Path to the variant, or onnx_file
+    """
+    variant = get_variant_path(onnx_file, precision)
+    if variant != onnx_file and not osp.exists(variant):
+        print(f"Model variant '{precision}' not found ({variant}), using FP32: {onnx_file}")
+        return onnx_file
+    return variant
+
 class ModelRouter:
     """
     Determines the correct model implementation based on the ONNX file structure.
     """
-    def __init__(self, onnx_file):
+    def __init__(self, onnx_file, source_file=None):
+        """
+        Args:
+            onnx_file: ONNX file to create the session from (may be a quantized variant)
+            source_file: FP32 file the variant was derived from; the model classes
+                inspect it for preprocessing constants (default: onnx_file)
+        """
         self.onnx_file = onnx_file
+        self.source_file = source_file or onnx_file
 
-    def get_model(self, **kwargs):
+    def get_model(self, profile_name=None, cache_optimized=None, **kwargs):
         """
         Returns the appropriate model implementation based on the ONNX file.
         
         Args:
+            profile_name: Session profile in config.onnx_runtime.profiles
+            cache_optimized: Reuse/persist the optimized graph (default: config.onnx_runtime.cache_optimized)
             **kwargs: Additional arguments to pass to the ONNX session
         
         Returns:
             A model object (RetinaFace or AdaFace)
         """
-        session = PickableInferenceSession(self.onnx_file, **kwargs)
+        session = self.create_session(profile_name, cache_optimized, **kwargs)
         print(f'Applied providers: {session._providers}, with options: {session._provider_options}')
         
         inputs = session.get_inputs()
@@ -48,9 +180,56 @@ class ModelRouter:
 
         # Determine model type based on output count
         if len(outputs) >= 5:
-            return RetinaFace(model_file=self.onnx_file, session=session)
+            return RetinaFace(model_file=self.source_file, session=session)
         else:
-            return AdaFace(model_file=self.onnx_file, session=session)
+            return AdaFace(model_file=self.source_file, session=session)
+
+    def create_session(self, profile_name=None, cache_optimized=None, **kwargs):
+        """
+        Create the inference session with the profile's SessionOptions.
+        
+        Khi đã có graph tối ưu trong cache, nạp trực tiếp file đó với
+        graph optimization tắt; nếu chưa có, ONNX Runtime tối ưu graph như bình
+        thường và ghi kết quả ra cache qua optimized_model_filepath.
+        
+        Returns:
+            PickableInferenceSession
+        """
+        profile_name = profile_name or config.onnx_runtime.profile
+        profile = get_session_profile(profile_name)
+        if cache_optimized is None:
+            cache_optimized = config.onnx_runtime.cache_optimized
+
+        options = build_session_options(profile)
+        if not cache_optimized or str(profile['graph_optimization_level']).lower() == 'disable':
+            return PickableInferenceSession(self.onnx_file, sess_options=options, **kwargs)
+
+        optimized_path = get_optimized_model_path(self.onnx_file, profile_name, profile, kwargs.get('providers'))
+        if osp.exists(optimized_path):
+            options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS['disable']
+            try:
+                session = PickableInferenceSession(optimized_path, sess_options=options, **kwargs)
+                print(f'Loaded optimized graph ({profile_name}): {optimized_path}')
+                return session
+            except Exception as e:
+                print(f'Cached optimized graph unusable, rebuilding: {e}')
+                options = build_session_options(profile)
+
+        os.makedirs(osp.dirname(optimized_path), exist_ok=True)
+        tmp_path = f"{optimized_path}.tmp"
+        options.optimized_model_filepath = tmp_path
+        try:
+            session = PickableInferenceSession(self.onnx_file, sess_options=options, **kwargs)
+        except Exception as e:
+            # Một số provider (TensorRT, ...) không serialize được graph đã biên dịch
+            print(f'Could not save optimized graph, loading without cache: {e}')
+            return PickableInferenceSession(self.onnx_file, sess_options=build_session_options(profile), **kwargs)
+
+        if osp.exists(tmp_path):
+            os.replace(tmp_path, optimized_path)
+            _remove_stale_optimized(optimized_path)
+            print(f'Saved optimized graph ({profile_name}): {optimized_path}')
+        return session
 
 def find_onnx_file(dir_path):
     """
@@ -64,7 +243,9 @@ def find_onnx_file(dir_path):
     """
     if not os.path.exists(dir_path):
         return None
-    paths = glob.glob("%s/*.onnx" % dir_path)
+    # Bỏ qua các biến thể đã lượng tử hóa (<tên>.<precision>.onnx)
+    paths = [p for p in glob.glob("%s/*.onnx" % dir_path)
+             if osp.basename(p).rsplit('.', 2)[-2] not in MODEL_PRECISIONS]
     if len(paths) == 0:
         return None
     paths = sorted(paths)
@@ -100,6 +281,8 @@ class ModelZoo:
         Args:
             name: Path to the ONNX file
             **kwargs: Additional arguments for model initialization
+                (providers, provider_options, profile, cache_optimized,
+                precision: 'fp32' | 'fp16' | 'int8_dynamic' | 'int8_static')
             
         Returns:
             A model object
@@ -113,10 +296,16 @@ class ModelZoo:
         if not os.path.exists(name):
             raise ValueError(f"Model file not found: {name}")
             
-        router = ModelRouter(name)
+        variant = resolve_model_variant(name, kwargs.get('precision'))
+        router = ModelRouter(variant, source_file=name)
         providers = kwargs.get('providers', get_default_providers())
         provider_options = kwargs.get('provider_options', get_default_provider_options())
-        model = router.get_model(providers=providers, provider_options=provider_options)
+        model = router.get_model(
+            profile_name=kwargs.get('profile'),
+            cache_optimized=kwargs.get('cache_optimized'),
+            providers=providers,
+            provider_options=provider_options
+        )
         return model
 
 # Create a singleton instance
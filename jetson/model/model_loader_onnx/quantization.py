@@ -0,0 +1,177 @@
+import os
+import os.path as osp
+import glob
+import random
+import tempfile
+
+import cv2
+import numpy as np
+import onnx
+from onnxruntime.quantization import (
+    CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+)
+
+from model.utils import face_align
+from utils.config_utils import config
+from .model_zoo import get_variant_path
+
+def iter_gallery(gallery_path=None, include_unknown=False):
+    """
+    Duyệt ảnh trong gallery theo cùng quy ước với FaceDatabase.process_gallery
+    (mỗi người một thư mục, ảnh .jpg/.png)
+
+    Yields:
+        (person_name, img_path)
+    """
+    gallery_path = gallery_path or config.gallery_path
+    for person_dir in sorted(glob.glob(osp.join(gallery_path, "*"))):
+        person_name = osp.basename(person_dir)
+        if not osp.isdir(person_dir) or (person_name == "Unknown" and not include_unknown):
+            continue
+        for img_path in sorted(glob.glob(osp.join(person_dir, "*.[jp][pn][g]"))):
+            yield person_name, img_path
+
+def load_gallery_images(gallery_path=None, limit=None, seed=0, include_unknown=True):
+    """
+    Load up to `limit` gallery images (random but reproducible sample)
+
+    Returns:
+        list: BGR images
+    """
+    paths = [path for _, path in iter_gallery(gallery_path, include_unknown=include_unknown)]
+    if limit and len(paths) > limit:
+        paths = random.Random(seed).sample(paths, limit)
+    images = []
+    for path in paths:
+        img = cv2.imread(path)
+        if img is not None:
+            images.append(img)
+    return images
+
+def letterbox(img, input_size):
+    """
+    Resize giữ tỉ lệ và đặt vào góc trên-trái của khung input_size,
+    giống hệt RetinaFace.detect
+
+    Returns:
+        (det_img, det_scale)
+    """
+    im_ratio = float(img.shape[0]) / img.shape[1]
+    model_ratio = float(input_size[1]) / input_size[0]
+    if im_ratio > model_ratio:
+        new_height = input_size[1]
+        new_width = int(new_height / im_ratio)
+    else:
+        new_width = input_size[0]
+        new_height = int(new_width * im_ratio)
+    det_scale = float(new_height) / img.shape[0]
+    resized_img = cv2.resize(img, (new_width, new_height))
+    det_img = np.zeros((input_size[1], input_size[0], 3), dtype=np.uint8)
+    det_img[:new_height, :new_width, :] = resized_img
+    return det_img, det_scale
+
+def detection_calibration_blobs(images, det_model, input_size=None):
+    """Preprocess gallery images exactly like RetinaFace.forward"""
+    input_size = tuple(input_size or config.det_size)
+    blobs = []
+    for img in images:
+        det_img, _ = letterbox(img, input_size)
+        blobs.append(cv2.dnn.blobFromImage(
+            det_img, 1.0 / det_model.input_std, input_size,
+            (det_model.input_mean, det_model.input_mean, det_model.input_mean), swapRB=True))
+    return blobs
+
+def recognition_calibration_blobs(images, det_model, rec_model):
+    """
+    Detect faces with the FP32 detector and build aligned crops preprocessed
+    like AdaFace.get_feat
+    """
+    blobs = []
+    for img in images:
+        bboxes, kpss = det_model.detect(img, max_num=1)
+        if bboxes.shape[0] == 0 or kpss is None:
+            continue
+        aimg = face_align.norm_crop(img, landmark=kpss[0], image_size=rec_model.input_size[0])
+        blobs.append(cv2.dnn.blobFromImage(
+            aimg, 1.0 / rec_model.input_std, rec_model.input_size,
+            (rec_model.input_mean, rec_model.input_mean, rec_model.input_mean), swapRB=True))
+    return blobs
+
+class BlobCalibrationReader(CalibrationDataReader):
+    """CalibrationDataReader feeding preprocessed blobs one by one"""
+
+    def __init__(self, blobs, input_name):
+        self.blobs = blobs
+        self.input_name = input_name
+        self._iter = iter(self.blobs)
+
+    def get_next(self):
+        blob = next(self._iter, None)
+        return None if blob is None else {self.input_name: blob}
+
+    def rewind(self):
+        self._iter = iter(self.blobs)
+
+def _preprocess(src):
+    """Run onnxruntime's shape inference/optimization pre-pass when available"""
+    try:
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+    except ImportError:
+        return src, None
+    fd, tmp_path = tempfile.mkstemp(suffix=".onnx")
+    os.close(fd)
+    try:
+        quant_pre_process(src, tmp_path, skip_symbolic_shape=True)
+        return tmp_path, tmp_path
+    except Exception as e:
+        print(f"Quantization pre-process skipped: {e}")
+        os.remove(tmp_path)
+        return src, None
+
+def quantize_fp16(src, dst=None):
+    """
+    Convert weights/activations to FP16, keeping FP32 inputs/outputs so the
+    variant is a drop-in replacement (requires onnxconverter-common)
+    """
+    from onnxconverter_common import float16
+    dst = dst or get_variant_path(src, "fp16")
+    model = float16.convert_float_to_float16(onnx.load(src), keep_io_types=True)
+    onnx.save(model, dst)
+    return dst
+
+def quantize_int8_dynamic(src, dst=None, per_channel=False):
+    """Weight-only INT8 with activations quantized at runtime (no calibration data)"""
+    dst = dst or get_variant_path(src, "int8_dynamic")
+    model_input, tmp_path = _preprocess(src)
+    try:
+        quantize_dynamic(model_input, dst, weight_type=QuantType.QInt8, per_channel=per_channel)
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+    return dst
+
+def quantize_int8_static(src, blobs, dst=None, per_channel=True):
+    """
+    Static INT8 (QDQ) with activation ranges calibrated on `blobs`
+
+    Args:
+        src: FP32 ONNX file
+        blobs: Preprocessed calibration inputs (see *_calibration_blobs)
+    """
+    if not blobs:
+        raise ValueError("No calibration data: gallery has no usable images")
+    dst = dst or get_variant_path(src, "int8_static")
+    input_name = onnx.load(src, load_external_data=False).graph.input[0].name
+    model_input, tmp_path = _preprocess(src)
+    try:
+        quantize_static(
+            model_input, dst, BlobCalibrationReader(blobs, input_name),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=per_channel
+        )
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+    return dst
@@ -1,6 +1,5 @@
 import cv2
 import numpy as np
-from skimage import transform as trans
 
  
 arcface_dst = np.array(
@@ -8,8 +7,45 @@ arcface_dst = np.array(
      [41.5493, 92.3655], [70.7299, 92.2041]],
     dtype=np.float32)
 
-def estimate_norm(lmk, image_size=112,mode='adaface'):
-    assert lmk.shape == (5, 2)
+def umeyama(src, dst):
+    """
+    Ước lượng phép biến đổi similarity (xoay, tỉ lệ, tịnh tiến) theo bình phương
+    tối thiểu từ src sang dst (Umeyama 1991), cùng kết quả với
+    skimage.transform.SimilarityTransform.estimate nhưng chạy cho cả batch.
+
+    Args:
+        src: Điểm nguồn (K, 2) hoặc batch (N, K, 2)
+        dst: Điểm đích (K, 2), dùng chung cho cả batch
+
+    Returns:
+        Ma trận affine (2, 3) hoặc (N, 2, 3)
+    """
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    single = src.ndim == 2
+    if single:
+        src = src[None]
+    num = src.shape[1]
+
+    src_mean = src.mean(axis=1)
+    dst_mean = dst.mean(axis=0)
+    src_demean = src - src_mean[:, None, :]
+    dst_demean = dst - dst_mean
+
+    # Ma trận hiệp phương sai (N, 2, 2) và SVD cho cả batch
+    A = np.einsum('kd,nke->nde', dst_demean, src_demean) / num
+    d = np.ones((src.shape[0], 2))
+    d[np.linalg.det(A) < 0, 1] = -1
+    U, S, V = np.linalg.svd(A)
+    R = np.einsum('nij,nj,njk->nik', U, d, V)
+
+    scale = (S * d).sum(axis=1) / src_demean.var(axis=1).sum(axis=1)
+    M = np.empty((src.shape[0], 2, 3))
+    M[:, :, :2] = R * scale[:, None, None]
+    M[:, :, 2] = dst_mean - np.einsum('nij,nj->ni', M[:, :, :2], src_mean)
+    return M[0] if single else M
+
+def _norm_dst(image_size):
     assert image_size%112==0 or image_size%128==0
     if image_size%112==0:
         ratio = float(image_size)/112.0
@@ -19,10 +55,17 @@ def estimate_norm(lmk, image_size=112,mode='adaface'):
         diff_x = 8.0*ratio
     dst = arcface_dst * ratio
     dst[:,0] += diff_x
-    tform = trans.SimilarityTransform()
-    tform.estimate(lmk, dst)
-    M = tform.params[0:2, :]
-    return M
+    return dst
+
+def estimate_norm(lmk, image_size=112,mode='adaface'):
+    assert lmk.shape == (5, 2)
+    return umeyama(lmk, _norm_dst(image_size))
+
+def estimate_norm_many(lmks, image_size=112):
+    """Ma trận align (N, 2, 3) cho batch landmarks (N, 5, 2) trong một lần tính"""
+    lmks = np.asarray(lmks)
+    assert lmks.ndim == 3 and lmks.shape[1:] == (5, 2)
+    return umeyama(lmks, _norm_dst(image_size))
 
 def norm_crop(img, landmark, image_size=112, mode='arcface'):
     M = estimate_norm(landmark, image_size, mode)
@@ -34,6 +77,26 @@ def norm_crop2(img, landmark, image_size=112, mode='arcface'):
     warped = cv2.warpAffine(img, M, (image_size, image_size), borderValue=0.0)
     return warped, M
 
+def norm_crop_many(imgs, landmarks, image_size=112):
+    """
+    Align nhiều khuôn mặt thành một stack (N, image_size, image_size, 3) cho AdaFace.get_feat
+
+    Args:
+        imgs: Một ảnh chứa mọi khuôn mặt, hoặc list ảnh (mỗi khuôn mặt một ảnh)
+        landmarks: (N, 5, 2)
+    """
+    landmarks = np.asarray(landmarks)
+    if len(landmarks) == 0:
+        return np.zeros((0, image_size, image_size, 3), dtype=np.uint8)
+    if isinstance(imgs, np.ndarray):
+        imgs = [imgs] * len(landmarks)
+    assert len(imgs) == len(landmarks)
+    Ms = estimate_norm_many(landmarks, image_size)
+    out = np.zeros((len(landmarks), image_size, image_size, imgs[0].shape[2]), dtype=imgs[0].dtype)
+    for i, (img, M) in enumerate(zip(imgs, Ms)):
+        cv2.warpAffine(img, M, (image_size, image_size), dst=out[i], borderValue=0.0)
+    return out
+
 def square_crop(im, S):
     if im.shape[0] > im.shape[1]:
         height = S
@@ -53,15 +116,14 @@ def transform(data, center, output_size, scale, rotation):
     scale_ratio = scale
     rot = float(rotation) * np.pi / 180.0
     #translation = (output_size/2-center[0]*scale_ratio, output_size/2-center[1]*scale_ratio)
-    t1 = trans.SimilarityTransform(scale=scale_ratio)
     cx = center[0] * scale_ratio
     cy = center[1] * scale_ratio
-    t2 = trans.SimilarityTransform(translation=(-1 * cx, -1 * cy))
-    t3 = trans.SimilarityTransform(rotation=rot)
-    t4 = trans.SimilarityTransform(translation=(output_size / 2,
-                                                output_size / 2))
-    t = t1 + t2 + t3 + t4
-    M = t.params[0:2]
+    # scale -> dời tâm về gốc -> xoay -> dời ra giữa ảnh đích
+    cos, sin = np.cos(rot), np.sin(rot)
+    M = np.array([
+        [scale_ratio * cos, -scale_ratio * sin, -cx * cos + cy * sin + output_size / 2],
+        [scale_ratio * sin, scale_ratio * cos, -cx * sin - cy * cos + output_size / 2]
+    ])
     cropped = cv2.warpAffine(data,
                              M, (output_size, output_size),
                              borderValue=0.0)
@@ -0,0 +1,52 @@
+"""
+Chạy ZenSys ở chế độ headless (không Qt) cho thiết bị không có màn hình:
+camera, RFID, xác thực và gửi điểm danh như bản GUI, cùng API điều khiển local
+(xem config.service).
+
+Usage:
+    python service.py
+    python service.py --port 8765 --unix-socket /run/zensys/control.sock
+    curl http://127.0.0.1:8765/status
+"""
+import os
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Headless ZenSys service with a local control API")
+    parser.add_argument("--host", help="Control API host (default: service.host)")
+    parser.add_argument("--port", type=int, help="Control API port (default: service.port)")
+    parser.add_argument("--unix-socket", help="Also serve the API on this Unix socket")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    from utils.config_utils import config
+    from src.log.system_logger import SystemLogger
+    from src.core.service.headless import HeadlessService
+
+    # Console/file handler của logger "zensys" chạy qua queue (log "zensys.service" đi theo)
+    SystemLogger()
+
+    settings = config.service
+    if args.host:
+        settings.host = args.host
+    if args.port is not None:
+        settings.port = args.port
+    if args.unix_socket:
+        settings.unix_socket = args.unix_socket
+
+    HeadlessService(settings).run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
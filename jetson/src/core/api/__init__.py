@@ -1,5 +1,7 @@
 from src.core.api.config import APIConfig
 from src.core.api.result import Result
 from src.core.api.attendance_service import AttendanceService
+from src.core.api.schedule_cache import ScheduleCache
+from src.core.api.identity_sync import IdentitySync
 
-__all__ = ['APIConfig', 'Result', 'AttendanceService'] 
\ No newline at end of file
+__all__ = ['APIConfig', 'Result', 'AttendanceService', 'ScheduleCache', 'IdentitySync'] 
\ No newline at end of file
@@ -1,5 +1,4 @@
 import requests
-import json
 from typing import Dict, Any, Optional
 import logging
 
@@ -12,7 +11,7 @@ class AttendanceService:
     def __init__(self):
         self.api_endpoint = APIConfig.API_ENDPOINT
         self.headers = APIConfig.get_headers()
-        self.logger = logging.getLogger("AttendanceService")
+        self.logger = logging.getLogger("zensys.api")
     
     def send_attendance(self, attendance_data: Dict[str, Any]) -> Result:
         """
@@ -46,20 +45,8 @@ class AttendanceService:
             print(f"DEBUG API - Headers: {self.headers}")
             print(f"DEBUG API - Using HTTP Method: PUT")
             
-            # Loại bỏ vector và ảnh để in log gọn hơn
-            debug_data = attendance_data.copy()
-            if "faceVectorList" in debug_data and debug_data["faceVectorList"]:
-                vector_count = len(debug_data["faceVectorList"])
-                vector_type = debug_data["faceVectorList"][0]["vectorType"]
-                vector_score = debug_data["faceVectorList"][0]["score"]
-                debug_data["faceVectorList"] = f"[{vector_count} vectors of type '{vector_type}', score: {vector_score}]"
-            
-            if "checkInFace" in debug_data and debug_data["checkInFace"]:
-                debug_data["checkInFace"] = "data:image/jpeg;base64,...[truncated]"
-            
-            # Log the request
-            self.logger.info(f"Sending attendance data: {json.dumps(debug_data)}")
-            print(f"DEBUG API - Sending data: {json.dumps(debug_data, indent=2)}")
+            # Log the request (vector và ảnh được tóm tắt bởi formatter)
+            self.logger.info("Sending attendance data: %s", attendance_data)
             
             # Send data to server using PUT method
             response = requests.put(
@@ -76,7 +63,7 @@ class AttendanceService:
             if response.status_code == 200:
                 try:
                     response_data = response.json()
-                    print(f"DEBUG API - Response data: {json.dumps(response_data, indent=2)}")
+                    self.logger.debug("Response data: %s", response_data)
                     return Result.success_result(
                         data=response_data,
                         message="Attendance sent successfully"
@@ -93,7 +80,7 @@ class AttendanceService:
                 try:
                     error_data = response.json()
                     error_message = error_data.get('message', error_message)
-                    print(f"DEBUG API - Error response: {json.dumps(error_data, indent=2)}")
+                    self.logger.debug("Error response: %s", error_data)
                 except Exception as e:
                     print(f"DEBUG API - Non-JSON error response: {response.text}")
                     error_message = f"{error_message}, Response: {response.text}"
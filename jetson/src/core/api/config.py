@@ -28,6 +28,25 @@ class APIConfig:
         print(f"WARNING: API access token is missing. API calls will likely fail.")
         print(f"Please update the ACCESS_TOKEN value in .env file.")
     
+    # URL gốc của API (vd: http://fams.io.vn/api-nodejs); mặc định suy ra từ API_CHECK_ATTENDANCE
+    API_BASE_URL = os.getenv('API_BASE_URL', '')
+    
+    @classmethod
+    def get_base_url(cls):
+        """Lấy URL gốc của API, bỏ phần /attendance/check-in khỏi API_CHECK_ATTENDANCE nếu cần"""
+        if cls.API_BASE_URL:
+            return cls.API_BASE_URL.rstrip('/')
+        endpoint = cls.API_ENDPOINT.rstrip('/')
+        suffix = '/attendance/check-in'
+        if endpoint.endswith(suffix):
+            return endpoint[:-len(suffix)]
+        return endpoint.rsplit('/', 1)[0] if '/' in endpoint else endpoint
+    
+    @classmethod
+    def build_url(cls, path):
+        """Ghép path (vd: "schedules/all") vào URL gốc"""
+        return f"{cls.get_base_url()}/{path.lstrip('/')}"
+    
     # Request headers
     @classmethod
     def get_headers(cls):
@@ -0,0 +1,152 @@
+import time
+import logging
+import threading
+
+import requests
+
+from src.core.api.config import APIConfig
+
+SYNC_PATH = "rfid/sync"
+RFID_CURSOR = "rfid_cursor"
+USER_CURSOR = "user_cursor"
+FULL_SYNC_AT = "full_sync_at"
+
+
+def card_row(record):
+    """Bản ghi RFID của server -> (dòng cards, thẻ còn hiệu lực không)"""
+    card_id = str(record.get("RFID_ID") or record.get("rfidId") or "")
+    user_id = str(record.get("UserID") or record.get("userId") or "")
+    active = record.get("isActive", True) and record.get("Status", "Active") == "Active"
+    return {"card_id": card_id, "user_id": user_id, "updated_at": record.get("updatedAt")}, bool(active)
+
+
+def user_row(record):
+    """Bản ghi UserAccount của server -> dòng users"""
+    return {
+        "user_id": str(record["userId"]),
+        "display_name": record.get("fullName") or record.get("username"),
+        "role": record.get("role"),
+        "active": bool(record.get("isActive", True)),
+        "updated_at": record.get("updatedAt")
+    }
+
+
+class IdentitySync:
+    """
+    Đồng bộ thẻ RFID và tài khoản người dùng từ server vào IdentityStore theo kiểu
+    delta: mỗi lần chỉ tải bản ghi đổi sau cursor (updatedAt, _id) của lần trước.
+    Cursor được lưu trong cùng transaction với dữ liệu. Bản ghi bị xóa hẳn trên
+    server không xuất hiện trong delta nên định kỳ chạy một lần đồng bộ đầy đủ.
+    """
+
+    def __init__(self, store, refresh_interval=300, full_sync_interval=86400, page_size=500, fetcher=None):
+        """
+        Args:
+            store: IdentityStore
+            refresh_interval: Số giây giữa các lần đồng bộ delta
+            full_sync_interval: Số giây giữa các lần đồng bộ đầy đủ (xóa thẻ không còn trên server)
+            page_size: Số bản ghi tối đa mỗi request
+            fetcher: Hàm fetcher(path, params) -> dict thay cho HTTP (dùng cho test)
+        """
+        self.store = store
+        self.refresh_interval = float(refresh_interval)
+        self.full_sync_interval = float(full_sync_interval)
+        self.page_size = int(page_size)
+        self.fetcher = fetcher or self._http_get
+        self.logger = logging.getLogger("zensys.identity")
+        self.synced_at = 0.0
+        self.last_error = None
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _http_get(self, path, params=None):
+        response = requests.get(APIConfig.build_url(path), headers=APIConfig.get_headers(),
+                                params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    def full_sync_due(self):
+        last = float(self.store.get_cursor(FULL_SYNC_AT) or 0)
+        return time.time() - last >= self.full_sync_interval
+
+    def sync(self, full=False):
+        """
+        Tải các thay đổi từ server, từng trang một
+
+        Args:
+            full: Bỏ qua cursor, tải lại toàn bộ và xóa thẻ không còn trên server
+
+        Returns:
+            bool: True nếu đồng bộ thành công
+        """
+        rfid_cursor = None if full else self.store.get_cursor(RFID_CURSOR)
+        user_cursor = None if full else self.store.get_cursor(USER_CURSOR)
+        seen_cards = set()
+        changes = 0
+        try:
+            while True:
+                params = {"limit": self.page_size}
+                if rfid_cursor:
+                    params["rfidSince"] = rfid_cursor
+                if user_cursor:
+                    params["userSince"] = user_cursor
+                data = self.fetcher(SYNC_PATH, params).get("data", {})
+
+                cards, removed = [], []
+                for record in data.get("cards", []):
+                    row, active = card_row(record)
+                    if not row["card_id"]:
+                        continue
+                    if active:
+                        cards.append(row)
+                        seen_cards.add(row["card_id"])
+                    else:
+                        removed.append(row["card_id"])
+                users = [user_row(record) for record in data.get("users", []) if record.get("userId")]
+
+                rfid_cursor = data.get("rfidCursor") or rfid_cursor
+                user_cursor = data.get("userCursor") or user_cursor
+                cursors = {RFID_CURSOR: rfid_cursor, USER_CURSOR: user_cursor}
+                self.store.apply(cards=cards, users=users, removed_cards=removed,
+                                 cursors={k: v for k, v in cursors.items() if v})
+                changes += len(cards) + len(users) + len(removed)
+                if not data.get("hasMore"):
+                    break
+        except Exception as e:
+            self.last_error = str(e)
+            self.logger.warning("Failed to sync identities: %s", e)
+            return False
+
+        if full:
+            stale = [card_id for card_id in self.store.card_ids() if card_id not in seen_cards]
+            self.store.apply(removed_cards=stale, cursors={FULL_SYNC_AT: str(time.time())})
+            changes += len(stale)
+        self.synced_at = time.time()
+        self.last_error = None
+        if changes:
+            self.logger.info("Identity sync%s: %s changes, %s cards", " (full)" if full else "", changes,
+                             len(self.store))
+        return True
+
+    def start(self):
+        """Bắt đầu luồng nền đồng bộ định kỳ"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._sync_loop, name="IdentitySync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Dừng luồng đồng bộ"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _sync_loop(self):
+        while not self._stop_event.is_set():
+            ok = self.sync(full=self.full_sync_due())
+            # Thử lại sớm hơn khi lỗi mạng, nhưng không dày hơn 60 giây
+            delay = self.refresh_interval if ok else min(self.refresh_interval, 60.0)
+            self._stop_event.wait(delay)
@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from src.core.api.config import APIConfig
+
+# Kết quả kiểm tra lịch học
+SESSION_ACTIVE = "ACTIVE"
+NO_SCHEDULE = "NO_SCHEDULE"
+SCHEDULE_UNKNOWN = "UNKNOWN"
+
+
+def _parse_time(value: str) -> Optional[int]:
+    """Convert "HH:MM" or "HH:MM:SS" to minutes since midnight"""
+    if not value:
+        return None
+    try:
+        parts = str(value).split(":")
+        return int(parts[0]) * 60 + int(parts[1])
+    except (ValueError, IndexError):
+        return None
+
+
+class ScheduleCache:
+    """
+    Bộ đệm thời khóa biểu (ClassSchedule) và khung giờ (ScheduleFormat) tại thiết bị.
+    Lịch được tải định kỳ từ server và lưu xuống disk để kiểm tra tại chỗ xem
+    hiện tại có tiết học trong phòng của thiết bị hay không.
+    """
+
+    def __init__(self, classroom_id=None, cache_file=None, refresh_interval=900, max_age=21600,
+                 days_ahead=7, early_minutes=15, late_minutes=0, fetcher=None):
+        """
+        Initialize the cache
+
+        Args:
+            classroom_id: Phòng học của thiết bị (None = tất cả lịch)
+            cache_file: File JSON lưu cache giữa các lần khởi động
+            refresh_interval: Số giây giữa các lần tải lại
+            max_age: Số giây tối đa cache được coi là còn mới
+            days_ahead: Số ngày lịch được tải trước
+            early_minutes: Số phút cho phép check-in trước giờ bắt đầu
+            late_minutes: Số phút cho phép check-in sau giờ kết thúc
+            fetcher: Hàm fetcher(path, params) -> dict thay cho HTTP (dùng cho test)
+        """
+        self.classroom_id = classroom_id
+        self.cache_file = cache_file
+        self.refresh_interval = float(refresh_interval)
+        self.max_age = float(max_age)
+        self.days_ahead = int(days_ahead)
+        self.early_minutes = int(early_minutes)
+        self.late_minutes = int(late_minutes)
+        self.fetcher = fetcher or self._http_get
+        self.logger = logging.getLogger("zensys.schedule")
+
+        self._lock = threading.Lock()
+        self.schedules: List[Dict[str, Any]] = []
+        self.slots: Dict[int, Dict[str, Any]] = {}
+        self.fetched_at = 0.0
+        self.last_error = None
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.load()
+
+    def _http_get(self, path, params=None):
+        response = requests.get(APIConfig.build_url(path), headers=APIConfig.get_headers(),
+                                params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    def refresh(self) -> bool:
+        """
+        Tải lại thời khóa biểu và khung giờ từ server
+
+        Returns:
+            bool: True nếu tải thành công
+        """
+        today = datetime.now().date()
+        params = {
+            "fromDate": today.isoformat(),
+            "toDate": (today + timedelta(days=self.days_ahead)).isoformat()
+        }
+        if self.classroom_id is not None:
+            params["classroomId"] = self.classroom_id
+
+        try:
+            schedules = self.fetcher("schedules/all", params).get("data", [])
+            slots = self.fetcher("schedule-formats", {"showInactive": "true"}).get("data", [])
+        except Exception as e:
+            self.last_error = str(e)
+            self.logger.warning("Failed to refresh schedule cache: %s", e)
+            return False
+
+        with self._lock:
+            self.schedules = [s for s in schedules if self._matches_classroom(s)]
+            self.slots = {int(s["slotId"]): s for s in slots if s.get("slotId") is not None}
+            self.fetched_at = time.time()
+            self.last_error = None
+
+        self.save()
+        self.logger.info("Schedule cache refreshed: %s sessions, %s slots", len(self.schedules), len(self.slots))
+        return True
+
+    def _matches_classroom(self, schedule):
+        if self.classroom_id is None:
+            return True
+        return str(schedule.get("classroomId")) == str(self.classroom_id)
+
+    def load(self) -> bool:
+        """Nạp cache từ disk (nếu có)"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return False
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning("Failed to load schedule cache: %s", e)
+            return False
+
+        with self._lock:
+            self.schedules = data.get("schedules", [])
+            self.slots = {int(k): v for k, v in data.get("slots", {}).items()}
+            self.fetched_at = float(data.get("fetched_at", 0))
+        return True
+
+    def save(self):
+        """Ghi cache xuống disk (file tạm rồi rename)"""
+        if not self.cache_file:
+            return
+        with self._lock:
+            data = {
+                "fetched_at": self.fetched_at,
+                "classroom_id": self.classroom_id,
+                "schedules": self.schedules,
+                "slots": {str(k): v for k, v in self.slots.items()}
+            }
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            self.logger.warning("Failed to save schedule cache: %s", e)
+
+    def age(self) -> float:
+        """Số giây kể từ lần tải thành công cuối cùng"""
+        return time.time() - self.fetched_at if self.fetched_at else float("inf")
+
+    def is_fresh(self) -> bool:
+        """Cache còn trong thời hạn max_age"""
+        return self.age() <= self.max_age
+
+    def _session_window(self, schedule):
+        """Return (date string, start minutes, end minutes) for a cached session"""
+        session_date = str(schedule.get("sessionDate") or schedule.get("SessionDate") or "")[:10]
+        slot = self.slots.get(schedule.get("slotId")) or self.slots.get(schedule.get("SlotID")) or {}
+        start = _parse_time(schedule.get("startTime") or slot.get("startTime"))
+        end = _parse_time(schedule.get("endTime") or slot.get("endTime"))
+        return session_date, start, end
+
+    def find_active_session(self, at: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Tìm tiết học đang diễn ra tại thời điểm `at`
+
+        Args:
+            at: Thời điểm kiểm tra (mặc định: hiện tại)
+
+        Returns:
+            dict: Lịch học đang diễn ra, hoặc None
+        """
+        at = at or datetime.now()
+        day = at.date().isoformat()
+        minute = at.hour * 60 + at.minute
+
+        with self._lock:
+            schedules = list(self.schedules)
+
+        for schedule in schedules:
+            session_date, start, end = self._session_window(schedule)
+            if session_date != day or start is None or end is None:
+                continue
+            if start - self.early_minutes <= minute <= end + self.late_minutes:
+                return schedule
+        return None
+
+    def check(self, at: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Kiểm tra tại chỗ xem có tiết học không
+
+        Returns:
+            dict: {"status": ACTIVE | NO_SCHEDULE | UNKNOWN, "fresh": bool,
+                   "scheduleId": ..., "session": ..., "age": giây}
+        """
+        fresh = self.is_fresh()
+        session = self.find_active_session(at) if self.fetched_at else None
+
+        if session is not None:
+            status = SESSION_ACTIVE
+        elif self.fetched_at:
+            status = NO_SCHEDULE
+        else:
+            status = SCHEDULE_UNKNOWN
+
+        return {
+            "status": status,
+            "fresh": fresh,
+            "scheduleId": session.get("scheduleId") if session else None,
+            "session": session,
+            "age": self.age()
+        }
+
+    def start(self):
+        """Bắt đầu luồng nền tải lại cache định kỳ"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name="ScheduleCache", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Dừng luồng tải lại"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _refresh_loop(self):
+        while not self._stop_event.is_set():
+            ok = self.refresh()
+            # Thử lại sớm hơn khi lỗi mạng, nhưng không dày hơn 60 giây
+            delay = self.refresh_interval if ok else min(self.refresh_interval, 60.0)
+            self._stop_event.wait(delay)
@@ -0,0 +1,10 @@
+from src.core.capture.frame_source import (
+    FrameSource, OpenCVSource, ImageFolderSource, create_frame_source, detect_source_type
+)
+from src.core.capture.frame_pool import FramePool, PooledFrame
+from src.core.capture.grabber import LatestFrameGrabber
+from src.core.capture.preview import PreviewRenderer, render_preview
+
+__all__ = ['FrameSource', 'OpenCVSource', 'ImageFolderSource', 'create_frame_source',
+           'detect_source_type', 'FramePool', 'PooledFrame', 'LatestFrameGrabber',
+           'PreviewRenderer', 'render_preview']
@@ -0,0 +1,103 @@
+import threading
+
+import numpy as np
+
+from src.log.metrics import get_metrics
+
+class PooledFrame:
+    """
+    Buffer frame lấy từ FramePool, có đếm tham chiếu. Ai giữ frame quá thời
+    điểm nhận được thì retain(), dùng xong thì release(); khi không còn ai giữ,
+    buffer quay về pool để luồng đọc camera ghi frame sau vào đó.
+    """
+
+    __slots__ = ("array", "_pool", "_refs")
+
+    def __init__(self, array, pool):
+        self.array = array
+        self._pool = pool
+        self._refs = 1
+
+    @property
+    def refs(self):
+        return self._refs
+
+    def retain(self):
+        with self._pool._lock:
+            if self._refs <= 0:
+                raise RuntimeError("retain() on a released frame")
+            self._refs += 1
+        return self
+
+    def release(self):
+        with self._pool._lock:
+            if self._refs <= 0:
+                raise RuntimeError("release() called more times than retain()")
+            self._refs -= 1
+            if self._refs == 0:
+                self._pool._recycle(self)
+
+class FramePool:
+    """
+    Pool buffer frame dùng lại giữa các frame để luồng camera/preview không cấp
+    phát mảng mới mỗi frame. Buffer có cùng shape/dtype; khi shape đổi (camera
+    kết nối lại với độ phân giải khác) các buffer cũ bị bỏ. Hết buffer rảnh thì
+    cấp phát thêm (đếm ở metric frame_pool_allocations) chứ không chặn.
+    """
+
+    def __init__(self, name="frames", capacity=6, metrics=None):
+        """
+        Args:
+            name: Nhãn pool trong metrics
+            capacity: Số buffer rảnh tối đa được giữ lại
+            metrics: MetricsRegistry (mặc định: get_metrics())
+        """
+        self.name = name
+        self.capacity = capacity
+        self.metrics = metrics or get_metrics()
+        self._lock = threading.Lock()
+        self._free = []
+        self._spec = None  # (shape, dtype) của buffer trong pool
+        self.allocations = 0
+        self.reuses = 0
+        self._labels = {"pool": name}
+        self.metrics.register_gauge("frame_pool_free", lambda: len(self._free), self._labels)
+
+    def acquire(self, shape, dtype=np.uint8):
+        """
+        Lấy một buffer (nội dung cũ, không được xóa) với refcount 1
+
+        Returns:
+            PooledFrame
+        """
+        spec = (tuple(shape), np.dtype(dtype))
+        with self._lock:
+            if spec != self._spec:
+                self._spec = spec
+                self._free.clear()
+            if self._free:
+                self.reuses += 1
+                frame = self._free.pop()
+                frame._refs = 1
+                return frame
+            self.allocations += 1
+        self.metrics.inc("frame_pool_allocations", labels=self._labels)
+        return PooledFrame(np.empty(spec[0], dtype=spec[1]), self)
+
+    def adopt(self, array):
+        """
+        Bọc mảng cấp phát ở nơi khác (vd decoder không ghi được vào buffer có sẵn)
+        để nó vào pool khi được release
+        """
+        with self._lock:
+            self._spec = (array.shape, array.dtype)
+        return PooledFrame(array, self)
+
+    def _recycle(self, frame):
+        """Gọi với _lock đang giữ"""
+        if (frame.array.shape, frame.array.dtype) == self._spec and len(self._free) < self.capacity:
+            self._free.append(frame)
+
+    def stats(self):
+        with self._lock:
+            return {"free": len(self._free), "allocations": self.allocations, "reuses": self.reuses}
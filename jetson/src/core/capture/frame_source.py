@@ -0,0 +1,208 @@
+import os
+import sys
+import glob
+
+import cv2
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+SOURCE_TYPES = ("device", "file", "rtsp", "folder")
+
+class FrameSource:
+    """
+    Nguồn frame dùng chung cho camera, file video, RTSP và thư mục ảnh.
+    read() có cùng quy ước với cv2.VideoCapture.read(): (ok, frame)
+    """
+
+    # True: nguồn phát theo thời gian thực (camera, RTSP), không cần giới hạn tốc độ đọc
+    live = True
+
+    def open(self):
+        raise NotImplementedError
+
+    def read(self):
+        raise NotImplementedError
+
+    def read_into(self, out=None):
+        """
+        Như read() nhưng ghi vào buffer `out` nếu nguồn hỗ trợ. Frame trả về có thể
+        là mảng khác (nguồn không ghi được vào out, hoặc out sai kích thước).
+        """
+        return self.read()
+
+    def release(self):
+        pass
+
+    def is_opened(self):
+        return False
+
+    @property
+    def fps(self):
+        return None
+
+    def describe(self):
+        return self.__class__.__name__
+
+class OpenCVSource(FrameSource):
+    """
+    Nguồn qua cv2.VideoCapture: camera V4L2 (chỉ số thiết bị hoặc /dev/videoN),
+    file video hoặc luồng RTSP/HTTP
+    """
+
+    def __init__(self, source, kind="device", width=None, height=None, fps=None,
+                 fourcc=None, buffer_size=None):
+        """
+        Args:
+            source: Chỉ số camera, đường dẫn file hoặc URL
+            kind: "device" | "file" | "rtsp"
+            width, height, fps: Độ phân giải và FPS yêu cầu (chỉ áp dụng cho camera)
+            fourcc: Định dạng pixel camera, vd "MJPG" hoặc "YUYV"
+            buffer_size: Số frame driver giữ trong buffer (1 = độ trễ thấp nhất)
+        """
+        self.source = source
+        self.kind = kind
+        self.live = kind != "file"
+        self.width = width
+        self.height = height
+        self.requested_fps = fps
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.cap = None
+
+    def _backend(self):
+        if self.kind == "device" and sys.platform.startswith("linux"):
+            return cv2.CAP_V4L2
+        if self.kind == "rtsp":
+            return cv2.CAP_FFMPEG
+        return cv2.CAP_ANY
+
+    def open(self):
+        self.release()
+        source = self.source
+        if self.kind == "device" and isinstance(source, str) and source.isdigit():
+            source = int(source)
+        self.cap = cv2.VideoCapture(source, self._backend())
+        if not self.cap.isOpened() and self.kind == "device":
+            # Một số driver không hỗ trợ V4L2 trực tiếp
+            self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            return False
+
+        if self.kind == "device":
+            # FOURCC phải đặt trước độ phân giải với phần lớn camera UVC
+            if self.fourcc:
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc[:4].ljust(4)))
+            if self.width:
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            if self.height:
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            if self.requested_fps:
+                self.cap.set(cv2.CAP_PROP_FPS, self.requested_fps)
+        if self.buffer_size and self.kind != "file":
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        return True
+
+    def read(self):
+        if self.cap is None:
+            return False, None
+        return self.cap.read()
+
+    def read_into(self, out=None):
+        if self.cap is None:
+            return False, None
+        # VideoCapture ghi thẳng vào out khi cùng kích thước, không cấp phát frame mới
+        return self.cap.read(out) if out is not None else self.cap.read()
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def is_opened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    @property
+    def fps(self):
+        if self.cap is None:
+            return self.requested_fps
+        return self.cap.get(cv2.CAP_PROP_FPS) or self.requested_fps
+
+    def describe(self):
+        if self.cap is None:
+            return f"{self.kind}:{self.source} (closed)"
+        w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        code = int(self.cap.get(cv2.CAP_PROP_FOURCC))
+        fourcc = "".join(chr((code >> 8 * i) & 0xFF) for i in range(4)) if code > 0 else "-"
+        return f"{self.kind}:{self.source} {w}x{h}@{self.fps or 0:.0f} {fourcc.strip()}"
+
+class ImageFolderSource(FrameSource):
+    """Thư mục ảnh (sắp xếp theo tên), dùng để thử pipeline không cần camera"""
+
+    live = False
+
+    def __init__(self, folder, fps=30, loop=False):
+        self.folder = folder
+        self.requested_fps = fps
+        self.loop = loop
+        self.paths = []
+        self._index = 0
+
+    def open(self):
+        self.paths = sorted(p for p in glob.glob(os.path.join(self.folder, "**", "*"), recursive=True)
+                            if p.lower().endswith(IMAGE_EXTENSIONS))
+        self._index = 0
+        return bool(self.paths)
+
+    def read(self):
+        while self._index < len(self.paths) or (self.loop and self.paths):
+            if self._index >= len(self.paths):
+                self._index = 0
+            frame = cv2.imread(self.paths[self._index])
+            self._index += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def release(self):
+        self.paths = []
+
+    def is_opened(self):
+        return bool(self.paths)
+
+    @property
+    def fps(self):
+        return self.requested_fps
+
+    def describe(self):
+        return f"folder:{self.folder} ({len(self.paths)} images)"
+
+def detect_source_type(source):
+    """Đoán loại nguồn từ giá trị `source` trong config"""
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return "device"
+    text = str(source)
+    if "://" in text:
+        return "rtsp"
+    if text.startswith("/dev/video"):
+        return "device"
+    if os.path.isdir(text):
+        return "folder"
+    return "file"
+
+def create_frame_source(settings):
+    """
+    Tạo FrameSource từ config.camera (hoặc SimpleNamespace tương tự)
+
+    Raises:
+        ValueError: Nếu settings.type không hợp lệ
+    """
+    kind = settings.type if settings.type and settings.type != "auto" else detect_source_type(settings.source)
+    if kind not in SOURCE_TYPES:
+        raise ValueError(f"Unknown camera source type '{kind}', expected one of {SOURCE_TYPES}")
+    if kind == "folder":
+        return ImageFolderSource(settings.source, fps=settings.fps, loop=settings.loop)
+    return OpenCVSource(
+        settings.source, kind=kind,
+        width=settings.width, height=settings.height, fps=settings.fps,
+        fourcc=settings.fourcc, buffer_size=settings.buffer_size
+    )
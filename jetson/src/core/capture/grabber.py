@@ -0,0 +1,209 @@
+import time
+import threading
+
+from src.log.metrics import get_metrics
+from src.core.capture.frame_pool import FramePool
+
+class LatestFrameGrabber:
+    """
+    Đọc frame liên tục trong luồng nền và chỉ giữ frame mới nhất, để người dùng
+    (luồng xử lý, UI) không bao giờ nhận frame cũ đang nằm trong buffer driver.
+
+    - Nguồn live (camera, RTSP): đọc nhanh nhất có thể, tự kết nối lại khi mất tín hiệu
+    - Nguồn file/thư mục: phát theo FPS của nguồn (pace=True), có thể lặp lại
+
+    Frame được đọc vào buffer của FramePool; frame mới nhất do grabber giữ một
+    tham chiếu. read_frame()/latest_frame() trả về PooledFrame đã retain cho
+    người dùng (phải release); read()/latest() trả về bản sao.
+    """
+
+    def __init__(self, source, pace=None, loop=False, reconnect_delay=2.0, metrics=None, pool=None):
+        """
+        Args:
+            source: FrameSource
+            pace: Giới hạn tốc độ đọc theo source.fps (mặc định: True với nguồn không live)
+            loop: Phát lại từ đầu khi file/thư mục hết frame
+            reconnect_delay: Số giây chờ trước khi mở lại nguồn live bị lỗi
+            metrics: MetricsRegistry (mặc định: get_metrics())
+            pool: FramePool cho buffer frame (mặc định tạo pool riêng)
+        """
+        self.source = source
+        self.pace = (not source.live) if pace is None else pace
+        self.loop = loop
+        self.reconnect_delay = reconnect_delay
+        self.metrics = metrics or get_metrics()
+        self.pool = pool or FramePool("capture", metrics=self.metrics)
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._timestamp = 0.0
+        self._consumed_seq = 0
+        self._running = False
+        self._thread = None
+        self.ended = False
+        self.frames_grabbed = 0
+        self.frames_dropped = 0
+
+    def start(self):
+        """Mở nguồn và bắt đầu luồng đọc. Trả về False nếu không mở được nguồn."""
+        if self._running:
+            return True
+        if not self.source.open():
+            print(f"Cannot open frame source: {self.source.describe()}")
+            if not self.source.live:
+                return False
+        else:
+            print(f"Frame source opened: {self.source.describe()}")
+        self._running = True
+        self.ended = False
+        self._thread = threading.Thread(target=self._run, name="FrameGrabber", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self):
+        interval = 1.0 / self.source.fps if self.pace and self.source.fps else 0.0
+        next_due = time.perf_counter()
+        spec = None  # (shape, dtype) của frame trước, để lấy buffer từ pool
+        while self._running:
+            buffer = self.pool.acquire(*spec) if spec is not None else None
+            ok, image = self.source.read_into(buffer.array if buffer is not None else None)
+            if not ok:
+                if buffer is not None:
+                    buffer.release()
+                if not self._handle_failure():
+                    break
+                next_due = time.perf_counter()
+                continue
+            if buffer is None or image is not buffer.array:
+                # Nguồn không ghi vào buffer (frame đầu, đổi độ phân giải): đưa mảng mới vào pool
+                if buffer is not None:
+                    buffer.release()
+                buffer = self.pool.adopt(image)
+                spec = (image.shape, image.dtype)
+
+            now = time.perf_counter()
+            with self._cond:
+                if self._seq > self._consumed_seq:
+                    # Frame trước chưa được lấy thì bị ghi đè
+                    self.frames_dropped += 1
+                    self.metrics.inc("capture_frames_dropped")
+                previous, self._frame = self._frame, buffer
+                self._seq += 1
+                self._timestamp = now
+                self.frames_grabbed += 1
+                self._cond.notify_all()
+            if previous is not None:
+                previous.release()
+
+            if interval:
+                next_due += interval
+                delay = next_due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_due = time.perf_counter()
+
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def _handle_failure(self):
+        """Xử lý read() thất bại. Trả về False để dừng luồng đọc."""
+        self.metrics.inc("camera_read_failures")
+        if not self.source.live:
+            if self.loop and self.source.open():
+                return True
+            with self._cond:
+                self.ended = True
+            return False
+        # Camera/RTSP: mở lại sau một khoảng chờ
+        print(f"Frame source lost, reconnecting in {self.reconnect_delay}s: {self.source.describe()}")
+        self.source.release()
+        deadline = time.perf_counter() + self.reconnect_delay
+        while self._running and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        if self._running and self.source.open():
+            self.metrics.inc("camera_reconnects")
+        return True
+
+    def read_frame(self, timeout=1.0):
+        """
+        Chờ frame mới hơn frame đã lấy lần trước
+
+        Returns:
+            (ok, PooledFrame): frame đã retain, người gọi phải release();
+            ok=False nếu hết thời gian chờ hoặc nguồn đã kết thúc
+        """
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            while self._seq == self._consumed_seq:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not self._running:
+                    return False, None
+                self._cond.wait(remaining)
+            self._consumed_seq = self._seq
+            return True, self._frame.retain()
+
+    def read(self, timeout=1.0):
+        """
+        Như read_frame() nhưng trả về bản sao ndarray (không cần release)
+
+        Returns:
+            (ok, frame)
+        """
+        ok, frame = self.read_frame(timeout)
+        if not ok:
+            return False, None
+        try:
+            return True, frame.array.copy()
+        finally:
+            frame.release()
+
+    def latest_frame(self):
+        """
+        Frame mới nhất, không chờ và không đánh dấu đã lấy (dùng cho UI)
+
+        Returns:
+            (seq, PooledFrame, timestamp): frame đã retain (phải release), seq=0 và
+            frame None nếu chưa có frame
+        """
+        with self._cond:
+            frame = self._frame.retain() if self._frame is not None else None
+            return self._seq, frame, self._timestamp
+
+    def latest(self):
+        """
+        Như latest_frame() nhưng trả về bản sao ndarray
+
+        Returns:
+            (seq, frame, timestamp)
+        """
+        seq, frame, timestamp = self.latest_frame()
+        if frame is None:
+            return seq, None, timestamp
+        try:
+            return seq, frame.array.copy(), timestamp
+        finally:
+            frame.release()
+
+    def is_running(self):
+        return self._running
+
+    def stop(self):
+        """Dừng luồng đọc và giải phóng nguồn"""
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        self.source.release()
+        with self._cond:
+            frame, self._frame = self._frame, None
+        if frame is not None:
+            frame.release()
+
+    def release(self):
+        """Tương thích với cv2.VideoCapture.release()"""
+        self.stop()
@@ -0,0 +1,148 @@
+import time
+import threading
+
+import cv2
+import numpy as np
+
+from src.log.metrics import get_metrics
+from src.core.capture.frame_pool import FramePool
+
+BOX_COLOR = (0, 255, 0)
+
+def preview_shape(frame_shape, size):
+    """Shape ảnh preview của frame khi thu vào khung size (w, h) giữ tỉ lệ"""
+    h, w = frame_shape[:2]
+    scale = min(size[0] / w, size[1] / h)
+    return (max(1, int(h * scale)), max(1, int(w * scale))) + tuple(frame_shape[2:])
+
+def render_preview(frame, size, bbox=None, out=None):
+    """
+    Thu nhỏ frame vào khung size (w, h) giữ tỉ lệ và vẽ bbox theo tỉ lệ mới
+
+    Args:
+        out: Buffer đích có shape preview_shape(frame.shape, size) (tùy chọn, tránh cấp phát)
+
+    Returns:
+        Ảnh BGR liên tục trong bộ nhớ, dùng trực tiếp cho QImage.Format_BGR888
+    """
+    h, w = frame.shape[:2]
+    scale = min(size[0] / w, size[1] / h)
+    out_h, out_w = preview_shape(frame.shape, size)[:2]
+    if out is not None and out.shape != preview_shape(frame.shape, size):
+        out = None
+    if (out_w, out_h) == (w, h):
+        if out is None:
+            preview = frame.copy()
+        else:
+            np.copyto(out, frame)
+            preview = out
+    else:
+        # INTER_AREA khi thu nhỏ (không răng cưa), INTER_LINEAR khi phóng to
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        preview = cv2.resize(frame, (out_w, out_h), dst=out, interpolation=interpolation)
+    if bbox is not None:
+        x1, y1, x2, y2 = [int(round(v * scale)) for v in bbox[:4]]
+        cv2.rectangle(preview, (x1, y1), (x2, y2), BOX_COLOR, 2)
+    return np.ascontiguousarray(preview)
+
+class PreviewRenderer:
+    """
+    Luồng nền tạo ảnh preview cho giao diện: lấy frame mới nhất của camera và
+    bbox từ kết quả xử lý gần nhất, thu nhỏ về kích thước hiển thị và vẽ sẵn.
+    UI thread chỉ còn bọc ảnh vào QImage; frame không đổi thì không render lại.
+    Ảnh preview được vẽ vào buffer của pool riêng (xem latest_frame()).
+    """
+
+    def __init__(self, face_system, fps=30, metrics=None):
+        """
+        Args:
+            face_system: ZenSys (dùng .camera và .latest_processed_result)
+            fps: Tần số kiểm tra frame mới tối đa
+            metrics: MetricsRegistry (mặc định: get_metrics())
+        """
+        self.face_system = face_system
+        self.interval = 1.0 / fps if fps else 0.0
+        self.metrics = metrics or get_metrics()
+        self.pool = FramePool("preview", capacity=3, metrics=self.metrics)
+        self._size = None
+        self._lock = threading.Lock()
+        self._preview = None
+        self._seq = 0
+        self._source = None  # (frame seq, kết quả xử lý, kích thước) của ảnh đã render
+        self._running = False
+        self._thread = None
+
+    def set_target_size(self, width, height):
+        """Kích thước vùng hiển thị hiện tại (gọi từ UI thread khi widget đổi kích thước)"""
+        if width > 0 and height > 0:
+            self._size = (int(width), int(height))
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="PreviewRenderer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while self._running:
+            if not self.render_once():
+                time.sleep(self.interval or 0.005)
+
+    def render_once(self):
+        """Render nếu frame, kết quả hoặc kích thước đã đổi. Trả về True nếu có ảnh mới."""
+        camera = getattr(self.face_system, 'camera', None)
+        size = self._size
+        if camera is None or size is None:
+            return False
+        result = self.face_system.latest_processed_result
+        last = self._source
+        frame_seq, frame, _ = camera.latest_frame()
+        if frame is None:
+            return False
+        try:
+            if last is not None and last[0] == frame_seq and last[1] is result and last[2] == size:
+                return False
+            with self.metrics.stage("preview_render"):
+                target = self.pool.acquire(preview_shape(frame.array.shape, size), frame.array.dtype)
+                render_preview(frame.array, size, result.get('face_bbox') if result else None, out=target.array)
+        finally:
+            frame.release()
+        with self._lock:
+            previous, self._preview = self._preview, target
+            self._seq += 1
+            self._source = (frame_seq, result, size)
+        if previous is not None:
+            previous.release()
+        return True
+
+    def latest_frame(self):
+        """
+        Ảnh preview mới nhất, đã retain: UI dùng xong (vd sau QPixmap.fromImage) phải release()
+
+        Returns:
+            (seq, PooledFrame): seq tăng mỗi lần render; 0 và None nếu chưa có ảnh
+        """
+        with self._lock:
+            return self._seq, self._preview.retain() if self._preview is not None else None
+
+    def latest(self):
+        """
+        Bản sao ảnh preview mới nhất
+
+        Returns:
+            (seq, image): seq tăng mỗi lần render, 0 nếu chưa có ảnh
+        """
+        seq, preview = self.latest_frame()
+        if preview is None:
+            return seq, None
+        try:
+            return seq, preview.array.copy()
+        finally:
+            preview.release()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
@@ -1,3 +1,4 @@
-from src.core.faiss_manager.face_database import FaceDatabase
+from src.core.faiss_manager.face_database import FaceDatabase, model_stamp
+from src.core.faiss_manager.vector_sync import FaceVectorSync
 
-__all__ = ['FaceDatabase'] 
\ No newline at end of file
+__all__ = ['FaceDatabase', 'model_stamp', 'FaceVectorSync'] 
\ No newline at end of file
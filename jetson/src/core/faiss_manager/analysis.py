@@ -0,0 +1,288 @@
+"""
+Phân tích chất lượng gallery trên embedding của FaceDatabase: phân bố điểm
+genuine/impostor, ROC, ngưỡng EER, embedding lệch nhãn/trùng lặp và độ trễ
+tìm kiếm của index. Ma trận tương đồng được tính theo khối hàng (blocked) bằng
+phép nhân ma trận, không có vòng lặp Python theo cặp, nên chạy được với hàng
+chục nghìn embedding mà không giữ cả ma trận n x n trong bộ nhớ.
+"""
+import time
+
+import numpy as np
+
+UNKNOWN = "Unknown"
+
+# Histogram điểm cosine trên [-1, 1], độ phân giải 0.001
+SCORE_BINS = 2000
+SCORE_RANGE = (-1.0, 1.0)
+
+
+def database_embeddings(face_db):
+    """
+    Embedding và nhãn đang có trong FaceDatabase (IndexFlat lưu nguyên vector)
+
+    Returns:
+        tuple: (ma trận float32 n x d, list nhãn)
+    """
+    with face_db._lock:
+        index, name_dict = face_db.index, face_db.name_dict
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32), []
+    embeddings = index.reconstruct_n(0, index.ntotal)
+    return embeddings, [name_dict[i] for i in range(index.ntotal)]
+
+
+def label_codes(labels):
+    """
+    Mã số nguyên cho nhãn; mỗi ảnh "Unknown" là một danh tính riêng (chỉ làm impostor)
+
+    Returns:
+        tuple: (np.ndarray mã, list tên theo mã)
+    """
+    names, lookup, codes = [], {}, np.empty(len(labels), dtype=np.int64)
+    for i, label in enumerate(labels):
+        if label == UNKNOWN or label not in lookup:
+            lookup.setdefault(label, len(names))
+            names.append(label)
+            codes[i] = len(names) - 1
+        else:
+            codes[i] = lookup[label]
+    return codes, names
+
+
+def _bin_index(scores):
+    low, high = SCORE_RANGE
+    idx = ((scores - low) * (SCORE_BINS / (high - low))).astype(np.int64)
+    return np.clip(idx, 0, SCORE_BINS - 1)
+
+
+def pair_statistics(embeddings, labels, block_size=512, duplicate_threshold=0.995):
+    """
+    Duyệt toàn bộ ma trận tương đồng theo khối hàng
+
+    Args:
+        embeddings: Ma trận n x d đã chuẩn hóa
+        labels: Nhãn của từng embedding
+        block_size: Số hàng mỗi khối. Bộ nhớ đỉnh là vài mảng (block_size, n) cùng lúc
+            (score float32, mask bool và mảng tạm của np.where), đo được cỡ block_size x n x 32 byte
+        duplicate_threshold: Cặp có cosine >= ngưỡng này coi là trùng lặp
+
+    Returns:
+        dict: genuine_hist, impostor_hist (mỗi cặp i < j một lần), genuine_mean,
+              genuine_max, genuine_count, nearest_impostor, nearest_impostor_score (theo từng
+              embedding), duplicates (list (i, j, score))
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    n = embeddings.shape[0]
+    codes, _ = label_codes(labels)
+    genuine_hist = np.zeros(SCORE_BINS, dtype=np.int64)
+    impostor_hist = np.zeros(SCORE_BINS, dtype=np.int64)
+    genuine_sum = np.zeros(n, dtype=np.float64)
+    genuine_count = np.zeros(n, dtype=np.int64)
+    genuine_max = np.full(n, -np.inf, dtype=np.float32)
+    nearest_impostor = np.full(n, -1, dtype=np.int64)
+    nearest_score = np.full(n, -np.inf, dtype=np.float32)
+    duplicates = []
+    columns = np.arange(n)
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        rows = columns[start:stop]
+        scores = embeddings[start:stop] @ embeddings.T  # (b, n)
+        same = codes[start:stop, None] == codes[None, :]
+        upper = columns[None, :] > rows[:, None]  # Mỗi cặp tính một lần cho histogram
+        not_self = columns[None, :] != rows[:, None]
+
+        genuine_hist += np.bincount(_bin_index(scores[same & upper]), minlength=SCORE_BINS)
+        impostor_hist += np.bincount(_bin_index(scores[~same & upper]), minlength=SCORE_BINS)
+
+        genuine = same & not_self
+        genuine_sum[start:stop] = np.where(genuine, scores, 0.0).sum(axis=1)
+        genuine_count[start:stop] = genuine.sum(axis=1)
+        genuine_max[start:stop] = np.where(genuine, scores, -np.inf).max(axis=1)
+
+        impostor = np.where(same, -np.inf, scores)
+        best = impostor.argmax(axis=1)
+        nearest_score[start:stop] = impostor[np.arange(stop - start), best]
+        nearest_impostor[start:stop] = np.where(np.isfinite(nearest_score[start:stop]), best, -1)
+
+        i, j = np.nonzero((scores >= duplicate_threshold) & upper)
+        duplicates.extend(zip((i + start).tolist(), j.tolist(), scores[i, j].tolist()))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        genuine_mean = np.where(genuine_count > 0, genuine_sum / np.maximum(genuine_count, 1), np.nan)
+    return {
+        "genuine_hist": genuine_hist,
+        "impostor_hist": impostor_hist,
+        "genuine_mean": genuine_mean,
+        "genuine_max": genuine_max,
+        "genuine_count": genuine_count,
+        "nearest_impostor": nearest_impostor,
+        "nearest_impostor_score": nearest_score,
+        "duplicates": duplicates
+    }
+
+
+def roc_curve(genuine_hist, impostor_hist):
+    """
+    FAR/FRR theo ngưỡng từ histogram (chấp nhận khi score > ngưỡng, như recognize_face)
+
+    Returns:
+        tuple: (thresholds, far, frr), ngưỡng là cạnh dưới của từng bin
+    """
+    low, high = SCORE_RANGE
+    thresholds = np.linspace(low, high, SCORE_BINS, endpoint=False)
+    genuine_total = max(int(genuine_hist.sum()), 1)
+    impostor_total = max(int(impostor_hist.sum()), 1)
+    # Số cặp có score trong bin >= k
+    genuine_above = np.cumsum(genuine_hist[::-1])[::-1]
+    impostor_above = np.cumsum(impostor_hist[::-1])[::-1]
+    far = impostor_above / impostor_total
+    frr = 1.0 - genuine_above / genuine_total
+    return thresholds, far, frr
+
+
+def equal_error_rate(thresholds, far, frr):
+    """
+    Returns:
+        tuple: (ngưỡng EER, EER)
+    """
+    k = int(np.argmin(np.abs(far - frr)))
+    return float(thresholds[k]), float((far[k] + frr[k]) / 2)
+
+
+def rates_at(threshold, thresholds, far, frr):
+    """FAR/FRR tại một ngưỡng cho trước (bin gần nhất)"""
+    k = int(np.clip(np.searchsorted(thresholds, threshold, side="right") - 1, 0, len(thresholds) - 1))
+    return float(far[k]), float(frr[k])
+
+
+def threshold_for_far(target_far, thresholds, far):
+    """Ngưỡng thấp nhất có FAR <= target_far (None nếu không đạt)"""
+    ok = np.nonzero(far <= target_far)[0]
+    return float(thresholds[ok[0]]) if ok.size else None
+
+
+def score_summary(hist):
+    """mean/p1/p50/p99 của phân bố điểm từ histogram"""
+    total = int(hist.sum())
+    if not total:
+        return {"count": 0}
+    low, high = SCORE_RANGE
+    centers = low + (np.arange(SCORE_BINS) + 0.5) * (high - low) / SCORE_BINS
+    cumulative = np.cumsum(hist) / total
+
+    def percentile(q):
+        return round(float(centers[int(np.searchsorted(cumulative, q))]), 4)
+
+    return {
+        "count": total,
+        "mean": round(float((centers * hist).sum() / total), 4),
+        "p1": percentile(0.01),
+        "p50": percentile(0.5),
+        "p99": percentile(0.99)
+    }
+
+
+def flag_embeddings(labels, stats, outlier_z=3.0, min_genuine=None):
+    """
+    Embedding đáng ngờ trong từng danh tính
+
+    - outlier: độ tương đồng trung bình với cùng người thấp bất thường (z-score trong
+      danh tính < -outlier_z) hoặc thấp hơn min_genuine
+    - closer_to_other: gần embedding của người khác hơn mọi embedding cùng người (nghi gắn nhầm nhãn)
+
+    Returns:
+        list: dict index, label, reason, genuine_mean, nearest_label, nearest_score
+    """
+    codes, _ = label_codes(labels)
+    genuine_mean = stats["genuine_mean"]
+    flagged = []
+    for code in np.unique(codes):
+        members = np.nonzero((codes == code) & (stats["genuine_count"] > 0))[0]
+        if members.size == 0:
+            continue
+        values = genuine_mean[members]
+        mu, sigma = values.mean(), values.std()
+        for i, value in zip(members, values):
+            reasons = []
+            if (sigma > 1e-6 and (value - mu) / sigma < -outlier_z) or \
+                    (min_genuine is not None and value < min_genuine):
+                reasons.append("outlier")
+            if stats["nearest_impostor"][i] >= 0 and stats["nearest_impostor_score"][i] > stats["genuine_max"][i]:
+                reasons.append("closer_to_other")
+            if reasons:
+                nearest = stats["nearest_impostor"][i]
+                flagged.append({
+                    "index": int(i),
+                    "label": labels[i],
+                    "reason": reasons,
+                    "genuine_mean": round(float(value), 4),
+                    "nearest_label": labels[nearest] if nearest >= 0 else None,
+                    "nearest_score": round(float(stats["nearest_impostor_score"][i]), 4)
+                })
+    return flagged
+
+
+def search_latency(index, queries, k=1, repeats=1):
+    """
+    Độ trễ tìm kiếm: từng truy vấn một (như pipeline nhận diện) và theo lô
+
+    Returns:
+        dict: ntotal, single_p50_ms, single_p95_ms, single_p99_ms, batch_ms_per_query
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    timings = []
+    for _ in range(repeats):
+        for query in queries:
+            t0 = time.perf_counter()
+            index.search(query[None, :], k)
+            timings.append((time.perf_counter() - t0) * 1000)
+    t0 = time.perf_counter()
+    index.search(queries, k)
+    batch_ms = (time.perf_counter() - t0) * 1000
+    timings = np.array(timings) if timings else np.array([np.nan])
+    return {
+        "ntotal": int(index.ntotal),
+        "queries": int(len(queries)),
+        "single_p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "single_p95_ms": round(float(np.percentile(timings, 95)), 4),
+        "single_p99_ms": round(float(np.percentile(timings, 99)), 4),
+        "batch_ms_per_query": round(batch_ms / max(len(queries), 1), 4)
+    }
+
+
+def analyze(embeddings, labels, threshold, block_size=512, duplicate_threshold=0.995,
+            outlier_z=3.0, target_far=1e-3):
+    """
+    Báo cáo đầy đủ cho một tập embedding có nhãn
+
+    Returns:
+        dict: JSON-serializable
+    """
+    stats = pair_statistics(embeddings, labels, block_size, duplicate_threshold)
+    thresholds, far, frr = roc_curve(stats["genuine_hist"], stats["impostor_hist"])
+    eer_threshold, eer = equal_error_rate(thresholds, far, frr)
+    current_far, current_frr = rates_at(threshold, thresholds, far, frr)
+    target_threshold = threshold_for_far(target_far, thresholds, far)
+
+    # ROC thưa (mỗi 0.01) cho báo cáo/vẽ đồ thị
+    step = SCORE_BINS // 200
+    return {
+        "embeddings": len(labels),
+        "identities": len(set(label for label in labels if label != UNKNOWN)),
+        "genuine": score_summary(stats["genuine_hist"]),
+        "impostor": score_summary(stats["impostor_hist"]),
+        "eer": round(eer, 5),
+        "eer_threshold": round(eer_threshold, 3),
+        "threshold": threshold,
+        "far_at_threshold": round(current_far, 6),
+        "frr_at_threshold": round(current_frr, 6),
+        "target_far": target_far,
+        "threshold_for_target_far": round(target_threshold, 3) if target_threshold is not None else None,
+        "roc": [[round(float(t), 3), round(float(a), 6), round(float(r), 6)]
+                for t, a, r in zip(thresholds[::step], far[::step], frr[::step])],
+        # Trung bình với cùng người dưới ngưỡng nhận diện thì ảnh đó gần như không giúp nhận ra người đó
+        "flagged": flag_embeddings(labels, stats, outlier_z, min_genuine=threshold),
+        "duplicates": [{"a": i, "b": j, "label_a": labels[i], "label_b": labels[j], "score": round(s, 4)}
+                       for i, j, s in stats["duplicates"]]
+    }
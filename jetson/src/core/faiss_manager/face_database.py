@@ -1,5 +1,9 @@
 import os
 import glob
+import json
+import time
+import hashlib
+import threading
 import numpy as np
 import faiss
 import pickle
@@ -15,6 +19,35 @@ if project_root not in sys.path:
 from utils.config_utils import config
 from src.log.system_logger import SystemLogger
 
+# Metadata của index: model recognition (tên, phiên bản, precision) đã tạo embedding
+INDEX_META_FILE = "index_meta.json"
+
+_stamp_cache = {}
+
+def model_stamp(model_file, precision=None):
+    """
+    Định danh model recognition để ghi vào metadata của index. Phiên bản là hash
+    nội dung file nên đổi model cùng tên cũng được phát hiện.
+    
+    Args:
+        model_file: Đường dẫn file ONNX (FP32, như config.recognition_model)
+        precision: Biến thể đang dùng ('fp32', 'int8_static', ...)
+        
+    Returns:
+        dict: {'model', 'version', 'precision'}
+    """
+    stat = os.stat(model_file)
+    key = (os.path.abspath(model_file), stat.st_size, stat.st_mtime)
+    version = _stamp_cache.get(key)
+    if version is None:
+        digest = hashlib.sha1()
+        with open(model_file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        version = _stamp_cache[key] = digest.hexdigest()[:12]
+    precision = precision or 'fp32'
+    return {"model": os.path.basename(model_file), "version": f"{version}-{precision}", "precision": precision}
+
 class FaceDatabase:
     """
     Quản lý cơ sở dữ liệu khuôn mặt sử dụng FAISS.
@@ -32,6 +65,8 @@ class FaceDatabase:
         self.dimension = dimension or config.embedding_dim
         self.index = faiss.IndexFlatIP(self.dimension)
         self.name_dict = {}
+        self.model_stamp = None  # Model recognition đã tạo index (xem model_stamp())
+        self._lock = threading.Lock()
         self.logger = SystemLogger()
         
     def process_gallery(self, face_analyzer, gallery_path=None, db_path=None):
@@ -58,7 +93,46 @@ class FaceDatabase:
         
         self.logger.info(f"Processing gallery from: {gallery_path}")
         
+        index, name_dict, processed_persons = self.build_index(face_analyzer, gallery_path)
+        
+        if index is not None:
+            self.swap(index, name_dict, self.model_stamp)
+            # Lưu index và dictionary tên vào assets/database
+            self.save(db_path)
+                
+            print("="*50)
+            print(f"DATABASE CREATED SUCCESSFULLY")
+            print(f"Total faces: {len(self.name_dict)}")
+            print(f"Unique persons: {len(processed_persons)}")
+            print(f"Database saved to: {db_path}")
+            print("="*50)
+            
+            self.logger.info(f"Successfully saved database with {len(self.name_dict)} faces to {db_path}")
+            return True
+        else:
+            print("="*50)
+            print("DATABASE CREATION FAILED: No faces were processed")
+            print("="*50)
+            
+            self.logger.error("No faces were processed from the gallery")
+            return False
+    
+    def build_index(self, face_analyzer, gallery_path=None, throttle=None):
+        """
+        Tạo embedding cho mọi ảnh trong gallery thành index mới, không đụng tới
+        index đang dùng (dùng cho cả dựng shadow index khi nâng cấp model)
+        
+        Args:
+            face_analyzer: Đối tượng có get(img) trả về list Face có embedding
+            gallery_path: Đường dẫn tới thư mục gallery (mặc định từ config)
+            throttle: Hàm gọi sau mỗi ảnh (vd. ngủ để giới hạn CPU), tùy chọn
+            
+        Returns:
+            tuple: (index hoặc None nếu không có khuôn mặt nào, name_dict, set tên người)
+        """
+        gallery_path = gallery_path or config.gallery_path
         all_embeddings = []
+        name_dict = {}
         current_index = 0
         processed_persons = set()
         
@@ -79,13 +153,15 @@ class FaceDatabase:
                     
                 # Phát hiện và lấy embedding của khuôn mặt
                 faces = face_analyzer.get(img)
+                if throttle is not None:
+                    throttle()
                 if len(faces) > 0:
                     face = faces[0]  # Lấy khuôn mặt đầu tiên
                     if face.embedding is not None:
                         # Normalize embedding
                         embedding = face.normed_embedding.reshape(1, -1).astype('float32')
                         all_embeddings.append(embedding)
-                        self.name_dict[current_index] = person_name
+                        name_dict[current_index] = person_name
                         current_index += 1
                         person_images_count += 1
                         self.logger.info(f"Successfully processed face for: {person_name}")
@@ -96,42 +172,53 @@ class FaceDatabase:
             
             print(f"Processed {person_images_count} images for person: {person_name}")
         
-        if all_embeddings:
-            # Gộp tất cả embeddings
-            all_embeddings = np.vstack(all_embeddings)
-            # Add vào FAISS index
-            self.index = faiss.IndexFlatIP(self.dimension)  # Tạo index mới
-            self.index.add(all_embeddings)
-            
-            # Lưu index và dictionary tên vào assets/database
-            os.makedirs(db_path, exist_ok=True)
-            index_path = os.path.join(db_path, "face_index.faiss")
-            dict_path = os.path.join(db_path, "name_dict.pkl")
-            
-            faiss.write_index(self.index, index_path)
-            with open(dict_path, "wb") as f:
-                pickle.dump(self.name_dict, f)
-                
-            print("="*50)
-            print(f"DATABASE CREATED SUCCESSFULLY")
-            print(f"Total faces: {len(self.name_dict)}")
-            print(f"Unique persons: {len(processed_persons)}")
-            print(f"Database saved to: {db_path}")
-            print("="*50)
-            
-            self.logger.info(f"Successfully saved database with {len(self.name_dict)} faces to {db_path}")
-            return True
-        else:
-            print("="*50)
-            print("DATABASE CREATION FAILED: No faces were processed")
-            print("="*50)
-            
-            self.logger.error("No faces were processed from the gallery")
-            return False
+        if not all_embeddings:
+            return None, name_dict, processed_persons
+        # Gộp tất cả embeddings
+        all_embeddings = np.vstack(all_embeddings)
+        index = faiss.IndexFlatIP(all_embeddings.shape[1])  # Tạo index mới
+        index.add(all_embeddings)
+        return index, name_dict, processed_persons
+    
+    def swap(self, index, name_dict, model_stamp=None):
+        """
+        Thay index, tên và model stamp đang dùng trong một bước (recognize_face
+        không bao giờ thấy index mới đi với name_dict cũ)
+        """
+        with self._lock:
+            self.index = index
+            self.name_dict = name_dict
+            self.model_stamp = model_stamp
+            self.dimension = index.d
+    
+    def save(self, db_path=None):
+        """
+        Ghi index, name_dict và metadata model ra db_path. Ghi ra file tạm rồi
+        đổi tên để tiến trình khác không đọc phải file dở dang.
+        """
+        db_path = db_path or config.db_path
+        os.makedirs(db_path, exist_ok=True)
+        with self._lock:
+            index, name_dict, model_stamp = self.index, self.name_dict, self.model_stamp
+        index_path = os.path.join(db_path, "face_index.faiss")
+        dict_path = os.path.join(db_path, "name_dict.pkl")
+        meta_path = os.path.join(db_path, INDEX_META_FILE)
+        
+        faiss.write_index(index, index_path + ".tmp")
+        with open(dict_path + ".tmp", "wb") as f:
+            pickle.dump(name_dict, f)
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({**(model_stamp or {}), "dimension": index.d, "total_faces": len(name_dict),
+                       "created_at": time.time()}, f, indent=2)
+        os.replace(index_path + ".tmp", index_path)
+        os.replace(dict_path + ".tmp", dict_path)
+        os.replace(meta_path + ".tmp", meta_path)
     
     def load_database(self, db_path=None):
         """
-        Tải FAISS index và dictionary tên từ thư mục database
+        Tải FAISS index và dictionary tên từ thư mục database. Nếu đã biết model
+        đang dùng (model_stamp) mà index được tạo bằng model khác thì không tải:
+        embedding của hai model không so sánh được với nhau.
         
         Args:
             db_path: Đường dẫn tới thư mục database (mặc định từ config)
@@ -142,15 +229,34 @@ class FaceDatabase:
         db_path = db_path or config.db_path
         index_path = os.path.join(db_path, "face_index.faiss")
         dict_path = os.path.join(db_path, "name_dict.pkl")
+        meta_path = os.path.join(db_path, INDEX_META_FILE)
         
         if os.path.exists(index_path) and os.path.exists(dict_path):
-            self.index = faiss.read_index(index_path)
+            stored_stamp = None
+            if os.path.exists(meta_path):
+                with open(meta_path, "r") as f:
+                    meta = json.load(f)
+                stored_stamp = {key: meta.get(key) for key in ("model", "version", "precision")}
+            if self.model_stamp is not None and stored_stamp is not None and \
+                    stored_stamp["version"] != self.model_stamp["version"]:
+                self.logger.warning(
+                    f"Face index in {db_path} was built with {stored_stamp['model']} ({stored_stamp['version']}), "
+                    f"current model is {self.model_stamp['model']} ({self.model_stamp['version']}); rebuild required")
+                return False
+            index = faiss.read_index(index_path)
             with open(dict_path, "rb") as f:
-                self.name_dict = pickle.load(f)
+                name_dict = pickle.load(f)
+            self.swap(index, name_dict, stored_stamp or self.model_stamp)
             self.logger.info(f"Loaded database with {len(self.name_dict)} faces from {db_path}")
             return True
         return False
     
+    @property
+    def model_version(self):
+        """Phiên bản model đã tạo index (None nếu không rõ)"""
+        stamp = self.model_stamp
+        return stamp["version"] if stamp else None
+    
     def recognize_face(self, embedding, threshold=None):
         """
         Nhận diện khuôn mặt từ embedding
@@ -168,11 +274,17 @@ class FaceDatabase:
         if len(embedding.shape) == 1:
             embedding = embedding.reshape(1, -1)
             
+        with self._lock:
+            index, name_dict = self.index, self.name_dict
+        # Embedding của model khác kích thước (đang nâng cấp model) không so được
+        if embedding.shape[1] != index.d:
+            return "Unknown", 0.0
+            
         # Search trong FAISS index
-        D, I = self.index.search(embedding.astype('float32'), k=1)
+        D, I = index.search(embedding.astype('float32'), k=1)
         
         if D[0][0] > threshold:  # Ngưỡng similarity
-            return self.name_dict[I[0][0]], D[0][0]
+            return name_dict[I[0][0]], D[0][0]
         return "Unknown", 0.0
     
     def get_database_stats(self):
@@ -195,6 +307,24 @@ class FaceDatabase:
             "faces_per_person": person_count
         }
     
+    def gallery_signature(self, gallery_path=None):
+        """
+        Dấu vết của gallery (đường dẫn, kích thước, mtime từng ảnh) để biết có cần
+        dựng lại database hay không
+        
+        Returns:
+            tuple: Signature, đổi khi có ảnh thêm/xóa/sửa
+        """
+        gallery_path = gallery_path or config.gallery_path
+        entries = []
+        for img_path in sorted(glob.glob(os.path.join(gallery_path, "*", "*.[jp][pn][g]"))):
+            try:
+                stat = os.stat(img_path)
+            except OSError:
+                continue
+            entries.append((os.path.relpath(img_path, gallery_path), stat.st_size, int(stat.st_mtime)))
+        return tuple(entries)
+    
     def ensure_database(self, face_analyzer):
         """
         Always creates a new database from the gallery
@@ -0,0 +1,272 @@
+import os
+import io
+import json
+import time
+import base64
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import faiss
+import requests
+
+from src.core.api.config import APIConfig
+
+SYNC_PATH = "facevector/sync"
+
+
+def decode_vector(value):
+    """
+    Vector từ server (list số hoặc chuỗi base64 của float32) -> np.float32, None nếu không đọc được
+    """
+    if isinstance(value, dict):
+        value = value.get("data", value.get("vector"))
+    try:
+        if isinstance(value, str):
+            return np.frombuffer(base64.b64decode(value), dtype=np.float32).copy()
+        if isinstance(value, (list, tuple)):
+            return np.asarray(value, dtype=np.float32)
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+class FaceVectorSync:
+    """
+    Dựng FAISS index từ vector khuôn mặt (FaceVector) lưu trên server thay vì tạo
+    embedding lại từ ảnh trong gallery. Chỉ tải vector của học sinh/giáo viên có lịch
+    trong phòng của thiết bị, đúng ModelVersion của model recognition đang dùng, và
+    theo kiểu delta (cursor updatedAt). Vector được lưu xuống cache_file để khởi động
+    lại không cần mạng; index được dựng lại toàn bộ mỗi khi có thay đổi (IndexFlatIP
+    vài nghìn vector chỉ mất vài mili giây).
+    """
+
+    def __init__(self, face_db, classroom_id, model_id=None, cache_file=None, refresh_interval=600,
+                 days_ahead=7, page_size=200, fetcher=None):
+        """
+        Args:
+            face_db: FaceDatabase nhận index
+            classroom_id: Phòng học của thiết bị (server không trả vector nếu thiếu phòng)
+            model_id: ModelVersion.modelId trên server ứng với model recognition đang dùng
+            cache_file: File .npz lưu vector và cursor giữa các lần khởi động
+            refresh_interval: Số giây giữa các lần đồng bộ
+            days_ahead: Số ngày lịch học tính vào danh sách người cần tải
+            page_size: Số vector tối đa mỗi request
+            fetcher: Hàm fetcher(path, params) -> dict thay cho HTTP (dùng cho test)
+        """
+        self.face_db = face_db
+        self.model_id = model_id
+        self.classroom_id = classroom_id
+        self.cache_file = cache_file
+        self.refresh_interval = float(refresh_interval)
+        self.days_ahead = int(days_ahead)
+        self.page_size = int(page_size)
+        self.fetcher = fetcher or self._http_get
+        self.logger = logging.getLogger("zensys.face_vectors")
+        # Model recognition lúc chọn model_id; model đổi (nâng cấp tại chỗ) thì vector không còn dùng được
+        self.index_version = face_db.model_version
+
+        self._lock = threading.Lock()
+        self.vectors = {}  # (userId, category) -> vector đã chuẩn hóa
+        self.roster = None  # userId có lịch trong phòng (None = không lọc)
+        self.cursor = None
+        self.synced_at = 0.0
+        self.last_error = None
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _http_get(self, path, params=None):
+        response = requests.get(APIConfig.build_url(path), headers=APIConfig.get_headers(),
+                                params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    def initialize(self):
+        """
+        Nạp cache, đồng bộ một lần rồi dựng index (dùng thay cho dựng từ gallery)
+
+        Returns:
+            bool: True nếu có vector để dựng index
+        """
+        self.load()
+        self.sync(rebuild=False)
+        if not self.vectors:
+            return False
+        return self.rebuild()
+
+    def _base_params(self):
+        today = datetime.now().date()
+        params = {
+            "limit": self.page_size,
+            "classroomId": self.classroom_id,
+            "fromDate": today.isoformat(),
+            "toDate": (today + timedelta(days=self.days_ahead)).isoformat()
+        }
+        if self.model_id is not None:
+            params["modelId"] = self.model_id
+        return params
+
+    def _fetch(self, params, cursor):
+        """Tải hết các trang sau cursor. Returns: (vector entries, roster, cursor mới)"""
+        entries, roster = [], None
+        while True:
+            page_params = dict(params)
+            if cursor:
+                page_params["since"] = cursor
+            data = self.fetcher(SYNC_PATH, page_params).get("data", {})
+            entries.extend(data.get("vectors", []))
+            if data.get("userIds") is not None:
+                roster = set(data["userIds"])
+            cursor = data.get("cursor") or cursor
+            if not data.get("hasMore"):
+                return entries, roster, cursor
+
+    def sync(self, rebuild=True):
+        """
+        Tải vector thay đổi từ server và cập nhật index
+
+        Args:
+            rebuild: Dựng lại index ngay khi có thay đổi
+
+        Returns:
+            bool: True nếu đồng bộ thành công
+        """
+        params = self._base_params()
+        try:
+            entries, roster, cursor = self._fetch(params, self.cursor)
+            # Người mới vào lịch có thể có vector cũ hơn cursor: tải riêng toàn bộ vector của họ
+            if self.cursor and roster is not None and self.roster is not None:
+                joined = roster - self.roster
+                if joined:
+                    extra, _, _ = self._fetch({**params, "userIds": ",".join(sorted(joined))}, None)
+                    entries.extend(extra)
+        except Exception as e:
+            self.last_error = str(e)
+            self.logger.warning("Failed to sync face vectors: %s", e)
+            return False
+
+        changes = self._apply(entries, roster)
+        with self._lock:
+            self.cursor = cursor
+            self.roster = roster
+            self.synced_at = time.time()
+            self.last_error = None
+        if changes:
+            self.logger.info("Face vector sync: %s changes, %s vectors", changes, len(self.vectors))
+            if rebuild:
+                self.rebuild()
+        self.save()
+        return True
+
+    def _apply(self, entries, roster):
+        """Áp dụng vector mới/xóa và bỏ người không còn trong lịch. Returns: số thay đổi"""
+        dimension = self.face_db.dimension
+        changes = 0
+        with self._lock:
+            for entry in entries:
+                key = (str(entry.get("userId")), entry.get("category"))
+                vector = None if entry.get("removed") else decode_vector(entry.get("vector"))
+                if vector is not None and vector.shape[0] != dimension:
+                    self.logger.warning("Face vector %s has %s dims, index needs %s", key, vector.shape[0], dimension)
+                    vector = None
+                if vector is None:
+                    changes += self.vectors.pop(key, None) is not None
+                    continue
+                norm = np.linalg.norm(vector)
+                if norm > 0:
+                    self.vectors[key] = vector / norm
+                    changes += 1
+            if roster is not None:
+                for key in [key for key in self.vectors if key[0] not in roster]:
+                    del self.vectors[key]
+                    changes += 1
+        return changes
+
+    def rebuild(self):
+        """
+        Dựng index từ các vector hiện có và thay vào face_db
+
+        Returns:
+            bool: True nếu đã thay index
+        """
+        if self.face_db.model_version != self.index_version:
+            self.logger.warning("Recognition model changed since face vector sync started; "
+                                "vectors of model %s no longer apply", self.model_id)
+            return False
+        with self._lock:
+            items = sorted(self.vectors.items())
+        index = faiss.IndexFlatIP(self.face_db.dimension)
+        name_dict = {}
+        if items:
+            index.add(np.vstack([vector for _, vector in items]).astype('float32'))
+            name_dict = {i: user_id for i, ((user_id, _), _) in enumerate(items)}
+        self.face_db.swap(index, name_dict, self.face_db.model_stamp)
+        return True
+
+    def load(self):
+        """Nạp vector và cursor từ cache_file (bỏ qua nếu cache của model/phòng khác)"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return False
+        try:
+            with np.load(self.cache_file, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                user_ids, categories, vectors = data["user_ids"], data["categories"], data["vectors"]
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning("Failed to load face vector cache: %s", e)
+            return False
+        if meta.get("model_id") != self.model_id or meta.get("classroom_id") != self.classroom_id or \
+                (len(vectors) and vectors.shape[1] != self.face_db.dimension):
+            self.logger.info("Face vector cache is for another model or classroom, syncing from scratch")
+            return False
+        with self._lock:
+            self.vectors = {(str(u), str(c)): v for u, c, v in zip(user_ids, categories, vectors)}
+            self.roster = set(meta["roster"]) if meta.get("roster") is not None else None
+            self.cursor = meta.get("cursor")
+        return True
+
+    def save(self):
+        """Ghi vector và cursor xuống cache_file (file tạm rồi rename)"""
+        if not self.cache_file:
+            return
+        with self._lock:
+            items = sorted(self.vectors.items())
+            meta = {"model_id": self.model_id, "classroom_id": self.classroom_id, "cursor": self.cursor,
+                    "roster": sorted(self.roster) if self.roster is not None else None,
+                    "synced_at": self.synced_at}
+        vectors = np.vstack([v for _, v in items]) if items else np.zeros((0, self.face_db.dimension), np.float32)
+        buffer = io.BytesIO()
+        np.savez(buffer, meta=np.array(json.dumps(meta)),
+                 user_ids=np.array([key[0] for key, _ in items], dtype=str),
+                 categories=np.array([key[1] for key, _ in items], dtype=str),
+                 vectors=vectors.astype(np.float32))
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, "wb") as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            self.logger.warning("Failed to save face vector cache: %s", e)
+
+    def start(self):
+        """Bắt đầu luồng nền đồng bộ định kỳ"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._sync_loop, name="FaceVectorSync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Dừng luồng đồng bộ"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _sync_loop(self):
+        # initialize() vừa đồng bộ xong, đợi một chu kỳ trước lần kế tiếp
+        while not self._stop_event.wait(self.refresh_interval if not self.last_error
+                                        else min(self.refresh_interval, 60.0)):
+            self.sync()
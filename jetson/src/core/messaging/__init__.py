@@ -1,3 +1,4 @@
 from src.core.messaging.message_manager import MessageManager
+from src.core.messaging.stub_producer import StubProducer
 
-__all__ = ['MessageManager'] 
\ No newline at end of file
+__all__ = ['MessageManager', 'StubProducer'] 
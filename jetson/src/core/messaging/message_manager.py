@@ -1,13 +1,19 @@
+import atexit
 import json
 import logging
 import os
+import time
 import requests
+from collections import deque
+from functools import partial
 from typing import Dict, Any, Callable, Optional
-from threading import Thread, Event
+from threading import Thread, Event, Lock
 from confluent_kafka import Producer, Consumer, KafkaError
 from dotenv import load_dotenv
 from pathlib import Path
 
+from src.log.metrics import get_metrics
+
 # Load environment variables
 dotenv_path = Path(__file__).parent.parent.parent.parent / '.env'
 load_dotenv(dotenv_path)
@@ -23,22 +29,47 @@ class MessageManager:
     KAFKA_SYSTEM_TOPIC = os.getenv('KAFKA_SYSTEM_TOPIC', 'system_events')
     KAFKA_GROUP_ID = os.getenv('KAFKA_GROUP_ID', 'face_recognition_group')
     
+    # Kafka producer batching configuration
+    KAFKA_LINGER_MS = int(os.getenv('KAFKA_LINGER_MS', '20'))
+    KAFKA_BATCH_SIZE = int(os.getenv('KAFKA_BATCH_SIZE', '65536'))
+    KAFKA_COMPRESSION = os.getenv('KAFKA_COMPRESSION', 'lz4')
+    KAFKA_POLL_INTERVAL = float(os.getenv('KAFKA_POLL_INTERVAL', '0.1'))
+    KAFKA_STATS_INTERVAL_MS = int(os.getenv('KAFKA_STATS_INTERVAL_MS', '10000'))
+    KAFKA_FLUSH_TIMEOUT = float(os.getenv('KAFKA_FLUSH_TIMEOUT', '10'))
+    
     # API configuration
     API_ENDPOINT = os.getenv('API_CHECK_ATTENDANCE', '')
     API_TOKEN = os.getenv('ACCESS_TOKEN', '')
     
-    def __init__(self, use_kafka=False, use_api=True):
+    def __init__(self, use_kafka=False, use_api=True, producer=None):
         """
         Initialize Message Manager
         
         Args:
             use_kafka: Whether to use Kafka for messaging
             use_api: Whether to use HTTP API for messaging
+            producer: Optional pre-built producer (e.g. StubProducer for tests)
         """
-        self.logger = logging.getLogger("MessageManager")
+        self.logger = logging.getLogger("zensys.messaging")
         self.consumer_thread = None
         self.stop_event = Event()
         
+        # Background delivery poll loop
+        self.poll_thread = None
+        self.poll_stop_event = Event()
+        self._atexit_registered = False
+        self._closed = False
+        
+        # Delivery statistics
+        self._stats_lock = Lock()
+        self._delivery_latencies = deque(maxlen=1000)
+        self._messages_sent = 0
+        self._messages_delivered = 0
+        self._messages_failed = 0
+        self._poll_batches = 0
+        self._poll_events = 0
+        self._broker_batch_stats = {}
+        
         # Set message sending method
         self.use_kafka = use_kafka
         self.use_api = use_api
@@ -53,7 +84,12 @@ class MessageManager:
         self.producer_config = {
             'bootstrap.servers': self.KAFKA_BOOTSTRAP_SERVERS,
             'client.id': f'face_recognition_producer_{os.getpid()}',
-            'acks': 'all'
+            'acks': 'all',
+            'linger.ms': self.KAFKA_LINGER_MS,
+            'batch.size': self.KAFKA_BATCH_SIZE,
+            'compression.type': self.KAFKA_COMPRESSION,
+            'statistics.interval.ms': self.KAFKA_STATS_INTERVAL_MS,
+            'stats_cb': self._on_stats
         }
         
         # Configure Kafka consumer
@@ -65,7 +101,11 @@ class MessageManager:
         }
         
         # Initialize producer if using Kafka
-        if self.use_kafka:
+        if producer is not None:
+            self.producer = producer
+            self.use_kafka = True
+            self._start_poll_loop()
+        elif self.use_kafka:
             self._initialize_kafka_producer()
         else:
             self.producer = None
@@ -75,12 +115,128 @@ class MessageManager:
         """Initialize Kafka producer"""
         try:
             self.producer = Producer(self.producer_config)
-            self.logger.info(f"Kafka producer initialized with servers: {self.KAFKA_BOOTSTRAP_SERVERS}")
+            self.logger.info(
+                f"Kafka producer initialized with servers: {self.KAFKA_BOOTSTRAP_SERVERS} "
+                f"(linger.ms={self.KAFKA_LINGER_MS}, batch.size={self.KAFKA_BATCH_SIZE}, "
+                f"compression={self.KAFKA_COMPRESSION})"
+            )
+            self._start_poll_loop()
         except Exception as e:
             self.logger.error(f"Failed to initialize Kafka producer: {e}")
             self.producer = None
             self.use_kafka = False
     
+    def _start_poll_loop(self):
+        """Start background thread serving producer delivery callbacks"""
+        if self.poll_thread and self.poll_thread.is_alive():
+            return
+        
+        self.poll_stop_event.clear()
+        self.poll_thread = Thread(target=self._poll_loop, daemon=True)
+        self.poll_thread.start()
+        
+        # Flush pending messages when the process exits (chỉ đăng ký một lần dù poll loop khởi động lại)
+        if not self._atexit_registered:
+            atexit.register(self.close)
+            self._atexit_registered = True
+        
+        # Số message đang chờ gửi trong queue local của producer
+        get_metrics().register_queue(
+            "kafka_producer", lambda: len(self.producer) if self.producer is not None else 0)
+    
+    def _poll_loop(self):
+        """Serve delivery reports until close() is called"""
+        while not self.poll_stop_event.is_set():
+            try:
+                served = self.producer.poll(self.KAFKA_POLL_INTERVAL)
+                if served:
+                    with self._stats_lock:
+                        self._poll_batches += 1
+                        self._poll_events += served
+            except Exception as e:
+                self.logger.error(f"Error polling Kafka producer: {e}")
+                time.sleep(self.KAFKA_POLL_INTERVAL)
+    
+    def _on_delivery(self, sent_at, err, msg):
+        """
+        Delivery report callback, called from the poll loop
+        
+        Args:
+            sent_at: time.monotonic() when the message was produced
+            err: KafkaError or None
+            msg: Delivered message
+        """
+        latency_ms = (time.monotonic() - sent_at) * 1000.0
+        with self._stats_lock:
+            if err is not None:
+                self._messages_failed += 1
+            else:
+                self._messages_delivered += 1
+                self._delivery_latencies.append(latency_ms)
+        
+        if err is not None:
+            self.logger.error(f"Kafka delivery failed for topic {msg.topic()}: {err}")
+        else:
+            self.logger.debug(f"Delivered message to {msg.topic()} in {latency_ms:.1f} ms")
+    
+    def _on_stats(self, stats_json):
+        """
+        librdkafka statistics callback, used to expose batch efficiency
+        
+        Args:
+            stats_json: JSON statistics string emitted every statistics.interval.ms
+        """
+        try:
+            stats = json.loads(stats_json)
+            batch_stats = {}
+            for topic_name, topic in stats.get('topics', {}).items():
+                batch_stats[topic_name] = {
+                    'avg_batch_bytes': topic.get('batchsize', {}).get('avg', 0),
+                    'avg_batch_messages': topic.get('batchcnt', {}).get('avg', 0)
+                }
+            with self._stats_lock:
+                self._broker_batch_stats = batch_stats
+        except Exception as e:
+            self.logger.debug(f"Failed to parse Kafka statistics: {e}")
+    
+    def get_producer_stats(self) -> Dict[str, Any]:
+        """
+        Get Kafka producer delivery statistics
+        
+        Returns:
+            dict: Message counters, delivery latency (ms) and batch efficiency
+        """
+        with self._stats_lock:
+            latencies = sorted(self._delivery_latencies)
+            sent = self._messages_sent
+            delivered = self._messages_delivered
+            failed = self._messages_failed
+            poll_batches = self._poll_batches
+            poll_events = self._poll_events
+            broker_batches = dict(self._broker_batch_stats)
+        
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p / 100.0 * len(latencies)))]
+        
+        return {
+            "sent": sent,
+            "delivered": delivered,
+            "failed": failed,
+            "in_flight": len(self.producer) if self.producer is not None else 0,
+            "latency_ms": {
+                "avg": sum(latencies) / len(latencies) if latencies else 0.0,
+                "p50": percentile(50),
+                "p95": percentile(95),
+                "max": latencies[-1] if latencies else 0.0
+            },
+            "batch": {
+                "avg_reports_per_poll": poll_events / poll_batches if poll_batches else 0.0,
+                "topics": broker_batches
+            }
+        }
+    
     def send_attendance_event(self, attendance_data: Dict[str, Any]) -> bool:
         """
         Send attendance data via configured channels (Kafka and/or API)
@@ -93,11 +249,11 @@ class MessageManager:
         """
         success = True
         
-        # Always log the data
-        self.logger.info(f"ATTENDANCE DATA: {json.dumps(attendance_data)}")
+        # Always log the data (ảnh/vector được tóm tắt khi format, không serialize)
+        self.logger.info("ATTENDANCE DATA: %s", attendance_data)
         
         # Send via Kafka if enabled
-        if self.use_kafka and self.producer:
+        if self.use_kafka and self.producer is not None:
             try:
                 kafka_success = self._send_message(self.KAFKA_ATTENDANCE_TOPIC, attendance_data)
                 if not kafka_success:
@@ -131,10 +287,10 @@ class MessageManager:
             bool: Success status
         """
         # Always log the data
-        self.logger.info(f"SYSTEM EVENT: {json.dumps(event_data)}")
+        self.logger.info("SYSTEM EVENT: %s", event_data)
         
         # Only send system events to Kafka, not to API
-        if self.use_kafka and self.producer:
+        if self.use_kafka and self.producer is not None:
             return self._send_message(self.KAFKA_SYSTEM_TOPIC, event_data)
         
         return True
@@ -150,18 +306,27 @@ class MessageManager:
         Returns:
             bool: Success status
         """
-        if not self.producer:
+        if self.producer is None:
             self.logger.warning("Kafka producer not available")
             return False
         
         try:
             # Convert data to JSON string
             message_value = json.dumps(data).encode('utf-8')
+            on_delivery = partial(self._on_delivery, time.monotonic())
+            
+            # Queue message; delivery is confirmed asynchronously by the poll loop
+            try:
+                self.producer.produce(topic, value=message_value, on_delivery=on_delivery)
+            except BufferError:
+                # Local queue full: serve delivery reports then retry once
+                self.logger.warning("Kafka producer queue full, waiting for deliveries")
+                self.producer.poll(1.0)
+                self.producer.produce(topic, value=message_value, on_delivery=on_delivery)
             
-            # Send message
-            self.producer.produce(topic, value=message_value)
-            self.producer.flush(timeout=5)
-            self.logger.info(f"Sent message to Kafka topic: {topic}")
+            with self._stats_lock:
+                self._messages_sent += 1
+            self.logger.debug(f"Queued message for Kafka topic: {topic}")
             return True
         except Exception as e:
             self.logger.error(f"Error sending message to Kafka: {e}")
@@ -202,7 +367,7 @@ class MessageManager:
                 self.logger.error(f"API request failed with status code: {response.status_code}")
                 try:
                     error_data = response.json()
-                    self.logger.error(f"API error response: {json.dumps(error_data)}")
+                    self.logger.error("API error response: %s", error_data)
                 except:
                     self.logger.error(f"API response: {response.text}")
                 return False
@@ -289,10 +454,27 @@ class MessageManager:
             self.logger.error(f"Consumer error: {str(e)}")
     
     def close(self):
-        """Close connections"""
+        """Close connections, flushing queued Kafka messages"""
+        if self._closed:
+            return
+        self._closed = True
+        
         self.stop_consumer()
-        if self.producer:
-            self.producer.flush()
+        
+        # Stop poll loop before the final flush serves remaining callbacks
+        if self.poll_thread and self.poll_thread.is_alive():
+            self.poll_stop_event.set()
+            self.poll_thread.join(timeout=5.0)
+        
+        if self.producer is not None:
+            remaining = self.producer.flush(timeout=self.KAFKA_FLUSH_TIMEOUT)
+            if remaining:
+                self.logger.warning(f"{remaining} Kafka messages were not delivered before shutdown")
+            stats = self.get_producer_stats()
+            self.logger.info(
+                f"Kafka producer closed: delivered={stats['delivered']}, failed={stats['failed']}, "
+                f"avg latency={stats['latency_ms']['avg']:.1f} ms"
+            )
 
     def send_attendance(self, attendance_data):
         """
@@ -0,0 +1,123 @@
+import time
+from threading import Lock
+from typing import Any, Callable, List, Optional
+
+
+class StubMessage:
+    """
+    Minimal stand-in for confluent_kafka.Message passed to delivery callbacks
+    """
+
+    def __init__(self, topic: str, value: bytes, key: Optional[bytes] = None):
+        self._topic = topic
+        self._value = value
+        self._key = key
+        self._error = None
+
+    def topic(self):
+        return self._topic
+
+    def value(self):
+        return self._value
+
+    def key(self):
+        return self._key
+
+    def error(self):
+        return self._error
+
+
+class StubProducer:
+    """
+    Local in-memory producer with the same produce/poll/flush contract as
+    confluent_kafka.Producer. Messages are queued on produce() and delivery
+    reports are served in batches by poll()/flush(), so MessageManager can be
+    exercised without a broker.
+    """
+
+    def __init__(self, delivery_delay: float = 0.0, max_queue: int = 100000):
+        """
+        Initialize the stub producer
+
+        Args:
+            delivery_delay: Seconds a message stays queued before it can be delivered
+            max_queue: Queue size after which produce() raises BufferError
+        """
+        self.delivery_delay = delivery_delay
+        self.max_queue = max_queue
+        self.pending = []
+        self.delivered: List[StubMessage] = []
+        self.failed: List[StubMessage] = []
+        self.batches: List[int] = []
+        self._fail_next = 0
+        self._lock = Lock()
+
+    def produce(self, topic: str, value: bytes = None, key: bytes = None,
+                on_delivery: Optional[Callable[[Any, StubMessage], None]] = None, **kwargs):
+        """Queue a message for delivery"""
+        with self._lock:
+            if len(self.pending) >= self.max_queue:
+                raise BufferError("Local: Queue full")
+            self.pending.append((time.monotonic(), StubMessage(topic, value, key), on_delivery))
+
+    def fail_next(self, count: int = 1):
+        """Make the next `count` deliveries report an error"""
+        with self._lock:
+            self._fail_next += count
+
+    def poll(self, timeout: float = 0) -> int:
+        """
+        Serve delivery reports for messages whose delay has elapsed
+
+        Returns:
+            int: Number of delivery reports served
+        """
+        ready = self._take_ready()
+        if not ready and timeout:
+            time.sleep(min(timeout, 0.01))
+            ready = self._take_ready()
+        return self._deliver(ready)
+
+    def flush(self, timeout: float = None) -> int:
+        """
+        Deliver every queued message
+
+        Returns:
+            int: Number of messages still queued (always 0)
+        """
+        with self._lock:
+            ready, self.pending = self.pending, []
+        self._deliver(ready)
+        return 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self.pending)
+
+    def _take_ready(self):
+        now = time.monotonic()
+        with self._lock:
+            ready = [item for item in self.pending if now - item[0] >= self.delivery_delay]
+            if ready:
+                self.pending = [item for item in self.pending if now - item[0] < self.delivery_delay]
+            return ready
+
+    def _deliver(self, ready) -> int:
+        if not ready:
+            return 0
+
+        self.batches.append(len(ready))
+        for _, msg, on_delivery in ready:
+            err = None
+            with self._lock:
+                if self._fail_next > 0:
+                    self._fail_next -= 1
+                    err = "Local: Message timed out"
+            if err is not None:
+                msg._error = err
+                self.failed.append(msg)
+            else:
+                self.delivered.append(msg)
+            if on_delivery is not None:
+                on_delivery(err, msg)
+        return len(ready)
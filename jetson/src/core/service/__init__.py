@@ -0,0 +1,5 @@
+from src.core.service.control_api import ControlServer, to_jsonable, redact_config
+from src.core.service.client import ServiceClient
+
+# HeadlessService được import trực tiếp (kéo theo zensys_factory)
+__all__ = ['ControlServer', 'ServiceClient', 'to_jsonable', 'redact_config']
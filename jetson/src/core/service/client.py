@@ -0,0 +1,67 @@
+import json
+import socket
+import http.client
+from urllib.parse import urlencode
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+class ServiceClient:
+    """Client của ControlServer (HTTP hoặc Unix socket), dùng cho GUI và công cụ giám sát"""
+
+    def __init__(self, host="127.0.0.1", port=8765, unix_socket=None, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.timeout = timeout
+
+    def _connection(self):
+        if self.unix_socket:
+            return _UnixHTTPConnection(self.unix_socket, self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _request(self, method, path, params=None, body=None):
+        """
+        Raises:
+            RuntimeError: Nếu service trả về mã lỗi
+        """
+        if params:
+            path += "?" + urlencode({k: v for k, v in params.items() if v is not None})
+        connection = self._connection()
+        try:
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        finally:
+            connection.close()
+        if response.status >= 400:
+            raise RuntimeError(f"{method} {path} failed with {response.status}: {data.decode('utf-8', 'replace')}")
+        if response.getheader("Content-Type", "").startswith("application/json"):
+            return json.loads(data)
+        return data.decode("utf-8")
+
+    def status(self):
+        return self._request("GET", "/status")
+
+    def result(self, stream=None):
+        return self._request("GET", "/result", {"stream": stream})
+
+    def metrics(self):
+        return self._request("GET", "/metrics.json")
+
+    def config(self):
+        return self._request("GET", "/config")
+
+    def reload_config(self):
+        return self._request("POST", "/config/reload")
+
+    def scan_rfid(self, rfid_id, stream=None):
+        return self._request("POST", "/rfid", body={"rfid_id": rfid_id, "stream": stream})
@@ -0,0 +1,312 @@
+import os
+import json
+import time
+import logging
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import cv2
+import numpy as np
+
+from utils.config_utils import config
+from src.log.metrics import get_metrics
+from src.core.capture.preview import render_preview
+
+# Mảng lớn hơn (ảnh, depth map) chỉ trả về shape/dtype
+MAX_INLINE_ARRAY = 64
+SECRET_MARKERS = ("password", "secret", "token", "api_key", "apikey")
+
+def to_jsonable(value):
+    """Chuyển kết quả xử lý (numpy, bytes, object) sang kiểu JSON được"""
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        if value.size <= MAX_INLINE_ARRAY:
+            return value.tolist()
+        return {"shape": list(value.shape), "dtype": str(value.dtype)}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (bytes, bytearray)):
+        return {"bytes": len(value)}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def redact_config(value):
+    """Ẩn mật khẩu/token trước khi trả config qua API"""
+    if isinstance(value, dict):
+        return {k: "***" if any(m in str(k).lower() for m in SECRET_MARKERS) and v else redact_config(v)
+                for k, v in value.items()}
+    if isinstance(value, list):
+        return [redact_config(v) for v in value]
+    return value
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler cần client_address dạng (host, port)
+        return request, ("unix", 0)
+
+class ControlServer:
+    """
+    API điều khiển/trạng thái local của ZenSys cho chế độ headless và các client
+    (GUI, công cụ giám sát):
+
+    - GET  /status               trạng thái khởi động và từng luồng camera
+    - GET  /result?stream=       kết quả xử lý và xác thực gần nhất
+    - GET  /metrics, /metrics.json
+    - GET  /config               config đang dùng (đã ẩn mật khẩu)
+    - GET  /preview.mjpg?stream=&fps=&width=   preview MJPEG, chỉ mã hóa khi có client
+    - POST /rfid {"rfid_id", "stream"}         quẹt thẻ từ đầu đọc mạng/công cụ thử
+    - POST /config/reload        đọc lại config.yaml và áp dụng ngay (khi có reload_fn)
+    """
+
+    def __init__(self, systems_fn, startup=None, settings=None, metrics=None, reload_fn=None):
+        """
+        Args:
+            systems_fn: Hàm trả về list ZenSys hiện có (rỗng khi đang khởi động)
+            startup: StartupOrchestrator để báo tiến trình khởi động
+            settings: config.service (mặc định)
+            metrics: MetricsRegistry (mặc định: get_metrics())
+            reload_fn: Hàm đọc lại config (vd zensys_factory.reload_config), trả về dict kết quả
+        """
+        self.systems_fn = systems_fn
+        self.reload_fn = reload_fn
+        self.startup = startup
+        self.settings = settings or config.service
+        self.metrics = metrics or get_metrics()
+        self.logger = logging.getLogger("zensys.service")
+        self.started_at = time.time()
+        self._servers = []
+        self.http_port = None
+        self.preview_clients = 0
+        self._preview_lock = threading.Lock()
+
+    # ----- Dữ liệu trả về -----
+
+    def _system(self, name=None):
+        systems = self.systems_fn()
+        if not systems:
+            return None
+        if not name:
+            return systems[0]
+        for system in systems:
+            if system.stream_name == name:
+                return system
+        return None
+
+    def status(self):
+        streams = []
+        for system in self.systems_fn():
+            camera = system.camera
+            streams.append({
+                "stream": system.stream_name,
+                "camera": camera.source.describe() if camera is not None else None,
+                "camera_running": bool(camera is not None and camera.is_running()),
+                "rfid": system.stream.rfid,
+                "current_rfid": system.rfid.current_rfid,
+                "processing_paused": system.processing_paused,
+                "verification_in_progress": system.verification_in_progress,
+                **system.stream_stats.snapshot()
+            })
+        startup = self.startup.get_state() if self.startup is not None else None
+        systems = self.systems_fn()
+        upgrade = getattr(systems[0], 'model_upgrade', None) if systems else None
+        return {
+            "ready": bool(streams) and (self.startup is None or self.startup.is_ready()),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "pid": os.getpid(),
+            "startup": {"state": startup["state"], "message": startup["message"],
+                        "elapsed": startup["elapsed"]} if startup else None,
+            "streams": streams,
+            "model_upgrade": upgrade.status() if upgrade is not None else None,
+            "preview_clients": self.preview_clients
+        }
+
+    def result(self, stream=None):
+        system = self._system(stream)
+        if system is None:
+            return None
+        return to_jsonable({
+            "stream": system.stream_name,
+            "result": system.latest_processed_result,
+            "verification": system.verification_result
+        })
+
+    def inject_rfid(self, rfid_id, stream=None):
+        system = self._system(stream)
+        if system is None:
+            return False
+        system.on_rfid_scanned(str(rfid_id))
+        return True
+
+    def preview_frames(self, stream=None, fps=None, width=None):
+        """
+        Sinh JPEG preview mới nhất (frame đổi mới mã hóa lại) tới khi client ngắt kết nối.
+        Khi không có frame mới, JPEG cũ được gửi lại mỗi giây để phát hiện client đã ngắt.
+        """
+        system = self._system(stream)
+        if system is None:
+            return
+        interval = 1.0 / (fps or self.settings.preview_fps)
+        width = int(width or self.settings.preview_width)
+        quality = [int(cv2.IMWRITE_JPEG_QUALITY), int(self.settings.jpeg_quality)]
+        last_seq, last_result, jpeg, last_sent = 0, None, None, 0.0
+        while True:
+            started = time.perf_counter()
+            camera = system.camera
+            if camera is not None:
+                seq, frame, _ = camera.latest_frame()
+                result = system.latest_processed_result
+                encoded = None
+                if frame is not None:
+                    try:
+                        if seq != last_seq or result is not last_result:
+                            last_seq, last_result = seq, result
+                            encoded = self._encode_preview(frame.array, result, width, quality)
+                    finally:
+                        frame.release()  # Buffer quay về pool của camera
+                if encoded is not None:
+                    jpeg, last_sent = encoded, started
+                    yield jpeg
+                elif jpeg is not None and started - last_sent >= 1.0:
+                    last_sent = started
+                    yield jpeg
+            time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+    def _encode_preview(self, frame, result, width, quality):
+        """JPEG của frame thu nhỏ về width và vẽ bbox, None nếu mã hóa lỗi"""
+        h, w = frame.shape[:2]
+        size = (width, int(h * width / w)) if w > width else (w, h)
+        with self.metrics.stage("preview_encode"):
+            preview = render_preview(frame, size, result.get('face_bbox') if result else None)
+            ok, jpeg = cv2.imencode(".jpg", preview, quality)
+        return jpeg.tobytes() if ok else None
+
+    # ----- HTTP -----
+
+    def _handler(self):
+        server = self
+
+        class ControlHandler(BaseHTTPRequestHandler):
+            def _send(self, code, body, content_type="application/json"):
+                if not isinstance(body, bytes):
+                    body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                stream = query.get("stream")
+                if url.path in ("/", "/status"):
+                    self._send(200, server.status())
+                elif url.path == "/result":
+                    result = server.result(stream)
+                    self._send(200 if result is not None else 404,
+                               result if result is not None else {"error": "stream not ready"})
+                elif url.path == "/metrics":
+                    self._send(200, server.metrics.render_prometheus().encode("utf-8"),
+                               "text/plain; version=0.0.4; charset=utf-8")
+                elif url.path == "/metrics.json":
+                    self._send(200, to_jsonable(server.metrics.snapshot()))
+                elif url.path == "/config":
+                    self._send(200, redact_config(config.config_data))
+                elif url.path == "/preview.mjpg":
+                    self._stream_preview(stream, query)
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                if url.path == "/config/reload" and server.reload_fn is not None:
+                    try:
+                        self._send(200, server.reload_fn())
+                    except Exception as e:
+                        self._send(500, {"error": f"config reload failed: {e}"})
+                    return
+                if url.path != "/rfid":
+                    self._send(404, {"error": "not found"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                    rfid_id = body["rfid_id"]
+                except (ValueError, KeyError):
+                    self._send(400, {"error": "expected JSON body with rfid_id"})
+                    return
+                if server.inject_rfid(rfid_id, body.get("stream")):
+                    self._send(200, {"ok": True})
+                else:
+                    self._send(404, {"error": "stream not ready"})
+
+            def _stream_preview(self, stream, query):
+                if server._system(stream) is None:
+                    self._send(404, {"error": "stream not ready"})
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                with server._preview_lock:
+                    server.preview_clients += 1
+                try:
+                    fps = float(query["fps"]) if "fps" in query else None
+                    width = int(query["width"]) if "width" in query else None
+                    for jpeg in server.preview_frames(stream, fps, width):
+                        self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n"
+                                         + f"Content-Length: {len(jpeg)}\r\n\r\n".encode("ascii")
+                                         + jpeg + b"\r\n")
+                except (BrokenPipeError, ConnectionResetError, ValueError):
+                    pass  # Client ngắt kết nối
+                finally:
+                    with server._preview_lock:
+                        server.preview_clients -= 1
+
+            def log_message(self, format, *args):
+                pass  # Không ghi từng request vào console
+
+        return ControlHandler
+
+    def start(self):
+        """Mở cổng HTTP và/hoặc Unix socket theo config.service. Trả về False nếu không mở được."""
+        settings = self.settings
+        handler = self._handler()
+        try:
+            if settings.port is not None:
+                httpd = ThreadingHTTPServer((settings.host, settings.port), handler)
+                httpd.daemon_threads = True
+                self.http_port = httpd.server_port
+                self._servers.append(httpd)
+                self.logger.info("Control API on http://%s:%s", settings.host, self.http_port)
+            if settings.unix_socket:
+                if os.path.exists(settings.unix_socket):
+                    os.unlink(settings.unix_socket)
+                self._servers.append(_UnixHTTPServer(settings.unix_socket, handler))
+                self.logger.info("Control API on unix socket %s", settings.unix_socket)
+        except OSError as e:
+            self.logger.error("Control API disabled: %s", e)
+            for httpd in self._servers:
+                httpd.server_close()
+            self._servers = []
+            return False
+        for httpd in self._servers:
+            threading.Thread(target=httpd.serve_forever, name="ControlAPI", daemon=True).start()
+        return True
+
+    def stop(self):
+        for httpd in self._servers:
+            httpd.shutdown()
+            httpd.server_close()
+            if isinstance(httpd, _UnixHTTPServer) and os.path.exists(self.settings.unix_socket):
+                os.unlink(self.settings.unix_socket)
+        self._servers = []
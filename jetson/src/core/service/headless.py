@@ -0,0 +1,54 @@
+import signal
+import logging
+import threading
+
+from src.core.service.control_api import ControlServer
+from src.core.zensys_factory import (
+    get_stream_instances, get_startup_orchestrator, start_default_instance_async, get_default_instance,
+    reload_config
+)
+
+class HeadlessService:
+    """
+    Chạy ZenSys không cần giao diện Qt: camera, RFID, xác thực và gửi điểm danh
+    như bản GUI, kèm ControlServer để giám sát và xem preview khi cần
+    """
+
+    def __init__(self, settings=None):
+        """
+        Args:
+            settings: config.service (mặc định)
+        """
+        self.startup = get_startup_orchestrator()
+        self.server = ControlServer(get_stream_instances, startup=self.startup, settings=settings,
+                                    reload_fn=reload_config)
+        self.logger = logging.getLogger("zensys.service")
+        self._stop = threading.Event()
+
+    def start(self):
+        """Mở API trước để theo dõi được quá trình tải model, rồi khởi động ZenSys"""
+        self.server.start()
+        start_default_instance_async()
+        # Chặn tới khi khởi động xong; lỗi khởi động được ném lại ở đây
+        get_default_instance()
+        self.logger.info("ZenSys headless service ready: %s",
+                         ", ".join(system.stream_name for system in get_stream_instances()))
+
+    def run(self):
+        """Chạy tới khi nhận SIGINT/SIGTERM"""
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: self._stop.set())
+        self.start()
+        self._stop.wait()
+        self.stop()
+
+    def stop(self):
+        self.logger.info("ZenSys headless service stopping")
+        systems = get_stream_instances()
+        for system in systems:
+            system.stop_camera()
+            system.cleanup()
+        if systems and systems[0].shared.batcher is not None:
+            systems[0].shared.batcher.stop()
+        self.server.stop()
+        self._stop.set()
@@ -0,0 +1,9 @@
+from src.core.workers.shared_ring import SharedFrameRing
+from src.core.workers.process_worker import InferenceWorker, WorkerCrashedError
+
+# Export public API
+__all__ = [
+    'SharedFrameRing',
+    'InferenceWorker',
+    'WorkerCrashedError'
+]
@@ -0,0 +1,63 @@
+"""
+Engine chạy trong tiến trình worker. Mỗi engine tải model của mình một lần và
+trả lời request qua handle(method, arrays, params) -> (payload, output_arrays):
+payload là dữ liệu nhỏ gửi qua queue, output_arrays được ghi vào shared memory.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+
+class FaceEngine:
+    """ZenFace (RetinaFace + AdaFace) trong worker"""
+
+    def __init__(self, ctx_id=0):
+        from src.core.zen_face import ZenFace
+        self.face_analyzer = ZenFace(allowed_modules=['detection', 'recognition'])
+        self.face_analyzer.prepare(ctx_id=ctx_id)
+
+    @staticmethod
+    def _pack(faces):
+        return [{
+            "bbox": face.bbox,
+            "kps": face.kps,
+            "det_score": face.det_score,
+            "embedding": face.embedding,
+            "rec_version": face.rec_version
+        } for face in faces]
+
+    def handle(self, method, arrays, params):
+        if method == "get":
+            faces = self.face_analyzer.get(arrays["frame"], max_num=params.get("max_num", 0),
+                                           adaptive=params.get("adaptive", False))
+            return self._pack(faces), None
+        if method == "get_batch":
+            frames = [arrays[str(i)] for i in range(len(arrays))]
+            results = self.face_analyzer.get_batch(frames, max_num=params.get("max_num", 0))
+            return [self._pack(faces) for faces in results], None
+        if method == "apply_config":
+            # Worker có bản config riêng: đọc lại file rồi áp dụng như trong tiến trình chính
+            from utils.config_utils import config
+            config.reload()
+            self.face_analyzer.apply_config()
+            return None, None
+        raise ValueError(f"Unknown face engine method '{method}'")
+
+class DepthEngine:
+    """MiDaS (DepthManager) trong worker"""
+
+    def __init__(self, use_custom_midas=True):
+        from src.core.zensys.depth_manager import DepthManager
+        checkpoint_path = Path(os.getcwd()) / "assets" / "weights" / "checkpoints" / "midas_v21_small_256.pt"
+        if use_custom_midas and checkpoint_path.exists():
+            self.depth = DepthManager(model_type="MidasSmall", custom_model_path=str(checkpoint_path))
+        else:
+            self.depth = DepthManager(model_type="MidasSmall")
+
+    def handle(self, method, arrays, params):
+        if method == "predict_depth":
+            result = self.depth.predict_depth(arrays["frame"])
+            outputs = {key: value for key, value in result.items() if isinstance(value, np.ndarray)}
+            payload = {key: value for key, value in result.items() if not isinstance(value, np.ndarray)}
+            return payload, outputs
+        raise ValueError(f"Unknown depth engine method '{method}'")
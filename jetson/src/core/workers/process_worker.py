@@ -0,0 +1,251 @@
+import time
+import queue
+import signal
+import logging
+import itertools
+import threading
+import multiprocessing as mp
+from concurrent.futures import Future
+
+from src.log.metrics import get_metrics
+from src.core.workers.shared_ring import SharedFrameRing
+
+class WorkerCrashedError(RuntimeError):
+    """Worker chết hoặc bị khởi động lại khi request đang chờ"""
+
+def _worker_main(builder, ring_name, slots, slot_bytes, requests, responses, heartbeat):
+    """Vòng lặp trong tiến trình worker: tải engine, nhận request, ghi kết quả vào cùng ô shared memory"""
+    # Ctrl+C do tiến trình chính xử lý, worker được dừng qua request None
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    ring = SharedFrameRing(slots, slot_bytes, name=ring_name)
+    try:
+        engine = builder()
+    except Exception as e:
+        responses.put(("failed", repr(e)))
+        ring.close()
+        return
+    responses.put(("ready", None))
+
+    while True:
+        heartbeat.value = time.time()
+        try:
+            message = requests.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if message is None:
+            break
+        request_id, slot, layout, method, params = message
+        try:
+            arrays = ring.read(slot, layout, copy=False)
+            started = time.perf_counter()
+            payload, outputs = engine.handle(method, arrays, params or {})
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            del arrays
+            out_layout = ring.write(slot, outputs or {})
+            responses.put((request_id, payload, out_layout, elapsed_ms, None))
+        except Exception as e:
+            responses.put((request_id, None, None, 0.0, repr(e)))
+    ring.close()
+
+class InferenceWorker:
+    """
+    Chạy model trong một tiến trình riêng để suy luận không tranh GIL với GUI,
+    RFID và I/O. Frame và kết quả lớn đi qua SharedFrameRing; một luồng giám sát
+    khởi động lại worker khi tiến trình chết hoặc ngừng gửi heartbeat.
+    """
+
+    def __init__(self, name, builder, slots=4, slot_mb=8, heartbeat_timeout=10.0,
+                 restart_delay=1.0, start_timeout=120.0, metrics=None):
+        """
+        Args:
+            name: Tên worker (nhãn metrics, tên tiến trình)
+            builder: Callable pickle được, chạy trong worker và trả về engine có
+                     handle(method, arrays, params) -> (payload, output_arrays)
+            slots: Số request tối đa đang chờ cùng lúc
+            slot_mb: Kích thước mỗi ô shared memory (MB), đủ cho frame và kết quả lớn nhất
+            heartbeat_timeout: Số giây không có heartbeat thì coi worker bị treo
+            restart_delay: Số giây chờ trước khi khởi động lại worker
+            start_timeout: Số giây chờ worker tải model xong
+            metrics: MetricsRegistry (mặc định: get_metrics())
+        """
+        self.name = name
+        self.builder = builder
+        self.heartbeat_timeout = heartbeat_timeout
+        self.restart_delay = restart_delay
+        self.start_timeout = start_timeout
+        self.metrics = metrics or get_metrics()
+        self.logger = logging.getLogger(f"zensys.worker.{name}")
+        self._labels = {"worker": name}
+
+        # spawn: tiến trình sạch, không kế thừa luồng/CUDA context của tiến trình chính
+        self._ctx = mp.get_context("spawn")
+        self.ring = SharedFrameRing(slots, int(slot_mb * (1 << 20)))
+        self._heartbeat = self._ctx.Value("d", 0.0, lock=False)
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._running = False
+        self._process = None
+        self._requests = None
+        self._responses = None
+        self._error = None
+        self.restarts = 0
+        self.metrics.register_queue(f"worker_{name}_pending", lambda: len(self._pending))
+
+    def start(self):
+        """
+        Khởi động worker và chờ engine tải xong
+
+        Raises:
+            RuntimeError: Nếu worker không khởi động được trong start_timeout
+        """
+        if self._running:
+            return
+        self._running = True
+        self._spawn()
+        threading.Thread(target=self._read_responses, name=f"Worker-{self.name}-reader", daemon=True).start()
+        if not self._ready.wait(self.start_timeout) or self._error:
+            error = self._error or f"not ready after {self.start_timeout}s"
+            self.stop()
+            raise RuntimeError(f"Inference worker '{self.name}' failed to start: {error}")
+        threading.Thread(target=self._supervise, name=f"Worker-{self.name}-supervisor", daemon=True).start()
+
+    def _spawn(self):
+        self._ready.clear()
+        self._error = None
+        self._requests = self._ctx.Queue()
+        self._responses = self._ctx.Queue()
+        self._heartbeat.value = time.time()
+        self._process = self._ctx.Process(
+            target=_worker_main, name=f"zensys-{self.name}", daemon=True,
+            args=(self.builder, self.ring.name, self.ring.slots, self.ring.slot_bytes,
+                  self._requests, self._responses, self._heartbeat)
+        )
+        self._process.start()
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive() and self._ready.is_set()
+
+    def submit(self, method, arrays, params=None, slot_timeout=5.0):
+        """
+        Gửi một request
+
+        Args:
+            method: Tên thao tác của engine (vd "get", "predict_depth")
+            arrays: dict {key: np.ndarray} chép vào shared memory
+            params: dict tham số nhỏ (pickle)
+
+        Returns:
+            Future: kết quả (payload, output_arrays)
+        """
+        if not self._running:
+            raise RuntimeError(f"Inference worker '{self.name}' is not running")
+        slot = self.ring.acquire(slot_timeout)
+        try:
+            layout = self.ring.write(slot, arrays)
+        except Exception:
+            self.ring.release(slot)
+            raise
+        future = Future()
+        future.submitted = time.perf_counter()
+        request_id = next(self._ids)
+        with self._lock:
+            self._pending[request_id] = (future, slot)
+            requests = self._requests
+        requests.put((request_id, slot, layout, method, params))
+        return future
+
+    def call(self, method, arrays, params=None, timeout=None):
+        """Gửi request và chờ kết quả (payload, output_arrays)"""
+        return self.submit(method, arrays, params).result(timeout)
+
+    def _read_responses(self):
+        while self._running:
+            responses = self._responses
+            try:
+                message = responses.get(timeout=0.5)
+            except (queue.Empty, OSError, EOFError, ValueError):
+                continue
+            if message[0] == "ready":
+                self._ready.set()
+                continue
+            if message[0] == "failed":
+                self._error = message[1]
+                self._ready.set()
+                continue
+            request_id, payload, out_layout, elapsed_ms, error = message
+            with self._lock:
+                entry = self._pending.pop(request_id, None)
+            if entry is None:
+                continue  # Request của worker cũ đã bị hủy khi khởi động lại
+            future, slot = entry
+            try:
+                if error is not None:
+                    future.set_exception(RuntimeError(f"Inference worker '{self.name}': {error}"))
+                else:
+                    outputs = self.ring.read(slot, out_layout)
+                    self.metrics.observe("worker_inference", elapsed_ms, self._labels)
+                    self.metrics.observe("worker_roundtrip",
+                                         (time.perf_counter() - future.submitted) * 1000, self._labels)
+                    future.set_result((payload, outputs))
+            finally:
+                self.ring.release(slot)
+
+    def _supervise(self):
+        while self._running:
+            time.sleep(0.5)
+            process = self._process
+            if not self._running or process is None:
+                break
+            if not process.is_alive():
+                self._restart(f"exited with code {process.exitcode}")
+            elif self._ready.is_set() and time.time() - self._heartbeat.value > self.heartbeat_timeout:
+                self._restart(f"no heartbeat for {self.heartbeat_timeout}s")
+
+    def _restart(self, reason):
+        self.logger.error("Inference worker '%s' %s, restarting", self.name, reason)
+        self.metrics.inc("worker_restarts", labels=self._labels)
+        self.restarts += 1
+        self._terminate()
+        self._fail_pending(WorkerCrashedError(f"Inference worker '{self.name}' {reason}"))
+        time.sleep(self.restart_delay)
+        if not self._running:
+            return
+        self._spawn()
+        if not self._ready.wait(self.start_timeout) or self._error:
+            self.logger.error("Inference worker '%s' did not come back: %s", self.name, self._error)
+
+    def _terminate(self):
+        process = self._process
+        if process is None:
+            return
+        if process.is_alive():
+            process.terminate()
+        process.join(timeout=2.0)
+        if process.is_alive():
+            process.kill()
+            process.join(timeout=1.0)
+
+    def _fail_pending(self, error):
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future, slot in pending:
+            future.set_exception(error)
+            self.ring.release(slot)
+
+    def stop(self):
+        """Dừng worker, hủy request đang chờ và giải phóng shared memory"""
+        if self._process is None:
+            return
+        self._running = False
+        try:
+            self._requests.put(None)
+            self._process.join(timeout=2.0)
+        except Exception:
+            pass
+        self._terminate()
+        self._process = None
+        self._fail_pending(WorkerCrashedError(f"Inference worker '{self.name}' stopped"))
+        self.ring.close()
@@ -0,0 +1,100 @@
+from functools import partial
+
+from src.core.zen_face.face_operator import Face
+from src.core.zensys.depth_manager import DepthManager
+from src.core.workers.engines import FaceEngine, DepthEngine
+from src.core.workers.process_worker import InferenceWorker
+
+class RemoteFaceAnalyzer:
+    """
+    Thay thế ZenFace trong tiến trình chính: cùng get()/get_batch() nhưng model
+    chạy trong InferenceWorker
+    """
+
+    def __init__(self, worker, timeout=30.0):
+        self.worker = worker
+        self.timeout = timeout
+        # ZenSys._warm_up_face_recognition chỉ gọi get(); worker tự giữ model
+        self.models = {}
+        self.det_controller = None
+
+    @staticmethod
+    def _unpack(img, faces):
+        result = []
+        for data in faces:
+            face = Face(bbox=data["bbox"], kps=data["kps"], det_score=data["det_score"],
+                        embedding=data["embedding"])
+            face.img = img
+            face.rec_version = data.get("rec_version")
+            result.append(face.detach())
+        return result
+
+    def get(self, img, max_num=0, adaptive=False):
+        payload, _ = self.worker.call("get", {"frame": img}, {"max_num": max_num, "adaptive": adaptive},
+                                      timeout=self.timeout)
+        return self._unpack(img, payload)
+
+    def get_batch(self, imgs, max_num=0):
+        payload, _ = self.worker.call("get_batch", {str(i): img for i, img in enumerate(imgs)},
+                                      {"max_num": max_num}, timeout=self.timeout)
+        return [self._unpack(img, faces) for img, faces in zip(imgs, payload)]
+
+    def apply_config(self):
+        self.worker.call("apply_config", {}, timeout=self.timeout)
+
+    def close(self):
+        self.worker.stop()
+
+class RemoteDepthManager(DepthManager):
+    """DepthManager với MiDaS chạy trong InferenceWorker; ngưỡng và chỉ số depth tính tại chỗ"""
+
+    def __init__(self, worker, timeout=30.0):
+        # Không gọi DepthManager.__init__: model nằm trong worker
+        self.worker = worker
+        self.timeout = timeout
+        self.depth_predictor = None
+        self.last_depth_map = None
+        self.last_colored_depth = None
+        self.last_raw_depth = None
+
+        # Ngưỡng phát hiện liveness từ depth map
+        self.depth_variance_threshold = 5000.0
+        self.depth_range_threshold = 30.0
+        self.min_depth_threshold = 50.0
+        self.max_depth_threshold = 200.0
+
+    def predict_depth(self, image):
+        payload, outputs = self.worker.call("predict_depth", {"frame": image}, timeout=self.timeout)
+        depth_result = {**payload, **outputs}
+        if 'depth_map' in depth_result:
+            self.last_depth_map = depth_result['depth_map']
+        if 'colored_depth' in depth_result:
+            self.last_colored_depth = depth_result['colored_depth']
+        if 'raw_depth' in depth_result:
+            self.last_raw_depth = depth_result['raw_depth']
+        return depth_result
+
+    def close(self):
+        self.worker.stop()
+
+def _start_worker(name, builder, settings):
+    worker = InferenceWorker(
+        name, builder,
+        slots=settings.slots,
+        slot_mb=settings.slot_mb,
+        heartbeat_timeout=settings.heartbeat_timeout,
+        restart_delay=settings.restart_delay,
+        start_timeout=settings.start_timeout
+    )
+    worker.start()
+    return worker
+
+def create_remote_face_analyzer(settings):
+    """Khởi động worker ZenFace theo config.inference_workers và trả về RemoteFaceAnalyzer"""
+    worker = _start_worker("face", partial(FaceEngine, settings.ctx_id), settings)
+    return RemoteFaceAnalyzer(worker, timeout=settings.request_timeout)
+
+def create_remote_depth_manager(settings, use_custom_midas=True):
+    """Khởi động worker MiDaS theo config.inference_workers và trả về RemoteDepthManager"""
+    worker = _start_worker("depth", partial(DepthEngine, use_custom_midas), settings)
+    return RemoteDepthManager(worker, timeout=settings.request_timeout)
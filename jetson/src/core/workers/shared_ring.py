@@ -0,0 +1,94 @@
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+class SharedFrameRing:
+    """
+    Vùng shared memory chia thành `slots` ô cố định kích thước. Mỗi ô chứa các
+    mảng numpy của một request (frame) và sau đó là kết quả (vd: depth map), chỉ
+    kèm bảng vị trí nhỏ (layout) qua queue thay vì pickle cả mảng.
+    """
+
+    def __init__(self, slots=4, slot_bytes=8 << 20, name=None):
+        """
+        Args:
+            slots: Số ô (số request tối đa đang chờ cùng lúc)
+            slot_bytes: Kích thước mỗi ô
+            name: Tên vùng nhớ đã có (tiến trình worker); None để tạo mới
+        """
+        self.slots = int(slots)
+        self.slot_bytes = int(slot_bytes)
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=self.slots * self.slot_bytes)
+        self.name = self.shm.name
+        self._free = queue.Queue()
+        if self.owner:
+            for slot in range(self.slots):
+                self._free.put(slot)
+
+    def acquire(self, timeout=None):
+        """
+        Lấy một ô trống (chỉ dùng ở tiến trình tạo ring)
+
+        Raises:
+            TimeoutError: Nếu không có ô trống trong thời gian chờ
+        """
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No free shared memory slot") from None
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def write(self, slot, arrays):
+        """
+        Chép các mảng vào ô `slot`
+
+        Args:
+            arrays: dict {key: np.ndarray}
+
+        Returns:
+            list (key, offset, shape, dtype) để đọc lại bằng read()
+
+        Raises:
+            ValueError: Nếu tổng kích thước vượt quá slot_bytes
+        """
+        layout = []
+        offset = 0
+        base = slot * self.slot_bytes
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            end = offset + array.nbytes
+            if end > self.slot_bytes:
+                raise ValueError(f"Arrays need more than {self.slot_bytes} bytes, increase slot size")
+            target = np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf, offset=base + offset)
+            target[...] = array
+            layout.append((key, offset, array.shape, array.dtype.str))
+            # Căn 64 byte cho mảng tiếp theo
+            offset = (end + 63) & ~63
+        return layout
+
+    def read(self, slot, layout, copy=True):
+        """
+        Đọc các mảng từ ô `slot`
+
+        Args:
+            copy: False để trả về view trực tiếp vào shared memory (chỉ hợp lệ tới khi ô bị ghi lại)
+        """
+        base = slot * self.slot_bytes
+        arrays = {}
+        for key, offset, shape, dtype in layout:
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=self.shm.buf, offset=base + offset)
+            arrays[key] = view.copy() if copy else view
+        return arrays
+
+    def close(self):
+        """Đóng vùng nhớ; tiến trình tạo ring đồng thời giải phóng nó"""
+        try:
+            self.shm.close()
+            if self.owner:
+                self.shm.unlink()
+        except (FileNotFoundError, BufferError):
+            pass
@@ -0,0 +1,161 @@
+import threading
+
+import numpy as np
+
+class AdaptiveDetSize:
+    """
+    Bộ điều khiển kích thước đầu vào RetinaFace theo kích thước khuôn mặt gần đây.
+
+    - Khuôn mặt lớn (học sinh đứng gần camera): chạy detection ở kích thước nhỏ nhất
+    - Khuôn mặt nhỏ so với kích thước hiện tại: tăng kích thước ngay ở frame sau
+    - Không thấy mặt: thử ROI quanh vị trí mặt gần nhất, sau đó chạy kích thước
+      lớn nhất ở lần miss đầu tiên và định kỳ mỗi `probe_interval` frame
+    - Chỉ giảm kích thước sau `downscale_after` frame liên tiếp cho phép
+    """
+
+    def __init__(self, sizes, min_face_px=40, downscale_after=5, probe_interval=5,
+                 roi_margin=1.0, roi_max_age=10):
+        """
+        Args:
+            sizes: Danh sách kích thước (w, h) được phép, vd [(320, 320), (480, 480), (640, 640)]
+            min_face_px: Chiều cao mặt tối thiểu (px trong ảnh đầu vào detector) để phát hiện ổn định
+            downscale_after: Số frame liên tiếp trước khi giảm một bậc kích thước
+            probe_interval: Khi không có mặt, số frame giữa hai lần chạy ở kích thước lớn nhất
+            roi_margin: Mở rộng ROI quanh mặt gần nhất (tỉ lệ theo kích thước mặt, mỗi phía)
+            roi_max_age: Số frame tối đa dùng lại vị trí mặt cũ cho ROI
+        """
+        # Kích thước phải chia hết cho stride lớn nhất (32)
+        sizes = {(max(32, int(w) // 32 * 32), max(32, int(h) // 32 * 32)) for w, h in sizes}
+        self.sizes = sorted(sizes, key=lambda s: s[0] * s[1])
+        self.min_face_px = float(min_face_px)
+        self.downscale_after = max(1, int(downscale_after))
+        self.probe_interval = max(1, int(probe_interval))
+        self.roi_margin = float(roi_margin)
+        self.roi_max_age = int(roi_max_age)
+
+        self._lock = threading.Lock()
+        self.level = len(self.sizes) - 1  # Bắt đầu ở kích thước lớn nhất
+        self._down_streak = 0
+        self._miss_streak = 0
+        self._last_box = None
+        self._last_box_age = 0
+        self.stats = {"frames": 0, "roi_passes": 0, "roi_hits": 0, "probes": 0, "by_size": {}}
+
+    @property
+    def current_size(self):
+        return self.sizes[self.level]
+
+    def reset(self):
+        """Quay về kích thước lớn nhất (vd: sau khi đổi camera)"""
+        with self._lock:
+            self.level = len(self.sizes) - 1
+            self._down_streak = 0
+            self._miss_streak = 0
+            self._last_box = None
+
+    def _run(self, det_model, img, size, max_num):
+        key = f"{size[0]}x{size[1]}"
+        self.stats["by_size"][key] = self.stats["by_size"].get(key, 0) + 1
+        return det_model.detect(img, input_size=size, max_num=max_num, metric='default')
+
+    def _roi(self, shape):
+        """Expanded box around the last face, clipped to the frame"""
+        if self._last_box is None or self._last_box_age > self.roi_max_age:
+            return None
+        x1, y1, x2, y2 = self._last_box
+        mx = (x2 - x1) * self.roi_margin
+        my = (y2 - y1) * self.roi_margin
+        x1 = int(max(0, x1 - mx))
+        y1 = int(max(0, y1 - my))
+        x2 = int(min(shape[1], x2 + mx))
+        y2 = int(min(shape[0], y2 + my))
+        if x2 - x1 < 32 or y2 - y1 < 32:
+            return None
+        return x1, y1, x2, y2
+
+    def _detect_roi(self, det_model, img, roi, max_num):
+        """Detect inside the ROI at the smallest size and map results back to the frame"""
+        x1, y1, x2, y2 = roi
+        self.stats["roi_passes"] += 1
+        bboxes, kpss = self._run(det_model, img[y1:y2, x1:x2], self.sizes[0], max_num)
+        if bboxes.shape[0] == 0:
+            return bboxes, kpss
+        self.stats["roi_hits"] += 1
+        bboxes = bboxes.copy()
+        bboxes[:, [0, 2]] += x1
+        bboxes[:, [1, 3]] += y1
+        if kpss is not None:
+            kpss = kpss.copy()
+            kpss[:, :, 0] += x1
+            kpss[:, :, 1] += y1
+        return bboxes, kpss
+
+    def required_level(self, frame_shape, face_height):
+        """Smallest size at which a face of `face_height` frame pixels stays above min_face_px"""
+        frame_h, frame_w = frame_shape[:2]
+        for level, (w, h) in enumerate(self.sizes):
+            scale = min(float(w) / frame_w, float(h) / frame_h)
+            if face_height * scale >= self.min_face_px:
+                return level
+        return len(self.sizes) - 1
+
+    def detect(self, det_model, img, max_num=0):
+        """
+        Detect faces choosing the input size adaptively
+
+        Args:
+            det_model: RetinaFace với input động (detect nhận input_size)
+            img: Frame BGR
+            max_num: Như RetinaFace.detect
+
+        Returns:
+            (bboxes, kpss) như RetinaFace.detect, theo tọa độ frame gốc
+        """
+        with self._lock:
+            self.stats["frames"] += 1
+            level = self.level
+            roi = self._roi(img.shape)
+
+        top = len(self.sizes) - 1
+        bboxes, kpss = self._run(det_model, img, self.sizes[level], max_num)
+
+        if bboxes.shape[0] == 0 and level < top:
+            if roi is not None:
+                bboxes, kpss = self._detect_roi(det_model, img, roi, max_num)
+            if bboxes.shape[0] == 0 and self._miss_streak % self.probe_interval == 0:
+                # Mặt có thể quá nhỏ/xa so với kích thước hiện tại
+                self.stats["probes"] += 1
+                bboxes, kpss = self._run(det_model, img, self.sizes[top], max_num)
+
+        self._update(img.shape, bboxes)
+        return bboxes, kpss
+
+    def _update(self, frame_shape, bboxes):
+        with self._lock:
+            if bboxes.shape[0] == 0:
+                self._miss_streak += 1
+                self._last_box_age += 1
+                # Cửa lớp trống: chạy ở kích thước nhỏ nhất, phần còn lại do probe lo
+                if self._miss_streak >= self.downscale_after:
+                    self.level = 0
+                    self._down_streak = 0
+                return
+
+            self._miss_streak = 0
+            heights = bboxes[:, 3] - bboxes[:, 1]
+            largest = int(np.argmax(heights))
+            self._last_box = tuple(float(v) for v in bboxes[largest, :4])
+            self._last_box_age = 0
+
+            # Mặt nhỏ nhất quyết định kích thước cần thiết
+            required = self.required_level(frame_shape, float(np.min(heights)))
+            if required > self.level:
+                self.level = required
+                self._down_streak = 0
+            elif required < self.level:
+                self._down_streak += 1
+                if self._down_streak >= self.downscale_after:
+                    self.level -= 1
+                    self._down_streak = 0
+            else:
+                self._down_streak = 0
@@ -24,7 +24,25 @@ class Face:
         self.kps = kps
         self.det_score = det_score
         self.embedding = embedding
-        self.img = None  # Lưu ảnh gốc để sử dụng khi cắt khuôn mặt
+        self.img = None  # Ảnh gốc, chỉ giữ trong lúc detection/embedding
+        self.crop = None  # Bản sao vùng bbox, còn lại sau detach()
+        self.rec_version = None  # Phiên bản model đã tạo embedding
+        
+    def detach(self):
+        """
+        Bỏ tham chiếu tới ảnh gốc, chỉ giữ bản sao vùng bbox. Frame camera nằm
+        trong buffer của FramePool và sẽ bị ghi đè khi quay về pool, nên Face sống
+        lâu hơn frame không được trỏ vào nó.
+        """
+        if self.img is not None and self.bbox is not None:
+            h, w = self.img.shape[:2]
+            x1, y1, x2, y2 = [int(b) for b in self.bbox]
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(w, x2), min(h, y2)
+            if x2 > x1 and y2 > y1:
+                self.crop = self.img[y1:y2, x1:x2].copy()
+        self.img = None
+        return self
         
     @property
     def normed_embedding(self):
@@ -1,9 +1,14 @@
+import copy
 import onnxruntime
 import numpy as np
 
 from model.model_loader_onnx import model_zoo
+from model.utils import face_align
 from utils.config_utils import config
 from src.core.zen_face.face_operator import Face
+from src.core.zen_face.adaptive_detection import AdaptiveDetSize
+from src.core.faiss_manager.face_database import model_stamp
+from src.log.metrics import get_metrics
 
 class ZenFace:
     """
@@ -23,7 +28,7 @@ class ZenFace:
         
         # Load models từ config
         if allowed_modules and 'detection' in allowed_modules:
-            det_model = model_zoo.get_model(config.detection_model)
+            det_model = model_zoo.get_model(config.detection_model, precision=config.model_precision['detection'])
             if det_model is not None:
                 self.models['detection'] = det_model
                 print(f"Loaded detection model from: {config.detection_model}")
@@ -31,8 +36,11 @@ class ZenFace:
                 raise FileNotFoundError(f"Detection model not found at {config.detection_model}")
         
         if allowed_modules and 'recognition' in allowed_modules:
-            rec_model = model_zoo.get_model(config.recognition_model)
+            rec_model = model_zoo.get_model(config.recognition_model, precision=config.model_precision['recognition'])
             if rec_model is not None:
+                # Phiên bản model gắn vào mỗi Face để không so embedding với index của model khác
+                rec_model.version = model_stamp(config.recognition_model,
+                                                config.model_precision['recognition'])['version']
                 self.models['recognition'] = rec_model
                 print(f"Loaded recognition model from: {config.recognition_model}")
             else:
@@ -40,6 +48,8 @@ class ZenFace:
                 
         assert 'detection' in self.models, "Detection model is required"
         self.det_model = self.models['detection']
+        self.det_controller = None
+        self.metrics = get_metrics()
 
     def prepare(self, ctx_id, det_thresh=None, det_size=None):
         """
@@ -59,8 +69,55 @@ class ZenFace:
                 model.prepare(ctx_id, input_size=self.det_size, det_thresh=self.det_thresh)
             else:
                 model.prepare(ctx_id)
+        
+        self._prepare_adaptive_detection()
+
+    def apply_config(self):
+        """
+        Áp dụng lại ngưỡng, det-size và adaptive detection từ config (sau
+        config.reload()) mà không tải lại model. Model có input cố định giữ det-size cũ.
+        """
+        self.det_thresh = config.det_threshold
+        self.det_model.det_thresh = self.det_thresh
+        det_size = config.det_size
+        if isinstance(self.det_model.input_shape[2], str):
+            self.det_model.prime_center_cache(det_size)
+            self.det_model.input_size = det_size
+            self.det_size = det_size
+        elif tuple(det_size) != tuple(self.det_model.input_size):
+            print('det-size change ignored: detection model has a fixed input size')
+        self._prepare_adaptive_detection()
+        print('applied det-thresh:', self.det_thresh, 'det-size:', self.det_size)
+
+    def _prepare_adaptive_detection(self):
+        """
+        Tạo bộ điều khiển kích thước detection và tính sẵn anchor centers
+        cho mọi kích thước. Chỉ dùng được với model có input động.
+        """
+        adaptive = config.detection_adaptive
+        if not adaptive.enable:
+            self.det_controller = None
+            return
+        if not isinstance(self.det_model.input_shape[2], str):
+            self.det_controller = None
+            print('adaptive det-size disabled: detection model has a fixed input size')
+            return
+        
+        det_controller = AdaptiveDetSize(
+            adaptive.sizes,
+            min_face_px=adaptive.min_face_px,
+            downscale_after=adaptive.downscale_after,
+            probe_interval=adaptive.probe_interval,
+            roi_margin=adaptive.roi_margin,
+            roi_max_age=adaptive.roi_max_age
+        )
+        for size in det_controller.sizes:
+            self.det_model.prime_center_cache(size)
+        # Gán sau khi chuẩn bị xong: luồng camera có thể đang dùng controller cũ
+        self.det_controller = det_controller
+        print('adaptive det-sizes:', det_controller.sizes)
 
-    def get(self, img, max_num=0):
+    def get(self, img, max_num=0, adaptive=False):
         """
         Thực hiện face detection và recognition trên ảnh đầu vào.
         
@@ -72,59 +129,109 @@ class ZenFace:
         Args:
             img: Ảnh đầu vào dạng numpy array
             max_num: Số lượng khuôn mặt tối đa cần phát hiện (0 = không giới hạn)
+            adaptive: Chọn kích thước detection theo các frame trước (chỉ dùng cho luồng camera)
         
         Returns:
             List các đối tượng Face, hoặc danh sách rỗng nếu không phát hiện được mặt nào
         """
         # Bước 1: Face Detection - Sử dụng RetinaFace để phát hiện khuôn mặt
-        bboxes, kpss = self.det_model.detect(img, max_num=max_num, metric='default')
+        with self.metrics.stage("detection"):
+            if adaptive and self.det_controller is not None:
+                bboxes, kpss = self.det_controller.detect(self.det_model, img, max_num=max_num)
+            else:
+                bboxes, kpss = self.det_model.detect(img, max_num=max_num, metric='default')
         
-        # Nếu không phát hiện được khuôn mặt nào
-        if bboxes.shape[0] == 0:
+        face = self._largest_face(img, bboxes, kpss)
+        if face is None:
             return []
-        
-        # Chỉ xử lý khuôn mặt lớn nhất (area của bbox lớn nhất)
-        if bboxes.shape[0] > 1:
-            # Tính diện tích các bbox
-            areas = []
-            for i in range(bboxes.shape[0]):
-                bbox = bboxes[i, 0:4]
-                area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
-                areas.append(area)
-            
-            # Lấy index của bbox lớn nhất
-            largest_idx = np.argmax(areas)
-            
-            # Chỉ giữ lại bbox lớn nhất
-            bbox = bboxes[largest_idx, 0:4]
-            det_score = bboxes[largest_idx, 4]
-            kps = None if kpss is None else kpss[largest_idx]
-            
-            # Tạo đối tượng Face với thông tin từ detection
-            face = Face(bbox=bbox, kps=kps, det_score=det_score)
-            face.img = img  # Lưu ảnh gốc để sử dụng khi cần
-            
-            # Thực hiện recognition nếu cần
-            for taskname, model in self.models.items():
-                if taskname == 'detection':
-                    continue
-                model.get(img, face)
-                
-            return [face]  # Trả về list chỉ chứa khuôn mặt lớn nhất
-        else:
-            # Nếu chỉ có 1 khuôn mặt, xử lý như bình thường
-            bbox = bboxes[0, 0:4]
-            det_score = bboxes[0, 4]
-            kps = None if kpss is None else kpss[0]
-            
-            # Tạo đối tượng Face với thông tin từ detection
-            face = Face(bbox=bbox, kps=kps, det_score=det_score)
-            face.img = img  # Lưu ảnh gốc để sử dụng khi cần
-            
-            # Thực hiện recognition nếu cần
+
+        # Thực hiện recognition nếu cần
+        with self.metrics.stage("embedding"):
             for taskname, model in self.models.items():
                 if taskname == 'detection':
                     continue
                 model.get(img, face)
-                
-            return [face]  # Trả về list chỉ chứa khuôn mặt duy nhất 
\ No newline at end of file
+                face.rec_version = getattr(model, 'version', None)
+
+        return [face.detach()]  # Trả về list chỉ chứa khuôn mặt lớn nhất
+
+    def get_batch(self, imgs, max_num=0):
+        """
+        Detection và recognition cho nhiều frame (vd: mỗi camera một frame) với số
+        lần gọi model ít nhất: một lần detect cho cả batch, một lần embedding cho
+        mọi khuôn mặt tìm được. Dùng det_size cố định (không dùng adaptive).
+
+        Args:
+            imgs: List ảnh đầu vào
+            max_num: Số lượng khuôn mặt tối đa cần phát hiện mỗi ảnh (0 = không giới hạn)
+
+        Returns:
+            List kết quả theo thứ tự của imgs, mỗi phần tử như kết quả của get()
+        """
+        with self.metrics.stage("detection"):
+            detections = self.det_model.detect_batch(imgs, max_num=max_num, metric='default')
+
+        results = []
+        faces = []
+        for img, (bboxes, kpss) in zip(imgs, detections):
+            face = self._largest_face(img, bboxes, kpss)
+            if face is None:
+                results.append([])
+            else:
+                results.append([face])
+                faces.append(face)
+
+        if faces:
+            with self.metrics.stage("embedding"):
+                for taskname, model in self.models.items():
+                    if taskname == 'detection':
+                        continue
+                    self._embed_batch(model, faces)
+            for face in faces:
+                face.detach()
+        return results
+
+    def _largest_face(self, img, bboxes, kpss):
+        """Face của bbox có diện tích lớn nhất, None nếu không phát hiện được khuôn mặt nào"""
+        if bboxes.shape[0] == 0:
+            return None
+        areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+        largest_idx = int(np.argmax(areas))
+
+        # Tạo đối tượng Face với thông tin từ detection
+        face = Face(bbox=bboxes[largest_idx, 0:4], kps=None if kpss is None else kpss[largest_idx],
+                    det_score=bboxes[largest_idx, 4])
+        face.img = img  # Chỉ giữ tới khi embedding xong (xem Face.detach)
+        return face
+
+    @staticmethod
+    def _embed_batch(model, faces):
+        """Align và tạo embedding cho nhiều khuôn mặt trong một lần gọi session nếu model hỗ trợ"""
+        version = getattr(model, 'version', None)
+        if len(faces) < 2 or not getattr(model, 'dynamic_batch', False):
+            for face in faces:
+                model.get(face.img, face)
+                face.rec_version = version
+            return
+        crops = face_align.norm_crop_many([face.img for face in faces], [face.kps for face in faces],
+                                          image_size=model.input_size[0])
+        feats = model.get_feat(crops)
+        for face, feat in zip(faces, feats):
+            face.embedding = feat.flatten()
+            face.rec_version = version
+
+    def with_recognition(self, rec_model):
+        """
+        Bản sao dùng chung detector nhưng embedding bằng rec_model (dựng shadow
+        index khi nâng cấp model). Không dùng adaptive detection.
+        """
+        shadow = copy.copy(self)
+        shadow.models = {'detection': self.det_model, 'recognition': rec_model}
+        shadow.det_controller = None
+        return shadow
+
+    def swap_recognition(self, rec_model):
+        """Thay model recognition đang dùng; frame đang xử lý vẫn mang phiên bản model cũ"""
+        models = dict(self.models)
+        models['recognition'] = rec_model
+        self.models = models
@@ -1,5 +1,8 @@
 # Import the main class from the module
 from src.core.zensys.zensys import ZenSys
+from src.core.zensys.startup import StartupOrchestrator
+from src.core.zensys.streams import SharedModels, InferenceBatcher, StreamStats
+from src.core.zensys.model_registry import ModelRegistry, get_model_registry
 
 # Make the parent module's functions available without causing circular imports
 import os
@@ -12,7 +15,8 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 # Export public API
-__all__ = ['ZenSys']
+__all__ = ['ZenSys', 'StartupOrchestrator', 'SharedModels', 'InferenceBatcher', 'StreamStats',
+           'ModelRegistry', 'get_model_registry']
 
 # Note: create_zensys_instance and get_default_instance should be imported directly from src.core.zensys
 # This avoids the circular import that was causing maximum recursion depth errors
\ No newline at end of file
@@ -1,16 +1,19 @@
 import numpy as np
 from model.FaceAnti.face_anti import FaceAntiSpoofing
+from utils.config_utils import config
+from .liveness import LivenessAccumulator
 
 class AntiSpoofingManager:
     """
     Quản lý chức năng chống giả mạo khuôn mặt
     """
-    
+
     def __init__(self):
         """
         Khởi tạo Anti-Spoofing Manager
         """
         self.face_anti = FaceAntiSpoofing()
+        self.liveness = LivenessAccumulator(*self._liveness_settings())
         self.depth_face_crop = None
         self.anti_spoofing_result = None
         self.depth_variance = None
@@ -19,52 +22,81 @@ class AntiSpoofingManager:
         self.max_depth = None
         self.depth_range = None
         self.criteria_status = None
-    
+
+    @staticmethod
+    def _liveness_settings():
+        """(window, min_frames) từ config.anti_spoofing"""
+        settings = config.anti_spoofing
+        return getattr(settings, 'liveness_window', 8), getattr(settings, 'liveness_min_frames', 3)
+
+    def apply_config(self):
+        """
+        Cập nhật ngưỡng và cửa sổ liveness từ config (sau config.reload())
+        """
+        self.face_anti.apply_config()
+        self.liveness.configure(*self._liveness_settings())
+
     def process_depth_anti_spoofing(self, depth_map, face):
         """
-        Xử lý depth map cho face anti-spoofing
-        
+        Xử lý depth map cho face anti-spoofing. Thống kê của frame được đưa vào
+        LivenessAccumulator; kết quả anti-spoofing là quyết định trên các frame đã
+        gộp của khuôn mặt này.
+
         Args:
             depth_map: Bản đồ độ sâu
             face: Đối tượng Face cần kiểm tra
-            
+
         Returns:
             dict: Kết quả anti-spoofing hoặc None nếu không thể xử lý
         """
         if depth_map is None or face is None:
             return None
-            
+
         # Sử dụng face_anti để xử lý depth map
         result = self.face_anti.process_depth_map(depth_map, face.bbox)
-        
+
         if result is not None:
+            self.liveness.add(face.bbox, result)
+            decision, stats = self.liveness.decide(self.face_anti)
+            result.update(stats)
+            result["frame_result"] = result["detection_result"]
+            result["detection_result"] = decision
+            result["is_real"] = decision == "live"
+
             # Lưu depth face crop và kết quả anti-spoofing
             self.depth_face_crop = result["depth_visualization"]
-            self.anti_spoofing_result = result["detection_result"]
-            
-            # Lưu các giá trị thống kê
-            if "depth_variance" in result:
-                self.depth_variance = result["depth_variance"]
-            if "mean_gradient" in result:
-                self.mean_gradient = result["mean_gradient"]
-            if "min_depth" in result:
-                self.min_depth = result["min_depth"]
-            if "max_depth" in result:
-                self.max_depth = result["max_depth"]
-            if "depth_range" in result:
-                self.depth_range = result["depth_range"]
-            if "criteria_status" in result:
-                self.criteria_status = result["criteria_status"]
-            
+            self.anti_spoofing_result = decision
+
+            # Lưu các giá trị thống kê (đã gộp)
+            self.depth_variance = result["depth_variance"]
+            self.mean_gradient = result["mean_gradient"]
+            self.min_depth = result["min_depth"]
+            self.max_depth = result["max_depth"]
+            self.depth_range = result["depth_range"]
+            self.criteria_status = result["criteria_status"]
+
         return result
-    
+
+    def ready(self):
+        """
+        Đã đủ frame để quyết định liveness chưa (luôn True khi tắt anti-spoofing)
+        """
+        return not self.face_anti.enable or self.liveness.ready
+
+    def reset(self):
+        """
+        Bắt đầu phiên mới (quét RFID mới hoặc sau khi xác thực xong)
+        """
+        self.liveness.reset()
+        self.anti_spoofing_result = None
+
     def is_live_face(self):
         """
         Kiểm tra xem khuôn mặt có phải là thật hay không
-        
+
         Returns:
             bool: True nếu là khuôn mặt thật, False nếu là giả mạo hoặc chưa xác định
         """
-        if self.face_anti.enable and self.anti_spoofing_result is not None:
-            return self.anti_spoofing_result == "LIVE"
-        return True  # Mặc định trả về True nếu không bật anti-spoofing 
\ No newline at end of file
+        if self.face_anti.enable:
+            return self.anti_spoofing_result == "live"
+        return True  # Mặc định trả về True nếu không bật anti-spoofing
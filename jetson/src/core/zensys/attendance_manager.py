@@ -1,7 +1,8 @@
-import time
 import os
 from datetime import datetime
 from src.log.attendance_logger import AttendanceLogger
+from src.log.event_journal import get_journal
+from src.log.metrics import get_metrics
 from src.core.zensys_factory import get_attendance_service, get_message_manager
 import json
 import numpy as np
@@ -26,8 +27,10 @@ class AttendanceManager:
         self.api_enabled = True
         self.face_system = None
         self.message_manager = get_message_manager()
+        self.metrics = get_metrics()
     
-    def log_attendance(self, user_id, rfid_id, face_image=None, face_image_path=None, status="SUCCESS", detected_face=None, note=None):
+    def log_attendance(self, user_id, rfid_id, face_image=None, face_image_path=None, status="SUCCESS", detected_face=None, note=None, face_jpeg=None,
+                       schedule_id=None, upload=True):
         """
         Ghi log điểm danh ra file và gửi lên server
 
@@ -39,6 +42,9 @@ class AttendanceManager:
             status: Trạng thái điểm danh ("SUCCESS" hoặc "FAILED")
             detected_face: Tên khuôn mặt được nhận diện (nếu khác với user_id)
             note: Ghi chú bổ sung về trường hợp xác thực
+            face_jpeg: Ảnh khuôn mặt đã mã hóa JPEG (bytes), ưu tiên dùng nếu có
+            schedule_id: scheduleId của tiết học đã xác định tại thiết bị (tùy chọn)
+            upload: False để chỉ ghi log local, không gửi lên server
 
         Returns:
             dict: Kết quả điểm danh
@@ -72,18 +78,19 @@ class AttendanceManager:
         image_data = None
         base64_img = None  # Khởi tạo biến base64_img từ đầu
         
-        if image_path:
+        # Dùng trực tiếp JPEG đã mã hóa trong bộ nhớ, không đọc lại từ disk
+        if face_jpeg:
+            image_data = face_jpeg
+            base64_img = base64.b64encode(image_data).decode('utf-8')
+            print(f"Using in-memory JPEG: {len(image_data)} bytes")
+        
+        elif image_path:
             print(f"Image path: {image_path}")
             print(f"Image exists: {os.path.exists(image_path)}")
             
-            # Đọc dữ liệu ảnh nếu tồn tại
+            # Đọc dữ liệu ảnh nếu tồn tại (file được ghi nguyên tử nên không cần chờ)
             if os.path.exists(image_path):
                 try:
-                    # Đợi một chút nếu file vừa được tạo để đảm bảo quá trình ghi hoàn tất
-                    if os.path.getmtime(image_path) > time.time() - 2:
-                        print(f"File mới được tạo, đợi 500ms để đảm bảo ghi xong")
-                        time.sleep(0.5)
-                    
                     with open(image_path, "rb") as img_file:
                         image_data = img_file.read()
                     print(f"Read image data: {len(image_data)} bytes")
@@ -116,9 +123,9 @@ class AttendanceManager:
         embedding_score = 0.0
         
         print("\n==== GETTING FACE EMBEDDING ====")
-        if self.face_system and hasattr(self.face_system, '_last_frame') and self.face_system._last_frame is not None:
+        last_frame = self.face_system.snapshot_last_frame() if self.face_system else None
+        if last_frame is not None:
             try:
-                last_frame = self.face_system._last_frame
                 print(f"Last frame shape: {last_frame.shape}")
                 
                 # Lấy khuôn mặt từ frame
@@ -152,6 +159,11 @@ class AttendanceManager:
         # Thêm trạng thái xác thực
         api_data["status"] = status
         
+        # Gắn tiết học đã xác định từ cache thời khóa biểu (scheduleId dành cho luồng điểm danh của giáo viên)
+        if schedule_id is not None:
+            api_data["deviceScheduleId"] = schedule_id
+            log_data["ScheduleId"] = schedule_id
+        
         # Thêm note vào API data
         if note:
             api_data["note"] = note
@@ -184,13 +196,16 @@ class AttendanceManager:
         }
         
         # Call API nếu có message manager
-        if self.message_manager:
+        if self.message_manager and upload:
             print("\n==== SENDING ATTENDANCE DATA ====")
+            self.metrics.inc("api_requests")
             try:
-                api_response = self.message_manager.send_attendance(api_data)
+                with self.metrics.stage("api_call"):
+                    api_response = self.message_manager.send_attendance(api_data)
                 
                 # Kiểm tra lỗi từ API
                 if not api_response.get("success", False):
+                    self.metrics.inc("api_failures")
                     error_message = api_response.get("message", "Unknown error")
                     error_details = api_response.get("error", "")
                     error_code = api_response.get("code", "API_ERROR")
@@ -211,6 +226,7 @@ class AttendanceManager:
                     result["api_response"] = api_response
                     
             except Exception as e:
+                self.metrics.inc("api_failures")
                 print(f"Failed to send attendance data: {e}")
                 traceback.print_exc()
                 
@@ -223,11 +239,16 @@ class AttendanceManager:
                 # Log lỗi
                 self.log_api_error(user_id, rfid_id, str(e), "NETWORK_ERROR")
         else:
-            print("Message manager not available, skipping API call")
+            print("Upload skipped or message manager not available, skipping API call")
         
         # Ghi log điểm danh ra file local
         try:
-            self.attendance_logger.log_attendance(user_id, rfid_id, status, face_image_path)
+            self.attendance_logger.log_attendance(
+                user_id, rfid_id,
+                status=status,
+                face_jpeg=face_jpeg,
+                face_image_path=face_image_path
+            )
             result["local_logged"] = True
         except Exception as e:
             print(f"Error logging attendance locally: {e}")
@@ -255,15 +276,9 @@ class AttendanceManager:
                 "error_message": error_message
             }
             
-            # Tạo file log API errors nếu chưa có
+            # Ghi vào journal API errors (logs/api_errors_YYYY-MM-DD.jsonl)
             log_dir = os.path.join(os.getcwd(), "logs")
-            os.makedirs(log_dir, exist_ok=True)
-            
-            log_file = os.path.join(log_dir, "api_errors.log")
-            
-            # Ghi file log
-            with open(log_file, "a", encoding="utf-8") as f:
-                f.write(f"{json.dumps(error_data)}\n")
+            log_file = get_journal(log_dir, "api_errors").append(error_data)
                 
             print(f"Logged API error to {log_file}")
         except Exception as e:
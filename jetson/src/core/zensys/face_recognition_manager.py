@@ -1,34 +1,89 @@
 import numpy as np
+from utils.config_utils import config
 from src.core.zen_face import ZenFace
-from src.core.faiss_manager import FaceDatabase
+from src.core.faiss_manager import FaceDatabase, FaceVectorSync, model_stamp
 
 class FaceRecognitionManager:
     """
     Quản lý nhận diện khuôn mặt sử dụng ZenFace và FAISS
     """
     
-    def __init__(self, ctx_id=0):
+    def __init__(self, ctx_id=0, face_analyzer=None):
         """
         Khởi tạo Face Recognition Manager
         
         Args:
             ctx_id: Context ID cho thiết bị tính toán (GPU ID)
+            face_analyzer: Analyzer đã tạo sẵn (vd RemoteFaceAnalyzer), mặc định tạo ZenFace
         """
         # Khởi tạo ZenFace
-        self.face_analyzer = ZenFace(allowed_modules=['detection', 'recognition'])
-        self.face_analyzer.prepare(ctx_id=ctx_id)
+        if face_analyzer is None:
+            face_analyzer = ZenFace(allowed_modules=['detection', 'recognition'])
+            face_analyzer.prepare(ctx_id=ctx_id)
+        self.face_analyzer = face_analyzer
         
-        # Khởi tạo Face Database
+        # Khởi tạo Face Database, gắn model recognition đang dùng để phát hiện index lệch model
         self.face_db = FaceDatabase()
+        self.face_db.model_stamp = model_stamp(config.recognition_model, config.model_precision['recognition'])
+        self._gallery_signature = None
+        self.vector_sync = None  # FaceVectorSync khi index dựng từ vector trên server (face_sync)
+        # Model detection đã tải; đổi detection cần restart, đổi recognition nâng cấp tại chỗ
+        self.detection_source = (config.detection_model, config.model_precision['detection'])
         
     def initialize_database(self):
         """
-        Đảm bảo database được tải hoặc khởi tạo
+        Đảm bảo database được tải hoặc khởi tạo. Khi manager được dùng lại qua
+        ModelRegistry (restart_zensys) và gallery không đổi thì giữ database hiện có.
         
         Returns:
             bool: True nếu database đã sẵn sàng
         """
-        return self.face_db.ensure_database(self.face_analyzer)
+        if self.vector_sync is not None:
+            print(f"Face database synced from server, reusing it ({len(self.face_db.name_dict)} faces)")
+            return True
+        if self._initialize_from_server():
+            return True
+        signature = self.face_db.gallery_signature()
+        if self._gallery_signature is not None and signature == self._gallery_signature:
+            print(f"Gallery unchanged, reusing face database ({len(self.face_db.name_dict)} faces)")
+            return True
+        ready = self.face_db.ensure_database(self.face_analyzer)
+        self._gallery_signature = signature if ready else None
+        return ready
+    
+    def _initialize_from_server(self):
+        """
+        Dựng index từ vector khuôn mặt trên server (face_sync), không tạo embedding từ gallery
+        
+        Returns:
+            bool: True nếu index đã dựng từ server và luồng đồng bộ đã chạy
+        """
+        settings = config.face_sync
+        if not settings.enable:
+            return False
+        if settings.classroom_id is None:
+            print("face_sync needs a classroom_id (face_sync or schedule_cache), building database from gallery")
+            return False
+        sync = FaceVectorSync(
+            self.face_db,
+            settings.classroom_id,
+            model_id=settings.model_id,
+            cache_file=settings.cache_file,
+            refresh_interval=settings.refresh_interval,
+            days_ahead=settings.days_ahead,
+            page_size=settings.page_size
+        )
+        if not sync.initialize():
+            print("No face vectors available from server, building database from gallery")
+            return False
+        print(f"Face database built from server vectors ({len(self.face_db.name_dict)} faces)")
+        sync.start()
+        self.vector_sync = sync
+        return True
+    
+    def refresh_gallery_signature(self):
+        """Ghi nhận gallery hiện tại là nguồn của database (sau khi dựng lại index bên ngoài)"""
+        self._gallery_signature = self.face_db.gallery_signature()
     
     def detect_faces(self, image, max_num=0):
         """
@@ -43,15 +98,20 @@ class FaceRecognitionManager:
         """
         return self.face_analyzer.get(image, max_num=max_num)
     
-    def recognize_face(self, face_embedding, threshold=None):
+    def recognize_face(self, face_embedding, threshold=None, rec_version=None):
         """
         Nhận diện khuôn mặt từ embedding
         
         Args:
             face_embedding: Vector embedding khuôn mặt
             threshold: Ngưỡng nhận diện
+            rec_version: Phiên bản model đã tạo embedding (Face.rec_version); khác với
+                model của index (frame xử lý ngay lúc chuyển model) thì trả về Unknown
             
         Returns:
             tuple: (name, score) - Tên người và độ tương đồng
         """
+        index_version = self.face_db.model_version
+        if rec_version is not None and index_version is not None and rec_version != index_version:
+            return "Unknown", 0.0
         return self.face_db.recognize_face(face_embedding, threshold) 
\ No newline at end of file
@@ -0,0 +1,105 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+# Thống kê depth được gộp qua các frame (xem FaceAntiSpoofing.compute_depth_stats)
+LIVENESS_STAT_KEYS = ("depth_variance", "mean_gradient", "min_depth", "max_depth", "depth_range")
+
+def bbox_iou(a, b):
+    """IoU của hai bbox [x1, y1, x2, y2]"""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return float(inter / union) if union > 0 else 0.0
+
+class LivenessAccumulator:
+    """
+    Gộp bằng chứng liveness của một khuôn mặt qua các frame đã xử lý kể từ lúc
+    quét RFID, thay vì quyết định từ một depth map duy nhất. Thống kê của từng
+    frame được giữ trong cửa sổ trượt và quyết định dựa trên trung vị, nên một
+    frame nhiễu không lật được kết quả.
+
+    Track đơn giản theo bbox: khi bbox mới gần như không chồng lên bbox trước
+    (IoU < iou_reset) thì coi là người khác và bắt đầu lại.
+    """
+
+    def __init__(self, window=8, min_frames=3, iou_reset=0.3):
+        """
+        Args:
+            window: Số frame gần nhất được giữ
+            min_frames: Số frame tối thiểu trước khi đủ để quyết định
+            iou_reset: IoU tối thiểu giữa hai bbox liên tiếp để còn là cùng một track
+        """
+        self.window = window
+        self.min_frames = min_frames
+        self.iou_reset = iou_reset
+        self._samples = deque(maxlen=window)
+        self._last_bbox = None
+        self._lock = threading.Lock()
+
+    def configure(self, window, min_frames):
+        with self._lock:
+            self.window = window
+            self.min_frames = min_frames
+            self._samples = deque(self._samples, maxlen=window)
+
+    def add(self, bbox, stats):
+        """
+        Thêm thống kê depth của một frame
+
+        Args:
+            bbox: Bbox của khuôn mặt trong frame
+            stats: Dict có các khóa LIVENESS_STAT_KEYS
+        """
+        sample = tuple(float(stats[key]) for key in LIVENESS_STAT_KEYS)
+        with self._lock:
+            if self._last_bbox is not None and bbox_iou(self._last_bbox, bbox) < self.iou_reset:
+                self._samples.clear()
+            self._last_bbox = [float(b) for b in bbox]
+            self._samples.append(sample)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._last_bbox = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._samples)
+
+    @property
+    def ready(self):
+        return len(self) >= self.min_frames
+
+    def aggregate(self):
+        """
+        Trung vị từng thống kê trên cửa sổ
+
+        Returns:
+            dict hoặc None nếu chưa có frame nào
+        """
+        with self._lock:
+            if not self._samples:
+                return None
+            medians = np.median(np.asarray(self._samples), axis=0)
+        return dict(zip(LIVENESS_STAT_KEYS, (float(v) for v in medians)))
+
+    def decide(self, face_anti):
+        """
+        Quyết định liveness từ thống kê đã gộp
+
+        Args:
+            face_anti: FaceAntiSpoofing (cung cấp ngưỡng qua evaluate_depth_stats)
+
+        Returns:
+            (result, stats): result "live"/"spoof" (None nếu chưa có frame), stats đã
+            gộp kèm criteria_status và số frame
+        """
+        frames = len(self)
+        stats = self.aggregate()
+        if stats is None:
+            return None, {}
+        result, criteria_status = face_anti.evaluate_depth_stats(stats)
+        return result, {**stats, "criteria_status": criteria_status, "liveness_frames": frames}
@@ -0,0 +1,96 @@
+import os
+import threading
+
+from utils.config_utils import config
+
+class ModelRegistry:
+    """
+    Giữ các model đã tải (ZenFace, MiDaS) cho cả tiến trình, theo khóa gồm đường
+    dẫn model, precision và profile session. restart_zensys() tạo ZenSys mới nhưng
+    lấy lại model từ đây thay vì tải lại ONNX/MiDaS và dựng lại gallery.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, builder):
+        """
+        Lấy model theo khóa, tạo bằng builder() nếu chưa có. Hai luồng cùng xin một
+        khóa thì chỉ một luồng tải, luồng kia chờ và dùng lại kết quả.
+
+        Args:
+            key: Khóa hashable (xem face_model_key / depth_model_key)
+            builder: Hàm không tham số tạo model
+
+        Returns:
+            Model đã tải
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                return self._entries[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    return self._entries[key]
+            value = builder()
+            with self._lock:
+                self._entries[key] = value
+                self.misses += 1
+            return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def evict(self, key):
+        """Bỏ model khỏi registry (lần get sau sẽ tải lại). Trả về model đã bỏ hoặc None"""
+        with self._lock:
+            self._key_locks.pop(key, None)
+            return self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+def _file_stamp(path):
+    """(đường dẫn, mtime) để thay file model thì khóa cũng đổi"""
+    try:
+        return path, int(os.path.getmtime(path))
+    except OSError:
+        return path, None
+
+def face_model_key(ctx_id=0):
+    """Khóa của ZenFace theo config hiện tại: file model, precision, profile ONNX Runtime và thiết bị"""
+    precision = config.model_precision
+    return ("face",
+            _file_stamp(config.detection_model), precision['detection'],
+            _file_stamp(config.recognition_model), precision['recognition'],
+            config.onnx_runtime.profile, ctx_id)
+
+def depth_model_key(use_custom_midas=True):
+    """Khóa của MiDaS: loại model và checkpoint local (nếu dùng)"""
+    checkpoint = os.path.join(os.getcwd(), "assets", "weights", "checkpoints", "midas_v21_small_256.pt")
+    return ("depth", "MidasSmall", _file_stamp(checkpoint) if use_custom_midas else None)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_model_registry():
+    """ModelRegistry dùng chung cho cả tiến trình"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
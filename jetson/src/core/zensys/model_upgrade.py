@@ -0,0 +1,132 @@
+import os
+import time
+import threading
+
+from src.core.faiss_manager import FaceDatabase, model_stamp
+
+class RecognitionModelUpgrade:
+    """
+    Nâng cấp model recognition không dừng hệ thống: tải model mới song song với
+    model cũ, tạo lại embedding cho gallery vào shadow index trong luồng nền (giới
+    hạn theo cpu_budget), rồi chuyển model và index cùng lúc. Trong lúc đó nhận
+    diện vẫn chạy bằng model và index cũ.
+
+    Trạng thái: "pending" -> "loading" -> "reembedding" -> "switched" | "failed"
+    """
+
+    def __init__(self, face_recognition, model_file, precision=None, cpu_budget=0.25, ctx_id=0,
+                 gallery_path=None, db_path=None, model_loader=None):
+        """
+        Args:
+            face_recognition: FaceRecognitionManager đang chạy (ZenFace trong tiến trình)
+            model_file: File ONNX của model recognition mới
+            precision: Biến thể model ('fp32', 'int8_static', ...)
+            cpu_budget: Tỉ lệ thời gian (0-1] luồng nền được dùng để tạo embedding
+            ctx_id: Context ID cho thiết bị tính toán (GPU ID)
+            gallery_path, db_path: Mặc định từ config
+            model_loader: Hàm (model_file, precision) -> model, mặc định model_zoo.get_model
+        """
+        if not hasattr(face_recognition.face_analyzer, 'with_recognition'):
+            raise RuntimeError("Recognition model upgrade needs the in-process ZenFace "
+                               "(disable inference_workers or restart the workers with the new model)")
+        if not 0 < cpu_budget <= 1:
+            raise ValueError(f"cpu_budget must be in (0, 1], got {cpu_budget}")
+        self.face_recognition = face_recognition
+        self.model_file = model_file
+        self.precision = precision or 'fp32'
+        self.cpu_budget = cpu_budget
+        self.ctx_id = ctx_id
+        self.gallery_path = gallery_path
+        self.db_path = db_path
+        self.model_loader = model_loader or self._load_model
+        self.state = "pending"
+        self.error = None
+        self.images_done = 0
+        self.started_at = None
+        self.finished_at = None
+        self.stamp = None
+        self._work_started = None
+        self._thread = None
+        self._done = threading.Event()
+
+    @staticmethod
+    def _load_model(model_file, precision):
+        from model.model_loader_onnx import model_zoo
+        return model_zoo.get_model(model_file, precision=precision)
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="ModelUpgrade", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """
+        Chờ nâng cấp xong
+
+        Returns:
+            bool: True nếu đã chuyển sang model mới
+        """
+        self._done.wait(timeout)
+        return self.state == "switched"
+
+    def _throttle(self):
+        """Ngủ sau mỗi ảnh để phần thời gian làm việc không vượt quá cpu_budget"""
+        now = time.perf_counter()
+        busy = now - self._work_started
+        if self.cpu_budget < 1:
+            time.sleep(busy * (1 - self.cpu_budget) / self.cpu_budget)
+        self.images_done += 1
+        self._work_started = time.perf_counter()
+
+    def _run(self):
+        try:
+            self.state = "loading"
+            self.stamp = model_stamp(self.model_file, self.precision)
+            rec_model = self.model_loader(self.model_file, self.precision)
+            if rec_model is None:
+                raise FileNotFoundError(f"Recognition model not found at {self.model_file}")
+            rec_model.prepare(self.ctx_id)
+            rec_model.version = self.stamp["version"]
+
+            # Shadow index: cùng detector, embedding bằng model mới, không đụng index đang dùng
+            self.state = "reembedding"
+            face_analyzer = self.face_recognition.face_analyzer
+            shadow = FaceDatabase()
+            self._work_started = time.perf_counter()
+            index, name_dict, _ = shadow.build_index(face_analyzer.with_recognition(rec_model),
+                                                     self.gallery_path, throttle=self._throttle)
+            if index is None:
+                raise RuntimeError("No faces were embedded with the new model; keeping the current model")
+
+            # Chuyển model và index; frame đang xử lý mang phiên bản cũ sẽ bị bỏ qua
+            face_db = self.face_recognition.face_db
+            face_analyzer.swap_recognition(rec_model)
+            face_db.swap(index, name_dict, self.stamp)
+            face_db.save(self.db_path)
+            self.face_recognition.refresh_gallery_signature()
+            self.state = "switched"
+            print(f"Recognition model switched to {self.stamp['model']} ({self.stamp['version']}), "
+                  f"{len(name_dict)} faces re-embedded")
+        except Exception as e:
+            self.error = str(e)
+            self.state = "failed"
+            print(f"Recognition model upgrade failed: {e}")
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+    def status(self):
+        return {
+            "state": self.state,
+            "model": os.path.basename(self.model_file),
+            "precision": self.precision,
+            "version": self.stamp["version"] if self.stamp else None,
+            "images_done": self.images_done,
+            "cpu_budget": self.cpu_budget,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
@@ -0,0 +1,364 @@
+import os
+import sys
+import json
+import glob
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .verification import classify_verification
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+STATUS_TIMEOUT = "TIMEOUT"
+
+def peak_rss_mb():
+    """Memory high-water mark of this process (MB), None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KB, macOS trả về byte
+    return round(peak / (1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0), 1)
+
+def latency_summary(values):
+    """count / mean / p50 / p95 / p99 / max (ms) of a list of latencies"""
+    if not values:
+        return {"count": 0}
+    arr = np.asarray(values, dtype=np.float64)
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {
+        "count": int(arr.size),
+        "mean_ms": round(float(arr.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(arr.max()), 3)
+    }
+
+class StageTimer:
+    """Thu thập thời gian (ms) theo từng bước của pipeline"""
+
+    def __init__(self):
+        self.samples = {}
+        self.enabled = True
+
+    def add(self, stage, ms):
+        if self.enabled:
+            self.samples.setdefault(stage, []).append(ms)
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - t0) * 1000)
+
+    def wrap(self, obj, method, stage):
+        """Time every call of obj.method (instance attribute, the class is untouched)"""
+        original = getattr(obj, method)
+
+        def timed(*args, **kwargs):
+            with self.stage(stage):
+                return original(*args, **kwargs)
+
+        setattr(obj, method, timed)
+
+    def summary(self):
+        return {stage: latency_summary(values) for stage, values in self.samples.items()}
+
+class RfidTimeline:
+    """
+    Kịch bản quẹt thẻ RFID cho replay. Mỗi sự kiện:
+        {"rfid": "<id>", "frame": <index>}  hoặc  {"rfid": "<id>", "time": <giây>}
+    và tùy chọn "expect": trạng thái mong đợi (SUCCESS, WARNING, SPOOF_ATTEMPT, FAKE_FACE)
+    """
+
+    def __init__(self, events=None):
+        self.events = []
+        for event in events or []:
+            if "rfid" not in event or ("frame" not in event and "time" not in event):
+                raise ValueError(f"Invalid RFID event (needs rfid and frame or time): {event}")
+            self.events.append(dict(event, rfid=str(event["rfid"])))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["events"] if isinstance(data, dict) else data)
+
+    def due(self, index, timestamp):
+        """Events that fire at or before this frame, each returned once"""
+        fired = []
+        for event in self.events:
+            if event.get("_fired"):
+                continue
+            if ("frame" in event and index >= event["frame"]) or \
+                    ("time" in event and timestamp >= event["time"]):
+                event["_fired"] = True
+                fired.append(event)
+        return fired
+
+def load_labels(path):
+    """
+    Nhãn ground truth cho replay:
+    - dict {"<tên file ảnh>": "<tên người>"} cho thư mục ảnh
+    - list [{"start": s, "end": s, "label": "<tên người>"}] (giây) cho video
+    """
+    if not path:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _label_for(labels, index, timestamp, path, root):
+    if isinstance(labels, dict):
+        if path is not None:
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            return labels.get(rel, labels.get(os.path.basename(path)))
+        return None
+    if isinstance(labels, list):
+        for segment in labels:
+            if segment["start"] <= timestamp <= segment["end"]:
+                return segment["label"]
+        return None
+    # Không có file nhãn: thư mục ảnh theo cấu trúc gallery (<người>/<ảnh>)
+    if path is not None:
+        parent = os.path.dirname(path)
+        if os.path.normpath(parent) != os.path.normpath(root):
+            return os.path.basename(parent)
+    return None
+
+def iter_replay_frames(source, labels=None, fps=None, max_frames=None):
+    """
+    Đọc frame từ file video hoặc thư mục ảnh (sắp xếp theo đường dẫn)
+
+    Args:
+        source: File video hoặc thư mục ảnh
+        labels: Kết quả load_labels (None: nhãn theo tên thư mục con)
+        fps: Tốc độ giả lập để tính timestamp (mặc định: FPS của video, 30 cho ảnh)
+        max_frames: Giới hạn số frame
+
+    Yields:
+        (index, timestamp, frame, label)
+    """
+    if os.path.isdir(source):
+        paths = sorted(p for p in glob.glob(os.path.join(source, "**", "*"), recursive=True)
+                       if p.lower().endswith(IMAGE_EXTENSIONS))
+        fps = fps or 30.0
+        index = 0
+        for path in paths:
+            if max_frames is not None and index >= max_frames:
+                break
+            frame = cv2.imread(path)
+            if frame is None:
+                continue
+            timestamp = index / fps
+            yield index, timestamp, frame, _label_for(labels, index, timestamp, path, source)
+            index += 1
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open replay source: {source}")
+    fps = fps or cap.get(cv2.CAP_PROP_FPS) or 30.0
+    index = 0
+    try:
+        while max_frames is None or index < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            timestamp = index / fps
+            yield index, timestamp, frame, _label_for(labels, index, timestamp, None, source)
+            index += 1
+    finally:
+        cap.release()
+
+class AccuracyCounter:
+    """Độ chính xác nhận diện theo frame so với nhãn"""
+
+    def __init__(self):
+        self.labeled = 0
+        self.detected = 0
+        self.correct = 0
+        self.wrong_identity = 0  # Nhận nhầm thành người khác (false accept)
+        self.missed = 0          # Người đã biết nhưng trả về Unknown
+
+    def add(self, label, predicted):
+        if label is None:
+            return
+        self.labeled += 1
+        if predicted is None:
+            return
+        self.detected += 1
+        if predicted.lower() == label.lower():
+            self.correct += 1
+        elif predicted == "Unknown":
+            self.missed += 1
+        else:
+            self.wrong_identity += 1
+
+    def summary(self):
+        ratio = lambda a, b: round(a / b, 4) if b else None
+        return {
+            "labeled_frames": self.labeled,
+            "detected_frames": self.detected,
+            "detection_rate": ratio(self.detected, self.labeled),
+            "accuracy": ratio(self.correct, self.detected),
+            "false_accept_rate": ratio(self.wrong_identity, self.detected),
+            "miss_rate": ratio(self.missed, self.detected),
+            "correct": self.correct,
+            "wrong_identity": self.wrong_identity,
+            "missed": self.missed
+        }
+
+class ReplayPipeline:
+    """
+    Chạy lại các bước của ZenSys.process_frame / process_verification trên frame
+    đọc từ file, không có side effect (không lưu gallery, attendance, gọi API, timer)
+    """
+
+    def __init__(self, face_analyzer, face_db, rfid_system, depth=None, anti_spoofing=None,
+                 timer=None, rfid_timeout=10.0):
+        """
+        Args:
+            face_analyzer: ZenFace đã prepare
+            face_db: FaceDatabase đã có index
+            rfid_system: Đối tượng có verify_identity(rfid_id, face_name) (model.RFID.rfid.RFID)
+            depth: DepthManager (None: bỏ qua MiDaS và anti-spoofing)
+            anti_spoofing: AntiSpoofingManager
+            timer: StageTimer
+            rfid_timeout: Số giây chờ khuôn mặt sau khi quẹt thẻ trước khi bỏ sự kiện
+        """
+        self.face_analyzer = face_analyzer
+        self.face_db = face_db
+        self.rfid_system = rfid_system
+        self.depth = depth
+        self.anti_spoofing = anti_spoofing
+        self.timer = timer or StageTimer()
+        self.rfid_timeout = rfid_timeout
+        self.pending = None
+        self.verifications = []
+
+        # Tách thời gian detection và embedding bên trong ZenFace.get
+        det_model = getattr(face_analyzer, "det_model", None)
+        if det_model is not None:
+            self.timer.wrap(det_model, "detect", "detection")
+        rec_model = getattr(face_analyzer, "models", {}).get("recognition")
+        if rec_model is not None:
+            self.timer.wrap(rec_model, "get", "embedding")
+
+    def scan(self, event, index, timestamp):
+        """Quẹt thẻ: thẻ mới thay thế thẻ đang chờ như RFIDManager.on_rfid_scanned"""
+        if self.pending is not None:
+            self._record(self.pending, index, status=STATUS_TIMEOUT)
+        self.pending = dict(event, scanned_frame=index, scanned_time=timestamp)
+
+    def process(self, frame, index, timestamp):
+        """
+        Xử lý một frame
+
+        Returns:
+            dict: face_detected, face_name, face_score, verification
+        """
+        result = {"face_detected": False}
+        with self.timer.stage("frame"):
+            faces = self.face_analyzer.get(frame, adaptive=True)
+            if not faces:
+                if self.pending is not None and timestamp - self.pending["scanned_time"] > self.rfid_timeout:
+                    self._record(self.pending, index, status=STATUS_TIMEOUT)
+                    self.pending = None
+                return result
+
+            face = faces[0]
+            result["face_detected"] = True
+            with self.timer.stage("search"):
+                name, score = self.face_db.recognize_face(face.normed_embedding)
+            result["face_name"] = name
+            result["face_score"] = float(score)
+
+            if self.pending is not None:
+                result["verification"] = self._verify(frame, face, name, float(score), index)
+                self.pending = None
+        return result
+
+    def _verify(self, frame, face, face_name, score, index):
+        is_live_face = True
+        if self.depth is not None and self.anti_spoofing is not None:
+            self.anti_spoofing.anti_spoofing_result = None
+            with self.timer.stage("depth"):
+                depth_result = self.depth.predict_depth(frame)
+            with self.timer.stage("anti_spoofing"):
+                self.anti_spoofing.process_depth_anti_spoofing(depth_result.get("depth_map"), face)
+                is_live_face = self.anti_spoofing.is_live_face()
+
+        with self.timer.stage("verification"):
+            verification = self.rfid_system.verify_identity(self.pending["rfid"], face_name)
+            status, _ = classify_verification(
+                verification["match"], face_name, verification["rfid_name"], score, is_live_face)
+        return self._record(self.pending, index, status=status, face_name=face_name,
+                            rfid_name=verification["rfid_name"], score=round(score, 4),
+                            live=is_live_face)
+
+    def _record(self, event, index, **fields):
+        entry = {"rfid": event["rfid"], "scanned_frame": event["scanned_frame"], "frame": index}
+        entry.update(fields)
+        if "expect" in event:
+            entry["expected"] = event["expect"]
+            entry["correct"] = entry["status"] == event["expect"]
+        self.verifications.append(entry)
+        return entry
+
+    def finish(self, index):
+        """Thẻ còn chờ khi hết frame được tính là timeout"""
+        if self.pending is not None:
+            self._record(self.pending, index, status=STATUS_TIMEOUT)
+            self.pending = None
+
+def verification_summary(verifications):
+    counts = {}
+    for entry in verifications:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    scored = [entry for entry in verifications if "expected" in entry]
+    return {
+        "events": len(verifications),
+        "by_status": counts,
+        "expected_checked": len(scored),
+        "expected_correct": sum(1 for entry in scored if entry["correct"])
+    }
+
+def compare_reports(current, baseline, max_regression=0.10):
+    """
+    So sánh report hiện tại với baseline
+
+    Returns:
+        list: Mô tả các chỉ số xấu đi quá max_regression (tỉ lệ) hoặc độ chính xác giảm
+    """
+    regressions = []
+    for stage, stats in current.get("stages", {}).items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base or not base.get("count") or not stats.get("count"):
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            if base[key] > 0 and stats[key] > base[key] * (1 + max_regression):
+                regressions.append(f"{stage} {key}: {base[key]:.2f} -> {stats[key]:.2f}")
+
+    fps, base_fps = current["throughput"]["fps"], baseline.get("throughput", {}).get("fps")
+    if base_fps and fps < base_fps * (1 - max_regression):
+        regressions.append(f"fps: {base_fps:.2f} -> {fps:.2f}")
+
+    acc = current.get("accuracy", {}).get("accuracy")
+    base_acc = baseline.get("accuracy", {}).get("accuracy")
+    if acc is not None and base_acc is not None and acc < base_acc:
+        regressions.append(f"accuracy: {base_acc:.4f} -> {acc:.4f}")
+
+    mem = current.get("memory", {}).get("peak_rss_mb")
+    base_mem = baseline.get("memory", {}).get("peak_rss_mb")
+    if mem and base_mem and mem > base_mem * (1 + max_regression):
+        regressions.append(f"peak_rss_mb: {base_mem:.1f} -> {mem:.1f}")
+    return regressions
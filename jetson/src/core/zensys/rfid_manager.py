@@ -1,3 +1,5 @@
+import time
+
 from model.RFID.rfid import RFID
 from src.log.rfid_logger import RFIDLogger
 
@@ -17,18 +19,22 @@ class RFIDManager:
         self.rfid_system = RFID()
         self.rfid_logger = RFIDLogger()
         self.current_rfid = None
+        self.scanned_at = None  # perf_counter() lúc đầu đọc nhận đủ mã của lần quẹt hiện tại
         self.rfid_changed_callback = None
         
         # Bật chế độ debug nhưng không hiển thị từng phím
         if debug_mode:
             self.rfid_system.enable_debug(True, show_keys)
     
-    def start_listening(self):
+    def start_listening(self, backend=None):
         """
         Bắt đầu lắng nghe RFID
+        
+        Args:
+            backend: RFIDBackend (mặc định: theo config.rfid)
         """
-        self.rfid_system.set_callback(self.on_rfid_scanned)
-        self.rfid_system.start_listening()
+        self.rfid_system.set_callback(self._on_reader_scan)
+        self.rfid_system.start_listening(backend)
         print("RFID Manager started listening for cards")
     
     def stop_listening(self):
@@ -48,16 +54,23 @@ class RFIDManager:
         self.rfid_changed_callback = callback
         print("RFID change callback registered")
     
-    def on_rfid_scanned(self, rfid_id):
+    def _on_reader_scan(self, rfid_id):
+        """Callback của đầu đọc: thời điểm quẹt lấy từ RFIDEvent"""
+        event = self.rfid_system.last_event
+        self.on_rfid_scanned(rfid_id, event.monotonic if event is not None else None)
+    
+    def on_rfid_scanned(self, rfid_id, scanned_at=None):
         """
         Callback khi RFID được quét
         
         Args:
             rfid_id: ID của thẻ RFID
+            scanned_at: perf_counter() lúc nhận đủ mã (mặc định: bây giờ)
         """
-        # Lưu RFID hiện tại
+        # Lưu RFID hiện tại và thời điểm quẹt
         old_rfid = self.current_rfid
         self.current_rfid = rfid_id
+        self.scanned_at = scanned_at if scanned_at is not None else time.perf_counter()
         
         # Log sự kiện quẹt thẻ RFID
         rfid_name = self.rfid_system.get_name_from_id(rfid_id)
@@ -112,4 +125,5 @@ class RFIDManager:
         Xóa RFID hiện tại sau khi xử lý xong
         """
         self.current_rfid = None
+        self.scanned_at = None
         print("Current RFID cleared") 
\ No newline at end of file
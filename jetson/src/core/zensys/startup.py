@@ -0,0 +1,274 @@
+import os
+import json
+import time
+import threading
+import datetime
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.config_utils import config
+
+# Trạng thái khởi động
+STATE_PENDING = "pending"
+STATE_LOADING = "loading"
+STATE_WARMING_UP = "warming_up"
+STATE_INITIALIZING = "initializing"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+
+class StartupOrchestrator:
+    """
+    Điều phối quá trình khởi động ZenSys:
+    - Tải các model độc lập song song (ONNX, MiDaS, ...)
+    - Chạy một lần suy luận giả (warm-up) cho từng model
+    - Đo thời gian từng giai đoạn và ghi báo cáo JSON
+    - Cung cấp trạng thái sẵn sàng cho GUI
+    """
+
+    def __init__(self, max_workers=None, warmup=None, report_dir=None, write_report=None):
+        """
+        Initialize the orchestrator
+
+        Args:
+            max_workers: Số luồng tải model song song (mặc định: config.startup.parallel_workers)
+            warmup: Có chạy warm-up hay không (mặc định: config.startup.warmup)
+            report_dir: Thư mục lưu báo cáo (mặc định: data/logs/system)
+            write_report: Có ghi báo cáo JSON hay không (mặc định: config.startup.write_report)
+        """
+        self.max_workers = max(1, int(max_workers if max_workers is not None else config.startup.parallel_workers))
+        self.warmup_enabled = config.startup.warmup if warmup is None else warmup
+        self.write_report_enabled = config.startup.write_report if write_report is None else write_report
+        if report_dir is None:
+            base_dir = getattr(config.data, 'attendance_dir', 'data/attendance')
+            report_dir = os.path.join(os.path.dirname(base_dir), "logs", "system")
+        self.report_dir = report_dir
+
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.state = STATE_PENDING
+        self.message = ""
+        self.error = None
+        self.exception = None
+        self.components = {}
+        self.phases = []
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.ready_event = threading.Event()
+        self.report_path = None
+
+    def add_listener(self, callback):
+        """
+        Đăng ký callback(state_dict) được gọi mỗi khi trạng thái thay đổi
+        (callback chạy trong luồng khởi động, GUI cần tự chuyển về luồng UI)
+        """
+        self._listeners.append(callback)
+
+    def _set_state(self, state, message=""):
+        with self._lock:
+            self.state = state
+            self.message = message
+        self._notify()
+
+    def _notify(self):
+        snapshot = self.get_state()
+        for callback in list(self._listeners):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Error in startup listener: {e}")
+
+    def _update_component(self, name, **fields):
+        with self._lock:
+            self.components.setdefault(name, {"status": STATE_PENDING}).update(fields)
+        self._notify()
+
+    def get_state(self):
+        """
+        Trạng thái khởi động hiện tại
+
+        Returns:
+            dict: {"state", "message", "elapsed", "components", "phases", "error"}
+        """
+        with self._lock:
+            return {
+                "state": self.state,
+                "message": self.message,
+                "elapsed": round(time.perf_counter() - self._t0, 3),
+                "components": {k: dict(v) for k, v in self.components.items()},
+                "phases": list(self.phases),
+                "error": self.error
+            }
+
+    def is_ready(self):
+        return self.state == STATE_READY
+
+    def describe(self):
+        """Mô tả ngắn trạng thái khởi động để hiển thị trên GUI"""
+        state = self.get_state()
+        done = sum(1 for c in state["components"].values() if c["status"] == STATE_READY)
+        total = len(state["components"])
+        text = f"Đang khởi động hệ thống... ({state['elapsed']:.1f}s)"
+        if total:
+            text += f"\n{done}/{total} thành phần sẵn sàng"
+        if state["message"]:
+            text += f"\n{state['message']}"
+        if state["state"] == STATE_FAILED:
+            text = f"Khởi động thất bại: {state['error']}"
+        return text
+
+    @contextmanager
+    def phase(self, name):
+        """Đo thời gian một giai đoạn tuần tự (vd: database, camera)"""
+        self._set_state(STATE_INITIALIZING, name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append({
+                    "name": name,
+                    "start": round(start - self._t0, 3),
+                    "duration": round(time.perf_counter() - start, 3)
+                })
+
+    def _run_parallel(self, tasks, stage, time_key):
+        """Run {name: callable} concurrently and record per-task durations"""
+        results = {}
+        if not tasks:
+            return results
+
+        def run(name, func):
+            self._update_component(name, status=stage)
+            start = time.perf_counter()
+            result = func()
+            self._update_component(name, **{time_key: round(time.perf_counter() - start, 3)})
+            return result
+
+        phase_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"startup-{stage}") as pool:
+            futures = {name: pool.submit(run, name, func) for name, func in tasks.items()}
+            errors = {}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    errors[name] = e
+                    self._update_component(name, status=STATE_FAILED, error=str(e))
+
+        with self._lock:
+            self.phases.append({
+                "name": stage,
+                "start": round(phase_start - self._t0, 3),
+                "duration": round(time.perf_counter() - phase_start, 3),
+                "parallel": sorted(tasks.keys())
+            })
+
+        if errors:
+            name, error = next(iter(errors.items()))
+            raise RuntimeError(f"{name}: {error}") from error
+        return results
+
+    def load(self, builders):
+        """
+        Tải các thành phần độc lập song song
+
+        Args:
+            builders: {tên: hàm không tham số trả về thành phần}
+
+        Returns:
+            dict: {tên: thành phần đã tạo}
+        """
+        self._set_state(STATE_LOADING, ", ".join(builders.keys()))
+        try:
+            results = self._run_parallel(builders, STATE_LOADING, "load_s")
+        except Exception as e:
+            self.fail(e)
+            raise
+        for name in builders:
+            self._update_component(name, status=STATE_WARMING_UP)
+        return results
+
+    def warm_up(self, warmups):
+        """
+        Chạy suy luận giả cho từng model song song.
+        Lỗi warm-up không chặn khởi động, chỉ được ghi vào báo cáo.
+
+        Args:
+            warmups: {tên: hàm không tham số chạy một lần suy luận}
+        """
+        if self.warmup_enabled:
+            self._set_state(STATE_WARMING_UP, ", ".join(warmups.keys()))
+            try:
+                self._run_parallel(warmups, STATE_WARMING_UP, "warmup_s")
+            except Exception as e:
+                print(f"Warm-up failed: {e}")
+        with self._lock:
+            for component in self.components.values():
+                if component["status"] != STATE_FAILED:
+                    component["status"] = STATE_READY
+        self._notify()
+
+    def mark_ready(self, name, **fields):
+        """Đánh dấu một thành phần tuần tự (không cần warm-up) đã sẵn sàng"""
+        self._update_component(name, status=STATE_READY, **fields)
+
+    def finish(self):
+        """Kết thúc khởi động, ghi báo cáo và báo sẵn sàng"""
+        self._set_state(STATE_READY, "")
+        self.ready_event.set()
+        self.write_report()
+        total = self.get_state()["elapsed"]
+        print(f"ZenSys startup completed in {total:.2f}s (report: {self.report_path})")
+
+    def fail(self, error):
+        """Đánh dấu khởi động thất bại (giữ lại exception để result() ném lại)"""
+        with self._lock:
+            self.error = str(error)
+            if isinstance(error, BaseException):
+                self.exception = error
+        self._set_state(STATE_FAILED, str(error))
+        self.ready_event.set()
+        self.write_report()
+
+    def wait(self, timeout=None):
+        """Chờ tới khi khởi động xong (hoặc thất bại)"""
+        return self.ready_event.wait(timeout)
+
+    def result(self, timeout=None):
+        """
+        Chờ khởi động xong và ném lại lỗi nếu khởi động thất bại
+
+        Raises:
+            TimeoutError: Chưa xong sau timeout giây
+            Exception: Lỗi đã làm khởi động thất bại
+        """
+        if not self.ready_event.wait(timeout):
+            raise TimeoutError(f"Startup not finished after {timeout}s")
+        if self.state == STATE_FAILED:
+            if self.exception is not None:
+                raise self.exception
+            raise RuntimeError(self.error)
+        return True
+
+    def write_report(self):
+        """
+        Ghi báo cáo thời gian khởi động dạng JSON
+
+        Returns:
+            str: Đường dẫn file báo cáo
+        """
+        if not self.write_report_enabled:
+            return None
+        report = self.get_state()
+        report["started_at"] = datetime.datetime.fromtimestamp(self.started_at).strftime("%Y-%m-%d %H:%M:%S")
+        report["total_s"] = report.pop("elapsed")
+        try:
+            os.makedirs(self.report_dir, exist_ok=True)
+            stamp = datetime.datetime.fromtimestamp(self.started_at).strftime("%Y%m%d_%H%M%S")
+            self.report_path = os.path.join(self.report_dir, f"startup_{stamp}.json")
+            with open(self.report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            print(f"Error writing startup report: {e}")
+        return self.report_path
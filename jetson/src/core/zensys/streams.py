@@ -0,0 +1,145 @@
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from src.log.metrics import get_metrics
+
+class SharedModels:
+    """
+    Model dùng chung giữa các luồng camera trong một tiến trình: ZenFace + FAISS,
+    MiDaS và bộ gộp batch. Thêm một camera chỉ tốn bộ nhớ cho frame và trạng thái
+    xác thực của nó, không tải lại model.
+    """
+
+    def __init__(self, face_recognition, depth, batcher=None):
+        self.face_recognition = face_recognition
+        self.depth = depth
+        self.batcher = batcher
+        # MiDaS chạy trên cùng một model torch cho mọi luồng
+        self.depth_lock = threading.Lock()
+
+class InferenceBatcher:
+    """
+    Gộp frame của nhiều camera thành một lần gọi ZenFace.get_batch(): luồng nào
+    gửi frame trước thì chờ tối đa max_wait_ms để các camera khác gửi kèm.
+    """
+
+    def __init__(self, face_analyzer, max_batch=4, max_wait_ms=5.0, metrics=None):
+        """
+        Args:
+            face_analyzer: ZenFace (hoặc đối tượng có get_batch(imgs))
+            max_batch: Số frame tối đa mỗi lần gọi
+            max_wait_ms: Thời gian chờ frame khác sau frame đầu tiên của batch
+            metrics: MetricsRegistry (mặc định: get_metrics())
+        """
+        self.face_analyzer = face_analyzer
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.metrics = metrics or get_metrics()
+        self._queue = queue.Queue()
+        self._running = False
+        self._thread = None
+        self.metrics.register_queue("inference_batcher", self._queue.qsize)
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="InferenceBatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame):
+        """
+        Đưa một frame vào batch kế tiếp
+
+        Returns:
+            Future: kết quả là list Face như ZenFace.get()
+
+        Raises:
+            RuntimeError: Nếu batcher chưa chạy
+        """
+        if not self._running:
+            raise RuntimeError("InferenceBatcher is not running")
+        future = Future()
+        self._queue.put((frame, future))
+        return future
+
+    def analyze(self, frame, timeout=None):
+        """Gửi frame và chờ kết quả (gọi từ luồng xử lý của từng camera)"""
+        return self.submit(frame).result(timeout)
+
+    def _collect(self):
+        """Lấy một batch: chờ frame đầu tiên, rồi gom thêm đến max_batch hoặc hết max_wait"""
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._collect()
+            if not batch:
+                continue
+            frames = [frame for frame, _ in batch]
+            try:
+                with self.metrics.stage("batch_inference"):
+                    results = self.face_analyzer.get_batch(frames)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.metrics.inc("inference_batches")
+            self.metrics.inc("inference_batched_frames", len(batch))
+            for (_, future), faces in zip(batch, results):
+                future.set_result(faces)
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        # Không để luồng camera nào chờ mãi
+        while True:
+            try:
+                _, future = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("InferenceBatcher stopped"))
+
+class StreamStats:
+    """FPS và độ trễ xử lý của một luồng camera trên `window` frame gần nhất"""
+
+    def __init__(self, window=120):
+        self._times = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self.frames = 0
+
+    def add(self, latency_ms, now=None):
+        self._times.append(time.perf_counter() if now is None else now)
+        self._latencies.append(latency_ms)
+        self.frames += 1
+
+    def fps(self):
+        if len(self._times) < 2:
+            return 0.0
+        span = self._times[-1] - self._times[0]
+        return (len(self._times) - 1) / span if span > 0 else 0.0
+
+    def snapshot(self):
+        latencies = sorted(self._latencies)
+        return {
+            "frames": self.frames,
+            "fps": round(self.fps(), 2),
+            "latency_p50_ms": round(latencies[len(latencies) // 2], 2) if latencies else None,
+            "latency_max_ms": round(latencies[-1], 2) if latencies else None
+        }
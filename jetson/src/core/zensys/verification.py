@@ -0,0 +1,30 @@
+STATUS_SUCCESS = "SUCCESS"
+STATUS_WARNING = "WARNING"
+STATUS_SPOOF_ATTEMPT = "SPOOF_ATTEMPT"
+STATUS_FAKE_FACE = "FAKE_FACE"
+
+def classify_verification(is_match, face_name, rfid_name, score, is_live_face):
+    """
+    Phân loại kết quả xác thực RFID + khuôn mặt thành trạng thái điểm danh
+
+    Args:
+        is_match: Tên từ RFID và tên nhận diện khuôn mặt có khớp không
+        face_name: Tên nhận diện từ khuôn mặt ("Unknown" nếu không nhận ra)
+        rfid_name: Tên người dùng từ thẻ RFID
+        score: Độ tương đồng của khuôn mặt
+        is_live_face: Kết quả anti-spoofing
+
+    Returns:
+        tuple: (status, note) dùng cho attendance API
+    """
+    if not is_live_face:
+        # Khuôn mặt giả (ảnh/video)
+        return STATUS_FAKE_FACE, "Alert: Fake face detected! Anti-spoofing protection activated."
+    if is_match:
+        # TRƯỜNG HỢP 1: Thẻ RFID và khuôn mặt là cùng 1 người
+        return STATUS_SUCCESS, f"Success: RFID and face match for {rfid_name} (confidence: {score:.2f})"
+    if face_name == "Unknown":
+        # TRƯỜNG HỢP 2: Face là unknown - khuôn mặt mới của người dùng RFID
+        return STATUS_WARNING, f"Warning: Unrecognized face with RFID of {rfid_name}"
+    # TRƯỜNG HỢP 3: Face đã biết nhưng không khớp RFID - Cảnh báo giả mạo
+    return STATUS_SPOOF_ATTEMPT, f"Alert: Face spoofing detected! RFID {rfid_name} used with face of {face_name}"
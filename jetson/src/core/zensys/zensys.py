@@ -6,8 +6,12 @@ import sys
 import threading
 from pathlib import Path
 from model.utils import face_align
+from model.RFID.backends import create_rfid_backend
 from src.log.system_logger import SystemLogger
+from src.log.metrics import get_metrics
 from utils.config_utils import config
+from utils.image_writer import ImageWriter, encode_jpeg
+from src.core.capture import LatestFrameGrabber, FramePool, PooledFrame, create_frame_source
 
 # Import các module đã tách
 from .face_recognition_manager import FaceRecognitionManager
@@ -15,57 +19,115 @@ from .anti_spoofing_manager import AntiSpoofingManager
 from .depth_manager import DepthManager
 from .rfid_manager import RFIDManager
 from .attendance_manager import AttendanceManager
+from .startup import StartupOrchestrator
+from .streams import SharedModels, StreamStats
+from .model_registry import get_model_registry, face_model_key, depth_model_key
+from .model_upgrade import RecognitionModelUpgrade
+from src.core.faiss_manager import model_stamp
+from .verification import (
+    classify_verification, STATUS_SUCCESS, STATUS_WARNING, STATUS_SPOOF_ATTEMPT
+)
 
 class ZenSys:
     """
     Hệ thống ZenSys tích hợp nhận diện khuôn mặt, RFID, chống giả mạo và depth map
     """
     
-    def __init__(self, use_custom_midas=True):
+    # Section config áp dụng tại chỗ qua apply_config(); section khác cần restart_zensys()
+    LIVE_CONFIG_SECTIONS = ('detection', 'recognition', 'anti_spoofing', 'logging')
+    
+    def __init__(self, use_custom_midas=True, startup=None, shared=None, stream=None):
         """
         Khởi tạo ZenSys
         
         Args:
             use_custom_midas: Có sử dụng mô hình MiDaS tùy chỉnh hay không
+            startup: StartupOrchestrator theo dõi quá trình khởi động (tùy chọn)
+            shared: SharedModels của luồng camera chính; khi có thì dùng lại model thay vì tải mới
+            stream: Cấu hình luồng camera (một phần tử của config.streams, mặc định luồng đầu tiên)
         """
         # Khởi tạo logger
         self.system_logger = SystemLogger()
         self.system_logger.log_system_event("startup", {"message": "ZenSys starting up"})
-        
-        # Khởi tạo các module
-        self.face_recognition = FaceRecognitionManager()
-        self.anti_spoofing = AntiSpoofingManager()
+        self.startup = startup or StartupOrchestrator()
+        self.stream = stream or config.streams[0]
+        self.stream_name = self.stream.name
+        self.is_primary = shared is None
+        
+        # Metrics từng bước pipeline: endpoint HTTP local và dòng tóm tắt định kỳ
+        self.metrics = get_metrics()
+        self.metrics.start()
+        self.stream_stats = StreamStats()
+        self._stream_labels = {"stream": self.stream_name}
+        self.metrics.register_gauge("stream_fps", self.stream_stats.fps, self._stream_labels)
         
         # Cấu hình sử dụng repo và checkpoints local
         weights_dir = Path(os.getcwd()) / "assets" / "weights"
         os.environ['TORCH_HOME'] = str(weights_dir)
         
-        # Khởi tạo DepthManager với mô hình tùy chỉnh nếu được chỉ định
-        if use_custom_midas:
-            checkpoint_path = str(weights_dir / "checkpoints" / "midas_v21_small_256.pt")
-            if os.path.exists(checkpoint_path):
-                # Sử dụng MidasSmall với weights từ local checkpoint
-                self.depth = DepthManager(model_type="MidasSmall", custom_model_path=checkpoint_path)
-                self.system_logger.info(f"Using local MiDaS checkpoint: {checkpoint_path}")
+        if shared is None:
+            # Khởi tạo các module nặng (ONNX, MiDaS) song song vì chúng độc lập với nhau
+            workers = config.inference_workers
+            if workers.enable:
+                # Model chạy trong tiến trình worker, tiến trình này chỉ giữ adapter
+                from src.core.workers.remote import create_remote_face_analyzer, create_remote_depth_manager
+                reused = False
+                face_builder = lambda: FaceRecognitionManager(face_analyzer=create_remote_face_analyzer(workers))
+                depth_builder = lambda: create_remote_depth_manager(workers, use_custom_midas)
             else:
-                self.depth = DepthManager(model_type="MidasSmall")
-                self.system_logger.info("Using default MiDaS small model from hub")
+                # Model trong tiến trình được giữ trong ModelRegistry qua các lần restart_zensys()
+                registry = get_model_registry()
+                face_key, depth_key = face_model_key(), depth_model_key(use_custom_midas)
+                reused = face_key in registry and depth_key in registry
+                face_builder = lambda: registry.get(face_key, FaceRecognitionManager)
+                depth_builder = lambda: registry.get(
+                    depth_key, lambda: self._create_depth_manager(weights_dir, use_custom_midas))
+            components = self.startup.load({
+                "face_recognition": face_builder,
+                "anti_spoofing": AntiSpoofingManager,
+                "depth": depth_builder
+            })
+            self.face_recognition = components["face_recognition"]
+            self.anti_spoofing = components["anti_spoofing"]
+            self.depth = components["depth"]
+            self.shared = SharedModels(self.face_recognition, self.depth)
+            
+            # Chạy suy luận giả để các session khởi tạo xong trước frame đầu tiên
+            # (model lấy lại từ registry đã chạy rồi)
+            if not reused:
+                self.startup.warm_up({
+                    "face_recognition": self._warm_up_face_recognition,
+                    "depth": self._warm_up_depth
+                })
         else:
-            self.depth = DepthManager(model_type="MidasSmall")
-            self.system_logger.info("Using default MiDaS small model from hub")
+            # Luồng camera phụ: dùng chung model, chỉ tạo trạng thái anti-spoofing riêng
+            self.shared = shared
+            self.face_recognition = shared.face_recognition
+            self.depth = shared.depth
+            with self.startup.phase(self._phase_name("anti_spoofing")):
+                self.anti_spoofing = AntiSpoofingManager()
+            self.startup.mark_ready(self._phase_name("anti_spoofing"))
             
         # Bật debug mode nhưng không hiển thị từng phím nhấn
-        self.rfid = RFIDManager(debug_mode=True, show_keys=False)
-        self.attendance = AttendanceManager()
+        with self.startup.phase(self._phase_name("rfid")):
+            self.rfid = RFIDManager(debug_mode=True, show_keys=False)
+        self.startup.mark_ready(self._phase_name("rfid"))
+        with self.startup.phase(self._phase_name("attendance")):
+            self.attendance = AttendanceManager()
+        self.startup.mark_ready(self._phase_name("attendance"))
         
         # Thiết lập tham chiếu đến ZenSys cho AttendanceManager
         self.attendance.face_system = self
         
         # Các biến trạng thái
         self.current_face_crop = None
+        self.current_face_jpeg = None  # Ảnh crop đã mã hóa JPEG một lần, dùng chung
         self.current_face_crop_path = None  # Thêm biến để lưu đường dẫn ảnh
+        self.image_writer = ImageWriter(metrics=self.metrics)
         self.verification_result = None
         self._last_frame = None
+        self._last_pooled = None  # Buffer (FramePool) chứa _last_frame
+        self._last_frame_lock = threading.Lock()
         self._last_rfid_update_time = 0
         self._last_rfid_id = None
         self.ui_callback = None
@@ -82,6 +144,9 @@ class ZenSys:
         self.attendance_faces_dir = os.path.join(os.getcwd(), "data", "attendance")
         os.makedirs(self.attendance_faces_dir, exist_ok=True)
         
+        # Nâng cấp model recognition đang chạy nền (chỉ luồng chính)
+        self.model_upgrade = None
+        
         # For backward compatibility
         self.face_analyzer = self.face_recognition.face_analyzer
         self.rfid_system = self.rfid.rfid_system
@@ -106,6 +171,44 @@ class ZenSys:
         
         # Biến để lưu kết quả API gửi đi 1 lần
         self.api_request_sent = False
+        
+        # Cache thời khóa biểu và đồng bộ thẻ/người dùng: luồng nền gọi server, khởi động trong initialize()
+        self.schedule_cache = None
+        self.identity_sync = None
+    
+    def _phase_name(self, name):
+        """Tên giai đoạn khởi động; luồng phụ thêm tên luồng để không trùng với luồng chính"""
+        return name if self.is_primary else f"{name}:{self.stream_name}"
+    
+    def _create_depth_manager(self, weights_dir, use_custom_midas):
+        """
+        Khởi tạo DepthManager với mô hình tùy chỉnh nếu được chỉ định
+        """
+        if use_custom_midas:
+            checkpoint_path = str(weights_dir / "checkpoints" / "midas_v21_small_256.pt")
+            if os.path.exists(checkpoint_path):
+                # Sử dụng MidasSmall với weights từ local checkpoint
+                self.system_logger.info("Using local MiDaS checkpoint: %s", checkpoint_path)
+                return DepthManager(model_type="MidasSmall", custom_model_path=checkpoint_path)
+        self.system_logger.info("Using default MiDaS small model from hub")
+        return DepthManager(model_type="MidasSmall")
+    
+    def _warm_up_face_recognition(self):
+        """Run detection on a blank frame and recognition on a blank aligned crop"""
+        face_analyzer = self.face_recognition.face_analyzer
+        blank = np.zeros((480, 640, 3), dtype=np.uint8)
+        face_analyzer.get(blank)
+        # Mỗi kích thước detection thích ứng là một shape đầu vào mới cho session
+        if getattr(face_analyzer, 'det_controller', None) is not None:
+            for size in face_analyzer.det_controller.sizes:
+                face_analyzer.det_model.detect(blank, input_size=size)
+        rec_model = face_analyzer.models.get('recognition')
+        if rec_model is not None and hasattr(rec_model, 'get_feat'):
+            rec_model.get_feat(np.zeros((112, 112, 3), dtype=np.uint8))
+    
+    def _warm_up_depth(self):
+        """Run one MiDaS inference on a blank frame"""
+        self.depth.predict_depth(np.zeros((480, 640, 3), dtype=np.uint8))
     
     def set_ui_callback(self, callback):
         """
@@ -147,7 +250,10 @@ class ZenSys:
         # Reset trạng thái xác thực
         self.verification_result = None
         self.current_face_crop = None
+        self.current_face_jpeg = None
         self.api_request_sent = False
+        # Liveness chỉ gộp các frame từ lần quét này
+        self.anti_spoofing.reset()
         
         # Cập nhật UI nếu có callback
         if self.ui_callback:
@@ -167,22 +273,37 @@ class ZenSys:
             "rfid_name": rfid_name
         })
     
-    def initialize(self):
+    def initialize(self, finish_startup=True):
         """
         Khởi tạo hệ thống
+        
+        Args:
+            finish_startup: Báo khởi động xong sau bước này (False khi còn luồng camera khác cần khởi tạo)
         """
         print("\n" + "="*70)
-        print("INITIALIZING ZENSYS - Always creating new face recognition database")
+        print(f"INITIALIZING ZENSYS [{self.stream_name}] - Always creating new face recognition database")
         print("="*70 + "\n")
         
-        # Khởi tạo database khuôn mặt
-        self.face_recognition.initialize_database()
+        # Khởi tạo database khuôn mặt (luồng phụ dùng chung database của luồng chính)
+        if self.is_primary:
+            with self.startup.phase("face_database"):
+                self.face_recognition.initialize_database()
         
-        # Khởi động RFID listener
-        self.rfid.start_listening()
+        # Cache thời khóa biểu để kiểm tra tiết học tại chỗ và đồng bộ thẻ/người dùng từ server
+        # vào IdentityStore (chạy nền, dùng chung mọi luồng)
+        from src.core.zensys_factory import get_schedule_cache, get_identity_sync
+        self.schedule_cache = get_schedule_cache()
+        self.identity_sync = get_identity_sync()
+        
+        # Khởi động RFID listener (đầu đọc bàn phím chỉ gắn được với một luồng)
+        if self.stream.rfid:
+            with self.startup.phase(self._phase_name("rfid_listener")):
+                self.rfid.start_listening(create_rfid_backend(
+                    self.stream.rfid, getattr(self.stream, 'rfid_device', None), config.rfid))
         
         # Thêm: Khởi tạo camera
-        self.start_camera()
+        with self.startup.phase(self._phase_name("camera")):
+            self.start_camera()
         
         print("\n" + "="*70)
         print("ZENSYS INITIALIZATION COMPLETE")
@@ -191,7 +312,9 @@ class ZenSys:
         print("    - Camera initialized successfully")
         print("="*70 + "\n")
         
-        self.system_logger.info("ZenSys initialized successfully")
+        self.system_logger.info("ZenSys [%s] initialized successfully", self.stream_name)
+        if finish_startup:
+            self.startup.finish()
     
     # Methods for backward compatibility
     def start_rfid_listening(self):
@@ -268,15 +391,12 @@ class ZenSys:
             filename = "latest.jpg"
             filepath = os.path.join(user_dir, filename)
             
-            # Xóa file cũ nếu tồn tại
-            if os.path.exists(filepath):
-                try:
-                    os.remove(filepath)
-                except Exception as e:
-                    self.system_logger.error(f"Failed to remove old image: {e}")
-            
-            # Lưu ảnh
-            cv2.imwrite(filepath, face_image)
+            # Mã hóa và ghi qua writer nền (thay file cũ nguyên tử)
+            face_jpeg = encode_jpeg(face_image)
+            if face_jpeg is None:
+                self.system_logger.warning("Cannot save face image: JPEG encoding failed")
+                return None
+            self.image_writer.submit(filepath, face_jpeg)
             
             return filepath
         except Exception as e:
@@ -296,20 +416,28 @@ class ZenSys:
         result = {}
 
         try:
-            # 1. Lưu frame gốc
-            self._last_frame = frame.copy()
+            # 1. Lưu frame gốc (luồng camera đã giữ buffer qua _set_last_frame)
+            self._set_last_frame(frame)
             
             # Nếu đang trong quá trình xác thực, chỉ trả về kết quả cũ
             if self.processing_paused:
+                self.metrics.inc("frames_dropped", labels=self._stream_labels)
                 return self.latest_processed_result or {}
+            self.metrics.inc("frames_processed", labels=self._stream_labels)
 
-            # 2. Phát hiện khuôn mặt
-            faces = self.face_recognition.face_analyzer.get(frame)
+            # 2. Phát hiện khuôn mặt (thời gian detection/embedding đo trong ZenFace.get)
+            batcher = self.shared.batcher
+            if batcher is not None:
+                # Nhiều camera: gộp với frame của các luồng khác thành một lần gọi model
+                faces = batcher.analyze(frame)
+            else:
+                faces = self.face_recognition.face_analyzer.get(frame, adaptive=True)
             result['face_detected'] = len(faces) > 0
 
             # Khởi tạo hoặc reset các giá trị nếu không có khuôn mặt
             if not faces:
                 self.current_face_crop = None
+                self.current_face_jpeg = None
                 self.current_face_image = None
                 self.current_face_crop_path = None
                 return result
@@ -318,43 +446,50 @@ class ZenSys:
             depth_result = None
             if not self.processing_paused and self.rfid.current_rfid:
                 # Xử lý depth map
-                depth_result = self.depth.predict_depth(frame)
+                with self.metrics.stage("depth"), self.shared.depth_lock:
+                    depth_result = self.depth.predict_depth(frame)
                 result['depth_info'] = depth_result['stats'] if 'stats' in depth_result else {}
                 # Lưu trữ depth map để sử dụng cho anti-spoofing
                 self._last_depth_map = depth_result.get('depth_map', None)
             
             if faces:
                 face = faces[0]  # Lấy khuôn mặt lớn nhất (đã được sắp xếp trong ZenFace)
+                result['face_bbox'] = face.bbox  # Cho preview vẽ bbox, không phải detect lại trên UI thread
                 
                 # 3. Nhận diện khuôn mặt chỉ khi cần
                 if not self.processing_paused:
                     embedding = face.normed_embedding
-                    name, score = self.face_recognition.recognize_face(embedding)
+                    with self.metrics.stage("search"):
+                        name, score = self.face_recognition.recognize_face(embedding, rec_version=face.rec_version)
                     result['face_name'] = name
                     result['face_score'] = score
                     
                     # 4. Xử lý anti-spoofing với depth map
                     if depth_result and self.rfid.current_rfid:
-                        anti_spoofing_result = self.anti_spoofing.process_depth_anti_spoofing(
-                            depth_result.get('depth_map'), face)
+                        with self.metrics.stage("anti_spoofing"):
+                            anti_spoofing_result = self.anti_spoofing.process_depth_anti_spoofing(
+                                depth_result.get('depth_map'), face)
                         result['anti_spoofing'] = anti_spoofing_result
                         # Update for backward compatibility
                         self.depth_face_crop = self.anti_spoofing.depth_face_crop
                         self.anti_spoofing_result = self.anti_spoofing.anti_spoofing_result
                 
-                # 6. Xác thực nếu có RFID và chưa đang trong quá trình xác thực
-                if self.rfid.current_rfid and not self.verification_in_progress:
+                # 6. Xác thực nếu có RFID, chưa đang xác thực và đã gộp đủ frame cho liveness
+                if (self.rfid.current_rfid and not self.verification_in_progress
+                        and self.anti_spoofing.ready()):
                     # Đánh dấu đang trong quá trình xác thực
                     self.verification_in_progress = True
                     # Bắt đầu quy trình xác thực
                     print("Starting verification process after RFID detection")
-                    self.process_verification(face)
+                    with self.metrics.stage("verification"):
+                        self.process_verification(face)
                     # Update current RFID for backward compatibility
                     self.current_rfid = self.rfid.current_rfid
                     result['verification'] = self.verification_result
         
         except Exception as e:
-            self.system_logger.error(f"Error processing frame: {e}")
+            self.metrics.inc("frame_errors", labels=self._stream_labels)
+            self.system_logger.error("Error processing frame: %s", e)
             
         # Lưu kết quả để tái sử dụng trong trạng thái tạm dừng
         self.latest_processed_result = result
@@ -375,6 +510,9 @@ class ZenSys:
             return None
         
         print(f"Processing verification for RFID: {self.rfid.current_rfid}")    
+        if self.rfid.scanned_at is not None:
+            self.metrics.observe("rfid_scan_to_verification",
+                                 (time.perf_counter() - self.rfid.scanned_at) * 1000.0, labels=self._stream_labels)
         # Đảm bảo chỉ xử lý một lần
         self.processing_paused = True
         
@@ -385,7 +523,8 @@ class ZenSys:
         embedding = face.normed_embedding
         
         # Nhận diện khuôn mặt
-        face_name, score = self.face_recognition.recognize_face(embedding)
+        with self.metrics.stage("search"):
+            face_name, score = self.face_recognition.recognize_face(embedding, rec_version=face.rec_version)
         
         # Xác thực với RFID
         self.verification_result = self.rfid.verify_identity(
@@ -395,15 +534,8 @@ class ZenSys:
         rfid_id = self.rfid.current_rfid
         rfid_name = self.verification_result.get("rfid_name", "Unknown")
         
-        # Chạy MiDAS 1 lần để lấy depth map cho anti-spoofing
-        if hasattr(self, '_last_frame') and self._last_frame is not None:
-            # Chỉ chạy MiDAS nếu chưa có depth map hoặc đã bị reset
-            if not hasattr(self, 'last_depth_result') or self.last_depth_result is None:
-                print("Running MiDAS depth model for verification...")
-                depth_result = self.depth.predict_depth(self._last_frame)
-                self.last_depth_result = depth_result
-        
-        # Kiểm tra anti-spoofing
+        # Kiểm tra anti-spoofing: quyết định đã gộp qua các frame từ lúc quét RFID,
+        # không cần chạy thêm MiDaS ở đây
         is_live_face = self.anti_spoofing.is_live_face()
         
         # Log kết quả xác thực
@@ -418,44 +550,29 @@ class ZenSys:
         # Chuẩn bị ảnh khuôn mặt từ bbox
         self._prepare_face_crop(face)
         
-        # Chuẩn bị note cho từng trường hợp
-        note = None
-        status = "SUCCESS"  # Default status
-
-        # XỬ LÝ 3 TRƯỜNG HỢP THEO YÊU CẦU:
-        if is_live_face:  # Chỉ xử lý khi khuôn mặt thật (không phải ảnh/video)
-            if self.verification_result["match"]:
-                # TRƯỜNG HỢP 1: Thẻ RFID và khuôn mặt là cùng 1 người
-                note = f"Success: RFID and face match for {rfid_name} (confidence: {score:.2f})"
-                print(f"MATCH: Face {face_name} matches RFID {rfid_name} - Adding face to gallery")
-                self._save_face_to_gallery(face_name)
-            else:
-                # Khuôn mặt và RFID không khớp
-                if face_name == "Unknown":
-                    # TRƯỜNG HỢP 2: Face là unknown - Thêm khuôn mặt mới vào gallery với tên của người dùng RFID
-                    note = f"Warning: Unrecognized face with RFID of {rfid_name}"
-                    status = "WARNING"
-                    print(f"UNKNOWN FACE: Adding as new face for {rfid_name} in gallery")
-                    self._save_face_to_gallery(rfid_name)  # Lưu với tên người dùng RFID
-                else:
-                    # TRƯỜNG HỢP 3: Face đã biết nhưng không khớp RFID - Cảnh báo giả mạo
-                    note = f"Alert: Face spoofing detected! RFID {rfid_name} used with face of {face_name}"
-                    status = "SPOOF_ATTEMPT"
-                    print(f"SPOOF ALERT: Face {face_name} using RFID of {rfid_name}")
-                    # Không lưu vào gallery nhưng vẫn lưu vào attendance
-            
-            # Luôn lưu ảnh vào thư mục attendance theo userId của RFID
-            self._save_face_to_attendance(rfid_name)
+        # XỬ LÝ 3 TRƯỜNG HỢP THEO YÊU CẦU (và trường hợp khuôn mặt giả)
+        status, note = classify_verification(
+            self.verification_result["match"], face_name, rfid_name, score, is_live_face)
+        if status == STATUS_SUCCESS:
+            print(f"MATCH: Face {face_name} matches RFID {rfid_name} - Adding face to gallery")
+            self._save_face_to_gallery(face_name)
+        elif status == STATUS_WARNING:
+            print(f"UNKNOWN FACE: Adding as new face for {rfid_name} in gallery")
+            self._save_face_to_gallery(rfid_name)  # Lưu với tên người dùng RFID
+        elif status == STATUS_SPOOF_ATTEMPT:
+            # Không lưu vào gallery nhưng vẫn lưu vào attendance
+            print(f"SPOOF ALERT: Face {face_name} using RFID of {rfid_name}")
         else:
-            # Trường hợp khuôn mặt giả (anti-spoofing detection)
-            note = "Alert: Fake face detected! Anti-spoofing protection activated."
-            status = "FAKE_FACE"
             print(f"FAKE FACE DETECTED: Anti-spoofing triggered for RFID {rfid_name}")
-            # Lưu ảnh giả vào thư mục attendance theo userId của RFID
-            self._save_face_to_attendance(rfid_name)
+
+        # Luôn lưu ảnh vào thư mục attendance theo userId của RFID
+        self._save_face_to_attendance(rfid_name)
             
         # Gửi attendance API cho tất cả các trường hợp (đã đi qua anti-spoofing)
         if not self.api_request_sent:
+            # Kiểm tra tiết học tại chỗ từ cache thời khóa biểu
+            schedule_check = self._check_schedule()
+            skip_upload = self._should_skip_upload(schedule_check)
             try:
                 # Gửi thông tin điểm danh lên server
                 attendance_result = self.attendance.log_attendance(
@@ -463,10 +580,21 @@ class ZenSys:
                     rfid_id=rfid_id,
                     face_image=self.current_face_crop,
                     face_image_path=self.current_face_crop_path,
+                    face_jpeg=self.current_face_jpeg,
                     status=status,
                     detected_face=face_name,  # Thêm trường này để server biết khuôn mặt được nhận diện
-                    note=note  # Thêm note cho API
+                    note=note,  # Thêm note cho API
+                    schedule_id=schedule_check.get("scheduleId"),
+                    upload=not skip_upload
                 )
+                if skip_upload:
+                    # Không có tiết học: báo ngay lên UI, không cần chờ server trả NO_SCHEDULE
+                    attendance_result.update({
+                        "success": False,
+                        "error": True,
+                        "error_code": "NO_SCHEDULE",
+                        "error_message": "Không tìm thấy lịch học phù hợp với thời gian hiện tại (kiểm tra tại thiết bị)"
+                    })
             except Exception as e:
                 self.system_logger.error(f"Error logging attendance: {e}")
                 attendance_result = {"error": True, "error_message": str(e)}
@@ -494,10 +622,11 @@ class ZenSys:
         
         # Log thành công hoặc thất bại
         if self.verification_result["match"] and is_live_face:
-            self.system_logger.info(f"Authentication successful for user: {rfid_name}, RFID: {rfid_id}")
+            self.system_logger.info("Authentication successful for user: %s, RFID: %s", rfid_name, rfid_id)
         else:
             reason = "face mismatch" if not self.verification_result["match"] else "fake face"
-            self.system_logger.warning(f"Authentication failed: reason={reason}, match={self.verification_result['match']}, live_face={is_live_face}")
+            self.system_logger.warning("Authentication failed: reason=%s, match=%s, live_face=%s",
+                                       reason, self.verification_result['match'], is_live_face)
             
         # Reset RFID sau thời gian hiển thị từ config
         log_interval = float(config.logging.log_interval) if hasattr(config.logging, 'log_interval') else 5.0
@@ -532,12 +661,13 @@ class ZenSys:
             
             # Reset depth map display và các biến trạng thái
             self.depth_display_paused = False
-            self.last_depth_result = None  # Đảm bảo depth map được tính toán lại trong lần tiếp theo
+            self.anti_spoofing.reset()  # Phiên sau gộp liveness từ đầu
             
             # Reset các giá trị khác
             self.verification_result = None
             self.anti_spoofing_result = None
             self.current_face_crop = None
+            self.current_face_jpeg = None
             self.current_face_crop_path = None
             
             # QUAN TRỌNG: Đặt các biến trạng thái về False ngay lập tức
@@ -620,6 +750,95 @@ class ZenSys:
         Dọn dẹp tài nguyên
         """
         self.rfid.stop_listening()
+        self.image_writer.close()
+        if self.is_primary:
+            # Dừng tiến trình worker nếu model chạy ngoài tiến trình
+            for component in (self.face_recognition.face_analyzer, self.depth):
+                close = getattr(component, 'close', None)
+                if close is not None:
+                    close()
+    
+    def apply_config(self, sections):
+        """
+        Áp dụng thay đổi config (sau config.reload()) cho các thành phần đang chạy,
+        không tải lại model. Ngưỡng recognition và logging.log_interval được đọc từ
+        config mỗi lần dùng nên không cần làm gì thêm.
+        
+        Args:
+            sections: Tên các section đã thay đổi
+            
+        Returns:
+            list: Các section trong số đó cần restart_zensys() mới có hiệu lực
+        """
+        sections = set(sections)
+        # Detection dùng chung giữa các luồng: chỉ luồng chính áp dụng
+        if 'detection' in sections and self.is_primary:
+            apply = getattr(self.face_recognition.face_analyzer, 'apply_config', None)
+            if apply is not None:
+                apply()
+        if 'anti_spoofing' in sections:
+            self.anti_spoofing.apply_config()
+        self.system_logger.log_system_event("config_applied", {
+            "stream": self.stream_name,
+            "sections": sorted(sections & set(self.LIVE_CONFIG_SECTIONS))
+        })
+        return sorted(sections - set(self.LIVE_CONFIG_SECTIONS))
+    
+    def upgrade_recognition_model(self, model_file=None, precision=None, cpu_budget=None):
+        """
+        Bắt đầu nâng cấp model recognition không dừng hệ thống (xem RecognitionModelUpgrade)
+        
+        Args:
+            model_file: File ONNX mới (mặc định config.recognition_model)
+            precision: Biến thể model (mặc định config.model_precision['recognition'])
+            cpu_budget: Tỉ lệ CPU cho việc tạo lại embedding (mặc định config.model_upgrade.cpu_budget)
+            
+        Returns:
+            RecognitionModelUpgrade đang chạy
+            
+        Raises:
+            RuntimeError: Nếu không phải luồng chính, đang có lần nâng cấp khác, hoặc model chạy trong worker
+        """
+        if not self.is_primary:
+            raise RuntimeError("Recognition model upgrade runs on the primary stream")
+        if self.model_upgrade is not None and self.model_upgrade.state in ("pending", "loading", "reembedding"):
+            raise RuntimeError("A recognition model upgrade is already running")
+        self.model_upgrade = RecognitionModelUpgrade(
+            self.face_recognition,
+            model_file or config.recognition_model,
+            precision=precision or config.model_precision['recognition'],
+            cpu_budget=cpu_budget or config.model_upgrade.cpu_budget
+        ).start()
+        self.system_logger.log_system_event("model_upgrade_started", self.model_upgrade.status())
+        return self.model_upgrade
+    
+    def apply_weights_config(self):
+        """
+        Xử lý thay đổi section weights (sau config.reload()): chỉ đổi model
+        recognition thì nâng cấp tại chỗ; đổi model detection thì cần restart.
+        
+        Returns:
+            bool: True nếu thay đổi đã được xử lý không cần restart
+        """
+        face_recognition = self.face_recognition
+        if face_recognition.detection_source != (config.detection_model, config.model_precision['detection']):
+            return False
+        try:
+            stamp = model_stamp(config.recognition_model, config.model_precision['recognition'])
+        except OSError as e:
+            print(f"Recognition model unavailable, keeping the current model: {e}")
+            return False
+        upgrade = self.model_upgrade
+        if stamp['version'] == face_recognition.face_db.model_version or \
+                (upgrade is not None and upgrade.state in ("pending", "loading", "reembedding")
+                 and upgrade.stamp is not None and upgrade.stamp['version'] == stamp['version']):
+            return True
+        try:
+            self.upgrade_recognition_model()
+        except RuntimeError as e:
+            print(f"Recognition model change needs restart_zensys(): {e}")
+            return False
+        return True
     
     def enable_checkin(self, enabled=True, cooldown=5.0):
         """
@@ -651,27 +870,81 @@ class ZenSys:
         )
         print(f"Depth thresholds updated: variance={variance_thresh}, range={range_thresh}, min={min_thresh}, max={max_thresh}")
     
-    def start_camera(self):
+    def start_camera(self, source=None):
+        """
+        Mở nguồn frame (config.camera) với luồng đọc nền chỉ giữ frame mới nhất,
+        rồi bắt đầu luồng xử lý
+
+        Args:
+            source: FrameSource tùy chọn thay cho nguồn trong config (vd: file/thư mục để thử)
+        """
         with self.camera_lock:
-            if self.camera is None:
-                self.camera = cv2.VideoCapture(0)
+            if self.camera is not None:
+                return
+            settings = self.stream.camera
+            camera = LatestFrameGrabber(
+                source or create_frame_source(settings),
+                loop=settings.loop,
+                reconnect_delay=settings.reconnect_delay,
+                metrics=self.metrics,
+                pool=FramePool(f"capture:{self.stream_name}", metrics=self.metrics)
+            )
+            if not camera.start():
+                self.system_logger.error("Cannot start frame source: %s", camera.source.describe())
+                return
+            self.camera = camera
                 
         # Bắt đầu thread xử lý liên tục
-        self.camera_thread = threading.Thread(target=self.camera_processing_loop)
+        self.camera_thread = threading.Thread(target=self.camera_processing_loop, args=(camera,))
         self.camera_thread.daemon = True
         self.camera_thread.start()
         
-    def camera_processing_loop(self):
-        while True:
-            # Đọc frame từ camera
-            ret, frame = self.camera.read()
+    def camera_processing_loop(self, camera):
+        while self.camera is camera:
+            # Chờ frame mới nhất; frame cũ trong lúc đang xử lý đã bị bỏ qua ở grabber
+            ret, frame = camera.read_frame(timeout=1.0)
             if ret:
+                # Giữ buffer làm frame gần nhất tới frame sau thay vì chép ra mảng mới
+                self._set_last_frame(frame)
                 # Xử lý frame và lưu kết quả
-                result = self.process_frame(frame)
+                started = time.perf_counter()
+                with self.metrics.stage("frame", self._stream_labels):
+                    result = self.process_frame(frame.array)
+                self.stream_stats.add((time.perf_counter() - started) * 1000)
                 self.latest_processed_result = result
-            
-            # Ngủ một chút để giảm tải CPU
-            time.sleep(0.01)
+            elif not camera.is_running():
+                break
+        self._set_last_frame(None)
+    
+    def _set_last_frame(self, frame):
+        """
+        Thay frame gần nhất và trả buffer cũ về pool
+        
+        Args:
+            frame: PooledFrame đã retain (ZenSys nhận quyền sở hữu), mảng thường
+                   (frame không lấy từ pool), hoặc None để bỏ frame gần nhất
+        """
+        with self._last_frame_lock:
+            previous = self._last_pooled
+            if previous is not None and frame is previous.array:
+                return  # Đúng buffer đang giữ
+            if isinstance(frame, PooledFrame):
+                self._last_pooled, self._last_frame = frame, frame.array
+            else:
+                # Không trỏ tiếp vào buffer đã trả về pool: pool sẽ ghi frame khác vào đó
+                self._last_pooled, self._last_frame = None, frame
+        if previous is not None:
+            previous.release()
+    
+    def snapshot_last_frame(self):
+        """
+        Bản sao frame gần nhất cho luồng khác (buffer gốc được luồng camera dùng lại)
+        
+        Returns:
+            np.ndarray hoặc None
+        """
+        with self._last_frame_lock:
+            return None if self._last_frame is None else self._last_frame.copy()
             
     def get_latest_processed_frame(self):
         # API để GUI lấy frame và kết quả mới nhất
@@ -689,9 +962,13 @@ class ZenSys:
     def stop_camera(self):
         with self.camera_lock:
             if self.camera:
-                self.camera.release()
+                self.camera.stop()
                 self.camera = None 
     
+    def get_stream_stats(self):
+        """FPS và độ trễ xử lý của luồng camera này"""
+        return {"stream": self.stream_name, **self.stream_stats.snapshot()}
+    
     def _prepare_face_crop(self, face):
         """
         Chuẩn bị ảnh khuôn mặt từ đối tượng face
@@ -699,23 +976,14 @@ class ZenSys:
         Args:
             face: Đối tượng Face từ ZenFace
         """
-        if self.current_face_crop is None and face.bbox is not None and hasattr(face, 'img') and face.img is not None:
+        crop_img = getattr(face, 'crop', None)  # Vùng bbox đã cắt sẵn (Face.detach)
+        if self.current_face_crop is None and crop_img is not None and crop_img.size > 0:
             try:
-                x1, y1, x2, y2 = [int(b) for b in face.bbox]
-                img = face.img  # Lấy ảnh từ face object
-                
-                # Đảm bảo tọa độ nằm trong kích thước ảnh
-                h, w = img.shape[:2]
-                x1, y1 = max(0, x1), max(0, y1)
-                x2, y2 = min(w, x2), min(h, y2)
-                
-                if x2 > x1 and y2 > y1:
-                    # Cắt khuôn mặt
-                    crop_img = img[y1:y2, x1:x2]
-                    if crop_img.size > 0:
-                        self.current_face_crop = cv2.resize(crop_img, (112, 112))
-                        # Lưu biến ảnh trực tiếp vào đối tượng để GUI có thể truy cập 
-                        self.current_face_image = self.current_face_crop.copy()
+                self.current_face_crop = cv2.resize(crop_img, (112, 112))
+                # Mã hóa JPEG một lần cho API, gallery và attendance
+                self.current_face_jpeg = encode_jpeg(self.current_face_crop)
+                # Lưu biến ảnh trực tiếp vào đối tượng để GUI có thể truy cập 
+                self.current_face_image = self.current_face_crop.copy()
             except Exception as e:
                 self.system_logger.error(f"Error creating face crop from source: {e}")
     
@@ -743,14 +1011,13 @@ class ZenSys:
             filename = f"{user_id}_{timestamp}.jpg"
             filepath = os.path.join(gallery_dir, filename)
             
-            # Lưu ảnh
-            success = cv2.imwrite(filepath, self.current_face_crop)
-            if success:
-                print(f"Successfully saved face to gallery: {filepath}")
-                return True
-            else:
-                self.system_logger.error("Failed to save face to gallery: cv2.imwrite returned False")
+            # Ghi ảnh JPEG đã mã hóa qua writer nền (ghi file tạm rồi rename)
+            if self.current_face_jpeg is None:
+                self.system_logger.error("Failed to save face to gallery: JPEG encoding failed")
                 return False
+            self.image_writer.submit(filepath, self.current_face_jpeg)
+            print(f"Queued face for gallery: {filepath}")
+            return True
         except Exception as e:
             self.system_logger.error(f"Error saving face to gallery: {e}")
             return False
@@ -778,26 +1045,41 @@ class ZenSys:
             filename = "latest.jpg"
             filepath = os.path.join(user_dir, filename)
             
-            # Xóa file cũ nếu tồn tại
-            if os.path.exists(filepath):
-                try:
-                    os.remove(filepath)
-                except Exception as e:
-                    self.system_logger.error(f"Failed to remove old image: {e}")
-            
-            # Lưu ảnh
-            success = cv2.imwrite(filepath, self.current_face_crop)
-            if success:
-                self.current_face_crop_path = filepath
-                print(f"Successfully saved face image to attendance: {filepath}")
-                return True
-            else:
-                self.system_logger.error("Failed to save face to attendance: cv2.imwrite returned False")
+            # Ghi qua writer nền; os.replace thay file cũ nguyên tử nên không cần xóa trước
+            if self.current_face_jpeg is None:
+                self.system_logger.error("Failed to save face to attendance: JPEG encoding failed")
                 return False
+            self.image_writer.submit(filepath, self.current_face_jpeg)
+            self.current_face_crop_path = filepath
+            print(f"Queued face image for attendance: {filepath}")
+            return True
         except Exception as e:
             self.system_logger.error(f"Error saving face to attendance: {e}")
             return False
     
+    def _check_schedule(self):
+        """
+        Kiểm tra tiết học hiện tại bằng cache thời khóa biểu
+        
+        Returns:
+            dict: Kết quả từ ScheduleCache.check(), hoặc trạng thái UNKNOWN nếu cache bị tắt
+        """
+        if self.schedule_cache is None:
+            return {"status": "UNKNOWN", "fresh": False, "scheduleId": None}
+        try:
+            return self.schedule_cache.check()
+        except Exception as e:
+            self.system_logger.error("Error checking schedule cache: %s", e)
+            return {"status": "UNKNOWN", "fresh": False, "scheduleId": None}
+    
+    def _should_skip_upload(self, schedule_check):
+        """
+        Chỉ bỏ qua việc gửi lên server khi cache còn mới và chắc chắn không có tiết học
+        """
+        if not config.schedule_cache.skip_upload_when_no_session:
+            return False
+        return schedule_check.get("status") == "NO_SCHEDULE" and schedule_check.get("fresh", False)
+    
     def _handle_api_error(self, attendance_result, user_id, rfid_id):
         """
         Xử lý lỗi API khi gửi attendance
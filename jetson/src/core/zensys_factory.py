@@ -1,5 +1,6 @@
 import os
 import sys
+import threading
 from pathlib import Path
 
 # Add project root to Python path
@@ -9,30 +10,71 @@ if project_root not in sys.path:
 
 # Default instances for simple import
 default_zensys = None
+default_streams = []
 default_attendance_service = None
 default_message_manager = None
+default_schedule_cache = None
+default_identity_sync = None
+default_startup = None
+default_config_watcher = None
+_startup_thread = None
+_startup_lock = threading.Lock()
 
-def create_zensys_instance():
+def create_zensys_instance(startup=None):
     """
     Create and initialize a ZenSys instance with default configuration.
     This is the recommended way to get a ZenSys instance.
     
+    Với nhiều luồng trong config.streams, mỗi camera có một ZenSys riêng dùng
+    chung model và database của instance đầu tiên (lấy qua get_stream_instances()).
+    
+    Args:
+        startup: StartupOrchestrator theo dõi quá trình khởi động (tùy chọn)
+    
     Returns:
-        A pre-configured ZenSys instance
+        A pre-configured ZenSys instance (luồng camera đầu tiên)
     """
+    global default_streams
     try:
         # Import here to avoid circular imports
+        from utils.config_utils import config
         from src.core.zensys.zensys import ZenSys
+        from src.core.zensys.startup import StartupOrchestrator
+        from src.core.zensys.streams import InferenceBatcher
+        
+        streams = config.streams
+        if sum(1 for stream in streams if stream.rfid == "keyboard") > 1:
+            raise ValueError("Only one stream can use the keyboard RFID reader")
+        readers = [stream.rfid_device for stream in streams if stream.rfid and stream.rfid != "keyboard"]
+        if len(readers) != len(set(readers)):
+            raise ValueError("Each RFID device can be bound to only one stream")
+        startup = startup or StartupOrchestrator()
         
         # Create a new ZenSys instance
-        zen_system = ZenSys()
+        zen_system = ZenSys(startup=startup, stream=streams[0])
+        instances = [zen_system]
+        for stream in streams[1:]:
+            instances.append(ZenSys(startup=startup, shared=zen_system.shared, stream=stream))
+        
+        batching = config.batching
+        if len(instances) > 1 and batching.enable:
+            batcher = InferenceBatcher(zen_system.face_analyzer,
+                                       max_batch=batching.max_batch, max_wait_ms=batching.max_wait_ms)
+            batcher.start()
+            zen_system.shared.batcher = batcher
         
         # Initialize the system
-        zen_system.initialize()
+        for instance in instances:
+            instance.initialize(finish_startup=False)
+        startup.finish()
         
+        default_streams = instances
+        start_config_watcher()
         return zen_system
     except Exception as e:
         print(f"Error initializing ZenSys: {e}")
+        if startup is not None:
+            startup.fail(e)
         raise
 
 def get_default_instance():
@@ -44,9 +86,76 @@ def get_default_instance():
     """
     global default_zensys
     if default_zensys is None:
-        default_zensys = create_zensys_instance()
+        # Nếu đang khởi động nền thì chờ luồng đó thay vì tạo instance thứ hai
+        thread = _startup_thread
+        if thread is not None:
+            thread.join()
+        # Khởi động nền đã thất bại: ném lại lỗi gốc thay vì khởi động lại với orchestrator đã FAILED
+        startup = default_startup
+        if default_zensys is None and startup is not None and startup.exception is not None:
+            startup.result(0)
+        if default_zensys is None:
+            default_zensys = create_zensys_instance(get_startup_orchestrator())
     return default_zensys
 
+def get_stream_instances():
+    """
+    Get the ZenSys instance of every camera stream (the first one is the default instance).
+    
+    Returns:
+        list of ZenSys, empty until the default instance has been created
+    """
+    return list(default_streams)
+
+def get_startup_orchestrator():
+    """
+    Get the StartupOrchestrator tracking the default instance's startup.
+    
+    Returns:
+        The default StartupOrchestrator instance
+    """
+    global default_startup
+    with _startup_lock:
+        if default_startup is None:
+            from src.core.zensys.startup import StartupOrchestrator
+            default_startup = StartupOrchestrator()
+        return default_startup
+
+def start_default_instance_async():
+    """
+    Tạo default ZenSys instance trong luồng nền để GUI không bị chặn khi tải model.
+    GUI theo dõi tiến trình qua orchestrator và gọi get_default_instance() khi sẵn sàng.
+    
+    Returns:
+        The StartupOrchestrator tracking the startup
+    """
+    global _startup_thread
+    startup = get_startup_orchestrator()
+    with _startup_lock:
+        if default_zensys is None and _startup_thread is None:
+            def build():
+                global default_zensys, _startup_thread
+                try:
+                    default_zensys = create_zensys_instance(startup)
+                except Exception as e:
+                    # Lỗi được giữ trong orchestrator, get_default_instance()/startup.result() ném lại
+                    from src.log.system_logger import SystemLogger
+                    SystemLogger().error("ZenSys startup failed: %s", e, exc_info=True)
+                finally:
+                    _startup_thread = None
+            _startup_thread = threading.Thread(target=build, name="ZenSysStartup", daemon=True)
+            _startup_thread.start()
+    return startup
+
+def is_default_instance_ready():
+    """
+    Check whether the default ZenSys instance finished starting up.
+    
+    Returns:
+        bool: True nếu instance đã sẵn sàng
+    """
+    return default_zensys is not None and get_startup_orchestrator().is_ready()
+
 def get_attendance_service():
     """
     Get the default AttendanceService instance, creating it if needed.
@@ -77,15 +186,124 @@ def get_message_manager(use_kafka=False, use_api=True):
         default_message_manager = MessageManager(use_kafka=use_kafka, use_api=use_api)
     return default_message_manager
 
+def get_schedule_cache():
+    """
+    Get the default ScheduleCache instance, creating and starting it if needed.
+    
+    Returns:
+        The default ScheduleCache instance, or None if disabled in config
+    """
+    global default_schedule_cache
+    if default_schedule_cache is None:
+        from utils.config_utils import config
+        settings = config.schedule_cache
+        if not settings.enable:
+            return None
+        from src.core.api.schedule_cache import ScheduleCache
+        default_schedule_cache = ScheduleCache(
+            classroom_id=settings.classroom_id,
+            cache_file=settings.cache_file,
+            refresh_interval=settings.refresh_interval,
+            max_age=settings.max_age,
+            days_ahead=settings.days_ahead,
+            early_minutes=settings.early_minutes,
+            late_minutes=settings.late_minutes
+        )
+        default_schedule_cache.start()
+    return default_schedule_cache
+
+def get_identity_sync():
+    """
+    Get the default IdentitySync instance, creating and starting it if needed.
+    
+    Returns:
+        The default IdentitySync instance, or None if disabled in config
+    """
+    global default_identity_sync
+    if default_identity_sync is None:
+        from utils.config_utils import config
+        settings = config.identity
+        if not settings.sync:
+            return None
+        from src.core.api.identity_sync import IdentitySync
+        from model.RFID.identity_store import get_identity_store
+        default_identity_sync = IdentitySync(
+            get_identity_store(),
+            refresh_interval=settings.sync_interval,
+            full_sync_interval=settings.full_sync_interval
+        )
+        default_identity_sync.start()
+    return default_identity_sync
+
+def reload_config():
+    """
+    Đọc lại config.yaml và áp dụng thay đổi cho mọi luồng camera đang chạy mà
+    không tạo lại ZenSys (ngưỡng, det-size, anti-spoofing, cooldown).
+    
+    Returns:
+        dict: {'changed': [...], 'restart_required': [...]} - section đã đổi và
+        section chỉ có hiệu lực sau restart_zensys()
+    """
+    from utils.config_utils import config
+    changed = config.reload()
+    return {'changed': changed, 'restart_required': apply_config_changes(changed)}
+
+def apply_config_changes(sections):
+    """
+    Áp dụng các section đã đổi (sau config.reload()) cho mọi luồng camera đang chạy
+    
+    Returns:
+        list: Section cần restart_zensys() mới có hiệu lực
+    """
+    sections = list(sections)
+    instances = get_stream_instances()
+    # Đổi model recognition: luồng chính nâng cấp nền thay vì restart
+    if 'weights' in sections and instances and instances[0].apply_weights_config():
+        sections.remove('weights')
+    restart_required = set()
+    for instance in instances:
+        restart_required.update(instance.apply_config(sections))
+    if restart_required:
+        print(f"Config sections changed that need restart_zensys(): {sorted(restart_required)}")
+    return sorted(restart_required)
+
+def upgrade_recognition_model(model_file=None, precision=None, cpu_budget=None):
+    """
+    Nâng cấp model recognition của default instance không dừng hệ thống
+    
+    Returns:
+        RecognitionModelUpgrade đang chạy (status() để theo dõi, wait() để chờ)
+    """
+    return get_default_instance().upgrade_recognition_model(model_file, precision, cpu_budget)
+
+def start_config_watcher():
+    """
+    Bật theo dõi config.yaml (config.config_watch) để thay đổi có hiệu lực ngay
+    
+    Returns:
+        ConfigWatcher, hoặc None nếu tắt trong config
+    """
+    global default_config_watcher
+    from utils.config_utils import config, ConfigWatcher
+    settings = config.config_watch
+    if default_config_watcher is None and settings.enable:
+        default_config_watcher = ConfigWatcher(config, apply_config_changes, interval=settings.interval)
+        default_config_watcher.start()
+    return default_config_watcher
+
 # Thêm phương thức để lưu trạng thái và khởi động lại
 def restart_zensys():
     """
-    Lưu trạng thái và khởi động lại ZenSys instance
+    Lưu trạng thái và khởi động lại ZenSys instance. Config được đọc lại để mọi
+    section có hiệu lực; model và database khuôn mặt được lấy lại từ ModelRegistry
+    khi file model, profile và gallery không đổi.
     
     Returns:
         Một ZenSys instance mới
     """
     global default_zensys
+    from utils.config_utils import config
+    config.reload()
     
     # Lưu trạng thái của instance hiện tại (nếu cần)
     if default_zensys is not None:
@@ -94,8 +312,12 @@ def restart_zensys():
             # Thực hiện việc lưu trạng thái nếu cần
             # ...
             
-            # Đóng tài nguyên
-            default_zensys.cleanup()
+            # Đóng tài nguyên của mọi luồng camera
+            for instance in default_streams or [default_zensys]:
+                instance.stop_camera()
+                instance.cleanup()
+            if default_zensys.shared.batcher is not None:
+                default_zensys.shared.batcher.stop()
             print("Previous ZenSys instance cleaned up")
         except Exception as e:
             print(f"Error closing previous ZenSys instance: {e}")
@@ -114,7 +336,16 @@ def restart_zensys():
 __all__ = [
     'create_zensys_instance', 
     'get_default_instance',
+    'get_stream_instances',
+    'get_startup_orchestrator',
+    'start_default_instance_async',
+    'is_default_instance_ready',
     'get_attendance_service',
     'get_message_manager',
+    'get_schedule_cache',
+    'reload_config',
+    'apply_config_changes',
+    'upgrade_recognition_model',
+    'start_config_watcher',
     'restart_zensys'
 ] 
\ No newline at end of file
@@ -1,5 +1,9 @@
 from src.log.attendance_logger import AttendanceLogger
 from src.log.rfid_logger import RFIDLogger
 from src.log.system_logger import SystemLogger
+from src.log.event_journal import EventJournal, JournalReader
+from src.log.async_logging import StructuredFormatter, summarize_payload
+from src.log.metrics import MetricsRegistry, RollingHistogram, get_metrics
 
-__all__ = ['AttendanceLogger', 'RFIDLogger', 'SystemLogger'] 
\ No newline at end of file
+__all__ = ['AttendanceLogger', 'RFIDLogger', 'SystemLogger', 'EventJournal', 'JournalReader',
+           'StructuredFormatter', 'summarize_payload', 'MetricsRegistry', 'RollingHistogram', 'get_metrics'] 
\ No newline at end of file
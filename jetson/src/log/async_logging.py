@@ -0,0 +1,189 @@
+import json
+import queue
+import atexit
+import logging
+import threading
+from collections.abc import Mapping
+from logging.handlers import QueueHandler, QueueListener
+
+# Giới hạn kích thước trước khi một trường bị tóm tắt thay vì serialize
+MAX_STRING_LENGTH = 256
+MAX_LIST_LENGTH = 16
+MAX_DEPTH = 4
+
+
+def summarize_payload(value, depth=0):
+    """
+    Tạo bản tóm tắt gọn của payload để ghi log.
+    Ảnh base64, vector embedding, numpy array và bytes được thay bằng mô tả
+    ngắn (kiểu + kích thước) thay vì serialize toàn bộ.
+
+    Args:
+        value: Giá trị cần tóm tắt (dict, list, str, ndarray, ...)
+        depth: Độ sâu đệ quy hiện tại
+
+    Returns:
+        Bản sao đã tóm tắt, có thể serialize bằng json
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+
+    if isinstance(value, str):
+        if value.startswith("data:image"):
+            header = value.split(",", 1)[0]
+            return f"<{header[5:]} {len(value)} chars>"
+        if len(value) > MAX_STRING_LENGTH:
+            return f"{value[:64]}...<{len(value)} chars>"
+        return value
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<bytes {len(value)}>"
+
+    # numpy array (không import numpy để module này không phụ thuộc)
+    shape = getattr(value, "shape", None)
+    if shape is not None and hasattr(value, "dtype"):
+        if getattr(value, "size", 0) <= MAX_LIST_LENGTH and len(shape) <= 1:
+            return [summarize_payload(v.item() if hasattr(v, "item") else v, depth + 1) for v in value]
+        return f"<ndarray shape={tuple(shape)} dtype={value.dtype}>"
+
+    if depth >= MAX_DEPTH:
+        return f"<{type(value).__name__}>"
+
+    if isinstance(value, Mapping):
+        return {str(k): summarize_payload(v, depth + 1) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        if len(value) > MAX_LIST_LENGTH:
+            if isinstance(value[0], (int, float)):
+                return f"<vector len={len(value)}>"
+            return [summarize_payload(v, depth + 1) for v in value[:MAX_LIST_LENGTH]] + \
+                [f"<{len(value) - MAX_LIST_LENGTH} more>"]
+        return [summarize_payload(v, depth + 1) for v in value]
+
+    return value
+
+
+class PayloadSummary:
+    """
+    Giữ bản tóm tắt của một payload; chỉ serialize thành JSON khi message được
+    format (trong luồng QueueListener), không phải trong luồng gọi log.
+    """
+
+    __slots__ = ("summary",)
+
+    def __init__(self, value):
+        self.summary = summarize_payload(value)
+
+    def __str__(self):
+        try:
+            return json.dumps(self.summary, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            return str(self.summary)
+
+    __repr__ = __str__
+
+
+def _is_payload(value):
+    return isinstance(value, (Mapping, list, tuple, bytes, bytearray)) or \
+        (hasattr(value, "shape") and hasattr(value, "dtype"))
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler không format message trong luồng gọi.
+    QueueHandler.prepare() mặc định gọi self.format(record) ngay tại chỗ; ở đây
+    chỉ chụp bản tóm tắt của các tham số lớn rồi đẩy record vào queue, việc
+    format (msg % args) được thực hiện bởi QueueListener.
+    """
+
+    def prepare(self, record):
+        record = _copy_record(record)
+
+        args = record.args
+        if isinstance(args, Mapping) and "%(" not in str(record.msg):
+            # logger.info("... %s", some_dict): LogRecord đã bóc dict ra khỏi tuple
+            record.args = (PayloadSummary(args),)
+        elif isinstance(args, Mapping):
+            record.args = {k: PayloadSummary(v) if _is_payload(v) else v for k, v in args.items()}
+        elif args:
+            record.args = tuple(PayloadSummary(a) if _is_payload(a) else a for a in args)
+
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            record.payload = PayloadSummary(payload)
+
+        if record.exc_info:
+            # Traceback không nên đi qua queue; format sẵn thành exc_text
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _copy_record(record):
+    return logging.makeLogRecord(record.__dict__)
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formatter thêm trường `payload` (truyền qua extra={"payload": ...}) đã được
+    tóm tắt vào cuối dòng log.
+    """
+
+    def format(self, record):
+        message = super().format(record)
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            if not isinstance(payload, PayloadSummary):
+                payload = PayloadSummary(payload)
+            message = f"{message} | payload={payload}"
+        return message
+
+
+_listeners = {}
+_listeners_lock = threading.Lock()
+
+
+def start_queue_logging(logger, handlers):
+    """
+    Chuyển các handler của logger sang một QueueListener chạy nền.
+    Logger chỉ còn một DeferredQueueHandler nên việc ghi log trong luồng camera
+    chỉ tốn một lần put vào queue.
+
+    Args:
+        logger: logging.Logger cần cấu hình
+        handlers: Các handler thực sự (file, console, ...) chạy trong listener
+
+    Returns:
+        QueueListener: Listener đã được khởi động
+    """
+    with _listeners_lock:
+        if logger.name in _listeners:
+            return _listeners[logger.name]
+
+        log_queue = queue.SimpleQueue()
+        while logger.handlers:
+            logger.handlers.pop()
+        logger.addHandler(DeferredQueueHandler(log_queue))
+        # Không đẩy bản ghi thô (args chưa tóm tắt) lên handler của root trong luồng gọi
+        logger.propagate = False
+
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners[logger.name] = listener
+        return listener
+
+
+def stop_queue_logging():
+    """Flush and stop every queue listener (registered with atexit)"""
+    with _listeners_lock:
+        listeners = list(_listeners.values())
+        _listeners.clear()
+    for listener in listeners:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+
+
+atexit.register(stop_queue_logging)
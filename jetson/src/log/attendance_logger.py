@@ -1,10 +1,10 @@
 import os
-import json
 import time
 import datetime
 import cv2
 from pathlib import Path
 import sys
+import logging
 import numpy as np
 
 # Add project root to Python path
@@ -13,6 +13,8 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from utils.config_utils import config
+from src.log.event_journal import get_journal
+from utils.image_writer import encode_jpeg, write_atomic
 
 class AttendanceLogger:
     """
@@ -29,6 +31,8 @@ class AttendanceLogger:
         """
         self.base_path = base_path or config.data.attendance_dir
         self.device_id = config.logging.device_id if hasattr(config, 'logging') else 1
+        self.logger = logging.getLogger("zensys.attendance")
+        self.log_dir = os.path.join(self.base_path, "../logs")
         self._ensure_directories()
         
     def _ensure_directories(self):
@@ -47,7 +51,10 @@ class AttendanceLogger:
         
         Hỗ trợ 2 cách gọi:
         1. log_attendance(attendance_data, status="SUCCESS") - attendance_data là dictionary
-        2. log_attendance(user_id, rfid_id, face_image=None, device_id=None, status="SUCCESS")
+        2. log_attendance(user_id, rfid_id, face_image=None, device_id=None, status="SUCCESS",
+                          face_jpeg=None, face_image_path=None)
+           face_jpeg là ảnh đã mã hóa JPEG sẵn (không mã hóa lại); nếu có
+           face_image_path thì ảnh đã được ghi ở nơi khác và không ghi lại.
         
         Returns:
             dict: Attendance record information
@@ -74,7 +81,7 @@ class AttendanceLogger:
             face_image = kwargs.get("face_image")
             device_id = kwargs.get("device_id", self.device_id)
             status = kwargs.get("status", "SUCCESS")
-            image_path = None
+            image_path = kwargs.get("face_image_path")
         
         # Use device_id from parameter or from config
         device_id = device_id or self.device_id
@@ -84,46 +91,30 @@ class AttendanceLogger:
         formatted_time = timestamp.strftime("%Y-%m-%d_%H-%M-%S")
         iso_time = timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
         
-        # Trường hợp 2: Nếu là tham số riêng lẻ và có face_image
+        # Trường hợp 2: Nếu là tham số riêng lẻ và có face_image / face_jpeg
         face_base64 = ""
-        if image_path is None and "face_image" in kwargs and kwargs["face_image"] is not None:
-            face_image = kwargs["face_image"]
-            if isinstance(face_image, np.ndarray) and face_image.size > 0:
-                user_dir = self._get_user_dir(user_id)
-                image_filename = f"latest.jpg"  # Sử dụng tên file cố định
-                image_path = os.path.join(user_dir, image_filename)
-                
+        face_jpeg = kwargs.get("face_jpeg")
+        face_image = kwargs.get("face_image")
+        if face_jpeg is None and isinstance(face_image, np.ndarray) and face_image.size > 0:
+            # Chuyển ảnh grayscale sang BGR nếu cần, sau đó mã hóa đúng một lần
+            if len(face_image.shape) == 2:
+                face_image = cv2.cvtColor(face_image, cv2.COLOR_GRAY2BGR)
+            face_jpeg = encode_jpeg(face_image)
+        
+        if face_jpeg:
+            if image_path is None:
+                image_path = os.path.join(self._get_user_dir(user_id), "latest.jpg")  # Sử dụng tên file cố định
                 try:
-                    # Đảm bảo thư mục tồn tại
-                    os.makedirs(os.path.dirname(image_path), exist_ok=True)
-                    
-                    # Xóa file cũ nếu tồn tại
-                    if os.path.exists(image_path):
-                        try:
-                            os.remove(image_path)
-                        except Exception as e:
-                            print(f"ERROR removing old image: {e}", flush=True)
-                    
-                    # Kiểm tra hình dạng của ảnh
-                    if len(face_image.shape) != 3 or face_image.shape[2] != 3:
-                        # Thử chuyển đổi ảnh grayscale sang BGR nếu cần
-                        if len(face_image.shape) == 2:
-                            face_image = cv2.cvtColor(face_image, cv2.COLOR_GRAY2BGR)
-                    
-                    # Lưu ảnh
-                    success = cv2.imwrite(image_path, face_image)
-                    if success:
-                        # Chuyển đổi ảnh thành base64
-                        import base64
-                        import cv2
-                        _, buffer = cv2.imencode('.jpg', face_image)
-                        face_base64 = base64.b64encode(buffer).decode('utf-8')
-                        face_base64 = f"data:image/jpeg;base64,{face_base64}"
-                    else:
-                        image_path = None
+                    # Ghi file tạm rồi rename, thay thế file cũ nguyên tử
+                    write_atomic(image_path, face_jpeg)
                 except Exception as e:
                     print(f"ERROR saving face image: {e}", flush=True)
                     image_path = None
+            
+            # Chuyển đổi ảnh thành base64
+            import base64
+            face_base64 = base64.b64encode(face_jpeg).decode('utf-8')
+            face_base64 = f"data:image/jpeg;base64,{face_base64}"
         
         # Obtener el vector facial si es posible
         face_vector = None
@@ -139,8 +130,10 @@ class AttendanceLogger:
                 face_score = zensys.verification_result["face_score"]
             
             # Obtener el embedding si está disponible
-            if zensys._last_frame is not None and len(zensys.face_recognition.face_analyzer.get(zensys._last_frame)) > 0:
-                face = zensys.face_recognition.face_analyzer.get(zensys._last_frame)[0]
+            last_frame = zensys.snapshot_last_frame()
+            faces = zensys.face_recognition.face_analyzer.get(last_frame) if last_frame is not None else []
+            if faces:
+                face = faces[0]
                 if face and face.embedding is not None:
                     face_vector = face.normed_embedding.tolist()
         except Exception as e:
@@ -175,14 +168,15 @@ class AttendanceLogger:
         }
         
         # Mostrar JSON en el nuevo formato pero guardar en el formato anterior para compatibilidad
-        print(json.dumps(attendance_record, indent=2, ensure_ascii=False), flush=True)
+        # (log lazy: ảnh base64 và vector chỉ được tóm tắt, không serialize)
+        self.logger.info("Attendance record: %s", attendance_record)
         
         # Devolvemos el registro original para mantener compatibilidad
         return original_record
         
     def save_log_to_file(self, attendance_record, log_dir=None):
         """
-        Lưu attendance_record vào file JSON
+        Ghi attendance_record vào journal JSON Lines (append-only)
         
         Args:
             attendance_record: Thông tin điểm danh (en formato original)
@@ -192,25 +186,7 @@ class AttendanceLogger:
             str: Đường dẫn tới file log
         """
         if log_dir is None:
-            log_dir = os.path.join(self.base_path, "../logs")
-            
-        Path(log_dir).mkdir(parents=True, exist_ok=True)
-        
-        # Tạo tên file theo ngày
-        today = datetime.datetime.now().strftime("%Y-%m-%d")
-        log_file = os.path.join(log_dir, f"attendance_{today}.json")
-        
-        # Đọc log hiện tại nếu đã tồn tại
-        logs = []
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-            except:
-                logs = []
-        
-        # Thêm log mới (como attendance_record es el formato original, 
-        # necesitamos crear la versión nueva para el archivo)
+            log_dir = self.log_dir
         
         # Crear timestamp en formato ISO
         timestamp = datetime.datetime.now()
@@ -241,8 +217,10 @@ class AttendanceLogger:
             if zensys.verification_result and "face_score" in zensys.verification_result:
                 face_score = zensys.verification_result["face_score"]
             
-            if zensys._last_frame is not None and len(zensys.face_recognition.face_analyzer.get(zensys._last_frame)) > 0:
-                face = zensys.face_recognition.face_analyzer.get(zensys._last_frame)[0]
+            last_frame = zensys.snapshot_last_frame()
+            faces = zensys.face_recognition.face_analyzer.get(last_frame) if last_frame is not None else []
+            if faces:
+                face = faces[0]
                 if face and face.embedding is not None:
                     face_vector = face.normed_embedding.tolist()
         except Exception as e:
@@ -268,10 +246,4 @@ class AttendanceLogger:
             ]
         
         # Añadir el registro en formato nuevo
-        logs.append(new_format_record)
-        
-        # Ghi lại vào file
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(logs, indent=2, ensure_ascii=False, fp=f)
-            
-        return log_file 
\ No newline at end of file
+        return get_journal(log_dir, "attendance").append(new_format_record) 
\ No newline at end of file
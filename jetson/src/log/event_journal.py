@@ -0,0 +1,370 @@
+import os
+import re
+import json
+import time
+import atexit
+import datetime
+import threading
+from pathlib import Path
+import sys
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.config_utils import config
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# <prefix>_<YYYY-MM-DD>[.<part>].jsonl
+_FILE_PATTERN = r"^{prefix}_(\d{{4}}-\d{{2}}-\d{{2}})(?:\.(\d+))?\.(jsonl|json)$"
+
+
+def _parse_timestamp(value):
+    """Convert a journal timestamp (string or epoch) to epoch seconds"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    for fmt in (TIMESTAMP_FORMAT, "%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return time.mktime(datetime.datetime.strptime(value, fmt).timetuple())
+        except ValueError:
+            continue
+    return None
+
+
+def _to_epoch(value):
+    """Accept datetime, date string or epoch for range queries"""
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return time.mktime(value.timetuple())
+    if isinstance(value, datetime.date):
+        return time.mktime(datetime.datetime.combine(value, datetime.time()).timetuple())
+    if isinstance(value, str) and len(value) == 10:
+        return _parse_timestamp(f"{value} 00:00:00")
+    return _parse_timestamp(value)
+
+
+class EventJournal:
+    """
+    Journal ghi nối tiếp (append-only) dạng JSON Lines.
+    Mỗi bản ghi là một dòng JSON, file được xoay vòng theo ngày và theo kích thước,
+    fsync được gom theo lô để tránh ghi đè toàn bộ file cho mỗi sự kiện.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, log_dir, prefix, max_bytes=10 * 1024 * 1024, fsync_every=20,
+                 fsync_interval=2.0, time_field="timestamp"):
+        """
+        Initialize the journal
+
+        Args:
+            log_dir: Thư mục chứa các file journal
+            prefix: Tiền tố tên file (vd: "rfid" -> rfid_YYYY-MM-DD.jsonl)
+            max_bytes: Kích thước tối đa của một file trước khi xoay vòng
+            fsync_every: Số bản ghi tối đa giữa hai lần fsync
+            fsync_interval: Thời gian tối đa (giây) giữa hai lần fsync
+            time_field: Tên trường timestamp trong bản ghi
+        """
+        self.log_dir = str(log_dir)
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.fsync_every = max(1, int(fsync_every))
+        self.fsync_interval = float(fsync_interval)
+        self.time_field = time_field
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_day = None
+        self._file_part = 0
+        self._unsynced = 0
+        self._last_fsync = time.monotonic()
+
+        Path(self.log_dir).mkdir(parents=True, exist_ok=True)
+        atexit.register(self.close)
+
+    @classmethod
+    def get(cls, log_dir, prefix, **kwargs):
+        """
+        Get the shared journal for (log_dir, prefix), creating it if needed.
+        Several loggers writing the same stream then share one file handle and lock.
+        """
+        key = (os.path.abspath(str(log_dir)), prefix)
+        with cls._instances_lock:
+            journal = cls._instances.get(key)
+            if journal is None:
+                journal = cls(log_dir, prefix, **kwargs)
+                cls._instances[key] = journal
+            return journal
+
+    def _path_for(self, day, part):
+        suffix = f".{part}" if part else ""
+        return os.path.join(self.log_dir, f"{self.prefix}_{day}{suffix}.jsonl")
+
+    def _open_for(self, day):
+        """Open the newest part for `day`, continuing an existing file after restarts"""
+        self._close_file()
+        part = 0
+        while os.path.exists(self._path_for(day, part + 1)):
+            part += 1
+        self._file_day = day
+        self._file_part = part
+        self._file = open(self._path_for(day, part), "a", encoding="utf-8")
+
+    def _rotate_if_needed(self, day, incoming_bytes):
+        if self._file is None or self._file_day != day:
+            self._open_for(day)
+        if self._file.tell() > 0 and self._file.tell() + incoming_bytes > self.max_bytes:
+            self._close_file()
+            self._file_part += 1
+            self._file = open(self._path_for(day, self._file_part), "a", encoding="utf-8")
+
+    def append(self, record):
+        """
+        Ghi một bản ghi vào cuối journal
+
+        Args:
+            record: dict cần ghi (timestamp được thêm nếu chưa có)
+
+        Returns:
+            str: Đường dẫn tới file journal đã ghi
+        """
+        if self.time_field not in record:
+            record = dict(record)
+            record[self.time_field] = datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        day = datetime.datetime.now().strftime("%Y-%m-%d")
+
+        with self._lock:
+            self._rotate_if_needed(day, len(line.encode("utf-8")))
+            self._file.write(line)
+            # Đẩy xuống OS ngay để tiến trình khác đọc được; fsync theo lô
+            self._file.flush()
+            self._unsynced += 1
+            if (self._unsynced >= self.fsync_every or
+                    time.monotonic() - self._last_fsync >= self.fsync_interval):
+                self._fsync()
+            return self._file.name
+
+    def _fsync(self):
+        if self._file is None or self._unsynced == 0:
+            return
+        try:
+            os.fsync(self._file.fileno())
+        except OSError:
+            pass
+        self._unsynced = 0
+        self._last_fsync = time.monotonic()
+
+    def flush(self):
+        """Force pending records to disk"""
+        with self._lock:
+            self._fsync()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.flush()
+            self._fsync()
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """Fsync and close the current file"""
+        with self._lock:
+            self._close_file()
+
+
+def get_journal(log_dir, prefix):
+    """
+    Lấy journal dùng chung cho (log_dir, prefix) với thông số từ config.logging
+
+    Args:
+        log_dir: Thư mục chứa các file journal
+        prefix: Tiền tố tên file journal
+
+    Returns:
+        EventJournal: Journal dùng chung
+    """
+    return EventJournal.get(
+        log_dir, prefix,
+        max_bytes=int(float(config.logging.journal_max_mb) * 1024 * 1024),
+        fsync_every=config.logging.journal_fsync_every,
+        fsync_interval=config.logging.journal_fsync_interval
+    )
+
+
+class JournalReader:
+    """
+    Đọc journal theo luồng (streaming) trong một khoảng thời gian.
+    Các file ngoài khoảng ngày bị bỏ qua theo tên file; trong mỗi file, chỉ mục
+    thưa (offset theo thời gian) cho phép seek tới bản ghi đầu tiên cần đọc.
+    """
+
+    def __init__(self, log_dir, prefix, time_field="timestamp", index_stride=256):
+        """
+        Initialize the reader
+
+        Args:
+            log_dir: Thư mục chứa các file journal
+            prefix: Tiền tố tên file journal
+            time_field: Tên trường timestamp trong bản ghi
+            index_stride: Số bản ghi giữa hai điểm chỉ mục
+        """
+        self.log_dir = str(log_dir)
+        self.prefix = prefix
+        self.time_field = time_field
+        self.index_stride = max(1, int(index_stride))
+        self._pattern = re.compile(_FILE_PATTERN.format(prefix=re.escape(prefix)))
+        self._indexes = {}
+
+    def list_files(self, start=None, end=None):
+        """
+        Liệt kê các file journal có thể chứa bản ghi trong khoảng [start, end]
+
+        Returns:
+            list: Đường dẫn file, sắp xếp theo ngày và thứ tự xoay vòng
+        """
+        start_day = self._day_of(start)
+        end_day = self._day_of(end)
+
+        files = []
+        if not os.path.isdir(self.log_dir):
+            return files
+        for name in os.listdir(self.log_dir):
+            match = self._pattern.match(name)
+            if not match:
+                continue
+            day, part, ext = match.group(1), int(match.group(2) or 0), match.group(3)
+            if start_day and day < start_day:
+                continue
+            if end_day and day > end_day:
+                continue
+            # File .json cũ (mảng JSON) được đọc trước các file .jsonl cùng ngày
+            files.append((day, 0 if ext == "json" else 1, part, os.path.join(self.log_dir, name)))
+        return [entry[3] for entry in sorted(files)]
+
+    def _day_of(self, value):
+        epoch = _to_epoch(value)
+        if epoch is None:
+            return None
+        return datetime.datetime.fromtimestamp(epoch).strftime("%Y-%m-%d")
+
+    def iter_records(self, start=None, end=None, event_type=None):
+        """
+        Duyệt các bản ghi trong khoảng thời gian mà không tải toàn bộ file
+
+        Args:
+            start: Thời điểm bắt đầu (datetime, "YYYY-MM-DD[ HH:MM:SS]" hoặc epoch)
+            end: Thời điểm kết thúc (bao gồm)
+            event_type: Chỉ trả về bản ghi có event_type tương ứng
+
+        Yields:
+            dict: Bản ghi journal
+
+        Raises:
+            ValueError: start/end không đọc được thành thời điểm
+        """
+        start_ts = _to_epoch(start)
+        end_ts = _to_epoch(end)
+        for value, ts in ((start, start_ts), (end, end_ts)):
+            if value is not None and ts is None:
+                raise ValueError(f"Unparseable date: {value!r}")
+        if isinstance(end, str) and len(end) == 10:
+            end_ts += 24 * 3600 - 1
+
+        for path in self.list_files(start, end):
+            if path.endswith(".json"):
+                records = self._iter_legacy(path)
+            else:
+                records = self._iter_jsonl(path, start_ts)
+
+            for record in records:
+                ts = _parse_timestamp(record.get(self.time_field))
+                if ts is not None:
+                    if start_ts is not None and ts < start_ts:
+                        continue
+                    if end_ts is not None and ts > end_ts:
+                        # Bản ghi được ghi theo thứ tự thời gian
+                        break
+                if event_type and record.get("event_type") != event_type:
+                    continue
+                yield record
+
+    def count(self, start=None, end=None, event_type=None):
+        """Count records in range without materializing them"""
+        return sum(1 for _ in self.iter_records(start, end, event_type))
+
+    def _iter_legacy(self, path):
+        """Read a pre-journal JSON array file"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for record in data if isinstance(data, list) else []:
+            yield record
+
+    def _iter_jsonl(self, path, start_ts=None):
+        offset = self._seek_offset(path, start_ts) if start_ts is not None else 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # Dòng cuối đang được ghi dở
+                    break
+                try:
+                    yield json.loads(raw)
+                except ValueError:
+                    continue
+
+    def _seek_offset(self, path, start_ts):
+        """Find the last indexed offset whose timestamp is before start_ts"""
+        entries = self.build_index(path)
+        offset = 0
+        for ts, entry_offset in entries:
+            if ts >= start_ts:
+                break
+            offset = entry_offset
+        return offset
+
+    def build_index(self, path):
+        """
+        Build (or extend) the sparse time index of a journal file
+
+        Returns:
+            list: [(timestamp, byte_offset), ...] mỗi index_stride bản ghi
+        """
+        size = os.path.getsize(path)
+        cached = self._indexes.get(path)
+        if cached and cached["size"] == size:
+            return cached["entries"]
+
+        entries = cached["entries"] if cached else []
+        position = cached["size"] if cached else 0
+        line_no = cached["lines"] if cached else 0
+
+        with open(path, "rb") as f:
+            f.seek(position)
+            while True:
+                offset = f.tell()
+                raw = f.readline()
+                if not raw or not raw.endswith(b"\n"):
+                    break
+                if line_no % self.index_stride == 0:
+                    try:
+                        ts = _parse_timestamp(json.loads(raw).get(self.time_field))
+                    except ValueError:
+                        ts = None
+                    if ts is not None:
+                        entries.append((ts, offset))
+                line_no += 1
+                position = f.tell()
+
+        self._indexes[path] = {"size": position, "lines": line_no, "entries": entries}
+        return entries
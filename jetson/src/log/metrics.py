@@ -0,0 +1,282 @@
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from utils.config_utils import config
+
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_PREFIX = "zensys"
+
+# Dùng chung khi metrics tắt: stage() không cấp phát gì
+_NULL_STAGE = nullcontext()
+
+def _key(name, labels):
+    """Khóa nội bộ (tên, nhãn đã sắp xếp)"""
+    return (name, tuple(sorted(labels.items()))) if labels else (name, ())
+
+def _label_text(pairs):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+def _display(key):
+    """Tên hiển thị: "frame" hoặc 'frame{stream="door1"}'"""
+    return key[0] + _label_text(key[1])
+
+class RollingHistogram:
+    """
+    Phân vị trên `window` mẫu gần nhất, cùng tổng/đếm tích lũy từ lúc khởi động
+    """
+
+    def __init__(self, window=1024):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        with self._lock:
+            self._samples.append(value)
+            self.count += 1
+            self.total += value
+
+    def snapshot(self):
+        """dict {count, sum, quantiles: {0.5: ..., 0.95: ..., 0.99: ...}} (quantiles rỗng nếu chưa có mẫu)"""
+        with self._lock:
+            samples = list(self._samples)
+            count, total = self.count, self.total
+        quantiles = {}
+        if samples:
+            values = np.percentile(np.asarray(samples, dtype=np.float64), [q * 100 for q in QUANTILES])
+            quantiles = dict(zip(QUANTILES, (float(v) for v in values)))
+        return {"count": count, "sum": total, "quantiles": quantiles}
+
+class _Stage:
+    __slots__ = ("metrics", "name", "labels", "t0")
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, (time.perf_counter() - self.t0) * 1000, self.labels)
+        return False
+
+class MetricsRegistry:
+    """
+    Đo thời gian từng bước (histogram cuộn), counter và độ sâu queue cho thiết bị.
+    Xuất qua HTTP (định dạng text Prometheus) và một dòng tóm tắt định kỳ trong system log.
+    Khi tắt, stage()/inc() trả về ngay, không khóa và không cấp phát.
+    """
+
+    def __init__(self, enable=True, window=1024):
+        self.enabled = bool(enable)
+        self.window = int(window)
+        self._histograms = {}
+        self._counters = {}
+        self._queues = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self.http_port = None
+        self._summary_thread = None
+        self._stop = threading.Event()
+        self.logger = logging.getLogger("zensys.metrics")
+
+    def stage(self, name, labels=None):
+        """
+        Context manager đo thời gian một bước: `with metrics.stage("detection"): ...`
+
+        Args:
+            name: Tên bước
+            labels: dict nhãn tùy chọn, vd {"stream": "door1"}
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, labels)
+
+    def observe(self, name, ms, labels=None):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, RollingHistogram(self.window))
+        histogram.observe(ms)
+
+    def inc(self, name, value=1, labels=None):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_queue(self, name, depth_fn):
+        """Đăng ký hàm trả về độ sâu hiện tại của một queue (đọc khi xuất metrics)"""
+        with self._lock:
+            self._queues[name] = depth_fn
+
+    def register_gauge(self, name, value_fn, labels=None):
+        """Đăng ký hàm trả về giá trị hiện tại của một gauge, vd FPS của từng camera"""
+        with self._lock:
+            self._gauges[_key(name, labels)] = value_fn
+
+    @staticmethod
+    def _read(fn, cast):
+        try:
+            return cast(fn())
+        except Exception:
+            return -1
+
+    def _collect(self):
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            queues = sorted(self._queues.items())
+            gauges = sorted(self._gauges.items())
+        return (
+            [(key, h.snapshot()) for key, h in histograms],
+            counters,
+            [(name, self._read(fn, int)) for name, fn in queues],
+            [(key, self._read(fn, float)) for key, fn in gauges]
+        )
+
+    def snapshot(self):
+        """dict {stages, counters, queues, gauges} tại thời điểm gọi, theo tên hiển thị"""
+        stages, counters, queues, gauges = self._collect()
+        return {
+            "stages": {_display(key): stats for key, stats in stages},
+            "counters": {_display(key): value for key, value in counters},
+            "queues": dict(queues),
+            "gauges": {_display(key): value for key, value in gauges}
+        }
+
+    def render_prometheus(self):
+        """Metrics theo định dạng text exposition của Prometheus (latency tính bằng giây)"""
+        stages, counters, queues, gauges = self._collect()
+        lines = []
+        if stages:
+            name = f"{METRIC_PREFIX}_stage_duration_seconds"
+            lines.append(f"# HELP {name} Pipeline stage latency over the last {self.window} samples")
+            lines.append(f"# TYPE {name} summary")
+            for (stage, labels), stats in stages:
+                pairs = (("stage", stage),) + labels
+                for q, value in stats["quantiles"].items():
+                    lines.append(f'{name}{_label_text(pairs + (("quantile", q),))} {value / 1000:.6f}')
+                lines.append(f'{name}_sum{_label_text(pairs)} {stats["sum"] / 1000:.6f}')
+                lines.append(f'{name}_count{_label_text(pairs)} {stats["count"]}')
+        declared = set()
+        for (counter, labels), value in counters:
+            name = f"{METRIC_PREFIX}_{counter}_total"
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_label_text(labels)} {value}")
+        if queues:
+            name = f"{METRIC_PREFIX}_queue_depth"
+            lines.append(f"# TYPE {name} gauge")
+            for queue_name, depth in queues:
+                lines.append(f'{name}{{queue="{queue_name}"}} {depth}')
+        for (gauge, labels), value in gauges:
+            name = f"{METRIC_PREFIX}_{gauge}"
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{_label_text(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def summary_line(self):
+        """Một dòng tóm tắt cho system log"""
+        snap = self.snapshot()
+        parts = [" ".join(f"{k}={v}" for k, v in snap["counters"].items()) or "no counters"]
+        for stage, stats in snap["stages"].items():
+            q = stats["quantiles"]
+            if q:
+                parts.append(f"{stage} p50={q[0.5]:.1f} p95={q[0.95]:.1f} p99={q[0.99]:.1f}ms")
+        if snap["gauges"]:
+            parts.append(" ".join(f"{k}={v:.1f}" for k, v in snap["gauges"].items()))
+        if snap["queues"]:
+            parts.append("queues " + " ".join(f"{k}={v}" for k, v in snap["queues"].items()))
+        return " | ".join(parts)
+
+    def start_http_server(self, host="127.0.0.1", port=9108):
+        """Phục vụ GET /metrics trong luồng nền. Trả về False nếu không mở được cổng."""
+        if self._server is not None:
+            return True
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Không ghi mỗi lần scrape vào console
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            self.logger.warning("Metrics endpoint disabled, cannot bind %s:%s: %s", host, port, e)
+            return False
+        self._server.daemon_threads = True
+        self.http_port = self._server.server_port
+        threading.Thread(target=self._server.serve_forever, name="MetricsHTTP", daemon=True).start()
+        self.logger.info("Metrics endpoint on http://%s:%s/metrics", host, self._server.server_port)
+        return True
+
+    def start_periodic_summary(self, interval):
+        """Ghi summary_line() vào system log mỗi `interval` giây"""
+        if self._summary_thread is not None or interval <= 0:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                self.logger.info("Metrics: %s", self.summary_line())
+
+        self._summary_thread = threading.Thread(target=run, name="MetricsSummary", daemon=True)
+        self._summary_thread.start()
+
+    def start(self):
+        """Bật endpoint và log định kỳ theo config (gọi nhiều lần không sao)"""
+        settings = config.metrics
+        if not self.enabled:
+            return
+        if settings.http_enable:
+            self.start_http_server(settings.host, settings.port)
+        self.start_periodic_summary(settings.log_interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """MetricsRegistry dùng chung cho cả tiến trình (tạo theo config.metrics)"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                settings = config.metrics
+                _metrics = MetricsRegistry(enable=settings.enable, window=settings.window)
+    return _metrics
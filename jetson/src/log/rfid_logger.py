@@ -1,5 +1,4 @@
 import os
-import json
 import datetime
 from pathlib import Path
 import sys
@@ -10,6 +9,7 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from utils.config_utils import config
+from src.log.event_journal import get_journal, JournalReader
 
 class RFIDLogger:
     """
@@ -32,6 +32,7 @@ class RFIDLogger:
             
         self.device_id = config.logging.device_id if hasattr(config, 'logging') else 1
         self._ensure_directories()
+        self.journal = get_journal(self.log_dir, "rfid")
         
     def _ensure_directories(self):
         """Ensure necessary directories exist"""
@@ -97,7 +98,7 @@ class RFIDLogger:
     
     def _save_to_file(self, log_data):
         """
-        Lưu log vào file JSON
+        Ghi log vào journal (JSON Lines, append-only)
         
         Args:
             log_data: Dữ liệu log cần lưu
@@ -105,24 +106,18 @@ class RFIDLogger:
         Returns:
             str: Đường dẫn tới file log
         """
-        # Tạo tên file theo ngày
-        today = datetime.datetime.now().strftime("%Y-%m-%d")
-        log_file = os.path.join(self.log_dir, f"rfid_{today}.json")
-        
-        # Đọc log hiện tại nếu đã tồn tại
-        logs = []
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-            except:
-                logs = []
-        
-        # Thêm log mới
-        logs.append(log_data)
+        return self.journal.append(log_data)
+    
+    def query(self, start=None, end=None, event_type=None):
+        """
+        Truy vấn log RFID trong khoảng thời gian (đọc dạng stream)
         
-        # Ghi lại vào file
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(logs, indent=2, ensure_ascii=False, fp=f)
+        Args:
+            start: Thời điểm bắt đầu (datetime hoặc "YYYY-MM-DD[ HH:MM:SS]")
+            end: Thời điểm kết thúc
+            event_type: Lọc theo loại sự kiện (RFID_SCAN, VERIFICATION)
             
-        return log_file 
\ No newline at end of file
+        Returns:
+            generator: Các bản ghi log
+        """
+        return JournalReader(self.log_dir, "rfid").iter_records(start, end, event_type)
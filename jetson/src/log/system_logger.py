@@ -1,5 +1,4 @@
 import os
-import json
 import datetime
 import logging
 from pathlib import Path
@@ -11,10 +10,14 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from utils.config_utils import config
+from src.log.async_logging import StructuredFormatter, start_queue_logging
+from src.log.metrics import get_metrics
 
 class SystemLogger:
     """
     Logger cho hệ thống, ghi lại các thông báo hệ thống và lỗi.
+    Việc ghi file/console chạy trong QueueListener nền; luồng gọi chỉ đẩy record
+    vào queue, message được format (lazy) và payload lớn được tóm tắt ở listener.
     """
     
     # Class variable to track if logger has been initialized
@@ -59,13 +62,13 @@ class SystemLogger:
             console_handler.setLevel(log_level)
             
             # Định dạng log
-            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            formatter = StructuredFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
             file_handler.setFormatter(formatter)
             console_handler.setFormatter(formatter)
             
-            # Thêm handlers
-            self.logger.addHandler(file_handler)
-            self.logger.addHandler(console_handler)
+            # Handlers chạy trong QueueListener, logger chỉ giữ QueueHandler
+            listener = start_queue_logging(self.logger, [file_handler, console_handler])
+            get_metrics().register_queue("system_log", listener.queue.qsize)
             
             # Mark the logger as initialized
             SystemLogger._logger_initialized = True
@@ -74,21 +77,21 @@ class SystemLogger:
         """Ensure necessary directories exist"""
         Path(self.log_dir).mkdir(parents=True, exist_ok=True)
         
-    def info(self, message):
-        """Log thông tin"""
-        self.logger.info(message)
+    def info(self, message, *args, **kwargs):
+        """Log thông tin (args được format lazy, vd: info("User %s", user_id))"""
+        self.logger.info(message, *args, **kwargs)
         
-    def warning(self, message):
-        """Log cảnh báo"""
-        self.logger.warning(message)
+    def warning(self, message, *args, **kwargs):
+        """Log cảnh báo (args được format lazy, vd: warning("User %s", user_id))"""
+        self.logger.warning(message, *args, **kwargs)
         
-    def error(self, message):
-        """Log lỗi"""
-        self.logger.error(message)
+    def error(self, message, *args, **kwargs):
+        """Log lỗi (args được format lazy, vd: error("User %s", user_id))"""
+        self.logger.error(message, *args, **kwargs)
         
-    def debug(self, message):
-        """Log debug"""
-        self.logger.debug(message)
+    def debug(self, message, *args, **kwargs):
+        """Log debug (args được format lazy, vd: debug("User %s", user_id))"""
+        self.logger.debug(message, *args, **kwargs)
         
     def log_system_event(self, event_type, details=None):
         """
@@ -110,6 +113,6 @@ class SystemLogger:
         }
         
         # Log thông tin
-        self.info(f"System event: {event_type} - {json.dumps(details or {})}")
+        self.info("System event: %s - %s", event_type, details or {})
         
         return event_info 
\ No newline at end of file
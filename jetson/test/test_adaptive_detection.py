@@ -0,0 +1,105 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.zen_face.adaptive_detection import AdaptiveDetSize
+
+SIZES = [(320, 320), (480, 480), (640, 640)]
+
+class FakeDetector:
+    """
+    Trả về một khuôn mặt cố định (tọa độ frame) nếu nó đủ lớn ở kích thước đầu vào,
+    mô phỏng việc mặt nhỏ bị bỏ sót ở độ phân giải thấp
+    """
+
+    def __init__(self, box=None, min_px=20):
+        self.box = box
+        self.min_px = min_px
+        self.calls = []
+
+    def detect(self, img, input_size=None, max_num=0, metric='default'):
+        self.calls.append((input_size, img.shape[:2]))
+        scale = min(input_size[0] / img.shape[1], input_size[1] / img.shape[0])
+        if self.box is None:
+            return np.zeros((0, 5), dtype=np.float32), None
+        x1, y1, x2, y2 = self.box
+        if (y2 - y1) * scale < self.min_px:
+            return np.zeros((0, 5), dtype=np.float32), None
+        bboxes = np.array([[x1, y1, x2, y2, 0.9]], dtype=np.float32)
+        kpss = np.tile(np.array([[x1, y1]], dtype=np.float32), (1, 5, 1))
+        return bboxes, kpss
+
+class RoiOnlyDetector(FakeDetector):
+    """Chỉ thấy mặt trong ảnh ROI (vd: mặt bị mờ ở frame đầy đủ), trả về tọa độ theo ROI"""
+
+    def detect(self, img, input_size=None, max_num=0, metric='default'):
+        self.calls.append((input_size, img.shape[:2]))
+        if img.shape[:2] == (480, 640):
+            return np.zeros((0, 5), dtype=np.float32), None
+        bboxes = np.array([[10, 10, 60, 60, 0.9]], dtype=np.float32)
+        kpss = np.tile(np.array([[20, 20]], dtype=np.float32), (1, 5, 1))
+        return bboxes, kpss
+
+FRAME = np.zeros((480, 640, 3), dtype=np.uint8)
+
+def test_large_faces_step_down_to_smallest_size():
+    """A face filling a third of the frame ends up detected at 320"""
+    detector = FakeDetector(box=(200, 100, 360, 260))
+    controller = AdaptiveDetSize(SIZES, min_face_px=40, downscale_after=2)
+    for _ in range(10):
+        bboxes, _ = controller.detect(detector, FRAME)
+        assert bboxes.shape[0] == 1
+    assert controller.current_size == (320, 320)
+    assert detector.calls[-1][0] == (320, 320)
+
+def test_small_face_escalates_immediately():
+    """A face too small for the current size raises the size on the next frame"""
+    controller = AdaptiveDetSize(SIZES, min_face_px=40, downscale_after=1)
+    controller.detect(FakeDetector(box=(200, 100, 360, 260)), FRAME)
+    controller.detect(FakeDetector(box=(200, 100, 360, 260)), FRAME)
+    assert controller.current_size == (320, 320)
+
+    # 45 px mặt trong frame 640: ở 320 chỉ còn 22 px -> cần 640
+    small = FakeDetector(box=(300, 200, 345, 245))
+    controller.detect(small, FRAME)
+    assert controller.current_size == (640, 640)
+
+def test_miss_at_small_size_probes_full_size():
+    """A face missed at the small size is still found in the same frame by the probe"""
+    controller = AdaptiveDetSize(SIZES, min_face_px=40, downscale_after=1, probe_interval=5)
+    controller.level = 0
+    far = FakeDetector(box=(300, 200, 330, 230), min_px=20)  # 30 px: chỉ thấy ở 640
+    bboxes, _ = controller.detect(far, FRAME)
+    assert bboxes.shape[0] == 1
+    assert controller.stats["probes"] == 1
+    assert far.calls[-1][0] == (640, 640)
+
+def test_empty_scene_probes_periodically():
+    """With nobody in view the full-size pass only runs every probe_interval frames"""
+    controller = AdaptiveDetSize(SIZES, downscale_after=2, probe_interval=5)
+    empty = FakeDetector()
+    for _ in range(20):
+        controller.detect(empty, FRAME)
+    assert controller.current_size == (320, 320)
+    assert controller.stats["probes"] <= 20 // 5 + 2
+    assert controller.stats["by_size"]["320x320"] >= 15
+
+def test_roi_pass_maps_back_to_frame_coordinates():
+    """A miss near the last face is retried on a crop and mapped back to the frame"""
+    controller = AdaptiveDetSize(SIZES, min_face_px=40, roi_margin=1.0)
+    controller.detect(FakeDetector(box=(300, 200, 400, 300)), FRAME)
+    controller.level = 0
+
+    detector = RoiOnlyDetector()
+    bboxes, kpss = controller.detect(detector, FRAME)
+    assert controller.stats["roi_hits"] == 1
+    # ROI bắt đầu tại (200, 100): mặt trong ROI (10, 10) -> (210, 110) trong frame
+    assert list(bboxes[0, :4]) == [210, 110, 260, 160]
+    assert list(kpss[0, 0]) == [220, 120]
+    assert detector.calls[1][1] == (300, 300)
@@ -0,0 +1,102 @@
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from model.FaceAnti.face_anti import FaceAntiSpoofing
+from src.core.zen_face.face_operator import Face
+from src.core.zensys.anti_spoofing_manager import AntiSpoofingManager
+from src.core.zensys.liveness import LivenessAccumulator
+
+def make_anti(enable=True):
+    return FaceAntiSpoofing(var_thresh=100.0, grad_thresh=0.7, normalize_method="min_max",
+                            depth_range_thresh=30.0, min_depth_thresh=0.0, max_depth_thresh=255.0,
+                            enable=enable)
+
+def face_depth(size=96, flat=False):
+    """Depth map giả: mặt cong (mũi gần camera) hoặc mặt phẳng như ảnh in"""
+    ys, xs = np.mgrid[0:size, 0:size].astype(np.float32)
+    r2 = ((xs - size / 2) ** 2 + (ys - size / 2) ** 2) / (size / 2) ** 2
+    depth = 120 + (0 if flat else 100) * np.clip(1 - r2, 0, 1) + 10 * xs / size
+    return depth.astype(np.uint8)
+
+def reference_stats(depth_gray):
+    """Cách tính cũ: chuẩn hóa uint8, blur, variance, Sobel float64"""
+    norm = (depth_gray.astype(np.float32) - depth_gray.min()) / (depth_gray.max() - depth_gray.min())
+    smooth = cv2.GaussianBlur((norm * 255).astype(np.uint8), (5, 5), 0)
+    grad_x = cv2.Sobel(smooth, cv2.CV_64F, 1, 0, ksize=3)
+    grad_y = cv2.Sobel(smooth, cv2.CV_64F, 0, 1, ksize=3)
+    return float(np.var(smooth)), float(np.mean(np.sqrt(grad_x ** 2 + grad_y ** 2)))
+
+def test_fused_stats_match_reference():
+    anti = make_anti()
+    depth = face_depth()
+    stats, smooth = anti.compute_depth_stats(depth)
+    variance, mean_grad = reference_stats(depth)
+
+    # Cùng miền giá trị uint8 với cách tính cũ: ngưỡng đã hiệu chỉnh không đổi
+    assert stats["depth_variance"] == pytest.approx(variance, rel=1e-9)
+    assert stats["mean_gradient"] == pytest.approx(mean_grad, rel=1e-6)
+    assert (stats["min_depth"], stats["max_depth"]) == (float(depth.min()), float(depth.max()))
+    assert smooth.dtype == np.uint8
+
+    # Cùng kích thước crop: dùng lại buffer
+    _, again = anti.compute_depth_stats(face_depth())
+    assert again is smooth
+
+def test_process_depth_map_flags_flat_face():
+    anti = make_anti()
+    depth_map = np.zeros((200, 200), dtype=np.uint8)
+    depth_map[50:146, 50:146] = face_depth(flat=True)
+    flat = anti.process_depth_map(depth_map, [60, 60, 136, 136])
+    depth_map[50:146, 50:146] = face_depth()
+    live = anti.process_depth_map(depth_map, [60, 60, 136, 136])
+
+    assert live["detection_result"] == "live" and live["depth_visualization"].shape[2] == 3
+    assert flat["detection_result"] == "spoof"
+    assert make_anti(enable=False).detect_spoofing(face_depth(flat=True))[0] == "live"
+
+def test_accumulator_uses_median_and_resets_on_new_track():
+    anti = make_anti()
+    live, _ = anti.compute_depth_stats(face_depth())
+    flat, _ = anti.compute_depth_stats(face_depth(flat=True))
+    accumulator = LivenessAccumulator(window=5, min_frames=3)
+    bbox = [10, 10, 100, 100]
+
+    accumulator.add(bbox, live)
+    accumulator.add([12, 11, 102, 101], flat)  # Một frame nhiễu
+    assert not accumulator.ready
+    accumulator.add(bbox, live)
+    assert accumulator.ready
+    result, stats = accumulator.decide(anti)
+    assert result == "live" and stats["liveness_frames"] == 3
+
+    # Bbox ở chỗ khác: người khác, bắt đầu lại
+    accumulator.add([300, 300, 390, 390], flat)
+    assert len(accumulator) == 1 and accumulator.decide(anti)[0] == "spoof"
+
+def test_manager_waits_for_enough_frames():
+    manager = AntiSpoofingManager()
+    manager.face_anti = make_anti()
+    manager.liveness = LivenessAccumulator(window=4, min_frames=2)
+    depth_map = np.zeros((200, 200), dtype=np.uint8)
+    depth_map[50:146, 50:146] = face_depth()
+    face = Face(bbox=np.array([60, 60, 136, 136], dtype=np.float32))
+
+    manager.process_depth_anti_spoofing(depth_map, face)
+    assert not manager.ready()
+    result = manager.process_depth_anti_spoofing(depth_map, face)
+    assert manager.ready() and manager.is_live_face()
+    assert result["liveness_frames"] == 2 and result["frame_result"] == "live"
+
+    manager.reset()
+    assert not manager.ready() and not manager.is_live_face()
+    manager.face_anti.enable = False
+    assert manager.ready() and manager.is_live_face()
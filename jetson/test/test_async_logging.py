@@ -0,0 +1,79 @@
+import sys
+import time
+import logging
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.log.async_logging import (
+    summarize_payload, StructuredFormatter, start_queue_logging, stop_queue_logging
+)
+
+class ListHandler(logging.Handler):
+    """Collect formatted messages"""
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+    
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+def test_summarize_payload_redacts_large_fields():
+    """Images and vectors are summarized instead of serialized"""
+    record = {
+        "userId": "user1",
+        "checkInFace": "data:image/jpeg;base64," + "A" * 50000,
+        "faceVectorList": [{"vectorType": "front", "vector": [0.1] * 512, "score": 0.9}]
+    }
+    summary = summarize_payload(record)
+    assert summary["userId"] == "user1"
+    assert summary["checkInFace"].startswith("<image/jpeg;base64")
+    assert summary["faceVectorList"][0]["vector"] == "<vector len=512>"
+    assert summary["faceVectorList"][0]["score"] == 0.9
+
+def test_queue_logging_formats_in_listener():
+    """Records are formatted by the listener with payloads summarized"""
+    logger = logging.getLogger("test_async_logging")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = ListHandler()
+    handler.setFormatter(StructuredFormatter("%(message)s"))
+    start_queue_logging(logger, [handler])
+    
+    data = {"userId": "user1", "vector": [0.5] * 512}
+    logger.info("ATTENDANCE DATA: %s", data)
+    # Thay đổi sau khi log không ảnh hưởng tới bản ghi đã đưa vào queue
+    data["userId"] = "changed"
+    logger.info("event", extra={"payload": {"image": b"\xff" * 1000}})
+    
+    deadline = time.time() + 2.0
+    while len(handler.messages) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    stop_queue_logging()
+    
+    assert handler.messages[0] == 'ATTENDANCE DATA: {"userId": "user1", "vector": "<vector len=512>"}'
+    assert handler.messages[1] == 'event | payload={"image": "<bytes 1000>"}'
+
+def test_queue_logging_does_not_propagate_to_root():
+    """A root handler (basicConfig) never sees records of a queue-logged logger or its children"""
+    root_handler = ListHandler()
+    logging.getLogger().addHandler(root_handler)
+    try:
+        logger = logging.getLogger("test_async_logging_root")
+        logger.setLevel(logging.INFO)
+        handler = ListHandler()
+        start_queue_logging(logger, [handler])
+        logger.getChild("messaging").info("ATTENDANCE DATA: %s", {"vector": [0.5] * 512})
+
+        deadline = time.time() + 2.0
+        while not handler.messages and time.time() < deadline:
+            time.sleep(0.01)
+        stop_queue_logging()
+    finally:
+        logging.getLogger().removeHandler(root_handler)
+
+    assert len(handler.messages) == 1
+    assert root_handler.messages == []
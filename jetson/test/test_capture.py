@@ -0,0 +1,230 @@
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.capture import (
+    FrameSource, OpenCVSource, ImageFolderSource, LatestFrameGrabber, PreviewRenderer,
+    FramePool, create_frame_source, detect_source_type, render_preview
+)
+from src.log.metrics import MetricsRegistry
+
+class CountingSource(FrameSource):
+    """Nguồn live giả lập: mỗi frame chứa số thứ tự của nó ở pixel [0, 0]"""
+
+    def __init__(self, interval=0.002, fail_after=None):
+        self.interval = interval
+        self.fail_after = fail_after
+        self.count = 0
+        self.opens = 0
+
+    def open(self):
+        self.opens += 1
+        return True
+
+    def read(self):
+        time.sleep(self.interval)
+        self.count += 1
+        if self.fail_after is not None and self.count == self.fail_after:
+            return False, None
+        frame = np.zeros((4, 4), dtype=np.uint16)
+        frame[0, 0] = self.count
+        return True, frame
+
+    def is_opened(self):
+        return True
+
+class InPlaceSource(CountingSource):
+    """Như CountingSource nhưng ghi vào buffer có sẵn như VideoCapture.read(out)"""
+
+    def read_into(self, out=None):
+        ok, frame = self.read()
+        if not ok or out is None:
+            return ok, frame
+        out[...] = frame
+        return True, out
+
+def settings(**kwargs):
+    values = dict(source=0, type="auto", width=640, height=480, fps=30, fourcc="MJPG",
+                  buffer_size=1, loop=False, reconnect_delay=0.01)
+    values.update(kwargs)
+    return SimpleNamespace(**values)
+
+def test_detect_source_type(tmp_path):
+    assert detect_source_type(0) == "device"
+    assert detect_source_type("1") == "device"
+    assert detect_source_type("/dev/video2") == "device"
+    assert detect_source_type("rtsp://10.0.0.5/stream") == "rtsp"
+    assert detect_source_type(str(tmp_path)) == "folder"
+    assert detect_source_type("clip.mp4") == "file"
+    assert isinstance(create_frame_source(settings(source=str(tmp_path))), ImageFolderSource)
+    with pytest.raises(ValueError):
+        create_frame_source(settings(type="usb"))
+
+def test_grabber_keeps_only_newest_frame():
+    """A slow consumer always gets the newest frame and older frames are dropped"""
+    grabber = LatestFrameGrabber(CountingSource(), metrics=MetricsRegistry())
+    assert grabber.start()
+    try:
+        ok, first = grabber.read(timeout=1.0)
+        assert ok
+        time.sleep(0.05)  # Xử lý chậm: nguồn đã đọc thêm nhiều frame
+        ok, frame = grabber.read(timeout=1.0)
+        assert ok
+        assert grabber.latest()[0] >= 2
+        assert int(frame[0, 0]) >= int(first[0, 0]) + 5
+        assert grabber.frames_dropped > 0
+        assert grabber.metrics.snapshot()["counters"]["capture_frames_dropped"] == grabber.frames_dropped
+    finally:
+        grabber.stop()
+
+def test_live_source_reconnects_after_failure():
+    source = CountingSource(fail_after=3)
+    grabber = LatestFrameGrabber(source, reconnect_delay=0.01, metrics=MetricsRegistry())
+    grabber.start()
+    try:
+        deadline = time.time() + 2.0
+        while grabber.frames_grabbed < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        assert source.opens == 2
+        assert grabber.is_running()
+    finally:
+        grabber.stop()
+
+def test_frame_pool_recycles_released_buffers():
+    pool = FramePool("test", capacity=2, metrics=MetricsRegistry())
+    frame = pool.acquire((4, 4))
+    held = frame.retain()
+    frame.release()
+    assert pool.stats()["free"] == 0  # Vẫn còn người giữ
+    held.release()
+    assert pool.stats()["free"] == 1
+    assert pool.acquire((4, 4)) is frame and frame.refs == 1
+    frame.release()
+    with pytest.raises(RuntimeError):
+        frame.release()
+    # Đổi kích thước: buffer cũ bị bỏ, không trả về nhầm shape
+    assert pool.acquire((8, 8)).array.shape == (8, 8)
+    assert pool.stats()["allocations"] == 2
+
+def test_last_frame_does_not_outlive_its_buffer():
+    import threading
+    from src.core.zensys.zensys import ZenSys
+    zensys = ZenSys.__new__(ZenSys)
+    zensys._last_frame, zensys._last_pooled, zensys._last_frame_lock = None, None, threading.Lock()
+    pool = FramePool("test", capacity=2, metrics=MetricsRegistry())
+
+    frame = pool.acquire((4, 4))
+    zensys._set_last_frame(frame)
+    zensys._set_last_frame(frame.array)  # process_frame với đúng buffer đang giữ
+    assert zensys._last_pooled is frame and frame.refs == 1
+    zensys._set_last_frame(None)
+    assert zensys._last_frame is None and zensys.snapshot_last_frame() is None
+    assert pool.stats()["free"] == 1
+
+    # Frame không lấy từ pool thay chỗ buffer và trả buffer về pool
+    frame = pool.acquire((4, 4))
+    zensys._set_last_frame(frame)
+    plain = np.zeros((4, 4), dtype=np.uint8)
+    zensys._set_last_frame(plain)
+    assert zensys._last_frame is plain and zensys._last_pooled is None and frame.refs == 0
+
+def test_grabber_reuses_pooled_buffers():
+    """Steady state: the grabber writes into recycled buffers instead of allocating per frame"""
+    metrics = MetricsRegistry()
+    grabber = LatestFrameGrabber(InPlaceSource(interval=0.001), metrics=metrics,
+                                 pool=FramePool("test", metrics=metrics))
+    assert grabber.start()
+    try:
+        for _ in range(20):
+            ok, frame = grabber.read_frame(timeout=1.0)
+            assert ok
+            value = int(frame.array[0, 0])
+            time.sleep(0.005)
+            # Frame đang giữ không bị luồng đọc ghi đè
+            assert int(frame.array[0, 0]) == value
+            frame.release()
+        ok, copy = grabber.read(timeout=1.0)
+        seq, latest, _ = grabber.latest_frame()
+        assert copy is not latest.array
+        latest.release()
+    finally:
+        grabber.stop()
+    stats = grabber.pool.stats()
+    assert grabber.frames_grabbed > 20
+    assert stats["allocations"] <= 4 and stats["reuses"] >= grabber.frames_grabbed - 5
+
+def test_image_folder_replay_is_paced_and_ends(tmp_path):
+    for i in range(3):
+        cv2.imwrite(str(tmp_path / f"{i}.png"), np.full((8, 8, 3), i * 50, dtype=np.uint8))
+    grabber = LatestFrameGrabber(ImageFolderSource(str(tmp_path), fps=50), metrics=MetricsRegistry())
+    assert grabber.pace
+    assert grabber.start()
+    values = []
+    while True:
+        ok, frame = grabber.read(timeout=1.0)
+        if not ok:
+            break
+        values.append(int(frame[0, 0, 0]))
+    assert values == [0, 50, 100]  # Phát theo FPS nên không mất frame nào
+    assert grabber.ended
+
+def test_video_file_source(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (32, 24))
+    if not writer.isOpened():
+        pytest.skip("OpenCV build has no MJPG writer")
+    for i in range(5):
+        writer.write(np.full((24, 32, 3), i * 40, dtype=np.uint8))
+    writer.release()
+
+    source = create_frame_source(settings(source=path))
+    assert isinstance(source, OpenCVSource) and source.kind == "file" and not source.live
+    grabber = LatestFrameGrabber(source, loop=True, metrics=MetricsRegistry())
+    assert grabber.start()
+    try:
+        frames = [grabber.read(timeout=1.0) for _ in range(7)]
+    finally:
+        grabber.stop()
+    assert all(ok for ok, _ in frames)  # Lặp lại sau frame cuối
+    assert frames[0][1].shape == (24, 32, 3)
+
+def test_render_preview_scales_frame_and_bbox():
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    preview = render_preview(frame, (320, 320), bbox=np.array([100, 100, 300, 200], dtype=np.float32))
+    assert preview.shape == (240, 320, 3) and preview.flags["C_CONTIGUOUS"]
+    # bbox vẽ theo tỉ lệ 0.5
+    assert tuple(preview[50, 100]) == (0, 255, 0)
+    assert not preview[120, 120].any()
+
+def test_preview_renderer_skips_unchanged_frames():
+    class FakeCamera:
+        seq = 1
+        frame = np.zeros((40, 40, 3), dtype=np.uint8)
+        pool = FramePool("test", metrics=MetricsRegistry())
+
+        def latest_frame(self):
+            return self.seq, self.pool.adopt(self.frame), 0.0
+
+    system = SimpleNamespace(camera=FakeCamera(), latest_processed_result=None)
+    renderer = PreviewRenderer(system, metrics=MetricsRegistry())
+    assert not renderer.render_once()  # Chưa biết kích thước hiển thị
+    renderer.set_target_size(20, 20)
+    assert renderer.render_once()
+    assert not renderer.render_once()
+    system.latest_processed_result = {"face_bbox": np.array([0, 0, 10, 10])}
+    assert renderer.render_once()
+    system.camera.seq = 2
+    assert renderer.render_once()
+    seq, image = renderer.latest()
+    assert seq == 3 and image.shape == (20, 20, 3)
+
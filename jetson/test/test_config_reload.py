@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.config_utils import config, ConfigWatcher
+from src.core.zensys.model_registry import ModelRegistry
+from src.core.zen_face.main_pipeline import ZenFace
+
+@pytest.fixture
+def restore_config():
+    original = config.config_data
+    yield
+    config.config_data = original
+
+def with_changes(**sections):
+    data = dict(config.config_data)
+    for name, values in sections.items():
+        data[name] = {**(data.get(name) or {}), **values}
+    return data
+
+def test_registry_builds_each_key_once():
+    registry = ModelRegistry()
+    builds = []
+
+    def slow_builder():
+        builds.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("face", slow_builder)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1 and len({id(r) for r in results}) == 1
+    assert registry.misses == 1 and registry.hits == 3
+    assert "face" in registry
+    registry.evict("face")
+    assert registry.get("face", object) is not results[0]
+
+def test_reload_reports_changed_sections(monkeypatch, restore_config):
+    new = with_changes(recognition={"threshold": 0.55}, anti_spoofing={"enable": True})
+    monkeypatch.setattr(config, "_load_config", lambda: new)
+
+    assert config.reload() == ["anti_spoofing", "recognition"]
+    assert config.rec_threshold == 0.55
+    assert config.reload() == []
+
+def test_watcher_reloads_on_mtime_change(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text("a: 1\n")
+    reloads, applied = [], []
+
+    fake_config = SimpleNamespace(config_path=str(path))
+    fake_config.reload = lambda: reloads.append(1) or ["detection"]
+    watcher = ConfigWatcher(fake_config, applied.append)
+
+    assert watcher.check() == []
+    path.write_text("a: 2\n")
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 5))
+    assert watcher.check() == ["detection"]
+    assert applied == [["detection"]] and len(reloads) == 1
+    assert watcher.check() == []
+
+def test_zenface_apply_config_updates_detector(monkeypatch, restore_config):
+    class FakeDetector:
+        input_shape = [1, 3, '?', '?']
+        input_size = (640, 640)
+        det_thresh = 0.5
+
+        def __init__(self):
+            self.primed = []
+
+        def prime_center_cache(self, size):
+            self.primed.append(tuple(size))
+
+    analyzer = ZenFace.__new__(ZenFace)
+    analyzer.det_model = FakeDetector()
+    analyzer.det_size = (640, 640)
+    analyzer.det_controller = None
+    config.config_data = with_changes(detection={"threshold": 0.7, "input_size": [480, 480],
+                                                 "adaptive": {"enable": False}})
+
+    analyzer.apply_config()
+
+    assert analyzer.det_model.det_thresh == 0.7 and analyzer.det_thresh == 0.7
+    assert tuple(analyzer.det_model.input_size) == (480, 480)
+    assert (480, 480) in analyzer.det_model.primed
+    assert analyzer.det_controller is None
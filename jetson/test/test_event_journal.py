@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.log.event_journal import EventJournal, JournalReader
+
+def test_append_writes_json_lines(tmp_path):
+    """Each record is one JSON line appended to the day file"""
+    journal = EventJournal(tmp_path, "rfid", fsync_every=5)
+    for i in range(10):
+        path = journal.append({"event_type": "RFID_SCAN", "RFID_ID": str(i)})
+    journal.close()
+    
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [r["RFID_ID"] for r in lines] == [str(i) for i in range(10)]
+    assert all("timestamp" in r for r in lines)
+
+def test_rotates_by_size(tmp_path):
+    """A new part file is started once max_bytes is reached"""
+    journal = EventJournal(tmp_path, "rfid", max_bytes=200)
+    for i in range(20):
+        journal.append({"event_type": "RFID_SCAN", "RFID_ID": str(i)})
+    journal.close()
+    
+    reader = JournalReader(tmp_path, "rfid")
+    files = reader.list_files()
+    assert len(files) > 1
+    assert all(os.path.getsize(f) <= 200 for f in files)
+    assert [r["RFID_ID"] for r in reader.iter_records()] == [str(i) for i in range(20)]
+
+def test_reader_time_range_and_legacy(tmp_path):
+    """Range queries skip other days, use the index and read legacy arrays"""
+    legacy = [{"event_type": "RFID_SCAN", "timestamp": "2025-05-10 08:00:00", "RFID_ID": "old"}]
+    with open(tmp_path / "rfid_2025-05-10.json", "w", encoding="utf-8") as f:
+        json.dump(legacy, f)
+    
+    with open(tmp_path / "rfid_2025-05-11.jsonl", "w", encoding="utf-8") as f:
+        for minute in range(60):
+            f.write(json.dumps({
+                "event_type": "VERIFICATION" if minute % 2 else "RFID_SCAN",
+                "timestamp": f"2025-05-11 09:{minute:02d}:00",
+                "RFID_ID": str(minute)
+            }) + "\n")
+    
+    reader = JournalReader(tmp_path, "rfid", index_stride=8)
+    records = list(reader.iter_records("2025-05-11 09:30:00", "2025-05-11 09:39:59"))
+    assert [r["RFID_ID"] for r in records] == [str(m) for m in range(30, 40)]
+    assert reader.count("2025-05-11", "2025-05-11", event_type="VERIFICATION") == 30
+    assert [r["RFID_ID"] for r in reader.iter_records(end="2025-05-10")] == ["old"]
+    with pytest.raises(ValueError):
+        list(reader.iter_records(end="2025/05/10"))
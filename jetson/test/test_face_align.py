@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from model.utils import face_align
+
+def random_landmarks(n, seed=0):
+    """Landmark arcface bị co giãn, lệch và nhiễu như khuôn mặt thật trong frame"""
+    rng = np.random.default_rng(seed)
+    scale = rng.uniform(0.5, 3.0, (n, 1, 1))
+    offset = rng.uniform(0, 400, (n, 1, 2))
+    return (face_align.arcface_dst[None] * scale + offset + rng.normal(0, 4, (n, 5, 2))).astype(np.float32)
+
+@pytest.mark.parametrize("image_size", [112, 128, 224])
+def test_matches_skimage_similarity_transform(image_size):
+    trans = pytest.importorskip("skimage.transform")
+    landmarks = random_landmarks(64)
+    # Một khuôn mặt bị lật gương (định thức âm)
+    landmarks[0, :, 0] *= -1
+    batch = face_align.estimate_norm_many(landmarks, image_size)
+    dst = face_align._norm_dst(image_size)
+    for lmk, M in zip(landmarks, batch):
+        tform = trans.SimilarityTransform()
+        tform.estimate(lmk, dst)
+        np.testing.assert_allclose(M, tform.params[0:2, :], rtol=1e-4, atol=1e-3)
+        np.testing.assert_allclose(face_align.estimate_norm(lmk, image_size), M, atol=1e-9)
+
+def test_exact_landmarks_give_exact_template():
+    M = face_align.estimate_norm(face_align.arcface_dst * 2 + 10)
+    points = np.hstack([face_align.arcface_dst * 2 + 10, np.ones((5, 1))]) @ M.T
+    np.testing.assert_allclose(points, face_align.arcface_dst, atol=1e-4)
+
+def test_norm_crop_many_matches_single_crops():
+    rng = np.random.default_rng(1)
+    img = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    landmarks = random_landmarks(3, seed=2) * 0.5
+    stack = face_align.norm_crop_many(img, landmarks)
+    assert stack.shape == (3, 112, 112, 3) and stack.dtype == np.uint8
+    for crop, lmk in zip(stack, landmarks):
+        np.testing.assert_array_equal(crop, face_align.norm_crop(img, lmk))
+
+    # Mỗi khuôn mặt một ảnh (vd: frame của nhiều camera)
+    other = cv2.flip(img, 1)
+    stack = face_align.norm_crop_many([img, other], landmarks[:2])
+    np.testing.assert_array_equal(stack[1], face_align.norm_crop(other, landmarks[1]))
+    assert face_align.norm_crop_many(img, np.zeros((0, 5, 2))).shape == (0, 112, 112, 3)
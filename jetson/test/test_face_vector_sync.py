@@ -0,0 +1,133 @@
+import sys
+import base64
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.faiss_manager import FaceDatabase, FaceVectorSync
+
+DIM = 8
+STAMP = {"model": "rec.onnx", "version": "abc-fp32", "precision": "fp32"}
+
+def one_hot(i):
+    vector = [0.0] * DIM
+    vector[i] = 2.0  # Chưa chuẩn hóa
+    return vector
+
+class FakeServer:
+    """Giả lập /api/facevector/sync: cursor là số thứ tự bản ghi, roster theo phòng"""
+
+    def __init__(self, roster):
+        self.roster = list(roster)
+        self.docs = []
+        self.requests = []
+        self.seq = 0
+
+    def put(self, user_id, category, vector, model_id=1, active=True):
+        self.docs = [d for d in self.docs if (d["userId"], d["category"]) != (user_id, category)]
+        self.docs.append({"userId": user_id, "category": category, "vector": vector,
+                          "modelId": model_id, "isActive": active, "seq": self.seq})
+        self.seq += 1
+
+    def __call__(self, path, params):
+        assert path == "facevector/sync" and params.get("classroomId") is not None
+        self.requests.append(dict(params))
+        since = int(params.get("since", -1))
+        users = params["userIds"].split(",") if "userIds" in params else self.roster
+        docs = [d for d in self.docs if d["seq"] > since and d["userId"] in users]
+        page = docs[:params["limit"]]
+        vectors = []
+        for d in page:
+            entry = {"userId": d["userId"], "category": d["category"], "modelId": d["modelId"]}
+            if d["isActive"] and d["modelId"] == params.get("modelId"):
+                entry["vector"] = d["vector"]
+            else:
+                entry["removed"] = True
+            vectors.append(entry)
+        return {"success": True, "data": {
+            "vectors": vectors, "userIds": self.roster,
+            "cursor": str(page[-1]["seq"]) if page else params.get("since"),
+            "hasMore": len(docs) > len(page)
+        }}
+
+def make_db():
+    face_db = FaceDatabase(dimension=DIM)
+    face_db.model_stamp = STAMP
+    return face_db
+
+def test_builds_index_from_server_vectors(tmp_path):
+    server = FakeServer(["u1", "u2"])
+    server.put("u1", "front", one_hot(0))
+    server.put("u1", "left", one_hot(1))
+    server.put("u2", "front", one_hot(2))
+    server.put("u3", "front", one_hot(3))  # Không có lịch trong phòng
+    server.put("u2", "left", one_hot(4), model_id=2)  # Model khác
+
+    face_db = make_db()
+    sync = FaceVectorSync(face_db, model_id=1, classroom_id=7, cache_file=str(tmp_path / "vectors.npz"),
+                          page_size=2, fetcher=server)
+    assert sync.initialize()
+    assert len(server.requests) == 2 and server.requests[0]["classroomId"] == 7
+    assert sorted(face_db.name_dict.values()) == ["u1", "u1", "u2"]
+    assert face_db.model_stamp == STAMP
+    name, score = face_db.recognize_face(np.eye(DIM, dtype=np.float32)[2], threshold=0.5)
+    assert name == "u2" and abs(score - 1.0) < 1e-5
+    assert face_db.recognize_face(np.eye(DIM, dtype=np.float32)[3], threshold=0.5)[0] == "Unknown"
+
+def test_delta_updates_and_roster_changes(tmp_path):
+    server = FakeServer(["u1"])
+    server.put("u1", "front", one_hot(0))
+    server.put("u2", "front", one_hot(5))
+    face_db = make_db()
+    sync = FaceVectorSync(face_db, model_id=1, classroom_id=7, fetcher=server)
+    assert sync.initialize()
+    cursor = sync.cursor
+
+    # u1 cập nhật vector front, tắt vector left; u2 vào lịch nhưng vector cũ hơn cursor
+    server.put("u1", "front", one_hot(1))
+    server.roster.append("u2")
+    server.requests.clear()
+    assert sync.sync()
+    assert server.requests[0]["since"] == cursor
+    assert server.requests[-1]["userIds"] == "u2" and "since" not in server.requests[-1]
+    assert face_db.recognize_face(np.eye(DIM, dtype=np.float32)[1], threshold=0.5)[0] == "u1"
+    assert face_db.recognize_face(np.eye(DIM, dtype=np.float32)[0], threshold=0.5)[0] == "Unknown"
+    assert face_db.recognize_face(np.eye(DIM, dtype=np.float32)[5], threshold=0.5)[0] == "u2"
+
+    # Vector bị tắt và người rời lịch đều bị xóa khỏi index
+    server.put("u1", "front", one_hot(1), active=False)
+    server.roster.remove("u2")
+    assert sync.sync()
+    assert face_db.name_dict == {} and face_db.index.ntotal == 0
+
+def test_cache_restores_index_offline(tmp_path):
+    cache_file = str(tmp_path / "vectors.npz")
+    server = FakeServer(["u1"])
+    server.put("u1", "front", base64.b64encode(np.eye(DIM, dtype=np.float32)[6].tobytes()).decode())
+    assert FaceVectorSync(make_db(), model_id=1, classroom_id=7, cache_file=cache_file, fetcher=server).initialize()
+
+    def offline(path, params):
+        raise ConnectionError("offline")
+
+    face_db = make_db()
+    sync = FaceVectorSync(face_db, model_id=1, classroom_id=7, cache_file=cache_file, fetcher=offline)
+    assert sync.initialize() and sync.last_error
+    assert face_db.recognize_face(np.eye(DIM, dtype=np.float32)[6], threshold=0.5)[0] == "u1"
+
+    # Cache của model khác không được dùng
+    assert not FaceVectorSync(make_db(), model_id=2, classroom_id=7, cache_file=cache_file,
+                              fetcher=offline).initialize()
+
+def test_rebuild_skipped_after_model_change():
+    server = FakeServer(["u1"])
+    server.put("u1", "front", one_hot(0))
+    face_db = make_db()
+    sync = FaceVectorSync(face_db, 7, model_id=1, fetcher=server)
+    assert sync.initialize()
+    face_db.model_stamp = {"model": "new.onnx", "version": "def-fp32", "precision": "fp32"}
+    assert not sync.rebuild()
@@ -0,0 +1,86 @@
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.faiss_manager import FaceDatabase
+from src.core.faiss_manager.analysis import (
+    SCORE_BINS, analyze, database_embeddings, pair_statistics, roc_curve, equal_error_rate, search_latency,
+    _bin_index
+)
+
+def clustered(people=6, per_person=5, dim=32, spread=0.15, seed=0):
+    """Mỗi người một tâm ngẫu nhiên, ảnh = tâm + nhiễu (đã chuẩn hóa)"""
+    rng = np.random.default_rng(seed)
+    embeddings, labels = [], []
+    for p in range(people):
+        center = rng.normal(size=dim)
+        center /= np.linalg.norm(center)
+        for _ in range(per_person):
+            vector = center + rng.normal(scale=spread / np.sqrt(dim), size=dim)
+            embeddings.append(vector / np.linalg.norm(vector))
+            labels.append(f"person{p}")
+    return np.array(embeddings, dtype=np.float32), labels
+
+def test_blocked_statistics_match_brute_force():
+    embeddings, labels = clustered()
+    labels[-1] = "Unknown"
+    labels[-2] = "Unknown"  # Hai ảnh Unknown không tạo thành cặp genuine
+    full = embeddings @ embeddings.T
+    n = len(labels)
+    genuine = [full[i, j] for i in range(n) for j in range(i + 1, n) if labels[i] == labels[j] != "Unknown"]
+    impostor = [full[i, j] for i in range(n) for j in range(i + 1, n)
+                if labels[i] != labels[j] or labels[i] == "Unknown"]
+
+    for block_size in (1, 7, 1000):
+        stats = pair_statistics(embeddings, labels, block_size=block_size)
+        assert np.array_equal(stats["genuine_hist"], np.bincount(_bin_index(np.array(genuine)), minlength=SCORE_BINS))
+        assert np.array_equal(stats["impostor_hist"],
+                              np.bincount(_bin_index(np.array(impostor)), minlength=SCORE_BINS))
+        own = [j for j in range(n) if j != 0 and labels[j] == labels[0]]
+        assert abs(stats["genuine_mean"][0] - full[0, own].mean()) < 1e-5
+        assert abs(stats["genuine_max"][0] - full[0, own].max()) < 1e-5
+        assert stats["genuine_count"][-1] == 0
+
+def test_roc_and_eer_on_separable_gallery():
+    embeddings, labels = clustered(spread=0.1)
+    stats = pair_statistics(embeddings, labels)
+    thresholds, far, frr = roc_curve(stats["genuine_hist"], stats["impostor_hist"])
+    assert far[0] == 1.0 and frr[0] == 0.0 and far[-1] == 0.0
+    assert np.all(np.diff(far) <= 0) and np.all(np.diff(frr) >= 0)
+    threshold, eer = equal_error_rate(thresholds, far, frr)
+    assert eer == 0.0
+    genuine_min = (embeddings @ embeddings.T)[np.equal.outer(labels, labels)].min()
+    assert threshold <= genuine_min
+
+def test_flags_mislabelled_and_duplicate_embeddings():
+    embeddings, labels = clustered(dim=128)
+    embeddings = np.vstack([embeddings, embeddings[0:1], embeddings[7:8]])
+    labels = labels + ["person0", "person0"]  # Ảnh trùng đúng người và ảnh của person1 để nhầm thư mục
+    report = analyze(embeddings, labels, threshold=0.4)
+
+    mislabelled = [f for f in report["flagged"] if f["index"] == len(labels) - 1]
+    assert mislabelled and "closer_to_other" in mislabelled[0]["reason"]
+    assert mislabelled[0]["nearest_label"] == "person1"
+    pairs = {(d["a"], d["b"]) for d in report["duplicates"]}
+    assert (0, len(labels) - 2) in pairs and (7, len(labels) - 1) in pairs
+    assert report["identities"] == 6 and report["far_at_threshold"] < 0.05
+
+def test_database_embeddings_and_search_latency():
+    embeddings, labels = clustered(dim=16)
+    face_db = FaceDatabase(dimension=16)
+    index = faiss.IndexFlatIP(16)
+    index.add(embeddings)
+    face_db.swap(index, dict(enumerate(labels)))
+
+    restored, restored_labels = database_embeddings(face_db)
+    assert np.allclose(restored, embeddings) and restored_labels == labels
+    latency = search_latency(face_db.index, embeddings[:10])
+    assert latency["ntotal"] == len(labels) and latency["queries"] == 10
+    assert latency["single_p50_ms"] <= latency["single_p99_ms"]
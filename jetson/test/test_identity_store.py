@@ -0,0 +1,110 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from model.RFID.identity_store import IdentityStore
+from model.RFID.rfid import RFID
+from src.core.api.identity_sync import IdentitySync, RFID_CURSOR
+
+def test_store_persists_and_resolves_by_user_id(tmp_path):
+    path = str(tmp_path / "identity.db")
+    store = IdentityStore(path)
+    store.import_mapping({"0005563074": "thanhnpst1", "0005460978": "hungdnst2"})
+    # Thư mục gallery cũ đặt theo tên hiển thị
+    store.apply(users=[{"user_id": "hungdnst2", "display_name": "Dang Ngoc Hung", "gallery_identity": "Hung DN"}])
+    store.close()
+
+    reopened = IdentityStore(path)
+    assert len(reopened) == 2
+    assert reopened.lookup("0005460978")["gallery_identity"] == "Hung DN"
+    assert reopened.user_id_for_gallery("hung dn") == "hungdnst2"
+    assert reopened.user_id_for_gallery("thanhnpst1") == "thanhnpst1"  # Gallery theo userId
+    assert reopened.user_id_for_gallery("Unknown") is None
+    assert reopened.lookup("9999") is None
+
+def test_verify_identity_matches_on_user_id():
+    store = IdentityStore()
+    store.import_mapping({"0005563074": "thanhnpst1"})
+    store.apply(users=[{"user_id": "thanhnpst1", "gallery_identity": "Thanh NP"},
+                       {"user_id": "anhvnst3", "active": False}])
+    rfid = RFID(store)
+
+    assert rfid.verify_identity("0005563074", "Thanh NP")["match"]
+    assert rfid.verify_identity("0005563074", "thanhnpst1")["match"]  # Index từ server gắn nhãn userId
+    assert not rfid.verify_identity("0005563074", "hungdnst2")["match"]
+    unknown = rfid.verify_identity("1234567", "Unknown")
+    assert not unknown["match"] and unknown["rfid_name"] == "Unknown"
+
+    store.add_card("0005231461", "anhvnst3")
+    assert rfid.get_name_from_id("0005231461") == "Unknown"  # Tài khoản bị khóa
+
+def test_delta_sync_pages_with_cursor_and_full_sync_prunes():
+    store = IdentityStore()
+    store.import_mapping({"legacy": "olduser"})
+    server = {
+        "cards": [
+            {"_id": "1", "RFID_ID": "A1", "UserID": "u1", "Status": "Active", "updatedAt": "t1"},
+            {"_id": "2", "RFID_ID": "B2", "UserID": "u2", "Status": "Active", "updatedAt": "t2"},
+        ],
+        "users": [{"userId": "u1", "username": "user1", "role": "student", "isActive": True}]
+    }
+    requests = []
+
+    def fetcher(path, params):
+        requests.append(dict(params))
+        start = int(params.get("rfidSince", 0))
+        cards = server["cards"][start:start + params["limit"]]
+        users = server["users"] if "userSince" not in params else []
+        return {"success": True, "data": {
+            "cards": cards, "users": users,
+            "rfidCursor": str(start + len(cards)) if cards else params.get("rfidSince"),
+            "userCursor": "u" if users else params.get("userSince"),
+            "hasMore": start + len(cards) < len(server["cards"])
+        }}
+
+    sync = IdentitySync(store, page_size=1, fetcher=fetcher)
+    assert sync.sync()
+    assert len(requests) == 2 and requests[1]["rfidSince"] == "1"
+    assert store.user_id_for_card("A1") == "u1" and store.user_id_for_card("B2") == "u2"
+    assert store.get_cursor(RFID_CURSOR) == "2"
+    assert store.user_id_for_card("legacy") == "olduser"  # Delta không xóa gì
+
+    # Delta tiếp theo chỉ tải phần mới: thẻ A1 bị thu hồi
+    server["cards"].append({"_id": "3", "RFID_ID": "A1", "UserID": "u1", "Status": "Revoked"})
+    requests.clear()
+    assert sync.sync()
+    assert requests == [{"limit": 1, "rfidSince": "2", "userSince": "u"}]
+    assert store.user_id_for_card("A1") is None
+
+    # Đồng bộ đầy đủ: thẻ không còn trên server bị xóa
+    assert sync.full_sync_due()
+    assert sync.sync(full=True)
+    assert sorted(store.card_ids()) == ["B2"] and not sync.full_sync_due()
+
+def test_sync_keeps_local_gallery_mapping(tmp_path):
+    path = str(tmp_path / "identity.db")
+    store = IdentityStore(path)
+    store.apply(users=[{"user_id": "u1", "gallery_identity": "Nguyen Van A"}])
+
+    def fetcher(path, params):
+        return {"data": {"cards": [], "users": [{"userId": "u1", "fullName": "Nguyễn Văn A", "isActive": True}]}}
+
+    assert IdentitySync(store, fetcher=fetcher).sync(full=True)
+    assert store.user_id_for_gallery("Nguyen Van A") == "u1"
+    store.close()
+    assert IdentityStore(path).user_id_for_gallery("Nguyen Van A") == "u1"
+
+def test_sync_failure_keeps_local_data():
+    store = IdentityStore()
+    store.import_mapping({"0005563074": "thanhnpst1"})
+
+    def offline(path, params):
+        raise ConnectionError("offline")
+
+    sync = IdentitySync(store, fetcher=offline)
+    assert not sync.sync(full=True)
+    assert store.user_id_for_card("0005563074") == "thanhnpst1" and sync.last_error
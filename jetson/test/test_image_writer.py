@@ -0,0 +1,40 @@
+import os
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import numpy as np
+from utils.image_writer import ImageWriter, encode_jpeg, write_atomic
+
+def test_encode_jpeg_once():
+    """Encoded bytes are a JPEG and can be reused by every consumer"""
+    image = np.full((112, 112, 3), 128, dtype=np.uint8)
+    data = encode_jpeg(image)
+    assert data[:2] == b"\xff\xd8"
+    assert encode_jpeg(None) is None
+
+def test_write_atomic_replaces_file(tmp_path):
+    """Existing file is replaced without leaving temp files behind"""
+    target = tmp_path / "user" / "latest.jpg"
+    write_atomic(str(target), b"old")
+    write_atomic(str(target), b"new")
+    assert target.read_bytes() == b"new"
+    assert os.listdir(target.parent) == ["latest.jpg"]
+
+def test_writer_background_queue(tmp_path):
+    """Submitted images are written by the background thread"""
+    writer = ImageWriter()
+    done = []
+    for i in range(5):
+        writer.submit(str(tmp_path / f"{i}.jpg"), bytes([i]) * 10,
+                      callback=lambda path, ok: done.append(ok))
+    writer.flush()
+    writer.close()
+    
+    assert done == [True] * 5
+    assert writer.written == 5
+    assert (tmp_path / "3.jpg").read_bytes() == bytes([3]) * 10
@@ -0,0 +1,83 @@
+import sys
+import time
+import json
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.messaging.message_manager import MessageManager
+from src.core.messaging.stub_producer import StubProducer
+
+def wait_for(condition, timeout=2.0):
+    """Wait until condition() is true or timeout expires"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_send_does_not_flush_per_message():
+    """Messages are queued and delivered by the background poll loop"""
+    producer = StubProducer(delivery_delay=0.05)
+    manager = MessageManager(use_kafka=True, use_api=False, producer=producer)
+    
+    for i in range(20):
+        assert manager.send_system_event({"event": "tick", "seq": i})
+    
+    # Nothing has been delivered synchronously
+    assert len(producer.delivered) < 20
+    
+    assert wait_for(lambda: len(producer.delivered) == 20)
+    stats = manager.get_producer_stats()
+    assert stats["sent"] == 20
+    assert stats["delivered"] == 20
+    assert stats["failed"] == 0
+    assert stats["latency_ms"]["max"] >= 0.0
+    assert stats["batch"]["avg_reports_per_poll"] >= 1.0
+    
+    manager.close()
+
+def test_delivery_failures_are_counted():
+    """Failed delivery reports are exposed in the stats"""
+    producer = StubProducer()
+    producer.fail_next(2)
+    manager = MessageManager(use_kafka=True, use_api=False, producer=producer)
+    
+    for i in range(5):
+        manager.send_system_event({"seq": i})
+    manager.close()
+    
+    stats = manager.get_producer_stats()
+    assert stats["delivered"] == 3
+    assert stats["failed"] == 2
+    assert stats["in_flight"] == 0
+
+def test_close_flushes_pending_messages():
+    """Queued messages are flushed only at shutdown"""
+    producer = StubProducer(delivery_delay=60.0)
+    manager = MessageManager(use_kafka=True, use_api=False, producer=producer)
+    
+    manager.send_system_event({"event": "shutdown"})
+    assert len(producer) == 1
+    
+    manager.close()
+    assert len(producer) == 0
+    assert json.loads(producer.delivered[0].value()) == {"event": "shutdown"}
+
+def test_exit_handler_registered_once(monkeypatch):
+    """Restarting the poll loop does not stack atexit handlers"""
+    import atexit
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+    manager = MessageManager(use_kafka=True, use_api=False, producer=StubProducer())
+    
+    manager.poll_stop_event.set()
+    manager.poll_thread.join(1.0)
+    manager._start_poll_loop()
+    assert registered == [manager.close]
+    
+    manager.close()
@@ -0,0 +1,75 @@
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.log.metrics import MetricsRegistry, RollingHistogram
+from utils.image_writer import ImageWriter
+
+def test_rolling_histogram_keeps_window():
+    histogram = RollingHistogram(window=100)
+    for value in range(1000):
+        histogram.observe(float(value))
+    snap = histogram.snapshot()
+    # Phân vị chỉ trên 100 mẫu cuối, tổng/đếm tính từ đầu
+    assert snap["quantiles"][0.5] == pytest.approx(949.5)
+    assert snap["count"] == 1000
+    assert snap["sum"] == pytest.approx(sum(range(1000)))
+
+def test_stage_counters_and_queues():
+    metrics = MetricsRegistry(window=16)
+    with metrics.stage("detection"):
+        time.sleep(0.002)
+    metrics.inc("frames_processed")
+    metrics.inc("frames_processed")
+    metrics.register_queue("image_writer", lambda: 3)
+    snap = metrics.snapshot()
+    assert snap["stages"]["detection"]["count"] == 1
+    assert snap["stages"]["detection"]["quantiles"][0.5] >= 2.0
+    assert snap["counters"] == {"frames_processed": 2}
+    assert snap["queues"] == {"image_writer": 3}
+    line = metrics.summary_line()
+    assert "frames_processed=2" in line and "detection p50=" in line and "image_writer=3" in line
+
+def test_disabled_registry_records_nothing():
+    metrics = MetricsRegistry(enable=False)
+    with metrics.stage("detection"):
+        pass
+    metrics.inc("frames_processed")
+    assert metrics.stage("a") is metrics.stage("b")  # Không cấp phát mỗi lần gọi
+    assert metrics.snapshot()["stages"] == {} and metrics.snapshot()["counters"] == {}
+
+def test_prometheus_endpoint():
+    metrics = MetricsRegistry()
+    metrics.observe("search", 4.0)
+    metrics.inc("api_failures")
+    metrics.register_queue("system_log", lambda: 0)
+    assert metrics.start_http_server("127.0.0.1", 0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{metrics.http_port}/metrics", timeout=5) as response:
+            body = response.read().decode("utf-8")
+            assert response.headers["Content-Type"].startswith("text/plain")
+    finally:
+        metrics.stop()
+    assert '# TYPE zensys_stage_duration_seconds summary' in body
+    assert 'zensys_stage_duration_seconds{stage="search",quantile="0.95"} 0.004000' in body
+    assert 'zensys_stage_duration_seconds_count{stage="search"} 1' in body
+    assert 'zensys_api_failures_total 1' in body
+    assert 'zensys_queue_depth{queue="system_log"} 0' in body
+
+def test_image_writer_reports_disk_writes(tmp_path):
+    metrics = MetricsRegistry()
+    writer = ImageWriter(metrics=metrics)
+    writer.submit(str(tmp_path / "a.jpg"), b"data")
+    writer.flush()
+    writer.close()
+    snap = metrics.snapshot()
+    assert snap["stages"]["disk_write"]["count"] == 1
+    assert snap["queues"]["image_writer"] == 0
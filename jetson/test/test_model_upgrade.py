@@ -0,0 +1,132 @@
+import os
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.faiss_manager import FaceDatabase, model_stamp
+from src.core.zen_face.face_operator import Face
+from src.core.zensys.face_recognition_manager import FaceRecognitionManager
+from src.core.zensys.model_upgrade import RecognitionModelUpgrade
+
+class FakeRecModel:
+    """Embedding = one-hot theo màu ảnh, xoay vòng `shift` vị trí (mỗi model một không gian riêng)"""
+
+    def __init__(self, shift, dim=8):
+        self.shift = shift
+        self.dim = dim
+        self.version = None
+
+    def prepare(self, ctx_id):
+        pass
+
+    def embed(self, img):
+        embedding = np.zeros(self.dim, dtype=np.float32)
+        embedding[(int(img[0, 0, 0]) // 50 + self.shift) % self.dim] = 1.0
+        return embedding
+
+class FakeAnalyzer:
+    def __init__(self, rec_model):
+        self.rec_model = rec_model
+
+    def get(self, img, max_num=0):
+        face = Face(bbox=np.array([0, 0, 10, 10], dtype=np.float32), embedding=self.rec_model.embed(img))
+        face.rec_version = self.rec_model.version
+        return [face]
+
+    def with_recognition(self, rec_model):
+        return FakeAnalyzer(rec_model)
+
+    def swap_recognition(self, rec_model):
+        self.rec_model = rec_model
+
+def make_gallery(root):
+    for name, value in (("alice", 0), ("bob", 100), ("carol", 200)):
+        os.makedirs(root / name)
+        cv2.imwrite(str(root / name / "1.png"), np.full((16, 16, 3), value, dtype=np.uint8))
+
+def make_manager(tmp_path, old_model):
+    manager = FaceRecognitionManager.__new__(FaceRecognitionManager)
+    manager.face_analyzer = FakeAnalyzer(old_model)
+    manager.face_db = FaceDatabase(dimension=8)
+    manager.face_db.model_stamp = {"model": "old.onnx", "version": "old-fp32", "precision": "fp32"}
+    manager._gallery_signature = None
+    old_model.version = "old-fp32"
+    assert manager.face_db.process_gallery(manager.face_analyzer, str(tmp_path / "gallery"), str(tmp_path / "db"))
+    return manager
+
+def test_model_stamp_changes_with_content(tmp_path):
+    path = tmp_path / "adaface.onnx"
+    path.write_bytes(b"model-a")
+    first = model_stamp(str(path))
+    path.write_bytes(b"model-b!")
+    second = model_stamp(str(path), "int8_static")
+    assert first["model"] == "adaface.onnx" and first["version"].endswith("-fp32")
+    assert second["version"].endswith("-int8_static") and first["version"][:12] != second["version"][:12]
+
+def test_load_rejects_index_from_other_model(tmp_path):
+    make_gallery(tmp_path / "gallery")
+    manager = make_manager(tmp_path, FakeRecModel(shift=0))
+
+    same = FaceDatabase(dimension=8)
+    same.model_stamp = dict(manager.face_db.model_stamp)
+    assert same.load_database(str(tmp_path / "db"))
+    assert sorted(same.name_dict.values()) == ["alice", "bob", "carol"]
+
+    other = FaceDatabase(dimension=8)
+    other.model_stamp = {"model": "new.onnx", "version": "new-fp32", "precision": "fp32"}
+    assert not other.load_database(str(tmp_path / "db"))
+
+def test_upgrade_reembeds_and_switches(tmp_path):
+    make_gallery(tmp_path / "gallery")
+    old_model, new_model = FakeRecModel(shift=0), FakeRecModel(shift=3)
+    manager = make_manager(tmp_path, old_model)
+    bob = np.full((16, 16, 3), 100, dtype=np.uint8)
+
+    face = manager.face_analyzer.get(bob)[0]
+    assert manager.recognize_face(face.normed_embedding, rec_version=face.rec_version)[0] == "bob"
+
+    model_file = tmp_path / "adaface_v2.onnx"
+    model_file.write_bytes(b"new weights")
+    upgrade = RecognitionModelUpgrade(manager, str(model_file), cpu_budget=0.5,
+                                      gallery_path=str(tmp_path / "gallery"), db_path=str(tmp_path / "db"),
+                                      model_loader=lambda path, precision: new_model)
+    assert upgrade.start().wait(timeout=10), upgrade.error
+    assert upgrade.status()["images_done"] == 3
+
+    # Model và index đã chuyển cùng lúc; embedding của model cũ bị từ chối
+    assert manager.face_db.model_version == new_model.version == upgrade.stamp["version"]
+    new_face = manager.face_analyzer.get(bob)[0]
+    assert manager.recognize_face(new_face.normed_embedding, rec_version=new_face.rec_version)[0] == "bob"
+    assert manager.recognize_face(face.normed_embedding, rec_version=face.rec_version) == ("Unknown", 0.0)
+
+    reloaded = FaceDatabase(dimension=8)
+    reloaded.model_stamp = upgrade.stamp
+    assert reloaded.load_database(str(tmp_path / "db"))
+
+def test_upgrade_failure_keeps_current_model(tmp_path):
+    (tmp_path / "gallery").mkdir()
+    model_file = tmp_path / "adaface_v2.onnx"
+    model_file.write_bytes(b"new weights")
+    manager = FaceRecognitionManager.__new__(FaceRecognitionManager)
+    old_model = FakeRecModel(shift=0)
+    manager.face_analyzer = FakeAnalyzer(old_model)
+    manager.face_db = FaceDatabase(dimension=8)
+
+    upgrade = RecognitionModelUpgrade(manager, str(model_file), gallery_path=str(tmp_path / "gallery"),
+                                      model_loader=lambda path, precision: FakeRecModel(shift=1))
+    assert not upgrade.start().wait(timeout=10)
+    assert upgrade.state == "failed" and manager.face_analyzer.rec_model is old_model
+
+def test_cpu_budget_validated(tmp_path):
+    manager = FaceRecognitionManager.__new__(FaceRecognitionManager)
+    manager.face_analyzer = FakeAnalyzer(FakeRecModel(0))
+    with pytest.raises(ValueError):
+        RecognitionModelUpgrade(manager, "x.onnx", cpu_budget=0)
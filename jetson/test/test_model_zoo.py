@@ -0,0 +1,63 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+onnxruntime = pytest.importorskip("onnxruntime")
+
+from model.model_loader_onnx.model_zoo import (
+    DEFAULT_SESSION_PROFILE, get_session_profile, build_session_options, get_optimized_model_path,
+    get_variant_path, resolve_model_variant, find_onnx_file
+)
+
+def test_build_session_options_from_profile():
+    """Profile strings map onto SessionOptions enums and thread counts"""
+    profile = dict(DEFAULT_SESSION_PROFILE, graph_optimization_level="extended", intra_op_num_threads=2,
+                   inter_op_num_threads=1, execution_mode="parallel", enable_cpu_mem_arena=False)
+    options = build_session_options(profile)
+    assert options.graph_optimization_level == onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    assert options.execution_mode == onnxruntime.ExecutionMode.ORT_PARALLEL
+    assert options.intra_op_num_threads == 2
+    assert options.enable_cpu_mem_arena is False
+
+def test_configured_profiles():
+    """The profiles shipped in config.yaml are valid; unknown names are rejected"""
+    for name in ("latency", "throughput", "low_memory"):
+        build_session_options(get_session_profile(name))
+    with pytest.raises(ValueError):
+        get_session_profile("does-not-exist")
+
+def test_optimized_path_changes_with_model(tmp_path):
+    """A modified model file or different providers get a new cache entry"""
+    model = tmp_path / "det.onnx"
+    model.write_bytes(b"v1")
+    profile = get_session_profile("latency")
+
+    first = get_optimized_model_path(str(model), "latency", profile, ["CPUExecutionProvider"], str(tmp_path))
+    assert os.path.basename(first).startswith("det.latency.")
+    assert first == get_optimized_model_path(str(model), "latency", profile, ["CPUExecutionProvider"], str(tmp_path))
+    assert first != get_optimized_model_path(str(model), "latency", profile, ["CUDAExecutionProvider"], str(tmp_path))
+
+    model.write_bytes(b"version 2")
+    assert first != get_optimized_model_path(str(model), "latency", profile, ["CPUExecutionProvider"], str(tmp_path))
+
+def test_precision_variants(tmp_path):
+    """Variants live next to the FP32 file and fall back to it when missing"""
+    model = tmp_path / "adaface.onnx"
+    model.write_bytes(b"fp32")
+    assert get_variant_path(str(model), "fp32") == str(model)
+    assert resolve_model_variant(str(model), "int8_static") == str(model)
+
+    variant = tmp_path / "adaface.int8_static.onnx"
+    variant.write_bytes(b"int8")
+    assert resolve_model_variant(str(model), "int8_static") == str(variant)
+    # Các biến thể không được chọn thay cho model gốc
+    assert find_onnx_file(str(tmp_path)) == str(model)
+    with pytest.raises(ValueError):
+        get_variant_path(str(model), "int4")
@@ -0,0 +1,125 @@
+import sys
+import json
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.zensys.replay import (
+    StageTimer, RfidTimeline, AccuracyCounter, ReplayPipeline, iter_replay_frames,
+    latency_summary, compare_reports, verification_summary, STATUS_TIMEOUT
+)
+
+class FakeFace:
+    def __init__(self, name):
+        self.normed_embedding = np.array([1.0, 0.0], dtype=np.float32)
+        self.bbox = np.array([10, 10, 50, 50], dtype=np.float32)
+        self.name = name
+
+class FakeAnalyzer:
+    """Frame có pixel [0, 0] khác 0 được coi là có khuôn mặt của `name`"""
+
+    def __init__(self, name="alice"):
+        self.name = name
+
+    def get(self, img, max_num=0, adaptive=False):
+        return [FakeFace(self.name)] if img[0, 0, 0] else []
+
+class FakeDatabase:
+    def recognize_face(self, embedding, threshold=None):
+        return "alice", 0.8
+
+class FakeRfid:
+    database = {"111": "alice", "222": "bob"}
+
+    def verify_identity(self, rfid_id, face_name):
+        rfid_name = self.database.get(rfid_id, "Unknown")
+        return {"match": rfid_name.lower() == face_name.lower(), "rfid_name": rfid_name, "face_name": face_name}
+
+FACE = np.full((64, 64, 3), 255, dtype=np.uint8)
+EMPTY = np.zeros((64, 64, 3), dtype=np.uint8)
+
+def test_latency_summary_percentiles():
+    stats = latency_summary(list(range(1, 101)))
+    assert stats["count"] == 100
+    assert stats["p50_ms"] == pytest.approx(50.5)
+    assert stats["p99_ms"] == pytest.approx(99.01)
+    assert latency_summary([]) == {"count": 0}
+
+def test_timeline_fires_each_event_once():
+    timeline = RfidTimeline([{"rfid": 111, "frame": 2}, {"rfid": "222", "time": 1.0}])
+    assert timeline.due(0, 0.0) == []
+    assert [e["rfid"] for e in timeline.due(2, 0.07)] == ["111"]
+    assert timeline.due(3, 0.1) == []
+    assert [e["rfid"] for e in timeline.due(30, 1.0)] == ["222"]
+    with pytest.raises(ValueError):
+        RfidTimeline([{"rfid": "111"}])
+
+def test_pipeline_verifies_and_times_stages():
+    """A swipe is verified on the next frame with a face, without side effects"""
+    timer = StageTimer()
+    pipeline = ReplayPipeline(FakeAnalyzer(), FakeDatabase(), FakeRfid(), timer=timer)
+    timeline = RfidTimeline([
+        {"rfid": "111", "frame": 1, "expect": "SUCCESS"},
+        {"rfid": "222", "frame": 3, "expect": "SPOOF_ATTEMPT"},
+        {"rfid": "111", "frame": 5}
+    ])
+    frames = [FACE, EMPTY, FACE, FACE, EMPTY, EMPTY]
+    for index, frame in enumerate(frames):
+        for event in timeline.due(index, index / 30.0):
+            pipeline.scan(event, index, index / 30.0)
+        pipeline.process(frame, index, index / 30.0)
+    pipeline.finish(len(frames))
+
+    statuses = [v["status"] for v in pipeline.verifications]
+    assert statuses == ["SUCCESS", "SPOOF_ATTEMPT", STATUS_TIMEOUT]
+    assert pipeline.verifications[0]["frame"] == 2  # Chờ đến frame có mặt
+    summary = verification_summary(pipeline.verifications)
+    assert summary["expected_checked"] == 2 and summary["expected_correct"] == 2
+
+    stages = timer.summary()
+    assert stages["frame"]["count"] == 6
+    assert stages["search"]["count"] == 3
+    assert stages["verification"]["count"] == 2
+
+def test_accuracy_counter():
+    counter = AccuracyCounter()
+    for label, predicted in [("alice", "alice"), ("alice", "Unknown"), ("bob", "alice"),
+                             ("bob", None), (None, "alice")]:
+        counter.add(label, predicted)
+    summary = counter.summary()
+    assert summary["labeled_frames"] == 4
+    assert summary["detected_frames"] == 3
+    assert summary["accuracy"] == pytest.approx(1 / 3, abs=1e-4)
+    assert summary["wrong_identity"] == 1 and summary["missed"] == 1
+
+def test_image_folder_labels_from_subfolders(tmp_path):
+    for person in ("alice", "bob"):
+        (tmp_path / person).mkdir()
+        cv2.imwrite(str(tmp_path / person / "0.jpg"), FACE)
+    frames = list(iter_replay_frames(str(tmp_path), fps=10))
+    assert [(i, label) for i, _, _, label in frames] == [(0, "alice"), (1, "bob")]
+    assert frames[1][1] == pytest.approx(0.1)
+
+    labels = {"alice/0.jpg": "carol"}
+    assert list(iter_replay_frames(str(tmp_path), labels=labels))[0][3] == "carol"
+
+def test_compare_reports_flags_regressions():
+    baseline = {"stages": {"detection": {"count": 10, "p50_ms": 10.0, "p95_ms": 20.0}},
+                "throughput": {"fps": 20.0}, "accuracy": {"accuracy": 0.95},
+                "memory": {"peak_rss_mb": 500.0}}
+    current = json.loads(json.dumps(baseline))
+    assert compare_reports(current, baseline) == []
+
+    current["stages"]["detection"]["p95_ms"] = 25.0
+    current["throughput"]["fps"] = 15.0
+    current["accuracy"]["accuracy"] = 0.9
+    regressions = compare_reports(current, baseline, max_regression=0.1)
+    assert len(regressions) == 3
+    assert regressions[0].startswith("detection p95_ms")
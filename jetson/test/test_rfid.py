@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from model.RFID.rfid import RFID
+from model.RFID.identity_store import IdentityStore
+from model.RFID.backends import (
+    CodeAssembler, EvdevBackend, HidRawBackend, ReplayBackend, INPUT_EVENT, create_rfid_backend
+)
+
+class Collector:
+    def __init__(self):
+        self.items = []
+
+    def __call__(self, item):
+        self.items.append((item, time.perf_counter()))
+
+    def wait(self, count, timeout=2.0):
+        deadline = time.time() + timeout
+        while len(self.items) < count and time.time() < deadline:
+            time.sleep(0.005)
+        return len(self.items) >= count
+
+def test_assembler_finishes_code_on_enter_or_timeout():
+    codes = []
+    assembler = CodeAssembler(codes.append, char_timeout=0.05)
+    for char in "1234":
+        assembler.feed(char)
+    assembler.flush()
+    assert codes == ["1234"] and assembler.remaining() is None
+
+    for char in "abc":
+        assembler.feed(char)
+    assembler.expire()
+    assert codes == ["1234"]  # Chưa hết char_timeout
+    time.sleep(0.06)
+    assembler.expire()
+    assert codes == ["1234", "abc"]
+
+def test_replay_drives_rfid_with_low_latency():
+    rfid = RFID(IdentityStore())
+    scans = Collector()
+    rfid.set_callback(scans)
+    backend = ReplayBackend([(0.02, "0011223344"), (0.05, "0011223344"), (0.05, "5566778899")])
+    rfid.start_listening(backend)
+    try:
+        assert backend.wait(timeout=2.0)
+        assert scans.wait(2)
+    finally:
+        rfid.stop_listening()
+
+    # Lần quẹt lặp lại trong min_scan_interval bị bỏ qua
+    assert [card for card, _ in scans.items] == ["0011223344", "5566778899"]
+    assert rfid.last_event.card_id == "5566778899" and rfid.last_event.source == "replay"
+    delivered = [at for _, at in scans.items]
+    for due, at in zip([backend.scheduled[0], backend.scheduled[2]], delivered):
+        assert 0 <= at - due < 0.05
+
+def test_replay_script_file(tmp_path):
+    script = tmp_path / "scans.txt"
+    script.write_text("# delay card\n0.01 AB12CD\n\n0.02 EF34GH\n", encoding="utf-8")
+    backend = create_rfid_backend("replay", str(script))
+    events = Collector()
+    backend.start(events)
+    assert backend.wait(timeout=2.0)
+    assert [event.card_id for event, _ in events.items] == ["AB12CD", "EF34GH"]
+
+def key_events(codes):
+    data = b""
+    for code in codes:
+        data += INPUT_EVENT.pack(0, 0, 1, code, 1) + INPUT_EVENT.pack(0, 0, 1, code, 0)
+        data += INPUT_EVENT.pack(0, 0, 0, 0, 0)  # EV_SYN
+    return data
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs POSIX FIFOs")
+def test_evdev_backend_reads_key_events(tmp_path):
+    device = str(tmp_path / "event0")
+    os.mkfifo(device)
+    backend = EvdevBackend(device, char_timeout=0.5, grab=False)
+    events = Collector()
+    backend.start(events)
+    try:
+        with open(device, "wb", buffering=0) as f:
+            sent = time.perf_counter()
+            # "12a9" + Enter: kết thúc ngay khi có Enter, không chờ char_timeout
+            f.write(key_events([2, 3, 30, 10, 28]))
+            assert events.wait(1)
+        event, delivered = events.items[0]
+        assert event.card_id == "12a9" and event.source == "evdev"
+        assert delivered - sent < 0.25
+    finally:
+        backend.stop()
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs POSIX FIFOs")
+def test_hidraw_backend_finishes_code_by_timeout(tmp_path):
+    device = str(tmp_path / "hidraw0")
+    os.mkfifo(device)
+    backend = HidRawBackend(device, char_timeout=0.05)
+    events = Collector()
+    backend.start(events)
+    try:
+        with open(device, "wb", buffering=0) as f:
+            # "1", nhả, "1", nhả, "b": cùng phím nhấn hai lần vẫn ra hai ký tự
+            release = bytes(8)
+            for key in (0x1E, 0x1E, 0x05):
+                f.write(bytes([0, 0, key, 0, 0, 0, 0, 0]) + release)
+            assert events.wait(1)
+        assert [event.card_id for event, _ in events.items] == ["11b"]
+    finally:
+        backend.stop()
+
+def test_replay_rejects_looping_empty_script():
+    with pytest.raises(ValueError):
+        ReplayBackend([], loop=True)
+    backend = ReplayBackend([])
+    backend.start(Collector())
+    assert backend.wait(timeout=1.0)
+
+def test_create_backend_validates_kind():
+    with pytest.raises(ValueError):
+        create_rfid_backend("evdev")
+    with pytest.raises(ValueError):
+        create_rfid_backend("bluetooth", "/dev/null")
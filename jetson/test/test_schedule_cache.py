@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+from datetime import datetime
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.api.schedule_cache import ScheduleCache, SESSION_ACTIVE, NO_SCHEDULE, SCHEDULE_UNKNOWN
+
+SCHEDULES = [
+    {"scheduleId": 11, "classroomId": 1, "slotId": 1, "sessionDate": "2025-05-12T00:00:00.000Z"},
+    {"scheduleId": 12, "classroomId": 2, "slotId": 2, "sessionDate": "2025-05-12"},
+]
+SLOTS = [
+    {"slotId": 1, "startTime": "07:00", "endTime": "07:45", "dayOfWeek": "Monday"},
+    {"slotId": 2, "startTime": "08:00", "endTime": "08:45", "dayOfWeek": "Monday"},
+]
+
+def fake_fetcher(path, params=None):
+    """Serve canned responses for the two endpoints"""
+    if path == "schedules/all":
+        return {"success": True, "data": SCHEDULES}
+    return {"success": True, "data": SLOTS}
+
+def test_unknown_before_first_refresh(tmp_path):
+    """Without any cached data the check cannot decide"""
+    cache = ScheduleCache(cache_file=str(tmp_path / "cache.json"), fetcher=fake_fetcher)
+    assert cache.check()["status"] == SCHEDULE_UNKNOWN
+    assert not cache.is_fresh()
+
+def test_active_session_for_classroom(tmp_path):
+    """Only sessions of the device's classroom are considered"""
+    cache = ScheduleCache(classroom_id=1, cache_file=str(tmp_path / "cache.json"),
+                          early_minutes=10, fetcher=fake_fetcher)
+    assert cache.refresh()
+    
+    result = cache.check(datetime(2025, 5, 12, 6, 55))
+    assert result["status"] == SESSION_ACTIVE
+    assert result["scheduleId"] == 11
+    assert result["fresh"]
+    
+    # Tiết 2 thuộc phòng khác
+    assert cache.check(datetime(2025, 5, 12, 8, 10))["status"] == NO_SCHEDULE
+    assert cache.check(datetime(2025, 5, 13, 7, 10))["status"] == NO_SCHEDULE
+
+def test_cache_persists_and_expires(tmp_path):
+    """Cache reloads from disk and expires after max_age"""
+    cache_file = str(tmp_path / "cache.json")
+    ScheduleCache(cache_file=cache_file, fetcher=fake_fetcher).refresh()
+    
+    def offline(path, params=None):
+        raise ConnectionError("offline")
+    
+    reloaded = ScheduleCache(cache_file=cache_file, max_age=3600, fetcher=offline)
+    assert not reloaded.refresh()
+    assert reloaded.check(datetime(2025, 5, 12, 8, 10))["scheduleId"] == 12
+    
+    reloaded.fetched_at -= 7200
+    assert not reloaded.check()["fresh"]
@@ -0,0 +1,106 @@
+import sys
+import urllib.request
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.log.metrics import MetricsRegistry
+from src.core.zensys.streams import StreamStats
+from src.core.capture.frame_pool import FramePool
+from src.core.service import ControlServer, ServiceClient, to_jsonable, redact_config
+
+class FakeCamera:
+    source = SimpleNamespace(describe=lambda: "device:0 640x480@30 MJPG")
+
+    def __init__(self):
+        self.pool = FramePool("test", metrics=MetricsRegistry())
+        self.frame = np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def latest_frame(self):
+        return 1, self.pool.adopt(self.frame), 0.0
+
+    def is_running(self):
+        return True
+
+class FakeSystem:
+    def __init__(self, name):
+        self.stream_name = name
+        self.stream = SimpleNamespace(rfid="keyboard")
+        self.camera = FakeCamera()
+        self.rfid = SimpleNamespace(current_rfid=None)
+        self.processing_paused = False
+        self.verification_in_progress = False
+        self.stream_stats = StreamStats()
+        self.latest_processed_result = {"face_detected": True, "face_name": "alice",
+                                        "face_score": np.float32(0.75),
+                                        "face_bbox": np.array([1, 2, 30, 40], dtype=np.float32)}
+        self.verification_result = None
+        self.scans = []
+
+    def on_rfid_scanned(self, rfid_id):
+        self.scans.append(rfid_id)
+
+def settings(**overrides):
+    values = dict(host="127.0.0.1", port=0, unix_socket=None, gui_api=False,
+                  preview_fps=50, preview_width=32, jpeg_quality=70)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+@pytest.fixture
+def service():
+    systems = [FakeSystem("door1"), FakeSystem("door2")]
+    server = ControlServer(lambda: systems, settings=settings(), metrics=MetricsRegistry())
+    assert server.start()
+    yield server, systems, ServiceClient(port=server.http_port)
+    server.stop()
+
+def test_status_result_and_rfid(service):
+    server, systems, client = service
+    status = client.status()
+    assert status["ready"] and [s["stream"] for s in status["streams"]] == ["door1", "door2"]
+    assert status["streams"][0]["camera_running"]
+
+    result = client.result("door2")
+    assert result["stream"] == "door2"
+    assert result["result"]["face_score"] == pytest.approx(0.75)
+    assert result["result"]["face_bbox"] == [1, 2, 30, 40]
+    with pytest.raises(RuntimeError):
+        client.result("door9")
+
+    client.scan_rfid("0005563074", stream="door2")
+    assert systems[1].scans == ["0005563074"] and systems[0].scans == []
+    assert "counters" in client.metrics()
+
+def test_preview_stream_sends_jpeg(service):
+    server, _, _ = service
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.http_port}/preview.mjpg?fps=20", timeout=5) as response:
+        assert response.headers["Content-Type"].startswith("multipart/x-mixed-replace")
+        assert response.readline() == b"--frame\r\n"
+        assert response.readline() == b"Content-Type: image/jpeg\r\n"
+        length = int(response.readline().split(b":")[1])
+        response.readline()
+        jpeg = response.read(length)
+    assert jpeg[:2] == b"\xff\xd8"  # JPEG SOI
+
+def test_unix_socket(tmp_path):
+    path = str(tmp_path / "control.sock")
+    server = ControlServer(lambda: [], settings=settings(port=None, unix_socket=path), metrics=MetricsRegistry())
+    assert server.start()
+    try:
+        status = ServiceClient(unix_socket=path).status()
+        assert status["ready"] is False and status["streams"] == []
+    finally:
+        server.stop()
+
+def test_jsonable_and_redaction():
+    data = to_jsonable({"img": np.zeros((100, 100)), "v": np.int64(3), "b": b"abc", 1: (1, 2)})
+    assert data == {"img": {"shape": [100, 100], "dtype": "float64"}, "v": 3, "b": {"bytes": 3}, "1": [1, 2]}
+    assert redact_config({"api": {"password": "x", "token": "", "url": "u"}}) == \
+        {"api": {"password": "***", "token": "", "url": "u"}}
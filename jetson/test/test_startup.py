@@ -0,0 +1,107 @@
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.zensys.startup import StartupOrchestrator, STATE_READY, STATE_FAILED
+
+def make_orchestrator(tmp_path, **kwargs):
+    kwargs.setdefault("max_workers", 3)
+    kwargs.setdefault("warmup", True)
+    kwargs.setdefault("write_report", True)
+    return StartupOrchestrator(report_dir=str(tmp_path), **kwargs)
+
+def test_builders_run_concurrently(tmp_path):
+    """Independent builders overlap instead of running one after another"""
+    startup = make_orchestrator(tmp_path)
+    barrier = threading.Barrier(3, timeout=2.0)
+
+    def builder(name):
+        def build():
+            barrier.wait()  # Chỉ qua được khi cả ba builder chạy cùng lúc
+            return name
+        return build
+
+    results = startup.load({name: builder(name) for name in ("a", "b", "c")})
+    assert results == {"a": "a", "b": "b", "c": "c"}
+    assert startup.phases[-1]["parallel"] == ["a", "b", "c"]
+
+def test_warm_up_and_report(tmp_path):
+    """Each component records load/warm-up times and the report is written on finish"""
+    startup = make_orchestrator(tmp_path)
+    states = []
+    startup.add_listener(lambda state: states.append(state["state"]))
+
+    startup.load({"face": lambda: time.sleep(0.01) or "face", "depth": lambda: "depth"})
+    startup.warm_up({"face": lambda: None})
+    with startup.phase("camera"):
+        pass
+    startup.mark_ready("rfid")
+    startup.finish()
+
+    assert startup.is_ready()
+    assert startup.wait(0)
+    assert states[-1] == STATE_READY
+
+    with open(startup.report_path, encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["state"] == STATE_READY
+    assert report["components"]["face"]["load_s"] >= 0.01
+    assert "warmup_s" in report["components"]["face"]
+    assert report["components"]["depth"]["status"] == STATE_READY
+    assert [p["name"] for p in report["phases"]] == ["loading", "warming_up", "camera"]
+
+def test_warm_up_failure_does_not_block(tmp_path):
+    """A failing warm-up is reported but startup still completes"""
+    startup = make_orchestrator(tmp_path)
+    startup.load({"depth": lambda: "depth"})
+
+    def broken():
+        raise ValueError("bad input")
+
+    startup.warm_up({"depth": broken})
+    startup.finish()
+    assert startup.is_ready()
+    assert startup.components["depth"]["status"] == STATE_FAILED
+    assert "bad input" in startup.components["depth"]["error"]
+
+def test_load_failure_marks_startup_failed(tmp_path):
+    """A builder error fails the whole startup and is visible to the GUI"""
+    startup = make_orchestrator(tmp_path)
+
+    def broken():
+        raise RuntimeError("model missing")
+
+    with pytest.raises(RuntimeError):
+        startup.load({"face": broken, "depth": lambda: "depth"})
+    assert startup.state == STATE_FAILED
+    assert startup.wait(0)
+    assert "model missing" in startup.describe()
+    # Lỗi gốc được ném lại cho nơi chờ khởi động (luồng nền không nuốt mất)
+    with pytest.raises(RuntimeError, match="model missing"):
+        startup.result(0)
+
+def test_result_waits_for_startup(tmp_path):
+    """result() times out while starting and returns once startup finished"""
+    startup = make_orchestrator(tmp_path, write_report=False)
+    with pytest.raises(TimeoutError):
+        startup.result(0)
+    startup.finish()
+    assert startup.result(0)
+
+def test_warm_up_disabled(tmp_path):
+    """With warm-up disabled components become ready without running it"""
+    startup = make_orchestrator(tmp_path, warmup=False)
+    calls = []
+    startup.load({"face": lambda: "face"})
+    startup.warm_up({"face": lambda: calls.append(1)})
+    assert calls == []
+    assert startup.components["face"]["status"] == STATE_READY
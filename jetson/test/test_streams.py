@@ -0,0 +1,153 @@
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.log.metrics import MetricsRegistry
+from src.core.zensys.streams import InferenceBatcher, StreamStats
+from src.core.zen_face.main_pipeline import ZenFace
+from model.RetinaFace.retinaface import RetinaFace
+
+class FakeDetSession:
+    """SCRFD 6 output (3 stride, 2 anchor, không kps), output có chiều batch"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="input.1", shape=["batch", 3, "height", "width"])]
+
+    def get_outputs(self):
+        return [SimpleNamespace(name=f"out{i}", shape=["batch", "anchors", 1 if i < 3 else 4]) for i in range(6)]
+
+    def run(self, names, feed):
+        blob = feed["input.1"]
+        self.calls.append(blob.shape[0])
+        n, _, h, w = blob.shape
+        scores, boxes = [], []
+        for stride in (8, 16, 32):
+            k = (h // stride) * (w // stride) * 2
+            # Ảnh sáng có một anchor vượt ngưỡng ở mỗi stride
+            s = np.zeros((n, k, 1), dtype=np.float32)
+            s[blob[:, 0, 0, 0] > 0, stride // 8, 0] = 0.9
+            scores.append(s)
+            boxes.append(np.ones((n, k, 4), dtype=np.float32))
+        return scores + boxes
+
+class FakeAnalyzer:
+    def __init__(self):
+        self.batches = []
+        self.gate = threading.Event()
+
+    def get_batch(self, imgs):
+        self.gate.wait(1.0)
+        self.batches.append(len(imgs))
+        return [[int(img[0, 0])] for img in imgs]
+
+def test_labeled_metrics_and_gauges():
+    metrics = MetricsRegistry(window=16)
+    metrics.inc("frames_processed", labels={"stream": "door1"})
+    metrics.inc("frames_processed", labels={"stream": "door2"})
+    metrics.inc("frames_processed", labels={"stream": "door2"})
+    metrics.observe("frame", 10.0, labels={"stream": "door1"})
+    metrics.register_gauge("stream_fps", lambda: 12.5, labels={"stream": "door1"})
+
+    snap = metrics.snapshot()
+    assert snap["counters"] == {'frames_processed{stream="door1"}': 1, 'frames_processed{stream="door2"}': 2}
+    assert snap["stages"]['frame{stream="door1"}']["count"] == 1
+    assert snap["gauges"] == {'stream_fps{stream="door1"}': 12.5}
+
+    text = metrics.render_prometheus()
+    assert text.count("# TYPE zensys_frames_processed_total counter") == 1
+    assert 'zensys_frames_processed_total{stream="door2"} 2' in text
+    assert 'zensys_stage_duration_seconds_count{stage="frame",stream="door1"} 1' in text
+    assert 'zensys_stream_fps{stream="door1"} 12.5' in text
+
+def test_batcher_groups_concurrent_frames():
+    analyzer = FakeAnalyzer()
+    batcher = InferenceBatcher(analyzer, max_batch=4, max_wait_ms=200, metrics=MetricsRegistry())
+    batcher.start()
+    try:
+        # Luồng batcher bị chặn ở batch đầu nên 3 frame sau được gom thành một batch
+        futures = [batcher.submit(np.full((4, 4), i, dtype=np.uint8)) for i in range(4)]
+        analyzer.gate.set()
+        assert [f.result(2.0) for f in futures] == [[0], [1], [2], [3]]
+    finally:
+        batcher.stop()
+    assert sum(analyzer.batches) == 4
+    assert len(analyzer.batches) < 4
+    with pytest.raises(RuntimeError):
+        batcher.submit(np.zeros((4, 4), dtype=np.uint8))
+
+def test_detect_batch_matches_single_detection():
+    session = FakeDetSession()
+    detector = RetinaFace(session=session)
+    detector.prepare(0, input_size=(64, 64))
+    assert detector.batched and detector.dynamic_batch
+
+    bright = np.full((48, 64, 3), 200, dtype=np.uint8)
+    dark = np.zeros((48, 64, 3), dtype=np.uint8)
+    single = [detector.detect(img) for img in (bright, dark, bright)]
+    session.calls.clear()
+    batch = detector.detect_batch([bright, dark, bright])
+
+    assert session.calls == [3]
+    for (det_a, _), (det_b, _) in zip(single, batch):
+        np.testing.assert_allclose(det_a, det_b)
+    assert batch[0][0].shape[0] > 0 and batch[1][0].shape[0] == 0
+
+def test_get_batch_embeds_all_faces_in_one_call():
+    class FakeDetector:
+        def detect_batch(self, imgs, max_num=0, metric='default'):
+            results = []
+            for img in imgs:
+                if img[0, 0, 0]:
+                    bboxes = np.array([[0, 0, 10, 10, 0.9], [0, 0, 40, 40, 0.8]], dtype=np.float32)
+                    results.append((bboxes, np.zeros((2, 5, 2), dtype=np.float32)))
+                else:
+                    results.append((np.zeros((0, 5), dtype=np.float32), None))
+            return results
+
+    class FakeRecognizer:
+        dynamic_batch = True
+        input_size = (112, 112)
+
+        def __init__(self):
+            self.calls = []
+
+        def get_feat(self, crops):
+            self.calls.append(len(crops))
+            return np.ones((len(crops), 8), dtype=np.float32)
+
+    recognizer = FakeRecognizer()
+    analyzer = ZenFace.__new__(ZenFace)
+    analyzer.det_model = FakeDetector()
+    analyzer.models = {'detection': analyzer.det_model, 'recognition': recognizer}
+    analyzer.metrics = MetricsRegistry()
+
+    face_img = np.full((64, 64, 3), 255, dtype=np.uint8)
+    empty = np.zeros((64, 64, 3), dtype=np.uint8)
+    results = analyzer.get_batch([face_img, empty, face_img])
+
+    assert [len(faces) for faces in results] == [1, 0, 1]
+    assert recognizer.calls == [2]
+    # Chỉ giữ khuôn mặt lớn nhất
+    np.testing.assert_allclose(results[0][0].bbox, [0, 0, 40, 40])
+    assert results[2][0].embedding.shape == (8,)
+
+def test_stream_stats_fps():
+    stats = StreamStats(window=10)
+    for i in range(5):
+        stats.add(20.0, now=i * 0.1)
+    snap = stats.snapshot()
+    assert snap["frames"] == 5
+    assert snap["fps"] == pytest.approx(10.0)
+    assert snap["latency_p50_ms"] == 20.0
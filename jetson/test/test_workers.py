@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.log.metrics import MetricsRegistry
+from src.core.workers import SharedFrameRing, InferenceWorker, WorkerCrashedError
+
+class EchoEngine:
+    """Engine giả chạy trong worker: nhân đôi frame, hoặc thoát đột ngột"""
+
+    def handle(self, method, arrays, params):
+        if method == "double":
+            frame = arrays["frame"]
+            return {"sum": int(frame.sum()), "pid": os.getpid()}, {"frame": frame * 2}
+        if method == "crash":
+            os._exit(3)
+        raise ValueError(f"unknown method {method}")
+
+def test_ring_roundtrip_and_size_limit():
+    ring = SharedFrameRing(slots=2, slot_bytes=1 << 16)
+    try:
+        slot = ring.acquire()
+        frame = np.arange(48, dtype=np.uint8).reshape(4, 4, 3)
+        depth = np.linspace(0, 1, 16, dtype=np.float32).reshape(4, 4)
+        layout = ring.write(slot, {"frame": frame, "depth": depth})
+        arrays = ring.read(slot, layout)
+        np.testing.assert_array_equal(arrays["frame"], frame)
+        np.testing.assert_array_equal(arrays["depth"], depth)
+        # Mảng thứ hai được căn 64 byte
+        assert layout[1][1] % 64 == 0
+
+        with pytest.raises(ValueError):
+            ring.write(slot, {"frame": np.zeros(1 << 17, dtype=np.uint8)})
+        ring.acquire()
+        with pytest.raises(TimeoutError):
+            ring.acquire(timeout=0.01)
+    finally:
+        ring.close()
+
+def test_worker_roundtrip_errors_and_restart():
+    metrics = MetricsRegistry()
+    worker = InferenceWorker("echo", EchoEngine, slots=2, slot_mb=1, restart_delay=0.1,
+                             start_timeout=60, metrics=metrics)
+    worker.start()
+    try:
+        frame = np.full((8, 8, 3), 3, dtype=np.uint8)
+        payload, outputs = worker.call("double", {"frame": frame}, timeout=10)
+        assert payload["sum"] == 8 * 8 * 3 * 3
+        assert payload["pid"] != os.getpid()
+        np.testing.assert_array_equal(outputs["frame"], frame * 2)
+
+        with pytest.raises(RuntimeError, match="unknown method"):
+            worker.call("bogus", {}, timeout=10)
+
+        # Worker chết: request đang chờ bị hủy, worker mới được khởi động
+        with pytest.raises(WorkerCrashedError):
+            worker.call("crash", {}, timeout=10)
+        deadline = time.time() + 60
+        while not worker.is_alive() and time.time() < deadline:
+            time.sleep(0.1)
+        payload, _ = worker.call("double", {"frame": frame}, timeout=10)
+        assert payload["sum"] == 8 * 8 * 3 * 3
+        assert worker.restarts == 1
+        assert metrics.snapshot()["counters"]['worker_restarts{worker="echo"}'] == 1
+    finally:
+        worker.stop()
+    with pytest.raises(RuntimeError):
+        worker.submit("double", {"frame": frame})
@@ -0,0 +1,140 @@
+"""
+Phân tích chất lượng nhận diện và độ trễ tìm kiếm trên chính gallery của thiết bị:
+- Phân bố điểm genuine (cùng người) / impostor (khác người) trên mọi cặp embedding
+- ROC, EER và ngưỡng EER; FAR/FRR tại recognition.threshold hiện tại và ngưỡng đạt --target-far
+- Embedding lệch khỏi danh tính của nó (nghi ảnh xấu/gắn nhầm thư mục) và cặp trùng lặp
+- Độ trễ tìm kiếm của index ở kích thước hiện tại (IndexFlatIP, tùy chọn so với HNSW)
+
+Ma trận tương đồng được tính theo khối (src/core/faiss_manager/analysis.py).
+
+Usage:
+    python tools/gallery_analysis.py
+    python tools/gallery_analysis.py --gallery data/gallery --json gallery_report.json
+    python tools/gallery_analysis.py --db assets/database --hnsw 32 --queries 2000
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.config_utils import config
+from src.core.faiss_manager.analysis import analyze, database_embeddings, search_latency
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Gallery recognition-quality and search latency analysis")
+    parser.add_argument("--db", help="Existing database directory (default: config db_path)")
+    parser.add_argument("--gallery", help="Embed this gallery instead of loading the database")
+    parser.add_argument("--gpu", action="store_true", help="Allow CUDA when embedding --gallery")
+    parser.add_argument("--threshold", type=float, default=config.rec_threshold,
+                        help="Recognition threshold to report FAR/FRR at (default: recognition.threshold)")
+    parser.add_argument("--target-far", type=float, default=1e-3, help="Report the lowest threshold reaching this FAR")
+    parser.add_argument("--block", type=int, default=512, help="Rows per similarity block (peak memory ~ block x n x 32 B)")
+    parser.add_argument("--duplicate", type=float, default=0.995, help="Cosine at or above which a pair is a duplicate")
+    parser.add_argument("--outlier-z", type=float, default=3.0, help="Z-score within an identity that flags an outlier")
+    parser.add_argument("--queries", type=int, default=1000, help="Search queries for the latency benchmark")
+    parser.add_argument("--hnsw", type=int, default=0, help="Also benchmark IndexHNSWFlat with this M (0 = off)")
+    parser.add_argument("--top", type=int, default=20, help="Flagged embeddings / duplicates to print")
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    return parser.parse_args()
+
+def load_face_db(args):
+    from src.core.faiss_manager import FaceDatabase
+    if args.gallery:
+        from src.core.zensys.face_recognition_manager import FaceRecognitionManager
+        face_recognition = FaceRecognitionManager(ctx_id=0 if args.gpu else -1)
+        face_db = face_recognition.face_db
+        index, name_dict, _ = face_db.build_index(face_recognition.face_analyzer, args.gallery)
+        if index is None:
+            return None
+        face_db.swap(index, name_dict, face_db.model_stamp)
+        return face_db
+    face_db = FaceDatabase()
+    return face_db if face_db.load_database(args.db or config.db_path) else None
+
+def latency_queries(embeddings, count, seed=0):
+    """Embedding của gallery có nhiễu nhỏ, chuẩn hóa lại (gần với truy vấn thật hơn vector ngẫu nhiên)"""
+    rng = np.random.default_rng(seed)
+    queries = embeddings[rng.integers(0, len(embeddings), size=count)]
+    queries = queries + rng.normal(0, 0.02, size=queries.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def benchmark_indexes(face_db, embeddings, args):
+    import faiss
+    queries = latency_queries(embeddings, args.queries)
+    report = {"flat": search_latency(face_db.index, queries)}
+    if args.hnsw:
+        t0 = time.perf_counter()
+        hnsw = faiss.IndexHNSWFlat(embeddings.shape[1], args.hnsw, faiss.METRIC_INNER_PRODUCT)
+        hnsw.add(embeddings)
+        build_s = time.perf_counter() - t0
+        _, flat_top = face_db.index.search(queries, 1)
+        _, hnsw_top = hnsw.search(queries, 1)
+        report["hnsw"] = {**search_latency(hnsw, queries), "M": args.hnsw, "build_s": round(build_s, 3),
+                          "top1_agreement": round(float(np.mean(flat_top[:, 0] == hnsw_top[:, 0])), 4)}
+    return report
+
+def print_report(report, top):
+    print(f"\nEmbeddings: {report['embeddings']}   identities: {report['identities']}")
+    print(f"\n{'scores':<10}{'pairs':>12}{'mean':>8}{'p1':>8}{'p50':>8}{'p99':>8}")
+    for name in ("genuine", "impostor"):
+        s = report[name]
+        if s["count"]:
+            print(f"{name:<10}{s['count']:>12}{s['mean']:>8.3f}{s['p1']:>8.3f}{s['p50']:>8.3f}{s['p99']:>8.3f}")
+    print(f"\nEER {report['eer']:.4f} at threshold {report['eer_threshold']:.3f}")
+    print(f"At threshold {report['threshold']:.3f}: FAR {report['far_at_threshold']:.6f}  "
+          f"FRR {report['frr_at_threshold']:.6f}")
+    target = report["threshold_for_target_far"]
+    print(f"Lowest threshold with FAR <= {report['target_far']}: {target if target is not None else '-'}")
+
+    flagged = report["flagged"]
+    print(f"\nFlagged embeddings: {len(flagged)}")
+    for item in sorted(flagged, key=lambda f: f["genuine_mean"])[:top]:
+        print(f"  #{item['index']:<6} {item['label']:<24} {','.join(item['reason']):<24} "
+              f"own {item['genuine_mean']:.3f}  nearest {item['nearest_label']} {item['nearest_score']:.3f}")
+    duplicates = report["duplicates"]
+    print(f"\nDuplicate pairs: {len(duplicates)}")
+    for item in sorted(duplicates, key=lambda d: -d["score"])[:top]:
+        note = "" if item["label_a"] == item["label_b"] else "  (different identities)"
+        print(f"  #{item['a']} {item['label_a']} ~ #{item['b']} {item['label_b']}: {item['score']:.4f}{note}")
+
+    print(f"\n{'index':<8}{'ntotal':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'batch/q':>9}")
+    for name, stats in report["search"].items():
+        print(f"{name:<8}{stats['ntotal']:>8}{stats['single_p50_ms']:>9.3f}{stats['single_p95_ms']:>9.3f}"
+              f"{stats['single_p99_ms']:>9.3f}{stats['batch_ms_per_query']:>9.4f}")
+    if "hnsw" in report["search"]:
+        hnsw = report["search"]["hnsw"]
+        print(f"HNSW M={hnsw['M']}: build {hnsw['build_s']}s, top-1 agreement with flat {hnsw['top1_agreement']:.4f}")
+
+def main():
+    args = parse_args()
+    face_db = load_face_db(args)
+    if face_db is None:
+        print("Face database is empty: pass --gallery or build the database first")
+        return 1
+    embeddings, labels = database_embeddings(face_db)
+    print(f"Analyzing {len(labels)} embeddings from {args.gallery or args.db or config.db_path}")
+
+    t0 = time.perf_counter()
+    report = analyze(embeddings, labels, args.threshold, block_size=args.block,
+                     duplicate_threshold=args.duplicate, outlier_z=args.outlier_z, target_far=args.target_far)
+    report["analysis_s"] = round(time.perf_counter() - t0, 3)
+    report["search"] = benchmark_indexes(face_db, embeddings, args)
+    print_report(report, args.top)
+    print(f"\nAll-pairs analysis took {report['analysis_s']}s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Report written to {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
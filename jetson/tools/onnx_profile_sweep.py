@@ -0,0 +1,162 @@
+"""
+Đo thời gian suy luận của các model ONNX với các profile SessionOptions
+(config.onnx_runtime.profiles) và một lưới số luồng intra/inter-op, rồi báo
+profile nhanh nhất cho CPU của máy hiện tại.
+
+Usage:
+    python tools/onnx_profile_sweep.py
+    python tools/onnx_profile_sweep.py --model assets/weights/retinaface.onnx --runs 50
+    python tools/onnx_profile_sweep.py --providers CUDAExecutionProvider CPUExecutionProvider --json sweep.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+import numpy as np
+import onnxruntime
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.config_utils import config
+from model.model_loader_onnx.model_zoo import DEFAULT_SESSION_PROFILE, get_session_profile, build_session_options
+
+def resolve_input_shape(session):
+    """Replace dynamic dimensions: batch -> 1, spatial -> det_size or 112 for recognition"""
+    shape = list(session.get_inputs()[0].shape)
+    is_detection = len(session.get_outputs()) >= 5
+    spatial = config.det_size if is_detection else (112, 112)
+    resolved = []
+    for i, dim in enumerate(shape):
+        if isinstance(dim, int) and dim > 0:
+            resolved.append(dim)
+        elif i == 0:
+            resolved.append(1)
+        elif i == len(shape) - 2:
+            resolved.append(int(spatial[1]))
+        elif i == len(shape) - 1:
+            resolved.append(int(spatial[0]))
+        else:
+            resolved.append(3)
+    return resolved
+
+def candidate_profiles():
+    """Named profiles from config plus a grid of thread settings"""
+    candidates = {}
+    for name in config.onnx_runtime.profiles:
+        candidates[name] = get_session_profile(name)
+
+    cpu_count = os.cpu_count() or 1
+    threads = sorted({1, 2, 4, cpu_count} & set(range(1, cpu_count + 1)))
+    for intra in threads:
+        profile = dict(DEFAULT_SESSION_PROFILE, intra_op_num_threads=intra, inter_op_num_threads=1)
+        candidates[f"seq_intra{intra}"] = profile
+    if cpu_count >= 2:
+        for intra in threads:
+            profile = dict(DEFAULT_SESSION_PROFILE, intra_op_num_threads=intra,
+                           inter_op_num_threads=2, execution_mode='parallel')
+            candidates[f"par_intra{intra}_inter2"] = profile
+    return candidates
+
+def benchmark(model_path, profile, providers, runs, warmup):
+    """
+    Run `runs` timed inferences after `warmup` untimed ones
+
+    Returns:
+        dict: load time and latency statistics in milliseconds
+    """
+    start = time.perf_counter()
+    session = onnxruntime.InferenceSession(model_path, sess_options=build_session_options(profile),
+                                           providers=providers)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    input_name = session.get_inputs()[0].name
+    blob = np.random.rand(*resolve_input_shape(session)).astype(np.float32)
+
+    for _ in range(warmup):
+        session.run(None, {input_name: blob})
+
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        session.run(None, {input_name: blob})
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    timings.sort()
+    return {
+        "load_ms": round(load_ms, 1),
+        "median_ms": round(statistics.median(timings), 2),
+        "p90_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.9))], 2),
+        "mean_ms": round(statistics.fmean(timings), 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep ONNX Runtime session profiles and report the fastest")
+    parser.add_argument("--model", action="append", help="ONNX file (default: detection and recognition models from config)")
+    parser.add_argument("--providers", nargs="+", default=["CPUExecutionProvider"], help="Execution providers")
+    parser.add_argument("--runs", type=int, default=30, help="Timed runs per profile")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed runs per profile")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    models = args.model or [config.detection_model, config.recognition_model]
+    candidates = candidate_profiles()
+    named = set(config.onnx_runtime.profiles)
+    onnxruntime.set_default_logger_severity(3)
+
+    print(f"onnxruntime {onnxruntime.__version__}, providers={args.providers}, cpu_count={os.cpu_count()}")
+    results = {}
+    for model_path in models:
+        if not os.path.exists(model_path):
+            print(f"Skipping missing model: {model_path}")
+            continue
+        print(f"\n=== {os.path.basename(model_path)} ===")
+        print(f"{'profile':<24}{'median':>10}{'p90':>10}{'load':>10}")
+        model_results = {}
+        for name, profile in candidates.items():
+            try:
+                stats = benchmark(model_path, profile, args.providers, args.runs, args.warmup)
+            except Exception as e:
+                print(f"{name:<24}  failed: {e}")
+                continue
+            model_results[name] = dict(stats, profile=profile)
+            print(f"{name:<24}{stats['median_ms']:>9.2f}ms{stats['p90_ms']:>8.2f}ms{stats['load_ms']:>8.0f}ms")
+        results[model_path] = model_results
+
+    # Tổng median của tất cả model cho từng profile
+    totals = {}
+    for model_results in results.values():
+        for name, stats in model_results.items():
+            totals[name] = totals.get(name, 0.0) + stats["median_ms"]
+    complete = {name: total for name, total in totals.items()
+                if all(name in r for r in results.values())}
+    if not complete:
+        print("\nNo profile completed on every model")
+        return 1
+
+    best = min(complete, key=complete.get)
+    best_named = min((n for n in complete if n in named), key=complete.get, default=None)
+    print(f"\nFastest overall: {best} ({complete[best]:.2f} ms total median)")
+    if best_named:
+        print(f"Fastest configured profile: {best_named} ({complete[best_named]:.2f} ms)")
+        print(f"  -> set onnx_runtime.profile: \"{best_named}\" in config.yaml")
+    if best not in named:
+        print("  Settings for the fastest candidate (add as a profile in config.yaml):")
+        for key, value in list(results.values())[0][best]["profile"].items():
+            print(f"    {key}: {json.dumps(value)}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"providers": args.providers, "results": results, "totals": complete,
+                       "best": best, "best_configured": best_named}, f, indent=2)
+        print(f"Results written to {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
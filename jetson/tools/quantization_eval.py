@@ -0,0 +1,193 @@
+"""
+So sánh các biến thể FP16 / INT8 với model FP32 trên gallery local:
+- Detection recall: tỉ lệ khuôn mặt FP32 phát hiện được mà biến thể cũng phát hiện (IoU >= 0.5)
+- Embedding drift: cosine giữa embedding FP32 và embedding biến thể trên cùng ảnh đã căn chỉnh
+- Identification accuracy: top-1 leave-one-out trên gallery, so với FP32
+- Thời gian suy luận trung bình
+
+Trả về exit code 1 nếu một biến thể vượt ngưỡng cho phép.
+
+Usage:
+    python tools/quantization_eval.py
+    python tools/quantization_eval.py --precision int8_static --json eval.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.config_utils import config
+from model.utils import face_align
+from model.model_loader_onnx import model_zoo
+from model.model_loader_onnx.model_zoo import MODEL_PRECISIONS, get_variant_path
+from model.model_loader_onnx.quantization import iter_gallery
+
+def iou(a, b):
+    """IoU of two [x1, y1, x2, y2] boxes"""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+def load_pipeline(precision):
+    """Detector + recognizer for a precision; missing variants fall back to FP32"""
+    det_model = model_zoo.get_model(config.detection_model, precision=precision, cache_optimized=False)
+    det_model.prepare(0, input_size=config.det_size, det_thresh=config.det_threshold)
+    rec_model = model_zoo.get_model(config.recognition_model, precision=precision, cache_optimized=False)
+    return det_model, rec_model
+
+def largest(bboxes):
+    areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+    return int(np.argmax(areas))
+
+def embed(rec_model, img, kps):
+    aimg = face_align.norm_crop(img, landmark=kps, image_size=rec_model.input_size[0])
+    feat = rec_model.get_feat(aimg).flatten()
+    return feat / (np.linalg.norm(feat) + 1e-12)
+
+def run_pipeline(det_model, rec_model, samples):
+    """
+    Detect + embed every gallery image
+
+    Returns:
+        list: per-sample dict {bboxes, kps, embedding, det_ms, rec_ms}
+    """
+    results = []
+    for person, img in samples:
+        t0 = time.perf_counter()
+        bboxes, kpss = det_model.detect(img, max_num=0)
+        det_ms = (time.perf_counter() - t0) * 1000
+        entry = {"bboxes": bboxes, "kps": None, "embedding": None, "det_ms": det_ms, "rec_ms": None}
+        if bboxes.shape[0] > 0 and kpss is not None:
+            idx = largest(bboxes)
+            entry["kps"] = kpss[idx]
+            t0 = time.perf_counter()
+            entry["embedding"] = embed(rec_model, img, kpss[idx])
+            entry["rec_ms"] = (time.perf_counter() - t0) * 1000
+        results.append(entry)
+    return results
+
+def identification_accuracy(labels, embeddings):
+    """Top-1 leave-one-out accuracy over people with at least two embedded images"""
+    idx = [i for i, (label, emb) in enumerate(zip(labels, embeddings))
+           if emb is not None and label != "Unknown"]
+    counts = {}
+    for i in idx:
+        counts[labels[i]] = counts.get(labels[i], 0) + 1
+    queries = [i for i in idx if counts[labels[i]] >= 2]
+    if not queries:
+        return None
+    matrix = np.stack([embeddings[i] for i in idx])
+    correct = 0
+    for q in queries:
+        sims = matrix @ embeddings[q]
+        sims[idx.index(q)] = -np.inf
+        correct += labels[idx[int(np.argmax(sims))]] == labels[q]
+    return correct / len(queries)
+
+def compare(samples, labels, baseline, variant, rec_variant):
+    """Metrics of a variant against the FP32 pipeline results"""
+    matched = total = 0
+    drifts = []
+    for (person, img), base, var in zip(samples, baseline, variant):
+        for box in base["bboxes"]:
+            total += 1
+            if any(iou(box[:4], other[:4]) >= 0.5 for other in var["bboxes"]):
+                matched += 1
+        if base["kps"] is not None:
+            # Cùng ảnh căn chỉnh (landmark FP32) để tách sai lệch của recognizer
+            drifts.append(float(np.dot(base["embedding"], embed(rec_variant, img, base["kps"]))))
+
+    def mean_ms(results, key):
+        values = [r[key] for r in results if r[key] is not None]
+        return round(float(np.mean(values)), 2) if values else None
+
+    drifts = np.array(drifts) if drifts else np.array([np.nan])
+    return {
+        "detection_recall": round(matched / total, 4) if total else None,
+        "cosine_mean": round(float(np.nanmean(drifts)), 4),
+        "cosine_p5": round(float(np.nanpercentile(drifts, 5)), 4),
+        "cosine_min": round(float(np.nanmin(drifts)), 4),
+        "identification_accuracy": identification_accuracy(labels, [r["embedding"] for r in variant]),
+        "det_ms": mean_ms(variant, "det_ms"),
+        "rec_ms": mean_ms(variant, "rec_ms")
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy regression check of quantized models against FP32")
+    parser.add_argument("--precision", nargs="+", choices=[p for p in MODEL_PRECISIONS if p != "fp32"],
+                        help="Variants to evaluate (default: every variant found on disk)")
+    parser.add_argument("--gallery", default=config.gallery_path)
+    parser.add_argument("--min-recall", type=float, default=0.99, help="Min detection recall vs FP32")
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="Min mean cosine to FP32 embeddings")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01, help="Max identification accuracy drop")
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    precisions = args.precision or [
+        p for p in MODEL_PRECISIONS if p != "fp32" and any(
+            os.path.exists(get_variant_path(src, p)) for src in (config.detection_model, config.recognition_model))
+    ]
+    if not precisions:
+        print("No quantized variants found. Run tools/quantize_models.py first.")
+        return 1
+
+    samples, labels = [], []
+    for person, path in iter_gallery(args.gallery, include_unknown=True):
+        img = cv2.imread(path)
+        if img is not None:
+            samples.append((person, img))
+            labels.append(person)
+    print(f"Evaluating on {len(samples)} gallery images from {args.gallery}")
+
+    det_base, rec_base = load_pipeline("fp32")
+    baseline = run_pipeline(det_base, rec_base, samples)
+    report = {"fp32": compare(samples, labels, baseline, baseline, rec_base)}
+
+    for precision in precisions:
+        det_var, rec_var = load_pipeline(precision)
+        variant = run_pipeline(det_var, rec_var, samples)
+        report[precision] = compare(samples, labels, baseline, variant, rec_var)
+
+    base_acc = report["fp32"]["identification_accuracy"]
+    print(f"\n{'variant':<14}{'recall':>8}{'cos mean':>10}{'cos p5':>8}{'id acc':>8}{'det ms':>8}{'rec ms':>8}  verdict")
+    regressions = False
+    for name, metrics in report.items():
+        problems = []
+        if name != "fp32":
+            if metrics["detection_recall"] is not None and metrics["detection_recall"] < args.min_recall:
+                problems.append("recall")
+            if metrics["cosine_mean"] < args.min_cosine:
+                problems.append("cosine")
+            acc = metrics["identification_accuracy"]
+            if base_acc is not None and acc is not None and base_acc - acc > args.max_accuracy_drop:
+                problems.append("accuracy")
+        metrics["regressions"] = problems
+        regressions = regressions or bool(problems)
+        verdict = "baseline" if name == "fp32" else ("FAIL: " + ", ".join(problems) if problems else "ok")
+        fmt = lambda v, spec: format(v, spec) if v is not None else "-"
+        print(f"{name:<14}{fmt(metrics['detection_recall'], '>8.3f')}{metrics['cosine_mean']:>10.4f}"
+              f"{metrics['cosine_p5']:>8.4f}{fmt(metrics['identification_accuracy'], '>8.3f')}"
+              f"{fmt(metrics['det_ms'], '>8.1f')}{fmt(metrics['rec_ms'], '>8.1f')}  {verdict}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"images": len(samples), "thresholds": {
+                "min_recall": args.min_recall, "min_cosine": args.min_cosine,
+                "max_accuracy_drop": args.max_accuracy_drop}, "results": report}, f, indent=2)
+        print(f"Report written to {args.json}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Tạo các biến thể FP16 / INT8 của RetinaFace và AdaFace cạnh file FP32
+(<tên>.<precision>.onnx). INT8 tĩnh được hiệu chuẩn trên ảnh gallery local.
+
+Sau khi tạo, kiểm tra độ chính xác bằng tools/quantization_eval.py rồi bật
+bằng weights.precision trong config.yaml.
+
+Usage:
+    python tools/quantize_models.py
+    python tools/quantize_models.py --modes int8_static --calib-images 300
+    python tools/quantize_models.py --task recognition --modes fp16 int8_dynamic
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.config_utils import config
+from model.model_loader_onnx import model_zoo
+from model.model_loader_onnx.quantization import (
+    load_gallery_images, detection_calibration_blobs, recognition_calibration_blobs,
+    quantize_fp16, quantize_int8_dynamic, quantize_int8_static
+)
+
+def load_baseline():
+    """FP32 detector and recognizer, without the optimized-graph cache"""
+    det_model = model_zoo.get_model(config.detection_model, precision="fp32", cache_optimized=False)
+    det_model.prepare(0, input_size=config.det_size, det_thresh=config.det_threshold)
+    rec_model = model_zoo.get_model(config.recognition_model, precision="fp32", cache_optimized=False)
+    return det_model, rec_model
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate FP16/INT8 variants of the ONNX models")
+    parser.add_argument("--task", choices=["detection", "recognition", "all"], default="all")
+    parser.add_argument("--modes", nargs="+", choices=["fp16", "int8_dynamic", "int8_static"],
+                        default=["fp16", "int8_dynamic", "int8_static"])
+    parser.add_argument("--gallery", default=config.gallery_path, help="Gallery used for calibration")
+    parser.add_argument("--calib-images", type=int, default=200, help="Max calibration images")
+    parser.add_argument("--no-per-channel", action="store_true", help="Per-tensor weights for static INT8")
+    args = parser.parse_args()
+
+    tasks = ["detection", "recognition"] if args.task == "all" else [args.task]
+    sources = {"detection": config.detection_model, "recognition": config.recognition_model}
+
+    calibration = {}
+    if "int8_static" in args.modes:
+        images = load_gallery_images(args.gallery, limit=args.calib_images)
+        print(f"Loaded {len(images)} calibration images from {args.gallery}")
+        det_model, rec_model = load_baseline()
+        if "detection" in tasks:
+            calibration["detection"] = detection_calibration_blobs(images, det_model)
+        if "recognition" in tasks:
+            calibration["recognition"] = recognition_calibration_blobs(images, det_model, rec_model)
+        for task, blobs in calibration.items():
+            print(f"  {task}: {len(blobs)} calibration samples")
+
+    failed = False
+    for task in tasks:
+        src = sources[task]
+        for mode in args.modes:
+            print(f"\n[{task}] {mode} <- {src}")
+            try:
+                if mode == "fp16":
+                    dst = quantize_fp16(src)
+                elif mode == "int8_dynamic":
+                    dst = quantize_int8_dynamic(src)
+                else:
+                    dst = quantize_int8_static(src, calibration[task], per_channel=not args.no_per_channel)
+                print(f"  saved: {dst} ({Path(dst).stat().st_size / 1e6:.1f} MB, "
+                      f"FP32 {Path(src).stat().st_size / 1e6:.1f} MB)")
+            except ImportError as e:
+                print(f"  skipped, missing dependency: {e}")
+            except Exception as e:
+                print(f"  failed: {e}")
+                failed = True
+
+    print("\nNext: python tools/quantization_eval.py to compare against FP32")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
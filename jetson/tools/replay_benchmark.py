@@ -0,0 +1,213 @@
+"""
+Benchmark offline pipeline ZenSys: phát lại file video hoặc thư mục ảnh cùng
+kịch bản quẹt thẻ RFID qua ZenFace, FaceDatabase, DepthManager, FaceAntiSpoofing
+và logic xác thực, không cần camera, đầu đọc RFID hay giao diện.
+
+Báo cáo độ trễ theo từng bước (p50/p95/p99), throughput, bộ nhớ đỉnh (RSS) và
+độ chính xác nhận diện so với nhãn, lưu ra JSON để so sánh với baseline.
+Mặc định chạy trên CPU.
+
+Nhãn: thư mục ảnh theo cấu trúc gallery (<người>/<ảnh>) dùng tên thư mục con,
+hoặc --labels (xem src/core/zensys/replay.py:load_labels).
+
+Usage:
+    python tools/replay_benchmark.py data/replay/frames --gallery data/gallery
+    python tools/replay_benchmark.py clip.mp4 --labels clip_labels.json --rfid-timeline swipes.json
+    python tools/replay_benchmark.py clip.mp4 --no-depth --baseline baseline.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import platform
+import subprocess
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline replay benchmark of the recognition pipeline")
+    parser.add_argument("source", help="Video file or image folder")
+    parser.add_argument("--labels", help="Ground-truth labels JSON (default: image sub-folder names)")
+    parser.add_argument("--rfid-timeline", help="JSON list of RFID swipes {rfid, frame|time, expect?}")
+    parser.add_argument("--rfid-db", help="RFID id -> name JSON (default: data.rfid_file)")
+    parser.add_argument("--gallery", help="Build a temporary FAISS index from this gallery "
+                                          "(default: load the existing database)")
+    parser.add_argument("--db", help="Existing database directory (default: config db_path)")
+    parser.add_argument("--no-depth", action="store_true", help="Skip MiDaS and anti-spoofing")
+    parser.add_argument("--fps", type=float, help="Replay rate for timestamps (default: video FPS, 30 for images)")
+    parser.add_argument("--max-frames", type=int)
+    parser.add_argument("--warmup", type=int, default=5, help="Frames excluded from the statistics")
+    parser.add_argument("--rfid-timeout", type=float, default=10.0, help="Seconds a swipe waits for a face")
+    parser.add_argument("--gpu", action="store_true", help="Allow CUDA (default: CPU only)")
+    parser.add_argument("--output", help="Report JSON (default: data/benchmarks/replay_<time>.json)")
+    parser.add_argument("--baseline", help="Compare against a previous report")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Allowed latency/fps/memory regression vs baseline (fraction)")
+    return parser.parse_args()
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def build_pipeline(args, timer):
+    """Các thành phần của ZenSys, dựng trực tiếp để tránh RFID listener, attendance và API"""
+    from utils.config_utils import config
+    from model.RFID.rfid import RFID
+    from model.RFID.identity_store import IdentityStore
+    from src.core.zensys.face_recognition_manager import FaceRecognitionManager
+    from src.core.zensys.replay import ReplayPipeline
+
+    ctx_id = 0 if args.gpu else -1
+    with timer.stage("load_face_recognition"):
+        face_recognition = FaceRecognitionManager(ctx_id=ctx_id)
+
+    face_db = face_recognition.face_db
+    with timer.stage("load_face_database"):
+        if args.gallery:
+            # Index tạm, không ghi đè database của thiết bị
+            db_dir = tempfile.mkdtemp(prefix="replay_db_")
+            ok = face_db.process_gallery(face_recognition.face_analyzer, args.gallery, db_dir)
+        else:
+            ok = face_db.load_database(args.db or config.db_path)
+    if not ok:
+        raise RuntimeError("Face database is empty: pass --gallery or build the database first")
+
+    depth = anti_spoofing = None
+    if not args.no_depth:
+        from src.core.zensys.depth_manager import DepthManager
+        from src.core.zensys.anti_spoofing_manager import AntiSpoofingManager
+        with timer.stage("load_depth"):
+            depth = DepthManager(model_type="MidasSmall")
+            anti_spoofing = AntiSpoofingManager()
+
+    if args.rfid_db:
+        # Thẻ của bộ replay trong store tạm, không đụng identity store của thiết bị
+        identities = IdentityStore()
+        with open(args.rfid_db, "r", encoding="utf-8") as f:
+            identities.import_mapping(json.load(f))
+        rfid_system = RFID(identities)
+    else:
+        rfid_system = RFID()
+
+    return ReplayPipeline(face_recognition.face_analyzer, face_db, rfid_system,
+                          depth=depth, anti_spoofing=anti_spoofing, timer=timer,
+                          rfid_timeout=args.rfid_timeout)
+
+def print_report(report):
+    print(f"\n{'stage':<16}{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+    for stage, stats in report["stages"].items():
+        if not stats["count"]:
+            continue
+        print(f"{stage:<16}{stats['count']:>7}{stats['mean_ms']:>9.2f}{stats['p50_ms']:>9.2f}"
+              f"{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}{stats['max_ms']:>9.2f}")
+    throughput = report["throughput"]
+    print(f"\nThroughput: {throughput['fps']:.2f} fps ({throughput['frames']} frames in {throughput['wall_s']:.1f}s)")
+    print(f"Peak RSS: {report['memory']['peak_rss_mb']} MB (after load: {report['memory']['after_load_rss_mb']} MB)")
+    accuracy = report["accuracy"]
+    if accuracy["labeled_frames"]:
+        print(f"Accuracy: {accuracy['accuracy']} on {accuracy['detected_frames']}/{accuracy['labeled_frames']} "
+              f"labeled frames with a face (false accept {accuracy['false_accept_rate']}, "
+              f"miss {accuracy['miss_rate']})")
+    verification = report["verification"]
+    if verification["events"]:
+        print(f"Verifications: {verification['by_status']}"
+              + (f", expected {verification['expected_correct']}/{verification['expected_checked']}"
+                 if verification["expected_checked"] else ""))
+
+def main():
+    args = parse_args()
+    if not args.gpu:
+        # Phải đặt trước khi import torch / onnxruntime
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
+
+    from utils.config_utils import config
+    from src.core.zensys.replay import (
+        StageTimer, RfidTimeline, AccuracyCounter, iter_replay_frames, load_labels,
+        peak_rss_mb, verification_summary, compare_reports
+    )
+
+    timer = StageTimer()
+    pipeline = build_pipeline(args, timer)
+    load_stages = {stage: round(values[0], 1) for stage, values in timer.samples.items()}
+    timer.samples.clear()
+    after_load_rss = peak_rss_mb()
+
+    timeline = RfidTimeline.load(args.rfid_timeline) if args.rfid_timeline else RfidTimeline()
+    labels = load_labels(args.labels)
+    accuracy = AccuracyCounter()
+
+    frames = 0
+    index = -1
+    started = None
+    for index, timestamp, frame, label in iter_replay_frames(args.source, labels, args.fps, args.max_frames):
+        measuring = index >= args.warmup
+        timer.enabled = measuring
+        if measuring and started is None:
+            started = time.perf_counter()
+        for event in timeline.due(index, timestamp):
+            pipeline.scan(event, index, timestamp)
+        result = pipeline.process(frame, index, timestamp)
+        if measuring:
+            frames += 1
+            accuracy.add(label, result.get("face_name"))
+    pipeline.finish(index + 1)
+    wall_s = time.perf_counter() - started if started is not None else 0.0
+
+    if frames == 0:
+        print(f"No frames measured (source has {index + 1} frames, warm-up {args.warmup})")
+        return 1
+
+    report = {
+        "meta": {
+            "source": os.path.abspath(args.source),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "git_revision": git_revision(),
+            "platform": platform.platform(),
+            "device": "gpu" if args.gpu else "cpu",
+            "depth": not args.no_depth,
+            "warmup_frames": args.warmup,
+            "precision": config.model_precision,
+            "det_size": list(config.det_size),
+            "adaptive_detection": bool(config.detection_adaptive.enable)
+        },
+        "load_ms": load_stages,
+        "stages": timer.summary(),
+        "throughput": {"frames": frames, "wall_s": round(wall_s, 3),
+                       "fps": round(frames / wall_s, 3) if wall_s > 0 else 0.0},
+        "memory": {"after_load_rss_mb": after_load_rss, "peak_rss_mb": peak_rss_mb()},
+        "accuracy": accuracy.summary(),
+        "verification": verification_summary(pipeline.verifications),
+        "verifications": pipeline.verifications
+    }
+    print_report(report)
+
+    output = args.output or os.path.join(
+        config.base_path, "data", "benchmarks", f"replay_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    print(f"\nReport written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.max_regression)
+        if regressions:
+            print(f"\nRegressions vs {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions vs {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 import os
 import yaml
+import threading
 from typing import Dict, Any
 from types import SimpleNamespace
 
@@ -21,14 +22,35 @@ class ZenConfig:
         self._setup_paths()
         self._create_directories()
         
-    def _load_config(self) -> Dict[str, Any]:
-        """Load config from YAML file"""
+    @property
+    def config_path(self):
         current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        config_path = os.path.join(current_dir, "assets", "configs", "config.yaml")
+        return os.path.join(current_dir, "assets", "configs", "config.yaml")
         
-        with open(config_path, 'r') as f:
+    def _load_config(self) -> Dict[str, Any]:
+        """Load config from YAML file"""
+        with open(self.config_path, 'r') as f:
             config = yaml.safe_load(f)
         return config
+    
+    def reload(self):
+        """
+        Đọc lại config.yaml. Các property đọc config_data mỗi lần gọi nên giá trị
+        mới có hiệu lực ngay với code đọc config lúc chạy; thành phần đã giữ giá trị
+        cũ được cập nhật qua ZenSys.apply_config().
+        
+        Returns:
+            list: Tên các section cấp cao nhất đã thay đổi
+            
+        Raises:
+            yaml.YAMLError: Nếu file mới không hợp lệ (config cũ được giữ nguyên)
+        """
+        old = self.config_data
+        new = self._load_config() or {}
+        self.config_data = new
+        self._setup_paths()
+        self._create_directories()
+        return sorted(key for key in set(old) | set(new) if old.get(key) != new.get(key))
         
     def _setup_paths(self):
         """Setup absolute paths based on project root"""
@@ -79,6 +101,17 @@ class ZenConfig:
             rfid_file=os.path.join(self.base_path, rfid_file)
         )
         
+    @property
+    def model_precision(self):
+        """Get model variant precision per task ('fp32', 'fp16', 'int8_dynamic', 'int8_static')"""
+        precision = self.get_nested_value(['weights', 'precision'], 'fp32') or 'fp32'
+        if isinstance(precision, dict):
+            return {
+                'detection': precision.get('detection', 'fp32'),
+                'recognition': precision.get('recognition', 'fp32')
+            }
+        return {'detection': precision, 'recognition': precision}
+        
     @property
     def det_size(self):
         return tuple(self.config_data['detection']['input_size'])
@@ -87,6 +120,20 @@ class ZenConfig:
     def det_threshold(self):
         return self.config_data['detection']['threshold']
         
+    @property
+    def detection_adaptive(self):
+        """Get adaptive detection-size namespace with all parameters"""
+        return SimpleNamespace(**{
+            'enable': self.get_nested_value(['detection', 'adaptive', 'enable'], False),
+            'sizes': [tuple(s) for s in self.get_nested_value(
+                ['detection', 'adaptive', 'sizes'], [[320, 320], [480, 480], [640, 640]])],
+            'min_face_px': self.get_nested_value(['detection', 'adaptive', 'min_face_px'], 40),
+            'downscale_after': self.get_nested_value(['detection', 'adaptive', 'downscale_after'], 5),
+            'probe_interval': self.get_nested_value(['detection', 'adaptive', 'probe_interval'], 5),
+            'roi_margin': self.get_nested_value(['detection', 'adaptive', 'roi_margin'], 1.0),
+            'roi_max_age': self.get_nested_value(['detection', 'adaptive', 'roi_max_age'], 10)
+        })
+        
     @property
     def rec_threshold(self):
         return self.config_data['recognition']['threshold']
@@ -101,7 +148,185 @@ class ZenConfig:
         return SimpleNamespace(**{
             'device_id': self.get_nested_value(['logging', 'device_id'], 1),
             'log_interval': self.get_nested_value(['logging', 'log_interval'], 5),
-            'simplified': self.get_nested_value(['logging', 'simplified'], True)
+            'simplified': self.get_nested_value(['logging', 'simplified'], True),
+            'journal_max_mb': self.get_nested_value(['logging', 'journal_max_mb'], 10),
+            'journal_fsync_every': self.get_nested_value(['logging', 'journal_fsync_every'], 20),
+            'journal_fsync_interval': self.get_nested_value(['logging', 'journal_fsync_interval'], 2.0)
+        })
+        
+    @property
+    def schedule_cache(self):
+        """Get schedule cache namespace with all parameters"""
+        return SimpleNamespace(**{
+            'enable': self.get_nested_value(['schedule_cache', 'enable'], False),
+            'classroom_id': self.get_nested_value(['schedule_cache', 'classroom_id'], None),
+            'cache_file': os.path.join(self.base_path, self.get_nested_value(
+                ['schedule_cache', 'cache_file'], 'data/cache/schedule_cache.json')),
+            'refresh_interval': self.get_nested_value(['schedule_cache', 'refresh_interval'], 900),
+            'max_age': self.get_nested_value(['schedule_cache', 'max_age'], 21600),
+            'days_ahead': self.get_nested_value(['schedule_cache', 'days_ahead'], 7),
+            'early_minutes': self.get_nested_value(['schedule_cache', 'early_minutes'], 15),
+            'late_minutes': self.get_nested_value(['schedule_cache', 'late_minutes'], 0),
+            'skip_upload_when_no_session': self.get_nested_value(
+                ['schedule_cache', 'skip_upload_when_no_session'], True)
+        })
+
+    @property
+    def onnx_runtime(self):
+        """Get ONNX Runtime namespace: active profile name, profile table and optimized-graph cache"""
+        return SimpleNamespace(**{
+            'profile': self.get_nested_value(['onnx_runtime', 'profile'], 'latency'),
+            'profiles': self.get_nested_value(['onnx_runtime', 'profiles'], {}) or {},
+            'cache_optimized': self.get_nested_value(['onnx_runtime', 'cache_optimized'], True),
+            'cache_dir': os.path.join(self.base_path, self.get_nested_value(
+                ['onnx_runtime', 'cache_dir'], 'assets/weights/optimized'))
+        })
+
+    @property
+    def startup(self):
+        """Get startup orchestration namespace with all parameters"""
+        return SimpleNamespace(**{
+            'parallel_workers': self.get_nested_value(['startup', 'parallel_workers'], 3),
+            'warmup': self.get_nested_value(['startup', 'warmup'], True),
+            'write_report': self.get_nested_value(['startup', 'write_report'], True)
+        })
+
+    @property
+    def camera(self):
+        """Get camera / frame source namespace with all parameters"""
+        return SimpleNamespace(**{
+            'source': self.get_nested_value(['camera', 'source'], 0),
+            'type': self.get_nested_value(['camera', 'type'], 'auto'),
+            'width': self.get_nested_value(['camera', 'width'], 640),
+            'height': self.get_nested_value(['camera', 'height'], 480),
+            'fps': self.get_nested_value(['camera', 'fps'], 30),
+            'fourcc': self.get_nested_value(['camera', 'fourcc'], 'MJPG'),
+            'buffer_size': self.get_nested_value(['camera', 'buffer_size'], 1),
+            'loop': self.get_nested_value(['camera', 'loop'], False),
+            'reconnect_delay': self.get_nested_value(['camera', 'reconnect_delay'], 2.0)
+        })
+
+    @property
+    def identity(self):
+        """Get local identity store (card -> userId -> gallery) and server sync namespace"""
+        return SimpleNamespace(**{
+            'database': os.path.join(self.base_path, self.get_nested_value(
+                ['identity', 'database'], 'data/cache/identity.db')),
+            'sync': self.get_nested_value(['identity', 'sync'], True),
+            'sync_interval': self.get_nested_value(['identity', 'sync_interval'], 300),
+            'full_sync_interval': self.get_nested_value(['identity', 'full_sync_interval'], 86400)
+        })
+
+    @property
+    def face_sync(self):
+        """Get server face-vector sync namespace (build the FAISS index without re-embedding the gallery)"""
+        classroom_id = self.get_nested_value(['face_sync', 'classroom_id'], None)
+        if classroom_id is None:
+            classroom_id = self.get_nested_value(['schedule_cache', 'classroom_id'], None)
+        return SimpleNamespace(**{
+            'enable': self.get_nested_value(['face_sync', 'enable'], False),
+            'model_id': self.get_nested_value(['face_sync', 'model_id'], None),
+            'classroom_id': classroom_id,
+            'cache_file': os.path.join(self.base_path, self.get_nested_value(
+                ['face_sync', 'cache_file'], 'data/cache/face_vectors.npz')),
+            'refresh_interval': self.get_nested_value(['face_sync', 'refresh_interval'], 600),
+            'days_ahead': self.get_nested_value(['face_sync', 'days_ahead'], 7),
+            'page_size': self.get_nested_value(['face_sync', 'page_size'], 200)
+        })
+
+    @property
+    def rfid(self):
+        """Get RFID reader namespace (backend of the primary stream and reader settings)"""
+        return SimpleNamespace(**{
+            'backend': self.get_nested_value(['rfid', 'backend'], 'keyboard'),
+            'device': self.get_nested_value(['rfid', 'device'], None),
+            'char_timeout': self.get_nested_value(['rfid', 'char_timeout'], 0.1),
+            'baudrate': self.get_nested_value(['rfid', 'baudrate'], 9600),
+            'grab': self.get_nested_value(['rfid', 'grab'], True)
+        })
+
+    @property
+    def streams(self):
+        """
+        Get list of camera streams handled by one process. Each stream overrides
+        keys of `camera` and binds an RFID reader (`rfid`: backend name, `rfid_device`);
+        an empty list means a single stream "main" using `camera` and the `rfid` reader
+        """
+        entries = self.get_nested_value(['streams'], None) or [{'name': 'main'}]
+        reader = self.rfid
+        streams = []
+        for index, entry in enumerate(entries):
+            camera = vars(self.camera)
+            camera.update(entry.get('camera') or {})
+            streams.append(SimpleNamespace(**{
+                'name': str(entry.get('name') or f'stream{index}'),
+                'camera': SimpleNamespace(**camera),
+                'rfid': entry.get('rfid', reader.backend if index == 0 else None),
+                'rfid_device': entry.get('rfid_device', reader.device if index == 0 else None)
+            }))
+        return streams
+
+    @property
+    def service(self):
+        """Get local control/status API namespace (headless service and GUI)"""
+        return SimpleNamespace(**{
+            'host': self.get_nested_value(['service', 'host'], '127.0.0.1'),
+            'port': self.get_nested_value(['service', 'port'], 8765),
+            'unix_socket': self.get_nested_value(['service', 'unix_socket'], None),
+            'gui_api': self.get_nested_value(['service', 'gui_api'], False),
+            'preview_fps': self.get_nested_value(['service', 'preview_fps'], 10),
+            'preview_width': self.get_nested_value(['service', 'preview_width'], 640),
+            'jpeg_quality': self.get_nested_value(['service', 'jpeg_quality'], 70)
+        })
+
+    @property
+    def model_upgrade(self):
+        """Get background recognition-model upgrade namespace"""
+        return SimpleNamespace(**{
+            'cpu_budget': self.get_nested_value(['model_upgrade', 'cpu_budget'], 0.25)
+        })
+
+    @property
+    def config_watch(self):
+        """Get config.yaml hot-reload namespace"""
+        return SimpleNamespace(**{
+            'enable': self.get_nested_value(['config_watch', 'enable'], True),
+            'interval': self.get_nested_value(['config_watch', 'interval'], 1.0)
+        })
+
+    @property
+    def inference_workers(self):
+        """Get out-of-process inference namespace (ZenFace and MiDaS in worker processes)"""
+        return SimpleNamespace(**{
+            'enable': self.get_nested_value(['inference_workers', 'enable'], False),
+            'ctx_id': self.get_nested_value(['inference_workers', 'ctx_id'], 0),
+            'slots': self.get_nested_value(['inference_workers', 'slots'], 4),
+            'slot_mb': self.get_nested_value(['inference_workers', 'slot_mb'], 8),
+            'request_timeout': self.get_nested_value(['inference_workers', 'request_timeout'], 30.0),
+            'heartbeat_timeout': self.get_nested_value(['inference_workers', 'heartbeat_timeout'], 10.0),
+            'restart_delay': self.get_nested_value(['inference_workers', 'restart_delay'], 1.0),
+            'start_timeout': self.get_nested_value(['inference_workers', 'start_timeout'], 120.0)
+        })
+
+    @property
+    def batching(self):
+        """Get cross-stream inference batching namespace (multi-camera only)"""
+        return SimpleNamespace(**{
+            'enable': self.get_nested_value(['batching', 'enable'], True),
+            'max_batch': self.get_nested_value(['batching', 'max_batch'], 4),
+            'max_wait_ms': self.get_nested_value(['batching', 'max_wait_ms'], 5.0)
+        })
+
+    @property
+    def metrics(self):
+        """Get pipeline metrics namespace (stage histograms, HTTP endpoint, periodic log)"""
+        return SimpleNamespace(**{
+            'enable': self.get_nested_value(['metrics', 'enable'], True),
+            'window': self.get_nested_value(['metrics', 'window'], 1024),
+            'http_enable': self.get_nested_value(['metrics', 'http_enable'], True),
+            'host': self.get_nested_value(['metrics', 'host'], '127.0.0.1'),
+            'port': self.get_nested_value(['metrics', 'port'], 9108),
+            'log_interval': self.get_nested_value(['metrics', 'log_interval'], 60)
         })
         
     @property
@@ -116,5 +341,65 @@ class ZenConfig:
             'normalize_method': self.config_data.get('anti_spoofing', {}).get('normalize_method', 'min_max')
         })
 
+class ConfigWatcher:
+    """
+    Theo dõi mtime của config.yaml; khi file đổi thì gọi config.reload() rồi
+    on_change(changed_sections). File lỗi cú pháp được bỏ qua tới lần sửa sau.
+    """
+    
+    def __init__(self, zen_config, on_change, interval=1.0):
+        self.config = zen_config
+        self.on_change = on_change
+        self.interval = interval
+        self._mtime = self._current_mtime()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def _current_mtime(self):
+        try:
+            return os.path.getmtime(self.config.config_path)
+        except OSError:
+            return None
+    
+    def check(self):
+        """
+        Reload nếu file đã đổi từ lần kiểm tra trước
+        
+        Returns:
+            list: Section đã thay đổi (rỗng nếu file không đổi hoặc không đọc được)
+        """
+        mtime = self._current_mtime()
+        if mtime is None or mtime == self._mtime:
+            return []
+        self._mtime = mtime
+        try:
+            changed = self.config.reload()
+        except (OSError, yaml.YAMLError) as e:
+            print(f"Config reload failed, keeping previous config: {e}")
+            return []
+        if changed:
+            self.on_change(changed)
+        return changed
+    
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ConfigWatcher", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error applying config change: {e}")
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1.0)
+            self._thread = None
+
 # Create singleton instance
 config = ZenConfig() 
\ No newline at end of file
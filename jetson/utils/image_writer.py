@@ -0,0 +1,142 @@
+import os
+import time
+import queue
+import atexit
+import threading
+import cv2
+
+
+def encode_jpeg(image, quality=95):
+    """
+    Mã hóa ảnh thành JPEG trong bộ nhớ (một lần, dùng chung cho API/gallery/attendance)
+
+    Args:
+        image: Ảnh numpy array (BGR)
+        quality: Chất lượng JPEG
+
+    Returns:
+        bytes: Dữ liệu JPEG, hoặc None nếu lỗi
+    """
+    if image is None or getattr(image, "size", 0) == 0:
+        return None
+    success, buffer = cv2.imencode('.jpg', image, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
+    if not success:
+        return None
+    return buffer.tobytes()
+
+
+def write_atomic(filepath, data):
+    """
+    Ghi file bằng cách ghi ra file tạm rồi os.replace, người đọc không bao giờ
+    thấy file ghi dở
+
+    Args:
+        filepath: Đường dẫn đích
+        data: Dữ liệu bytes
+    """
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+    except Exception:
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        raise
+
+
+class ImageWriter:
+    """
+    Ghi ảnh xuống disk trong luồng nền, luồng xử lý camera chỉ đưa bytes vào queue
+    """
+
+    def __init__(self, max_queue=64, metrics=None):
+        """
+        Initialize the writer
+
+        Args:
+            max_queue: Số yêu cầu ghi tối đa đang chờ
+            metrics: MetricsRegistry (tùy chọn) nhận thời gian ghi và độ sâu queue
+        """
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.register_queue("image_writer", self._queue.qsize)
+        self._thread = threading.Thread(target=self._run, name="ImageWriter", daemon=True)
+        self._closed = False
+        self.written = 0
+        self.errors = 0
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, filepath, data, callback=None):
+        """
+        Đưa một yêu cầu ghi vào queue
+
+        Args:
+            filepath: Đường dẫn đích
+            data: Dữ liệu JPEG (bytes)
+            callback: Hàm callback(filepath, success) gọi sau khi ghi xong
+
+        Returns:
+            bool: True nếu đã đưa vào queue
+        """
+        if self._closed or data is None:
+            return False
+        try:
+            self._queue.put_nowait((filepath, data, callback))
+            return True
+        except queue.Full:
+            # Queue đầy: ghi trực tiếp thay vì làm mất ảnh
+            if self.metrics is not None:
+                self.metrics.inc("image_writer_queue_full")
+            self._write(filepath, data, callback)
+            return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, filepath, data, callback):
+        success = False
+        started = time.perf_counter()
+        try:
+            write_atomic(filepath, data)
+            self.written += 1
+            success = True
+        except Exception as e:
+            self.errors += 1
+            print(f"Error writing image {filepath}: {e}")
+        if self.metrics is not None:
+            self.metrics.observe("disk_write", (time.perf_counter() - started) * 1000)
+            if not success:
+                self.metrics.inc("disk_write_errors")
+        if callback:
+            try:
+                callback(filepath, success)
+            except Exception as e:
+                print(f"Error in image writer callback: {e}")
+
+    def flush(self):
+        """Block until every queued image has been written"""
+        self._queue.join()
+
+    def close(self):
+        """Write pending images and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
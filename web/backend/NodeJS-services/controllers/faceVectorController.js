@@ -3,6 +3,8 @@ const FaceVector = require('../database/models/FaceVector');
 const UserAccount = require('../database/models/UserAccount');
 const Student = require('../database/models/Student');
 const Teacher = require('../database/models/Teacher');
+const ClassSchedule = require('../database/models/ClassSchedule');
+const { decodeSyncCursor, encodeSyncCursor, afterSyncCursor } = require('../utils/syncCursor');
 
 /**
  * Lấy danh sách người dùng với điểm vector khuôn mặt
@@ -225,4 +227,89 @@ exports.updateUserVector = async (req, res) => {
       error: error.message
     });
   }
-}; 
\ No newline at end of file
+}; 
+
+/**
+ * userId của học sinh và giáo viên có lịch học trong phòng (trong khoảng fromDate..toDate nếu có)
+ * @returns {Promise<string[]>}
+ */
+const scheduledUserIds = async ({ classroomId, fromDate, toDate }) => {
+  const filter = { classroomId: Number(classroomId) };
+  if (fromDate || toDate) {
+    filter.sessionDate = {};
+    if (fromDate) filter.sessionDate.$gte = new Date(fromDate);
+    if (toDate) filter.sessionDate.$lte = new Date(`${toDate}T23:59:59.999Z`);
+  }
+  const schedules = await ClassSchedule.find(filter).select('classId teacherId').lean();
+  const classIds = [...new Set(schedules.map(schedule => schedule.classId))];
+  const teacherIds = [...new Set(schedules.map(schedule => schedule.teacherId))];
+
+  const [students, teachers] = await Promise.all([
+    Student.find({ classIds: { $in: classIds } }, 'userId').lean(),
+    Teacher.find({ teacherId: { $in: teacherIds } }, 'userId').lean()
+  ]);
+  return [...new Set([...students, ...teachers].map(person => person.userId))];
+};
+
+/**
+ * Vector khuôn mặt thay đổi sau cursor (đồng bộ delta cho thiết bị điểm danh)
+ * GET /api/facevector/sync?classroomId=&modelId=&since=&limit=&fromDate=&toDate=&userIds=
+ *
+ * classroomId là bắt buộc: chỉ gồm người có lịch trong phòng, không bao giờ trả cả bảng.
+ * Vector đã tắt hoặc thuộc model khác modelId được trả về dạng { removed: true } không kèm
+ * vector, để thiết bị xóa bản cũ. userIds (phân tách bằng dấu phẩy) lọc thêm trong số người
+ * có lịch, dùng khi có người mới vào lịch.
+ */
+exports.syncVectors = async (req, res) => {
+  try {
+    if (!req.query.classroomId || !Number.isInteger(Number(req.query.classroomId))) {
+      return res.status(400).json({
+        success: false,
+        message: 'Thiếu hoặc sai classroomId'
+      });
+    }
+
+    const limit = Math.min(parseInt(req.query.limit, 10) || 200, 1000);
+    const modelId = req.query.modelId !== undefined && req.query.modelId !== '' ? Number(req.query.modelId) : null;
+    const roster = await scheduledUserIds(req.query);
+
+    let userIds = roster;
+    if (req.query.userIds) {
+      const requested = new Set(String(req.query.userIds).split(',').filter(Boolean));
+      userIds = roster.filter(id => requested.has(id));
+    }
+
+    const filter = afterSyncCursor(decodeSyncCursor(req.query.since));
+    filter.userId = { $in: userIds };
+
+    const docs = await FaceVector.find(filter)
+      .select('userId category modelId vector isActive updatedAt')
+      .sort({ updatedAt: 1, _id: 1 })
+      .limit(limit + 1)
+      .lean();
+    const page = docs.slice(0, limit);
+
+    const vectors = page.map(doc => {
+      const usable = doc.isActive && (modelId === null || doc.modelId === modelId);
+      const entry = { userId: doc.userId, category: doc.category, modelId: doc.modelId, updatedAt: doc.updatedAt };
+      return usable ? { ...entry, vector: doc.vector } : { ...entry, removed: true };
+    });
+
+    return res.status(200).json({
+      success: true,
+      data: {
+        vectors,
+        userIds: roster,
+        cursor: page.length ? encodeSyncCursor(page[page.length - 1]) : (req.query.since || null),
+        hasMore: docs.length > limit
+      }
+    });
+  } catch (error) {
+    console.error('Error syncing face vectors:', error);
+    return res.status(500).json({
+      success: false,
+      message: 'Không thể đồng bộ vector khuôn mặt',
+      error: error.message
+    });
+  }
+};
\ No newline at end of file
@@ -3,6 +3,7 @@ const RFID = require('../database/models/RFID');
 const UserAccount = require('../database/models/UserAccount');
 const asyncHandler = require('../middleware/asyncHandler');
 const ErrorResponse = require('../utils/errorResponse');
+const { decodeSyncCursor, encodeSyncCursor, afterSyncCursor } = require('../utils/syncCursor');
 
 /**
  * Parse expiry date from format string
@@ -607,4 +608,40 @@ exports.deleteUserRFID = asyncHandler(async (req, res, next) => {
       error: error.message
     });
   }
-}); 
\ No newline at end of file
+}); 
+
+// @desc    Thẻ RFID và tài khoản thay đổi sau cursor (đồng bộ delta cho thiết bị điểm danh)
+// @route   GET /api/rfid/sync?rfidSince=&userSince=&limit=
+// @access  Private
+exports.syncRFIDs = asyncHandler(async (req, res, next) => {
+  const limit = Math.min(parseInt(req.query.limit, 10) || 500, 1000);
+  const sort = { updatedAt: 1, _id: 1 };
+
+  const [cards, users] = await Promise.all([
+    RFID.find(afterSyncCursor(decodeSyncCursor(req.query.rfidSince)))
+      .select('RFID_ID UserID isActive Status updatedAt')
+      .sort(sort)
+      .limit(limit + 1)
+      .lean(),
+    UserAccount.find(afterSyncCursor(decodeSyncCursor(req.query.userSince)))
+      .select('userId username role isActive updatedAt')
+      .sort(sort)
+      .limit(limit + 1)
+      .lean()
+  ]);
+
+  const hasMore = cards.length > limit || users.length > limit;
+  const cardPage = cards.slice(0, limit);
+  const userPage = users.slice(0, limit);
+
+  res.status(200).json({
+    success: true,
+    data: {
+      cards: cardPage,
+      users: userPage,
+      rfidCursor: cardPage.length ? encodeSyncCursor(cardPage[cardPage.length - 1]) : (req.query.rfidSince || null),
+      userCursor: userPage.length ? encodeSyncCursor(userPage[userPage.length - 1]) : (req.query.userSince || null),
+      hasMore
+    }
+  });
+});
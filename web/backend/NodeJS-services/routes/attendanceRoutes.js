@@ -543,6 +543,7 @@ router.put('/check-in', async (req, res) => {
       userId,
       scheduleId,
       deviceId,
+      deviceScheduleId,
       status,
       checkIn,
       checkInFace,
@@ -563,6 +564,7 @@ router.put('/check-in', async (req, res) => {
       userId,
       scheduleId,
       deviceId,
+      deviceScheduleId,
       status,
       checkIn,
       checkInFace,
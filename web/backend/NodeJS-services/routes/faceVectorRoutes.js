@@ -1,6 +1,7 @@
 const express = require('express');
 const router = express.Router();
 const faceVectorController = require('../controllers/faceVectorController');
+const { protect, authorize } = require('../middleware/authMiddleware');
 
 // Lấy danh sách người dùng với điểm vector khuôn mặt
 router.get('/user', faceVectorController.getAllUserVectors);
@@ -11,4 +12,8 @@ router.get('/user/:id', faceVectorController.getUserVectorById);
 // Cập nhật vector khuôn mặt
 router.put('/user/:id', faceVectorController.updateUserVector);
 
+// Đồng bộ delta vector khuôn mặt cho thiết bị (theo phòng học và phiên bản model).
+// Trả về vector sinh trắc học thô nên chỉ tài khoản admin (thiết bị điểm danh) được gọi
+router.get('/sync', protect, authorize('admin'), faceVectorController.syncVectors);
+
 module.exports = router; 
\ No newline at end of file
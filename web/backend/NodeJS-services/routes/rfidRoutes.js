@@ -9,7 +9,8 @@ const {
   getAllRFIDWithUserInfo,
   getUserRFID,
   createNewRFID,
-  deleteUserRFID
+  deleteUserRFID,
+  syncRFIDs
 } = require('../controllers/rfidController');
 
 const { protect, authorize } = require('../middleware/authMiddleware');
@@ -50,6 +51,9 @@ router
 // Route to create new RFID with correct schema
 router.route('/create').post(authorize('admin'), createNewRFID);
 
+// Delta sync cho thiết bị điểm danh (thẻ và tài khoản đổi sau cursor)
+router.route('/sync').get(syncRFIDs);
+
 // Get RFID by User ID (old endpoint)
 router.route('/user/:userId')
   .get(getRFIDByUserId);
@@ -402,6 +402,7 @@ router.get('/all', async (req, res) => {
       userId, 
       teacherId,
       classId,
+      classroomId,
       subjectId, 
       fromDate, 
       toDate,
@@ -544,6 +545,11 @@ router.get('/all', async (req, res) => {
       query.teacherId = parseInt(teacherId);
     }
     
+    // Classroom ID filter (thiết bị Jetson tải lịch của phòng học)
+    if (classroomId) {
+      query.classroomId = parseInt(classroomId);
+    }
+    
     // Subject ID filter
     if (subjectId) {
       query.subjectId = parseInt(subjectId);
@@ -622,6 +622,7 @@ exports.processJetsonCheckIn = async (checkInData) => {
     const { 
       userId, 
       deviceId, 
+      deviceScheduleId,
       checkIn, 
       checkInFace,
       faceVectorList
@@ -736,9 +737,15 @@ exports.processJetsonCheckIn = async (checkInData) => {
       matchingLog = validLogs[0];
       console.log(`[DEBUG] Using single matching log with ID: ${matchingLog.attendanceId}`);
     } 
-    // Nếu có nhiều bản ghi phù hợp, chọn bản ghi có attendanceId là 2 (theo yêu cầu)
+    // Nếu có nhiều bản ghi phù hợp, ưu tiên tiết học thiết bị đã xác định (deviceScheduleId), sau đó attendanceId là 2 (theo yêu cầu)
     else if (validLogs.length > 1) {
-      matchingLog = validLogs.find(log => log.attendanceId === 2);
+      if (deviceScheduleId) {
+        matchingLog = validLogs.find(log => String(log.scheduleId) === String(deviceScheduleId));
+      }
+      
+      if (!matchingLog) {
+        matchingLog = validLogs.find(log => log.attendanceId === 2);
+      }
       
       // Nếu không tìm thấy, chọn bản ghi đầu tiên
       if (!matchingLog) {
@@ -1047,7 +1054,7 @@ exports.smartCheckIn = async (checkInData) => {
     if (scheduleId) {
       return await exports.processTeacherCheckIn(checkInData);
     } 
-    // Pipeline for Jetson Nano device check-in
+    // Pipeline for Jetson Nano device check-in (tiết học từ cache lịch của thiết bị gửi trong deviceScheduleId)
     else if (deviceId) {
       const jetsonResult = await exports.processJetsonCheckIn(checkInData);
       
@@ -0,0 +1,34 @@
+const mongoose = require('mongoose');
+
+/**
+ * Cursor đồng bộ dạng "<updatedAt ISO>|<_id>"; null nếu không có hoặc sai định dạng
+ * @param {string} cursor - Cursor từ lần đồng bộ trước
+ * @returns {{updatedAt: Date, id: mongoose.Types.ObjectId}|null}
+ */
+exports.decodeSyncCursor = (cursor) => {
+  if (!cursor) return null;
+  const [time, id] = String(cursor).split('|');
+  const updatedAt = new Date(time);
+  if (isNaN(updatedAt.getTime()) || !mongoose.Types.ObjectId.isValid(id)) return null;
+  return { updatedAt, id: new mongoose.Types.ObjectId(id) };
+};
+
+/**
+ * Cursor của một bản ghi (bản ghi cuối của trang vừa trả về)
+ * @param {Object} doc - Bản ghi có updatedAt và _id
+ * @returns {string} Cursor
+ */
+exports.encodeSyncCursor = (doc) => `${(doc.updatedAt || new Date(0)).toISOString()}|${doc._id}`;
+
+/**
+ * Điều kiện lọc bản ghi sau cursor theo thứ tự (updatedAt, _id), để phân trang
+ * không bỏ sót bản ghi cùng updatedAt
+ * @param {Object|null} cursor - Kết quả decodeSyncCursor
+ * @returns {Object} Mongo filter
+ */
+exports.afterSyncCursor = (cursor) => cursor ? {
+  $or: [
+    { updatedAt: { $gt: cursor.updatedAt } },
+    { updatedAt: cursor.updatedAt, _id: { $gt: cursor.id } }
+  ]
+} : {};